@@ -70,6 +70,8 @@ class MdbExomol(CapiMdbExomol):
         optional_quantum_states=False,
         activation=True,
         local_databases="./",
+        block_index=False,
+        load_filter=None,
     ):
         """Molecular database for Exomol form.
 
@@ -84,6 +86,8 @@ class MdbExomol(CapiMdbExomol):
             inherit_dataframe: if True, it makes self.df instance available, which needs more DRAM when pickling.
             optional_quantum_states: if True, all of the fields available in self.df will be loaded. if False, the mandatory fields (i,E,g,J) will be loaded.
             activation: if True, the activation of mdb will be done when initialization, if False, the activation won't be done and it makes self.df instance available.
+            block_index: if True, only the row blocks relevant to nurange, crit, and elower_max are read using the wavenumber block index (exojax.spec.blockindex), which is built at the first time. self.df is then a subset of the line list.
+            load_filter: list of the predicates (column, operator, value) evaluated chunk by chunk when loading, e.g. [("v_u - v_l", "==", 2)], see exojax.spec.loadfilter. self.df is then the surviving lines.
 
 
         Note:
@@ -128,12 +132,30 @@ class MdbExomol(CapiMdbExomol):
         local_files = [mgr.cache_file(f) for f in self.trans_file]
 
         # data frame instance:
-        df = self.load(
-            local_files,
-            # columns=[k for k in self.__dict__ if k not in ["logsij0"]],
-            # lower_bound=([("Sij0", 0.0)]),
-            output="vaex",
-        )
+        if block_index:
+            from exojax.spec.blockindex import load_dataframe_blockwise
+
+            QTref_original = np.array(self.QT_interp(Tref_original))
+            df = load_dataframe_blockwise(
+                local_files,
+                ("nu_lines", "Sij0", "elower"),
+                nu_min=wavenum_min,
+                nu_max=wavenum_max,
+                crit=crit,
+                Ttyp=self.Ttyp,
+                qrtyp=self.QTtyp / QTref_original,
+                elower_max=elower_max,
+            )
+        else:
+            df = self.load(
+                local_files,
+                # columns=[k for k in self.__dict__ if k not in ["logsij0"]],
+                # lower_bound=([("Sij0", 0.0)]),
+                output="vaex",
+            )
+        self.load_filter = load_filter
+        if load_filter is not None:
+            df = self.filter_dataframe(df, load_filter)
 
         self.df_load_mask = self.compute_load_mask(df)
 
@@ -195,9 +217,138 @@ class MdbExomol(CapiMdbExomol):
         if self.gpu_transfer:
             self.generate_jnp_arrays()
 
+    #: columns (arrays) stored in the snapshot
+    snapshot_columns = [
+        "nu_lines",
+        "elower",
+        "line_strength_ref",
+        "logsij0",
+        "A",
+        "gpp",
+        "jlower",
+        "jupper",
+        "alpha_ref",
+        "n_Texp",
+        "gamma_natural",
+        "T_gQT",
+        "gQT",
+    ]
+    #: scalar attributes stored in the snapshot
+    snapshot_attributes = [
+        "dbtype",
+        "path",
+        "exact_molecule_name",
+        "database",
+        "bkgdatm",
+        "Tref",
+        "gpu_transfer",
+        "Ttyp",
+        "broadf",
+        "simple_molecule_name",
+        "molmass",
+        "skip_optional_data",
+        "activation",
+        "nurange",
+        "crit",
+        "elower_max",
+        "QTtyp",
+        "n_Texp_def",
+        "alpha_ref_def",
+        "isotope_fullname",
+        "molecule",
+    ]
+
+    def save_snapshot(self, path):
+        """save the activated line list and partition function table as a snapshot (memory-mapped columns)
+
+        Notes:
+            The snapshot contains the arrays after the masks (and the change of Tref) applied.
+            Use MdbExomol.from_snapshot to reload it without radis/vaex.
+
+        Args:
+            path (str): path to the snapshot directory
+
+        Returns:
+            str: path to the snapshot
+
+        Examples:
+            >>> mdb = api.MdbExomol(emf, nus)
+            >>> mdb.save_snapshot("snapshot_CO")
+            >>> # in another process
+            >>> mdb = api.MdbExomol.from_snapshot("snapshot_CO")
+        """
+        from exojax.spec.mdbsnapshot import save_snapshot
+
+        columns = {name: getattr(self, name) for name in self.snapshot_columns}
+        attributes = {
+            name: getattr(self, name, None) for name in self.snapshot_attributes
+        }
+        attributes["path"] = str(self.path)
+        path = save_snapshot(path, type(self).__name__, columns, attributes)
+        print("Snapshot saved: ", path)
+        return path
+
+    @classmethod
+    def from_snapshot(cls, path, gpu_transfer=None, mmap_mode="r"):
+        """MdbExomol from a snapshot, without radis/vaex
+
+        Args:
+            path (str): path to the snapshot directory, see save_snapshot
+            gpu_transfer (bool, optional): if True, the arrays are transfered to jnp.array. Defaults to None (the value when the snapshot was saved).
+            mmap_mode (str, optional): mmap_mode for the columns in np.load. Defaults to "r".
+
+        Returns:
+            MdbExomol: mdb (activated)
+        """
+        from exojax.spec.mdbsnapshot import load_snapshot
+
+        columns, attributes = load_snapshot(path, cls.__name__, mmap_mode)
+        mdb = cls.__new__(cls)
+        for name, value in attributes.items():
+            setattr(mdb, name, value)
+        mdb.path = pathlib.Path(mdb.path)
+        for name, arr in columns.items():
+            setattr(mdb, name, arr)
+        if gpu_transfer is not None:
+            mdb.gpu_transfer = gpu_transfer
+        if mdb.gpu_transfer:
+            mdb.generate_jnp_arrays()
+        return mdb
+
+    #: aliases of the columns used in load_filter
+    load_filter_aliases = {"nu": "nu_lines", "elower": "elower", "Sij0": "Sij0"}
+
+    def filter_dataframe(self, df, load_filter):
+        """filters the lines of the dataframe chunk by chunk by the load filter and the load mask (nurange, crit, elower_max)
+
+        Args:
+            df (DataFrame): vaex dataframe
+            load_filter (list): list of the predicates (column, operator, value), see exojax.spec.loadfilter
+
+        Returns:
+            DataFrame: vaex dataframe of the surviving lines
+
+        Examples:
+            >>> # we would extract the lines with delta nu = 2 and Sij(Ttyp) > 1.e-25 here
+            >>> load_filter = [("v_u - v_l", "==", 2), ("Sij", ">", 1.e-25)]
+            >>> mdb = api.MdbExomol(emf, nus, optional_quantum_states=True, load_filter=load_filter)
+        """
+        from exojax.spec.loadfilter import filter_dataframe_chunkwise
+
+        qrtyp = self.QTtyp / np.array(self.QT_interp(Tref_original))
+        line_strength_typ = lambda chunk: line_strength_numpy(
+            self.Ttyp, chunk.Sij0.values, chunk.nu_lines.values, chunk.elower.values, qrtyp
+        )
+        return filter_dataframe_chunkwise(
+            df,
+            load_filter,
+            aliases=self.load_filter_aliases,
+            derived={"Sij": line_strength_typ},
+            base_mask=lambda chunk: self.compute_load_mask(chunk).values,
+        )
+
     def compute_load_mask(self, df):
         # wavelength
-        print(df)
         mask = (df.nu_lines > self.nurange[0]) * (df.nu_lines < self.nurange[1])
         QTtyp = np.array(self.QT_interp(self.Ttyp))
         QTref_original = np.array(self.QT_interp(Tref_original))
@@ -261,6 +412,43 @@ class MdbExomol(CapiMdbExomol):
         self.line_strength_ref = self.line_strength_ref[mask]
         self.gpp = self.gpp[mask]
 
+    def prune_lines_trange(self, Trange, tolerance=1.e-3, nu_bin_width=1.0, nT=16):
+        """temperature-adaptive line pruning
+
+        Notes:
+            The lines are ranked by the maximum fractional contribution to the integrated opacity in each wavenumber bin over Trange.
+            The weakest lines are removed as long as the sum of their maximum contributions is below tolerance, see exojax.spec.lineprune.
+
+        Args:
+            Trange (list): temperature range [Tmin, Tmax] in Kelvin
+            tolerance (float, optional): tolerance of the lost fraction of the integrated opacity per wavenumber bin. Defaults to 1.e-3.
+            nu_bin_width (float, optional): wavenumber bin width in cm-1. Defaults to 1.0.
+            nT (int, optional): the number of the temperature grid. Defaults to 16.
+
+        Returns:
+            dict: pruning report (nline, nline_retained, retained_fraction, estimated_error etc)
+
+        Examples:
+            >>> mdb = api.MdbExomol(emf, nus)
+            >>> report = mdb.prune_lines_trange([500.0, 1500.0], tolerance=1.e-3)
+        """
+        from exojax.spec.lineprune import temperature_range_pruning_mask
+
+        mask, report = temperature_range_pruning_mask(
+            self.line_strength_ref,
+            self.nu_lines,
+            self.elower,
+            lambda T: self.qr_interp(T),
+            Trange,
+            tolerance=tolerance,
+            nu_bin_width=nu_bin_width,
+            nT=nT,
+            Tref=self.Tref,
+        )
+        self.apply_mask_mdb(mask)
+        _print_pruning_report(report)
+        return report
+
     def Sij0(self):
         """Deprecated line_strength_ref.
 
@@ -312,6 +500,22 @@ class MdbExomol(CapiMdbExomol):
         """
         return self.QT_interp(T) / self.QT_interp(self.Tref)
 
+    def qr_interp_layers(self, Tarr):
+        """partition function ratio of layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+            Tarr: temperature array of layers (Nlayer)
+
+        Returns:
+            qr(T)=Q(T)/Q(Tref) (Nlayer)
+        """
+        from exojax.spec.pftable import regular_qt_table_cached
+        from exojax.spec.pftable import interp_qt_table
+
+        T0, dT, table = regular_qt_table_cached(self)
+        return interp_qt_table(Tarr, T0, dT, table) / interp_qt_table(
+            self.Tref, T0, dT, table)
+
     def change_reference_temperature(self, Tref_new):
         """change the reference temperature Tref and recompute Sij0
 
@@ -341,6 +545,7 @@ class MdbCommonHitempHitran:
         activation=True,
         parfile=None,
         with_error=False,
+        load_filter=None,
     ):
         """Molecular database for HITRAN/HITEMP form.
 
@@ -356,6 +561,7 @@ class MdbCommonHitempHitran:
             activation: if True, the activation of mdb will be done when initialization, if False, the activation won't be done and it makes self.df instance available.
             parfile: if not none, provide path, then directly load parfile
             with_error: if True, uncertainty indices become available.
+            load_filter: list of the predicates (column, operator, value) evaluated chunk by chunk when loading, see exojax.spec.loadfilter.
         """
 
         self.path = pathlib.Path(path).expanduser()
@@ -372,6 +578,7 @@ class MdbCommonHitempHitran:
         self.activation = activation
         self.load_wavenum_min, self.load_wavenum_max = self.set_wavenum(nurange)
         self.with_error = with_error
+        self.load_filter = load_filter
 
     def QT_for_select_line(self, Ttyp):
         if self.isotope is None or self.isotope == 0:
@@ -441,6 +648,38 @@ class MdbCommonHitempHitran:
         else:
             self.molmass = molmass_isotope[self.simple_molecule_name][self.isotope]
 
+    #: aliases of the columns used in load_filter
+    load_filter_aliases = {"nu": "wav", "elower": "El", "Sij0": "int"}
+
+    def filter_dataframe(self, df, load_filter, qrtyp):
+        """filters the lines of the dataframe chunk by chunk by the load filter and the load mask (nurange, crit, elower_max)
+
+        Args:
+            df (DataFrame): vaex dataframe
+            load_filter (list): list of the predicates (column, operator, value), see exojax.spec.loadfilter
+            qrtyp (float): partition function ratio at Ttyp used in compute_load_mask
+
+        Returns:
+            DataFrame: vaex dataframe of the surviving lines
+
+        Examples:
+            >>> # we would extract the lines with Elower < 5000 cm-1 and Sij(Ttyp) > 1.e-25 here
+            >>> load_filter = [("elower", "<", 5000.0), ("Sij", ">", 1.e-25)]
+            >>> mdb = api.MdbHitemp("CO", nus, load_filter=load_filter)
+        """
+        from exojax.spec.loadfilter import filter_dataframe_chunkwise
+
+        line_strength_typ = lambda chunk: line_strength_numpy(
+            self.Ttyp, chunk.int.values, chunk.wav.values, chunk.El.values, qrtyp
+        )
+        return filter_dataframe_chunkwise(
+            df,
+            load_filter,
+            aliases=self.load_filter_aliases,
+            derived={"Sij": line_strength_typ},
+            base_mask=lambda chunk: self.compute_load_mask(chunk, qrtyp).values,
+        )
+
     def compute_load_mask(self, df, qrtyp):
         # wavelength
         mask = (df.wav > self.load_wavenum_min) * (df.wav < self.load_wavenum_max)
@@ -477,6 +716,53 @@ class MdbCommonHitempHitran:
             # uncertainties
             self.ierr = self.ierr[mask]
 
+    def prune_lines_trange(self, Trange, tolerance=1.e-3, nu_bin_width=1.0, nT=16):
+        """temperature-adaptive line pruning
+
+        Notes:
+            The lines are ranked by the maximum fractional contribution to the integrated opacity in each wavenumber bin over Trange.
+            The weakest lines are removed as long as the sum of their maximum contributions is below tolerance, see exojax.spec.lineprune.
+
+        Args:
+            Trange (list): temperature range [Tmin, Tmax] in Kelvin
+            tolerance (float, optional): tolerance of the lost fraction of the integrated opacity per wavenumber bin. Defaults to 1.e-3.
+            nu_bin_width (float, optional): wavenumber bin width in cm-1. Defaults to 1.0.
+            nT (int, optional): the number of the temperature grid. Defaults to 16.
+
+        Returns:
+            dict: pruning report (nline, nline_retained, retained_fraction, estimated_error etc)
+
+        Examples:
+            >>> mdb = api.MdbHitemp(emf, nus)
+            >>> report = mdb.prune_lines_trange([500.0, 1500.0], tolerance=1.e-3)
+        """
+        from exojax.spec.lineprune import temperature_range_pruning_mask
+
+        mask, report = temperature_range_pruning_mask(
+            self.line_strength_ref,
+            self.nu_lines,
+            self.elower,
+            self.qr_interp_lines,
+            Trange,
+            tolerance=tolerance,
+            nu_bin_width=nu_bin_width,
+            nT=nT,
+            Tref=self.Tref,
+        )
+        uniqiso = self.uniqiso
+        self.apply_mask_mdb(np.asarray(mask))
+        if 0 < len(self.uniqiso) < len(uniqiso):
+            # gQT is indexed by uniqiso
+            self.gQT, self.T_gQT = hitranapi.make_partition_function_grid_hitran(
+                self.molecid, self.uniqiso
+            )
+        if self.gpu_transfer:
+            self.generate_jnp_arrays()
+        else:
+            self.logsij0 = np.log(self.line_strength_ref)
+        _print_pruning_report(report)
+        return report
+
     def Sij0(self):
         """old line strength definition"""
         msg = "Sij0 instance was replaced to line_strength_ref."
@@ -513,17 +799,36 @@ class MdbCommonHitempHitran:
         (This function works for JAX environment.)
 
         Args:
-            T: temperature (K)
+            T: temperature (K), or temperature array of layers [Nlayer]
 
         Returns:
-            Qr_line, partition function ratio array for lines [Nlines]
+            Qr_line, partition function ratio array for lines [Nlines], or [Nlayer, Nlines] for the temperature array
 
         Note:
-            Nlines=len(self.nu_lines)
+            Nlines=len(self.nu_lines). The regular-grid table is used, see qr_interp_layers.
         """
-        return _qr_interp_lines(
-            T, self.isoid, self.uniqiso, self.T_gQT, self.gQT, self.Tref
-        )
+        qr_isotope = self.qr_interp_layers(T)
+        return qr_isotope[..., np.searchsorted(self.uniqiso, np.asarray(self.isoid))]
+
+    def qr_interp_layers(self, Tarr, isotope=None):
+        """partition function ratio of layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+            Tarr: temperature array of layers (Nlayer)
+            isotope (int, optional): HITRAN isotope number starting from 1. Defaults to None (all the isotopes in uniqiso).
+
+        Returns:
+            qr(T)=Q(T)/Q(Tref), (Nlayer, Nisotope) for isotope=None, (Nlayer) otherwise
+        """
+        from exojax.spec.pftable import regular_qt_table_cached
+        from exojax.spec.pftable import interp_qt_table
+
+        T0, dT, table = regular_qt_table_cached(self)
+        qr = interp_qt_table(Tarr, T0, dT, table) / interp_qt_table(
+            self.Tref, T0, dT, table)
+        if isotope is None:
+            return qr
+        return qr[..., _isotope_index_from_isotope_number(isotope, self.uniqiso)]
 
     def exact_isotope_name(self, isotope):
         """exact isotope name
@@ -621,6 +926,8 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
         activation=True,
         parfile=None,
         with_error=False,
+        block_index=False,
+        load_filter=None,
     ):
         """Molecular database for HITRAN/HITEMP form.
 
@@ -636,9 +943,12 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
             activation: if True, the activation of mdb will be done when initialization, if False, the activation won't be done and it makes self.df instance available.
             parfile: if not none, provide path, then directly load parfile
             with_error: if True, uncertainty indices become available.
+            block_index: if True, only the row blocks relevant to nurange, crit, and elower_max are read using the wavenumber block index (exojax.spec.blockindex), which is built at the first time. self.df is then a subset of the line list.
+            load_filter: list of the predicates (column, operator, value) evaluated chunk by chunk when loading, e.g. [("elower", "<", 5000.0)], see exojax.spec.loadfilter. self.df is then the surviving lines.
         """
 
         self.dbtype = "hitran"
+        self.block_index = block_index
         MdbCommonHitempHitran.__init__(
             self,
             path=path,
@@ -652,6 +962,7 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
             activation=activation,
             parfile=parfile,
             with_error=with_error,
+            load_filter=load_filter,
         )
 
         HITEMPDatabaseManager.__init__(
@@ -665,10 +976,15 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
             parallel=True,
         )
 
+        QTref, QTtyp = self.QT_for_select_line(Ttyp)
         if parfile is not None:
             from radis.api.hitranapi import hit2df
 
             df = hit2df(parfile, engine="vaex", cache="regen")
+            if self.block_index:
+                df = self.select_dataframe_blockwise([df], QTtyp / QTref)
+            if self.load_filter is not None:
+                df = self.filter_dataframe(df, self.load_filter, QTtyp / QTref)
             if isotope is None:
                 mask = None
             elif isotope == 0:
@@ -718,17 +1034,23 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
             output = "vaex"
 
             isotope_dfform = _convert_proper_isotope(self.isotope)
-            df = self.load(
-                files_loaded,  # filter other files,
-                columns=columns,
-                within=[("iso", isotope_dfform)] if isotope_dfform is not None else [],
-                output=output,
-            )
+            if self.block_index:
+                df = self.load_dataframe_blockwise(files_loaded, QTtyp / QTref)
+                if isotope_dfform is not None:
+                    df = df[df.iso == int(isotope_dfform)]
+            else:
+                df = self.load(
+                    files_loaded,  # filter other files,
+                    columns=columns,
+                    within=[("iso", isotope_dfform)] if isotope_dfform is not None else [],
+                    output=output,
+                )
+            if self.load_filter is not None:
+                df = self.filter_dataframe(df, self.load_filter, QTtyp / QTref)
             mask = None
 
         self.isoid = df.iso
         self.uniqiso = np.unique(df.iso.values)
-        QTref, QTtyp = self.QT_for_select_line(Ttyp)
         self.df_load_mask = self.compute_load_mask(df, QTtyp / QTref)
 
         if self.activation:
@@ -737,6 +1059,46 @@ class MdbHitemp(MdbCommonHitempHitran, HITEMPDatabaseManager):
             print("DataFrame (self.df) available.")
             self.df = df
 
+    def load_dataframe_blockwise(self, datafiles, qrtyp):
+        """loads the row blocks of the line list files relevant to the load mask using the block index
+
+        Args:
+            datafiles (list): paths to the HITEMP files (vaex hdf5)
+            qrtyp (float): partition function ratio at Ttyp used in compute_load_mask
+
+        Returns:
+            DataFrame: vaex dataframe of the selected row blocks
+        """
+        from exojax.spec.blockindex import load_dataframe_blockwise
+
+        return load_dataframe_blockwise(datafiles, ("wav", "int", "El"),
+                                        **self._block_selection_kwargs(qrtyp))
+
+    def select_dataframe_blockwise(self, dfs, qrtyp):
+        """selects the row blocks of the dataframes relevant to the load mask using the block index
+
+        Args:
+            dfs (list): vaex dataframes of the line lists
+            qrtyp (float): partition function ratio at Ttyp used in compute_load_mask
+
+        Returns:
+            DataFrame: vaex dataframe of the selected row blocks
+        """
+        from exojax.spec.blockindex import select_dataframe_blockwise
+
+        return select_dataframe_blockwise(dfs, ("wav", "int", "El"),
+                                          **self._block_selection_kwargs(qrtyp))
+
+    def _block_selection_kwargs(self, qrtyp):
+        return {
+            "nu_min": self.load_wavenum_min,
+            "nu_max": self.load_wavenum_max,
+            "crit": self.crit,
+            "Ttyp": self.Ttyp,
+            "qrtyp": qrtyp,
+            "elower_max": self.elower_max,
+        }
+
     def instances_from_dataframes(self, df_masked):
         """generate instances from (usually masked) data farame
 
@@ -817,6 +1179,7 @@ class MdbHitran(MdbCommonHitempHitran, HITRANDatabaseManager):
         parfile=None,
         nonair_broadening=False,
         with_error=False,
+        load_filter=None,
     ):
         """Molecular database for HITRAN/HITEMP form.
 
@@ -832,6 +1195,7 @@ class MdbHitran(MdbCommonHitempHitran, HITRANDatabaseManager):
             activation: if True, the activation of mdb will be done when initialization, if False, the activation won't be done and it makes self.df instance available.
             nonair_broadening: If True, background atmospheric broadening parameters(n and gamma) other than air will also be downloaded (e.g. h2, he...)
             with_error: if True, uncertainty indices become available. (Please set drop_non_numeric=False in radis.api.hitranapi)
+            load_filter: list of the predicates (column, operator, value) evaluated chunk by chunk when loading, e.g. [("elower", "<", 5000.0)], see exojax.spec.loadfilter. self.df is then the surviving lines.
         """
         self.dbtype = "hitran"
         MdbCommonHitempHitran.__init__(
@@ -847,6 +1211,7 @@ class MdbHitran(MdbCommonHitempHitran, HITRANDatabaseManager):
             activation=activation,
             parfile=parfile,
             with_error=with_error,
+            load_filter=load_filter,
         )
 
         # HITRAN ONLY FUNCTIONALITY
@@ -904,9 +1269,11 @@ class MdbHitran(MdbCommonHitempHitran, HITRANDatabaseManager):
             output=output,
         )
 
+        QTref, QTtyp = self.QT_for_select_line(Ttyp)
+        if self.load_filter is not None:
+            df = self.filter_dataframe(df, self.load_filter, QTtyp / QTref)
         self.isoid = df.iso
         self.uniqiso = np.unique(df.iso.values)
-        QTref, QTtyp = self.QT_for_select_line(Ttyp)
         self.df_load_mask = self.compute_load_mask(df, QTtyp / QTref)
         if self.activation:
             self.activate(df)
@@ -996,6 +1363,19 @@ class MdbHitran(MdbCommonHitempHitran, HITRANDatabaseManager):
             self.gamma_h2o = jnp.array(self.gamma_h2o)
 
 
+def _print_pruning_report(report):
+    print(
+        "Line pruning: "
+        + str(report["nline_retained"])
+        + "/"
+        + str(report["nline"])
+        + " lines retained (fraction = "
+        + "{:.3g}".format(report["retained_fraction"])
+        + "), estimated error of the integrated opacity = "
+        + "{:.3g}".format(report["estimated_error"])
+    )
+
+
 def _convert_proper_isotope(isotope):
     """covert isotope (int) to proper type for df
 
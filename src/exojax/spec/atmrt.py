@@ -131,7 +131,7 @@ class ArtCommon:
         """opacity profile (delta tau) from cross section matrix or vector, molecular line/Rayleigh scattering
 
         Args:
-            xs (2D array/1D array): cross section matrix i.e. xsmatrix (Nlayer, N_wavenumber) or vector i.e. xsvector (N_wavenumber)
+            xs (3D array/2D array/1D array): k-distribution matrix of OpaCKD (Nlayer, N_bin, N_g), cross section matrix i.e. xsmatrix (Nlayer, N_wavenumber) or vector i.e. xsvector (N_wavenumber)
             mixing_ratio (1D array): mass mixing ratio, Nlayer, (or volume mixing ratio profile)
             molmass (float): molecular mass (or mean molecular weight)
             gravity (float/1D profile): constant or 1d profile of gravity in cgs
@@ -139,6 +139,16 @@ class ArtCommon:
         Returns:
             dtau: opacity profile, whose element is optical depth in each layer.
         """
+        if jnp.ndim(xs) == 3:
+            nlayer, nbin, ng = jnp.shape(xs)
+            dtau = layer_optical_depth(
+                self.dParr,
+                jnp.abs(xs.reshape((nlayer, nbin * ng))),
+                mixing_ratio,
+                molmass,
+                gravity,
+            )
+            return dtau.reshape((nlayer, nbin, ng))
         return layer_optical_depth(
             self.dParr, jnp.abs(xs), mixing_ratio, molmass, gravity
         )
@@ -327,6 +337,7 @@ class ArtReflectPure(ArtCommon):
         nlayer=100,
         nu_grid=None,
         rtsolver="fluxadding_toon_hemispheric_mean",
+        checkpoint=False,
     ):
         """initialization of ArtReflectPure
 
@@ -336,11 +347,13 @@ class ArtReflectPure(ArtCommon):
             nlayer (int, optional): the number of the atmospheric layers. Defaults to 100.
             nu_grid (float, array, optional): the wavenumber grid. Defaults to None.
             rtsolver (str): Radiative Transfer Solver, fluxadding_toon_hemispheric_mean
+            checkpoint (bool, optional): if True, the scan in the RT solver is rematerialized in the backward pass (jax.checkpoint) to reduce the device memory use of the gradient. Defaults to False.
 
 
         """
         super().__init__(pressure_top, pressure_btm, nlayer, nu_grid)
         self.rtsolver = rtsolver
+        self.checkpoint = checkpoint
         self.method = "reflection_using_" + self.rtsolver
 
     def run(
@@ -378,6 +391,7 @@ class ArtReflectPure(ArtCommon):
                 source_surface,
                 reflectivity_surface,
                 incoming_flux,
+                checkpoint=self.checkpoint,
             )
         else:
             print("rtsolver=", self.rtsolver)
@@ -399,6 +413,7 @@ class ArtReflectEmis(ArtCommon):
         nlayer=100,
         nu_grid=None,
         rtsolver="fluxadding_toon_hemispheric_mean",
+        checkpoint=False,
     ):
         """initialization of ArtEmisPure
 
@@ -408,11 +423,13 @@ class ArtReflectEmis(ArtCommon):
             nlayer (int, optional): the number of the atmospheric layers. Defaults to 100.
             nu_grid (float, array, optional): the wavenumber grid. Defaults to None.
             rtsolver (str): Radiative Transfer Solver, fluxadding_toon_hemispheric_mean
+            checkpoint (bool, optional): if True, the scan in the RT solver is rematerialized in the backward pass (jax.checkpoint) to reduce the device memory use of the gradient. Defaults to False.
 
 
         """
         super().__init__(pressure_top, pressure_btm, nlayer, nu_grid)
         self.rtsolver = rtsolver
+        self.checkpoint = checkpoint
         self.method = "reflection_using_" + self.rtsolver
 
     def run(
@@ -458,6 +475,7 @@ class ArtReflectEmis(ArtCommon):
                 source_surface,
                 reflectivity_surface,
                 incoming_flux,
+                checkpoint=self.checkpoint,
             )
         else:
             print("rtsolver=", self.rtsolver)
@@ -479,6 +497,7 @@ class ArtEmisScat(ArtCommon):
         nlayer=100,
         nu_grid=None,
         rtsolver="fluxadding_toon_hemispheric_mean",
+        checkpoint=False,
     ):
         """initialization of ArtEmisScat
 
@@ -488,10 +507,12 @@ class ArtEmisScat(ArtCommon):
             nlayer (int, optional): the number of the atmospheric layers. Defaults to 100.
             nu_grid (float, array, optional): the wavenumber grid. Defaults to None.
             rtsolver (str): Radiative Transfer Solver, fluxadding_toon_hemispheric_mean (default), lart_toon_hemispheric_mean
+            checkpoint (bool, optional): if True, the scan in the RT solver is rematerialized in the backward pass (jax.checkpoint) to reduce the device memory use of the gradient. Defaults to False.
 
         """
         super().__init__(pressure_top, pressure_btm, nlayer, nu_grid)
         self.rtsolver = rtsolver
+        self.checkpoint = checkpoint
         self.method = "emission_with_scattering_using_" + self.rtsolver
 
     def run(
@@ -530,7 +551,11 @@ class ArtEmisScat(ArtCommon):
                 scat_coeff,
                 piB,
             ) = rtrun_emis_scat_lart_toonhm(
-                dtau, single_scattering_albedo, asymmetric_parameter, sourcef
+                dtau,
+                single_scattering_albedo,
+                asymmetric_parameter,
+                sourcef,
+                checkpoint=self.checkpoint,
             )
             if show:
                 from exojax.plot.rtplot import comparison_with_pure_absorption
@@ -542,7 +567,11 @@ class ArtEmisScat(ArtCommon):
 
         elif self.rtsolver == "fluxadding_toon_hemispheric_mean":
             spectrum = rtrun_emis_scat_fluxadding_toonhm(
-                dtau, single_scattering_albedo, asymmetric_parameter, sourcef
+                dtau,
+                single_scattering_albedo,
+                asymmetric_parameter,
+                sourcef,
+                checkpoint=self.checkpoint,
             )
 
         else:
@@ -571,6 +600,7 @@ class ArtEmisPure(ArtCommon):
         nu_grid=None,
         rtsolver="ibased",
         nstream=8,
+        checkpoint=False,
     ):
         """
         initialization of ArtEmisPure
@@ -582,9 +612,11 @@ class ArtEmisPure(ArtCommon):
             nu_grid (float, array, optional): the wavenumber grid. Defaults to None.
             rtsolver (str, optional): radiative transfer solver (ibased, fbased2st, ibased_linsap). Defaults to "ibased".
             nstream (int, optional): the number of stream. Defaults to 8. Should be 2 for rtsolver = fbased2st
+            checkpoint (bool, optional): if True, the scan over the streams in ibased/ibased_linsap is rematerialized in the backward pass (jax.checkpoint) to reduce the device memory use of the gradient. Defaults to False.
         """
         super().__init__(pressure_top, pressure_btm, nlayer, nu_grid)
         self.method = "emission_with_pure_absorption"
+        self.checkpoint = checkpoint
         self.set_capable_rtsolvers()
         self.validate_rtsolver(rtsolver, nstream)
 
@@ -651,6 +683,33 @@ class ArtEmisPure(ArtCommon):
             nu_grid = self.nu_grid
 
         sourcef = piBarr(temperature, nu_grid)
+        return self._run_rtsolver(dtau, sourcef)
+
+    def run_ck(self, dtau_ck, temperature, nu_bin, g_weights):
+        """run radiative transfer with the correlated-k distribution
+
+        Notes:
+            The radiative transfer is solved for each g-point, with the source function at the bin center, 
+            and the flux is integrated over the g-points.
+
+        Args:
+            dtau_ck (3D array): optical depth in the ck form (N_layer, N_bin, N_g), see OpaCKD
+            temperature (1D array): temperature profile (Nlayer)
+            nu_bin (1D array): center of the wavenumber bins (N_bin)
+            g_weights (1D array): weights of the g-ordinates (N_g)
+
+        Returns:
+            1D array: emission spectrum at the bin centers (N_bin)
+        """
+        nlayer, nbin, ng = jnp.shape(dtau_ck)
+        sourcef = piBarr(temperature, nu_bin)
+        sourcef = jnp.repeat(sourcef[:, :, None], ng, axis=2)
+        flux = self._run_rtsolver(
+            dtau_ck.reshape((nlayer, nbin * ng)), sourcef.reshape((nlayer, nbin * ng))
+        )
+        return flux.reshape((nbin, ng)) @ g_weights
+
+    def _run_rtsolver(self, dtau, sourcef):
         rtfunc = self.rtsolver_dict[self.rtsolver]
 
         if self.rtsolver == "fbased2st":
@@ -659,7 +718,7 @@ class ArtEmisPure(ArtCommon):
             from exojax.spec.rtransfer import initialize_gaussian_quadrature
 
             mus, weights = initialize_gaussian_quadrature(self.nstream)
-            return rtfunc(dtau, sourcef, mus, weights)
+            return rtfunc(dtau, sourcef, mus, weights, checkpoint=self.checkpoint)
 
 
 class ArtTransPure(ArtCommon):
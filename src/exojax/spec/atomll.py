@@ -398,12 +398,87 @@ def get_unique_species(adb):
     Returns:
        uspecies: unique elements of the combination of ielem and iion (jnp.array with a shape of N_UniqueSpecies x 2(ielem and iion))
     """
-    seen = []
-    def get_unique_list(seq): return [
-        x for x in seq if x not in seen and not seen.append(x)]
-    uspecies = jnp.array(get_unique_list(
-        jnp.vstack([adb.ielem, adb.iion]).T.tolist()))
-    return uspecies
+    uspecies, _, _, _ = species_segments(adb.ielem, adb.iion)
+    return jnp.array(uspecies)
+
+
+def species_segments(ielem, iion):
+    """Segment (ragged) layout of the lines separated by species
+
+    Notes:
+        The lines of the i-th species are line_order[species_offsets[i]:species_offsets[i+1]],
+        in the original order. The species are ordered by their first appearance in the line list, as in get_unique_species.
+
+    Args:
+        ielem: atomic number of the lines [N_line]
+        iion: ionized level of the lines [N_line]
+
+    Returns:
+        uspecies: unique combinations of ielem and iion [N_species x 2]
+        species_index: index of the species in uspecies for each line [N_line]
+        line_order: line indices sorted (stably) by species [N_line]
+        species_offsets: offsets of the species in line_order [N_species+1]
+    """
+    pairs = np.vstack([np.asarray(ielem), np.asarray(iion)]).T.astype(int)
+    upairs, first, inverse = np.unique(pairs,
+                                       axis=0,
+                                       return_index=True,
+                                       return_inverse=True)
+    order_first = np.argsort(first)
+    uspecies = upairs[order_first]
+    rank = np.empty(len(order_first), dtype=int)
+    rank[order_first] = np.arange(len(order_first))
+    species_index = rank[np.ravel(inverse)]
+    line_order = np.argsort(species_index, kind="stable")
+    species_offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(species_index,
+                                    minlength=len(uspecies)))])
+    return uspecies, species_index, line_order, species_offsets
+
+
+def species_padded_array(arr, species_index, line_order, species_offsets):
+    """Species-separated array padded with zeros, from the segment layout
+
+    Args:
+        arr: array of a parameter [N_line]
+        species_index: index of the species for each line [N_line], see species_segments
+        line_order: line indices sorted by species [N_line]
+        species_offsets: offsets of the species in line_order [N_species+1]
+
+    Returns:
+        arr_stacksp: species-separated array [N_species x N_line_max]
+    """
+    nline_species = np.diff(species_offsets)
+    sorted_species = species_index[line_order]
+    position = np.arange(len(line_order)) - species_offsets[sorted_species]
+    arr_stacksp = np.zeros([len(nline_species), np.max(nline_species)])
+    arr_stacksp[sorted_species, position] = np.asarray(arr)[line_order]
+    return arr_stacksp
+
+
+def line_species_weight(ielem, iion, uspecies, weight_uspecies):
+    """Weight of each line given by the weight of its species
+
+    Notes:
+        The lines of the species not listed in uspecies have zero weight. This function can be used in jit.
+
+    Args:
+        ielem: atomic number of the lines [N_line]
+        iion: ionized level of the lines [N_line]
+        uspecies: combinations of ielem and iion [N_species x 2]
+        weight_uspecies: weight of each species [N_species]
+
+    Returns:
+        weight of each line [N_line]
+    """
+    ncode = 100  # iion < 100
+    code_uspecies = uspecies[:, 0] * ncode + uspecies[:, 1]
+    code = ielem * ncode + iion
+    order = jnp.argsort(code_uspecies)
+    sorted_code = code_uspecies[order]
+    i = jnp.clip(jnp.searchsorted(sorted_code, code), 0, len(sorted_code) - 1)
+    return jnp.where(sorted_code[i] == code,
+                     jnp.asarray(weight_uspecies)[order[i]], 0.0)
 
 
 def ielemion_to_FastChemSymbol(ielem, iion):
@@ -550,21 +625,10 @@ def sep_arr_of_sp(arr, adb, trans_jnp=True, inttype=False):
     Returns:
         arr_stacksp: species-separated array [N_species x N_line_max]
     """
-    uspecies = get_unique_species(adb)
-    N_usp = len(uspecies)
-    len_of_eachsp = np.zeros(N_usp, dtype='int')
-    for i, sp in enumerate(uspecies):
-        len_of_eachsp[i] = len(
-            np.where((adb.ielem == sp[0]) * (adb.iion == sp[1]))[0])
-    L_max = np.max(len_of_eachsp)
-
-    arr_stacksp = np.zeros([N_usp, L_max])
-    def pad0(arr, L): return np.pad(arr, ((0, L-len(arr))))
-    for i, sp in enumerate(uspecies):
-        index_sp = np.where((adb.ielem == sp[0]) * (adb.iion == sp[1]))[0]
-        arr_t = jnp.take(arr, index_sp)
-        arr_tp = pad0(arr_t, L_max)
-        arr_stacksp[i] = arr_tp
+    _, species_index, line_order, species_offsets = species_segments(
+        adb.ielem, adb.iion)
+    arr_stacksp = species_padded_array(arr, species_index, line_order,
+                                       species_offsets)
     if trans_jnp:
         if inttype:
             arr_stacksp = jnp.array(arr_stacksp, dtype='int32')
@@ -3,7 +3,10 @@
 import numpy as np
 import pandas as pd
 from exojax.utils.constants import ccgs, ecgs, mecgs, eV2wn
+from exojax.utils.files import file_stamp
 import io
+import os
+import pathlib
 import vaex
 import pkgutil
 from io import BytesIO
@@ -11,6 +14,11 @@ from io import BytesIO
 PeriodicTable = np.zeros([119], dtype=object)
 PeriodicTable[:] = [' 0', 'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar', 'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Ga', 'Ge', 'As', 'Se', 'Br', 'Kr', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd', 'In', 'Sn', 'Sb', 'Te', 'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd', 'Pm', 'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os', 'Ir', 'Pt', 'Au', 'Hg', 'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn', 'Fr', 'Ra', 'Ac', 'Th', 'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr', 'Rf', 'Db', 'Sg', 'Bh', 'Hs', 'Mt', 'Ds', 'Rg', 'Cn', 'Nh', 'Fl', 'Mc', 'Lv', 'Ts', 'Og']
 
+#: lookup table from the element symbol to the atomic number
+_atomic_number_of_symbol = {
+    symbol: ielem for ielem, symbol in enumerate(PeriodicTable) if ielem > 0
+}
+
 
 def read_ExAll(allf):
     """IO for linelists downloaded from VALD3 with a query of "Long format" in the format of "Extract All" or "Extract Element".
@@ -54,40 +62,33 @@ def read_ExAll(allf):
                       'jupper', 'landelower', 'landeupper', 'landemean', 'rad_damping', 'stark_damping', 'waals_damping', 'depth_Cen', 'dummy'), low_memory=False) #convert=False)
     colWL = dat.iat[0, 0][13:22]
 
-    # Remove rows not starting with "'"
-    dat = dat[dat.species.str.startswith("'")]
-    dat = dat[dat.species.str.startswith("' ").map(
-        {False: True, True: False})]  # Remove rows of Reference
-    dat = dat[dat.species.str.startswith("'_").map(
-        {False: True, True: False})]  # Remove rows of Reference
-
+    species = dat.species.astype(str)
+    # Remove rows not starting with "'" and rows of Reference (starting with "' " or "'_")
+    mask = species.str.startswith("'") & ~species.str.startswith(
+        "' ") & ~species.str.startswith("'_")
     # Remove long name (molecules e.g., TiO)
-    dat = dat[dat.species.str.len() < 7]
+    mask &= species.str.len() < 7
     # Remove names starting with successive uppercase letters (molecules e.g., CO, OH, CN)
-    dat = dat[dat.species.str.slice(start=2, stop=3).str.isupper().map({
-        False: True, True: False})]
-    # Remove homonuclear polyatomic molecules (e.g., C2)
-    dat = dat[dat.species.str.slice(start=2, stop=3).str.isdigit().map({
-        False: True, True: False})]
-
+    # and homonuclear polyatomic molecules (e.g., C2)
+    third = species.str.slice(start=2, stop=3)
+    mask &= ~third.str.isupper() & ~third.str.isdigit()
+    dat = dat[mask.values]
+
+    # species code = ielem*100 + iion - 1, using the lookup table of the element symbols
+    tokens = dat.species.str.strip("'").str.split()
+    iion = tokens.str[-1].astype(int).to_numpy()
+    ielem = tokens.str[0].map(_atomic_number_of_symbol).fillna(0).to_numpy(
+        dtype=int)
+    dat = dat.assign(species=ielem * 100 + iion - 1)
     # Remove highly ionized ions (iion > 3, for which the partition function is not reported in Barklem+2016)
-    dat = dat.drop(dat.index[np.where(np.array(
-        list(map(lambda x: int(x[1].strip("'")), dat.species.str.split(' ')))) > 3)[0]])
-    for i, sp in enumerate(dat.species):
-        symbol = sp.strip("'").split(' ')[0]
-        ielem = np.where(PeriodicTable == symbol)[
-            0][0] if (symbol in PeriodicTable) else 0
-        iion = int(sp.strip("'").split(' ')[-1])
-        dat.species.values[i] = ielem*100+iion-1
+    dat = dat[iion <= 3]
     dat = dat.reset_index(drop=True)
     dat = dat.astype('float64')
-    #dat = dat.astype({'wav_lines': 'float64', 'loggf': 'float64', 'elowereV': 'float64', 'jlower': 'float64', 'euppereV': 'float64'})
     if colWL == 'WL_air(A)':
         # If wavelength is in air, it will be corrected (Note that wavelengths of transitions short of 2000 Angstroems are actually in vacuum and not in air.)
         dat.iloc[:, 1] = np.where(
             dat.iloc[:, 1] > 2000, air_to_vac(dat.iloc[:, 1]), dat.iloc[:, 1])
     dat = vaex.from_pandas(dat)
-    dat.export_hdf5(allf.with_suffix('.hdf5'))
 
     return dat
 
@@ -112,36 +113,25 @@ def read_kurucz(kuruczf):
         gamSta: log of gamma of Stark damping (s-1)
         gamvdW:  log of (van der Waals damping constant / neutral hydrogen number) (s-1)
     """
-    with open(kuruczf) as f:
-        lines = f.readlines()
-    wlnmair, loggf, species, elower, jlower, labellower, eupper, jupper, labelupper, \
-        gamRad, gamSta, gamvdW, ref, \
-        NLTElower, NLTEupper, isonum, hyperfrac, isonumdi, isofrac, \
-        hypershiftlower, hypershiftupper, hyperFlower, hypernotelower, hyperFupper, hypternoteupper, \
-        strenclass, auto, landeglower, landegupper, isoshiftmA \
-        = \
-        np.zeros(len(lines)), np.zeros(len(lines)), np.array(['']*len(lines), dtype=object), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), \
-        np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), \
-        np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), \
-        np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(len(lines)), \
-        np.zeros(len(lines)), np.zeros(len(lines)), np.zeros(
-            len(lines)), np.zeros(len(lines)), np.zeros(len(lines))
-    ielem, iion = np.zeros(len(lines), dtype=int), np.zeros(
-        len(lines), dtype=int)
-
-    for i, line in enumerate(lines):
-        wlnmair[i] = float(line[0:11])
-        loggf[i] = float(line[11:18])
-        species[i] = str(line[18:24])
-        ielem[i] = int(species[i].split('.')[0])
-        iion[i] = int(species[i].split('.')[1])+1
-        elower[i] = float(line[24:36])
-        jlower[i] = float(line[36:41])
-        eupper[i] = float(line[52:64])
-        jupper[i] = float(line[64:69])
-        gamRad[i] = float(line[80:86])
-        gamSta[i] = float(line[86:92])
-        gamvdW[i] = float(line[92:98])
+    with open(kuruczf, 'rb') as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    # fixed-width columns parsed in bulk from the (Nline, line length) byte matrix
+    width = max(map(len, lines))
+    block = np.array(lines, dtype='S%d' % width).view(np.uint8).reshape(
+        len(lines), width)
+    wlnmair = _fixed_width_column(block, 0, 11)
+    loggf = _fixed_width_column(block, 11, 18)
+    species = _fixed_width_column(block, 18, 24)
+    elower = _fixed_width_column(block, 24, 36)
+    jlower = _fixed_width_column(block, 36, 41)
+    eupper = _fixed_width_column(block, 52, 64)
+    jupper = _fixed_width_column(block, 64, 69)
+    gamRad = _fixed_width_column(block, 80, 86)
+    gamSta = _fixed_width_column(block, 86, 92)
+    gamvdW = _fixed_width_column(block, 92, 98)
+    # species = ielem.(iion-1) e.g. 26.01 for Fe II
+    ielem = np.floor(species).astype(int)
+    iion = np.rint((species - ielem) * 100).astype(int) + 1
 
     elower_inverted = np.where((eupper-elower) > 0,  elower,  eupper)
     eupper_inverted = np.where((eupper-elower) > 0,  eupper,  elower)
@@ -217,16 +207,128 @@ def pickup_param(ExAll):
     gamSta = ExAll['stark_damping'].to_numpy()
     vdWdamp = ExAll['waals_damping'].to_numpy()
 
-    ielem = np.zeros(len(ExAll), dtype='int')  # atomic number (e.g., Fe=26)
-    # e.g., neutral=1, singly ionized=2, ...
-    iion = np.zeros(len(ExAll), dtype='int')
-    for i, sp in enumerate(ExAll['species']):
-        ielem[i] = int(str(int(sp))[:2])
-        iion[i] = int(str(int(sp))[2:])+1
+    species = ExAll['species'].to_numpy().astype(int)
+    ielem = species // 100  # atomic number (e.g., Fe=26)
+    iion = species % 100 + 1  # e.g., neutral=1, singly ionized=2, ...
 
     return A, nu_lines, elower, eupper, gupper, jlower, jupper, ielem, iion, gamRad, gamSta, vdWdamp
 
 
+def _fixed_width_column(block, start, end):
+    """parses a fixed-width column of the byte matrix of the lines as float
+
+    Args:
+        block: byte matrix (Nline, line length) in uint8
+        start: start position of the column
+        end: end position of the column
+
+    Returns:
+        column values (Nline)
+    """
+    field = np.ascontiguousarray(block[:, start:end]).view('S%d' %
+                                                           (end - start))
+    return field.ravel().astype(float)
+
+
+#: version of the cache of the atomic line list
+ATOMLL_CACHE_VERSION = 1
+
+#: arrays stored in the cache of the atomic line list
+ATOMLL_CACHE_ITEMS = [
+    'A', 'nu_lines', 'elower', 'eupper', 'gupper', 'jlower', 'jupper',
+    'ielem', 'iion', 'gamRad', 'gamSta', 'vdWdamp'
+]
+
+
+def atomll_cache_path(path):
+    """path of the cache of the atomic line list
+
+    Args:
+        path: path to the line list (VALD3 or Kurucz)
+
+    Returns:
+        path to the cache (.atomll.npz next to the line list)
+    """
+    return pathlib.Path(str(path) + '.atomll.npz')
+
+
+def save_atomll_cache(path, params):
+    """saves the transition parameters in the cache next to the line list
+
+    Args:
+        path: path to the line list (VALD3 or Kurucz)
+        params: tuple of the transition parameters (see ATOMLL_CACHE_ITEMS)
+
+    Returns:
+        path to the cache
+    """
+    cache = atomll_cache_path(path)
+    tmpcache = cache.with_name(cache.name + '.tmp.npz')
+    np.savez(tmpcache,
+             version=ATOMLL_CACHE_VERSION,
+             source=file_stamp(path),
+             **dict(zip(ATOMLL_CACHE_ITEMS, params)))
+    os.replace(tmpcache, cache)
+    return cache
+
+
+def load_atomll_cache(path):
+    """loads the transition parameters from the cache if the line list is unchanged
+
+    Args:
+        path: path to the line list (VALD3 or Kurucz)
+
+    Returns:
+        tuple of the transition parameters (see ATOMLL_CACHE_ITEMS), or None if the cache does not exist or is stale
+    """
+    cache = atomll_cache_path(path)
+    if not cache.exists():
+        return None
+    with np.load(cache) as data:
+        if int(data['version']) != ATOMLL_CACHE_VERSION or not np.array_equal(
+                data['source'], file_stamp(path)):
+            return None
+        return tuple(data[key] for key in ATOMLL_CACHE_ITEMS)
+
+
+def load_vald(allf):
+    """transition parameters of the VALD3 line list, using the cache if the line list is unchanged
+
+    Args:
+        allf: fullpath to the input VALD linelist (see read_ExAll)
+
+    Returns:
+        A, nu_lines, elower, eupper, gupper, jlower, jupper, ielem, iion, gamRad, gamSta, vdWdamp (see pickup_param)
+    """
+    return _load_with_atomll_cache(
+        allf, lambda path: pickup_param(read_ExAll(path).to_pandas_df()))
+
+
+def load_kurucz(kuruczf):
+    """transition parameters of the Kurucz line list, using the cache if the line list is unchanged
+
+    Args:
+        kuruczf: file path
+
+    Returns:
+        A, nu_lines, elower, eupper, gupper, jlower, jupper, ielem, iion, gamRad, gamSta, gamvdW (see read_kurucz)
+    """
+    return _load_with_atomll_cache(kuruczf, read_kurucz)
+
+
+def _load_with_atomll_cache(path, reader):
+    params = load_atomll_cache(path)
+    if params is not None:
+        return params
+    print("Note: Couldn't find the valid cache. We parse the line list and cache it.")
+    params = reader(path)
+    try:
+        save_atomll_cache(path, params)
+    except OSError:
+        print('cache could not be saved for', path)
+    return params
+
+
 def vac_to_air(wlvac):
     """Convert wavelengths [AA] in vacuum into those in air.
 
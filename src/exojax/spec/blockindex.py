@@ -0,0 +1,346 @@
+"""Wavenumber block index for the sub-range loading of huge line lists
+
+* The rows of a line list file are divided into contiguous blocks of block_size rows.
+* The block index stores the row range, the min/max wavenumber, the max line strength and the min/max Elower of each block.
+* It is built once per file and saved next to the file (.blockindex.npz). It is rebuilt when the file is modified.
+* select_blocks chooses the blocks which can contain a line in the wavenumber range with the line strength at Ttyp above crit,
+  so that only the relevant row ranges are read.
+* The selection is always safe, but it is efficient only when the rows are (nearly) sorted in wavenumber, as in the HITEMP files.
+
+"""
+import os
+import numpy as np
+from exojax.spec.hitran import line_strength_numpy
+from exojax.utils.constants import Tref_original
+from exojax.utils.files import file_stamp
+
+#: version of the block index layout
+BLOCK_INDEX_VERSION = 1
+
+#: default number of the rows in a block
+DEFAULT_BLOCK_SIZE = 100000
+
+#: items of the block index
+BLOCK_INDEX_ITEMS = [
+    "row_start", "row_end", "nu_min", "nu_max", "line_strength_max",
+    "elower_min", "elower_max"
+]
+
+
+def build_block_index(nu_lines,
+                      line_strength_ref,
+                      elower,
+                      block_size=DEFAULT_BLOCK_SIZE,
+                      row_offset=0):
+    """builds the block index of a line list
+
+    Args:
+        nu_lines (array): line centers in cm-1 (Nrow)
+        line_strength_ref (array): line strength at Tref (Nrow)
+        elower (array): lower state energy in cm-1 (Nrow)
+        block_size (int, optional): the number of the rows in a block. Defaults to DEFAULT_BLOCK_SIZE.
+        row_offset (int, optional): row number of the first line. Defaults to 0.
+
+    Returns:
+        dict: block index, see BLOCK_INDEX_ITEMS
+    """
+    if block_size < 1:
+        raise ValueError("block_size should be positive.")
+    nu_lines = np.asarray(nu_lines)
+    line_strength_ref = np.asarray(line_strength_ref)
+    elower = np.asarray(elower)
+    nrow = len(nu_lines)
+    start = np.arange(0, nrow, block_size)
+    if nrow == 0:
+        return {key: np.array([]) for key in BLOCK_INDEX_ITEMS}
+    return {
+        "row_start": start + row_offset,
+        "row_end": np.minimum(start + block_size, nrow) + row_offset,
+        "nu_min": np.minimum.reduceat(nu_lines, start),
+        "nu_max": np.maximum.reduceat(nu_lines, start),
+        "line_strength_max": np.maximum.reduceat(line_strength_ref, start),
+        "elower_min": np.minimum.reduceat(elower, start),
+        "elower_max": np.maximum.reduceat(elower, start),
+    }
+
+
+def build_block_index_dataframe(df, columns, block_size=DEFAULT_BLOCK_SIZE):
+    """builds the block index of a (vaex) dataframe, reading the columns chunk by chunk
+
+    Args:
+        df (DataFrame): vaex dataframe of the line list
+        columns (tuple): column names of (line center, line strength at Tref, Elower), e.g. ("wav", "int", "El") for HITEMP
+        block_size (int, optional): the number of the rows in a block. Defaults to DEFAULT_BLOCK_SIZE.
+
+    Returns:
+        dict: block index
+    """
+    nu_column, strength_column, elower_column = columns
+    nrow = len(df)
+    chunk_size = block_size * 16
+    indices = []
+    for i in range(0, nrow, chunk_size):
+        chunk = df[i:min(i + chunk_size, nrow)]
+        indices.append(
+            build_block_index(chunk[nu_column].values,
+                              chunk[strength_column].values,
+                              chunk[elower_column].values,
+                              block_size=block_size,
+                              row_offset=i))
+    if len(indices) == 0:
+        return build_block_index([], [], [], block_size)
+    return {
+        key: np.concatenate([index[key] for index in indices])
+        for key in BLOCK_INDEX_ITEMS
+    }
+
+
+def block_index_path(datafile):
+    """path of the block index file of a line list file
+
+    Args:
+        datafile (str): path to the line list file
+
+    Returns:
+        str: path to the block index file
+    """
+    return str(datafile) + ".blockindex.npz"
+
+
+def save_block_index(datafile, index, columns, block_size):
+    """saves the block index next to the line list file
+
+    Args:
+        datafile (str): path to the line list file
+        index (dict): block index
+        columns (tuple): column names used in the block index
+        block_size (int): the number of the rows in a block
+
+    Returns:
+        str: path to the block index file
+    """
+    path = block_index_path(datafile)
+    tmppath = path + ".tmp.npz"
+    np.savez(tmppath,
+             version=BLOCK_INDEX_VERSION,
+             source=file_stamp(datafile),
+             columns=np.array(columns),
+             block_size=block_size,
+             **index)
+    os.replace(tmppath, path)
+    return path
+
+
+def load_block_index(datafile, columns, block_size):
+    """loads the block index of the line list file
+
+    Args:
+        datafile (str): path to the line list file
+        columns (tuple): column names used in the block index
+        block_size (int): the number of the rows in a block
+
+    Returns:
+        dict or None: block index, None if the index does not exist or is stale
+    """
+    path = block_index_path(datafile)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if (int(data["version"]) != BLOCK_INDEX_VERSION
+                or not np.array_equal(data["source"], file_stamp(datafile))
+                or list(data["columns"]) != list(columns)
+                or int(data["block_size"]) != block_size):
+            return None
+        return {key: data[key] for key in BLOCK_INDEX_ITEMS}
+
+
+def block_index_dataframe(df,
+                          columns,
+                          datafile=None,
+                          block_size=DEFAULT_BLOCK_SIZE):
+    """block index of a dataframe, loaded from or saved to the block index file if datafile is given
+
+    Args:
+        df (DataFrame): vaex dataframe of the line list (opened from datafile)
+        columns (tuple): column names of (line center, line strength at Tref, Elower)
+        datafile (str, optional): path to the line list file. Defaults to None (no file).
+        block_size (int, optional): the number of the rows in a block. Defaults to DEFAULT_BLOCK_SIZE.
+
+    Returns:
+        dict: block index
+    """
+    if datafile is not None:
+        index = load_block_index(datafile, columns, block_size)
+        if index is not None:
+            return index
+    index = build_block_index_dataframe(df, columns, block_size)
+    if datafile is not None:
+        try:
+            save_block_index(datafile, index, columns, block_size)
+        except OSError:
+            print("block index could not be saved for", datafile)
+    return index
+
+
+def select_blocks(index,
+                  nu_min=None,
+                  nu_max=None,
+                  crit=0.0,
+                  Ttyp=1000.0,
+                  qrtyp=1.0,
+                  elower_max=None,
+                  Tref=Tref_original):
+    """selects the blocks which can contain the lines to be loaded
+
+    Notes:
+        A block is selected if it overlaps the open interval (nu_min, nu_max)
+        and the upper bound of the line strength at Ttyp in the block exceeds crit.
+        The bound is given by the max line strength at Tref and the min/max of Elower and the wavenumber in the block,
+        because the line strength at Ttyp is monotonic in Elower and in the wavenumber.
+        Therefore, no line satisfying the conditions of compute_load_mask is missed.
+
+    Args:
+        index (dict): block index
+        nu_min (float, optional): minimum wavenumber in cm-1, None for no limit. Defaults to None.
+        nu_max (float, optional): maximum wavenumber in cm-1, None for no limit. Defaults to None.
+        crit (float, optional): line strength lower limit at Ttyp. Defaults to 0.0.
+        Ttyp (float, optional): typical temperature in Kelvin. Defaults to 1000.0.
+        qrtyp (float, optional): partition function ratio Q(Ttyp)/Q(Tref). Defaults to 1.0.
+        elower_max (float, optional): maximum Elower in cm-1. Defaults to None.
+        Tref (float, optional): reference temperature in Kelvin. Defaults to Tref_original.
+
+    Returns:
+        array: mask of the selected blocks
+    """
+    mask = np.ones(len(index["row_start"]), dtype=bool)
+    if nu_min is not None:
+        mask *= index["nu_max"] > nu_min
+    if nu_max is not None:
+        mask *= index["nu_min"] < nu_max
+    if elower_max is not None:
+        mask *= index["elower_min"] < elower_max
+    if crit > 0.0:
+        bound = np.zeros(len(mask))
+        for elower in [index["elower_min"], index["elower_max"]]:
+            for nu in [index["nu_min"], index["nu_max"]]:
+                bound = np.maximum(
+                    bound,
+                    line_strength_numpy(Ttyp, index["line_strength_max"], nu,
+                                        elower, qrtyp, Tref))
+        # small margin for the rounding error
+        mask *= bound * (1.0 + 1.e-6) > crit
+    return mask
+
+
+def block_row_ranges(index, block_mask):
+    """row ranges of the selected blocks, merging the adjacent blocks
+
+    Args:
+        index (dict): block index
+        block_mask (array): mask of the selected blocks
+
+    Returns:
+        list: list of (row_start, row_end)
+    """
+    ranges = []
+    for start, end in zip(index["row_start"][block_mask],
+                          index["row_end"][block_mask]):
+        if len(ranges) > 0 and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], int(end))
+        else:
+            ranges.append((int(start), int(end)))
+    return ranges
+
+
+def load_dataframe_blockwise(datafiles,
+                             columns,
+                             nu_min=None,
+                             nu_max=None,
+                             crit=0.0,
+                             Ttyp=1000.0,
+                             qrtyp=1.0,
+                             elower_max=None,
+                             block_size=DEFAULT_BLOCK_SIZE,
+                             Tref=Tref_original):
+    """loads the relevant row ranges of the line list files using the block index
+
+    Args:
+        datafiles (list): paths to the line list files (vaex hdf5)
+        columns (tuple): column names of (line center, line strength at Tref, Elower)
+        nu_min (float, optional): minimum wavenumber in cm-1, None for no limit. Defaults to None.
+        nu_max (float, optional): maximum wavenumber in cm-1, None for no limit. Defaults to None.
+        crit (float, optional): line strength lower limit at Ttyp. Defaults to 0.0.
+        Ttyp (float, optional): typical temperature in Kelvin. Defaults to 1000.0.
+        qrtyp (float, optional): partition function ratio Q(Ttyp)/Q(Tref). Defaults to 1.0.
+        elower_max (float, optional): maximum Elower in cm-1. Defaults to None.
+        block_size (int, optional): the number of the rows in a block. Defaults to DEFAULT_BLOCK_SIZE.
+        Tref (float, optional): reference temperature in Kelvin. Defaults to Tref_original.
+
+    Returns:
+        DataFrame: vaex dataframe of the selected rows
+    """
+    import vaex
+
+    dfs = [vaex.open(str(datafile)) for datafile in datafiles]
+    return select_dataframe_blockwise(dfs,
+                                      columns,
+                                      datafiles=datafiles,
+                                      nu_min=nu_min,
+                                      nu_max=nu_max,
+                                      crit=crit,
+                                      Ttyp=Ttyp,
+                                      qrtyp=qrtyp,
+                                      elower_max=elower_max,
+                                      block_size=block_size,
+                                      Tref=Tref)
+
+
+def select_dataframe_blockwise(dfs,
+                               columns,
+                               datafiles=None,
+                               nu_min=None,
+                               nu_max=None,
+                               crit=0.0,
+                               Ttyp=1000.0,
+                               qrtyp=1.0,
+                               elower_max=None,
+                               block_size=DEFAULT_BLOCK_SIZE,
+                               Tref=Tref_original):
+    """selects the relevant row ranges of (vaex) dataframes using the block index
+
+    Notes:
+        When no block is selected, the first row is kept so that the dataframe has the columns.
+        The row is removed by compute_load_mask of mdb.
+
+    Args:
+        dfs (list): vaex dataframes of the line lists
+        columns (tuple): column names of (line center, line strength at Tref, Elower)
+        datafiles (list, optional): paths to the line list files of dfs, where the block indices are saved. Defaults to None.
+        others: see load_dataframe_blockwise
+
+    Returns:
+        DataFrame: vaex dataframe of the selected rows
+    """
+    import vaex
+
+    if len(dfs) == 0:
+        raise ValueError("No line list file to be loaded.")
+    if datafiles is None:
+        datafiles = [None] * len(dfs)
+    selected = []
+    nblock = 0
+    nblock_selected = 0
+    for df, datafile in zip(dfs, datafiles):
+        index = block_index_dataframe(df, columns, datafile, block_size)
+        block_mask = select_blocks(index, nu_min, nu_max, crit, Ttyp, qrtyp,
+                                   elower_max, Tref)
+        nblock += len(block_mask)
+        nblock_selected += int(np.sum(block_mask))
+        for start, end in block_row_ranges(index, block_mask):
+            selected.append(df[start:end])
+    print("block index:", nblock_selected, "/", nblock, "blocks selected.")
+    if len(selected) == 0:
+        return dfs[0][0:1]
+    elif len(selected) == 1:
+        return selected[0]
+    return vaex.concat(selected)
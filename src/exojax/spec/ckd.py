@@ -0,0 +1,217 @@
+"""correlated-k distribution (CKD)
+
+    * k-distributions are computed per wavenumber bin from line-by-line cross sections of an opa (e.g. OpaPremodit) on a (T, P) grid.
+    * g-ordinates and weights follow the Gauss-Legendre quadrature in [0, 1].
+    * The k-table is interpolated bilinearly in (T, log10 P), see also opacalc.OpaCKD.
+    * Multiple species are combined by the random overlap approximation in the optical depth space.
+    * ArtEmisPure.run_ck integrates the emission over the g-points.
+
+"""
+import numpy as np
+import jax.numpy as jnp
+from jax import jit, vmap
+from exojax.utils.interp import interp2d_bilinear
+from exojax.utils.progbar import print_progress
+from exojax.utils.checkarray import check_strictly_ascending
+
+#: version of the ck table format
+CK_TABLE_VERSION = 1
+
+
+def gauss_legendre_grid(ng):
+    """g-ordinates and weights of the Gauss-Legendre quadrature in [0, 1]
+
+    Args:
+        ng (int): the number of the g-points
+
+    Returns:
+        array, array: g-ordinates, weights (sum = 1)
+    """
+    x, w = np.polynomial.legendre.leggauss(ng)
+    return 0.5 * (x + 1.0), 0.5 * w
+
+
+def nu_bin_index(nu_grid, nu_bin_edges):
+    """index of the wavenumber bin for the wavenumber grid
+
+    Args:
+        nu_grid (1D array): wavenumber grid in cm-1
+        nu_bin_edges (1D array): edges of the wavenumber bins in cm-1, ascending order (N_bin + 1)
+
+    Raises:
+        ValueError: a bin has no wavenumber grid point
+
+    Returns:
+        array: bin index for each wavenumber grid point, -1 if outside the bins
+    """
+    nu_bin_edges = np.asarray(nu_bin_edges)
+    check_strictly_ascending(nu_bin_edges, "nu_bin_edges")
+    index = np.searchsorted(nu_bin_edges, nu_grid, side="right") - 1
+    index[(index < 0) | (index >= len(nu_bin_edges) - 1)] = -1
+    counts = np.bincount(index[index >= 0], minlength=len(nu_bin_edges) - 1)
+    if np.any(counts == 0):
+        raise ValueError("Some bins have no wavenumber grid point.")
+    return index
+
+
+def compute_kdist(xs, bin_index, nbin, g_ordinates):
+    """compute the k-distribution in each wavenumber bin
+
+    Notes:
+        The cross sections in a bin are sorted and the k value at g is linearly interpolated 
+        from the cumulative fraction (i + 0.5)/n of the sorted samples.
+
+    Args:
+        xs (array): cross section (..., N_wavenumber)
+        bin_index (1D array): bin index for each wavenumber grid point, see nu_bin_index
+        nbin (int): the number of bins
+        g_ordinates (1D array): g-ordinates
+
+    Returns:
+        array: k-distribution (..., N_bin, N_g)
+    """
+    xs = np.asarray(xs)
+    kdist = np.zeros(xs.shape[:-1] + (nbin, len(g_ordinates)))
+    for ibin in range(nbin):
+        xs_bin = np.sort(xs[..., bin_index == ibin], axis=-1)
+        n = xs_bin.shape[-1]
+        gsample = (np.arange(n) + 0.5) / n
+        flat = xs_bin.reshape((-1, n))
+        kdist_bin = np.array(
+            [np.interp(g_ordinates, gsample, each) for each in flat])
+        kdist[..., ibin, :] = kdist_bin.reshape(xs.shape[:-1] +
+                                                (len(g_ordinates), ))
+    return kdist
+
+
+def build_ck_table(opa, T_grid, P_grid, nu_bin_edges, ng=8,
+                   show_progress=True):
+    """build the ck table on the (T, P) grid
+
+    Notes:
+        For each temperature, opa.xsmatrix is evaluated for all the pressure grid points at once 
+        and converted to the k-distributions. The line-by-line table is not kept.
+
+    Args:
+        opa (opa): opa instance with xsmatrix(Tarr, Parr), such as OpaPremodit
+        T_grid (1D array): temperature grid in K, ascending order
+        P_grid (1D array): pressure grid in bar, ascending order
+        nu_bin_edges (1D array): edges of the wavenumber bins in cm-1, ascending order
+        ng (int, optional): the number of the g-points. Defaults to 8.
+        show_progress (bool, optional): if True, the progress bar is shown. Defaults to True.
+
+    Returns:
+        ck_table (len(T_grid), len(P_grid), N_bin, ng), g_ordinates, g_weights
+    """
+    T_grid = np.asarray(T_grid)
+    P_grid = np.asarray(P_grid)
+    check_strictly_ascending(T_grid, "T_grid")
+    check_strictly_ascending(P_grid, "P_grid")
+    g_ordinates, g_weights = gauss_legendre_grid(ng)
+    bin_index = nu_bin_index(np.asarray(opa.nu_grid), nu_bin_edges)
+    nbin = len(nu_bin_edges) - 1
+
+    ck_table = np.zeros((len(T_grid), len(P_grid), nbin, ng))
+    for i, T in enumerate(T_grid):
+        Tarr = np.full(len(P_grid), T)
+        xs = np.abs(np.asarray(opa.xsmatrix(Tarr, P_grid)))
+        ck_table[i, :, :, :] = compute_kdist(xs, bin_index, nbin, g_ordinates)
+        if show_progress:
+            print_progress(i + 1, len(T_grid), "Making CK table:")
+    return ck_table, g_ordinates, g_weights
+
+
+def save_ck_table(filename, nu_bin_edges, T_grid, P_grid, ck_table,
+                  g_ordinates, g_weights):
+    """save the ck table in the compressed npz format
+
+    Args:
+        filename (str): file name (.npz)
+        nu_bin_edges (1D array): edges of the wavenumber bins in cm-1
+        T_grid (1D array): temperature grid in K
+        P_grid (1D array): pressure grid in bar
+        ck_table (array): ck table (len(T_grid), len(P_grid), N_bin, N_g)
+        g_ordinates (1D array): g-ordinates
+        g_weights (1D array): weights of the g-ordinates
+    """
+    if np.shape(ck_table) != (len(T_grid), len(P_grid),
+                              len(nu_bin_edges) - 1, len(g_ordinates)):
+        raise ValueError("shape of ck_table should be (nT, nP, nbin, ng).")
+    np.savez_compressed(filename,
+                        version=CK_TABLE_VERSION,
+                        nu_bin_edges=np.asarray(nu_bin_edges),
+                        T_grid=np.asarray(T_grid),
+                        P_grid=np.asarray(P_grid),
+                        ck_table=np.asarray(ck_table),
+                        g_ordinates=np.asarray(g_ordinates),
+                        g_weights=np.asarray(g_weights))
+
+
+def load_ck_table(filename):
+    """load the ck table
+
+    Args:
+        filename (str): file name (.npz)
+
+    Raises:
+        ValueError: version mismatch
+
+    Returns:
+        nu_bin_edges, T_grid, P_grid, ck_table, g_ordinates, g_weights
+    """
+    with np.load(filename) as dat:
+        if int(dat["version"]) != CK_TABLE_VERSION:
+            raise ValueError("version of the ck table file is not supported.")
+        return dat["nu_bin_edges"], dat["T_grid"], dat["P_grid"], dat[
+            "ck_table"], dat["g_ordinates"], dat["g_weights"]
+
+
+@jit
+def xsmatrix_ck(Tarr, Parr, T_grid, logP_grid, ck_table):
+    """k-distribution matrix by the bilinear interpolation of the ck table in (T, log10 P)
+
+    Args:
+        Tarr (_type_): temperature layers in K
+        Parr (_type_): pressure layers in bar
+        T_grid (_type_): temperature grid in K
+        logP_grid (_type_): log10 pressure grid (bar)
+        ck_table (_type_): ck table (len(T_grid), len(logP_grid), N_bin, N_g)
+
+    Returns:
+        jnp.array : k-distribution matrix (Nlayer, N_bin, N_g) in cm2
+    """
+    return vmap(interp2d_bilinear, (0, 0, None, None, None),
+                0)(Tarr, jnp.log10(Parr), T_grid, logP_grid, ck_table)
+
+
+def random_overlap_mixing(dtau_ck_1, dtau_ck_2, g_ordinates, g_weights):
+    """combine the optical depths of two species in the ck form by the random overlap approximation
+
+    Notes:
+        All the pairs of the g-points (N_g^2) are summed, sorted, and resampled to g_ordinates 
+        using the cumulative weights. Apply repeatedly for more than two species.
+
+    Args:
+        dtau_ck_1 (array): optical depth of the species 1 (..., N_g)
+        dtau_ck_2 (array): optical depth of the species 2 (..., N_g)
+        g_ordinates (1D array): g-ordinates
+        g_weights (1D array): weights of the g-ordinates
+
+    Returns:
+        array: combined optical depth (..., N_g)
+    """
+    shape = jnp.shape(dtau_ck_1)
+    ng = shape[-1]
+    dtau_pair = (dtau_ck_1[..., :, None] + dtau_ck_2[..., None, :]).reshape(
+        (-1, ng * ng))
+    g_weights = jnp.asarray(g_weights)
+    weight_pair = (g_weights[:, None] * g_weights[None, :]).reshape(ng * ng)
+
+    def resample(dtau_each):
+        index = jnp.argsort(dtau_each)
+        dtau_sorted = dtau_each[index]
+        weight_sorted = weight_pair[index]
+        g_cumulative = jnp.cumsum(weight_sorted) - 0.5 * weight_sorted
+        return jnp.interp(g_ordinates, g_cumulative, dtau_sorted)
+
+    return vmap(resample)(dtau_pair).reshape(shape)
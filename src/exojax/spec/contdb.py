@@ -5,7 +5,7 @@
 import numpy as np
 import jax.numpy as jnp
 import pathlib
-from exojax.spec.hitrancia import read_cia
+from exojax.spec.hitrancia import load_cia
 
 __all__ = ["CdbCIA"]
 
@@ -18,13 +18,16 @@ class CdbCIA(object):
             path: path for HITRAN cia file
             nurange: wavenumber range list (cm-1) or wavenumber array
             margin: margin for nurange (cm-1)
+
+        Note:
+            The CIA table is cached in the binary format (.npz) next to the CIA file at the first time, see hitrancia.load_cia.
         """
         self.nurange = [np.min(nurange), np.max(nurange)]
         self.margin = margin
         self.path = pathlib.Path(path)
         if not self.path.exists():
             self.download()
-        self.nucia, self.tcia, ac = read_cia(
+        self.nucia, self.tcia, ac = load_cia(
             path, self.nurange[0] - self.margin, self.nurange[1] + self.margin
         )
         self.logac = jnp.array(np.log10(ac))
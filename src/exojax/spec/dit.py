@@ -10,7 +10,7 @@ import jax.numpy as jnp
 from jax import jit
 from jax.lax import scan
 from exojax.spec.ditkernel import fold_voigt_kernel
-from exojax.spec.atomll import padding_2Darray_for_each_atom
+from exojax.spec.atomll import line_species_weight
 from exojax.spec.rtransfer import dtauM
 from exojax.spec.lsd import inc3D_givenx
 
@@ -194,6 +194,10 @@ def dtauM_vald_old(dParr, xsm, g, uspecies, mods_uspecies_list, MMR_uspecies_lis
 def dtauM_vald(dParr, g, adb, nus, cnu, indexnu, pmarray, SijM, gammaLM, sigmaDM, \
         uspecies, mods_uspecies_list, MMR_uspecies_list, atomicmass_uspecies_list, dgm_sigmaD, dgm_gammaL):
     """Compute dtau caused by VALD lines from cross section xs (DIT)
+
+    Note:
+       The lines of all the species are computed together in a single LSD, weighting the line strength of each line by MMR/(atomic mass) of its species.
+       Because DIT is linear in the line strength, this is equivalent to the sum of dtau of each species, without padding the lines of each species.
     
     Args:
        dParr: delta pressure profile (bar) [N_layer]
@@ -215,45 +219,14 @@ def dtauM_vald(dParr, g, adb, nus, cnu, indexnu, pmarray, SijM, gammaLM, sigmaDM
        dtauatom: optical depth matrix [N_layer, N_nus]
     
     """
-    zero_to_ones = lambda arr: jnp.where(arr!=0, arr, 1.)
-    def floop(xi, null):
-        i, dtauatom = xi
-        # process---->
-        #test220208 dgm_sigmaD = dgml_sigmaD[i]
-        sp = uspecies[i]
-        cnu_p = padding_2Darray_for_each_atom(cnu[None,:], adb, sp).reshape(cnu.shape)
-        indexnu_p = jnp.array(\
-                padding_2Darray_for_each_atom(indexnu[None,:], adb, sp).reshape(indexnu.shape)\
-                , dtype='int32')
-        sigmaDM_p = zero_to_ones(padding_2Darray_for_each_atom(sigmaDM, adb, sp))
-        gammaLM_p = zero_to_ones(padding_2Darray_for_each_atom(gammaLM, adb, sp))
-        SijM_p = padding_2Darray_for_each_atom(SijM, adb, sp)
-        #test220207 dgm_sigmaD_p = dgmatrix(sigmaDM_p)
-        #test220207 dgm_gammaL_p = dgmatrix(gammaLM_p)
-        xsm_p = xsmatrix(cnu_p, indexnu_p, pmarray, sigmaDM_p, gammaLM_p, SijM_p, nus, dgm_sigmaD, dgm_gammaL)
-        xsm_p = jnp.abs(xsm_p)
-
-        MMRmetalMod = mods_uspecies_list[i] #add_to_deal_with_individual_elemental_abundance
-        MMR_X_I = MMR_uspecies_list[i] *10**MMRmetalMod #modify this into individual elemental abundances shortly... (tako)
-        mass_X_I = atomicmass_uspecies_list[i]
-        
-        dtau_each = dtauM(dParr, xsm_p, MMR_X_I*jnp.ones_like(dParr), mass_X_I, g)
-        # Note that the same mixing ratio is assumed for all atmospheric layers here...
-        dtauatom = dtauatom + dtau_each
-        # <----process
-        i = i+1
-        xi = [i, dtauatom]
-        return xi, null
-
-    def f_dtaual(xi0):
-        xi, null = scan(floop, xi0, None, length)
-        return xi
-
-    length = len(uspecies)
-    dtauatom_init = jnp.zeros([len(dParr), len(nus)])
-    xi_init = [0, dtauatom_init]
-
-    dtauatom = f_dtaual(xi_init)[1]
+    from exojax.spec.layeropacity import layer_optical_depth
+
+    # Note that the same mixing ratio is assumed for all atmospheric layers here...
+    weight_uspecies = MMR_uspecies_list * 10**mods_uspecies_list / atomicmass_uspecies_list
+    weight = line_species_weight(adb.ielem, adb.iion, uspecies, weight_uspecies)
+    xsm = xsmatrix(cnu, indexnu, pmarray, sigmaDM, gammaLM, SijM * weight[None, :], nus, dgm_sigmaD, dgm_gammaL)
+    xsm = jnp.abs(xsm)
+    dtauatom = layer_optical_depth(dParr, xsm, jnp.ones_like(dParr), 1.0, g)
     return(dtauatom)
 
 def ditgrid(x, dit_grid_resolution=0.1, adopt=True):
@@ -1,6 +1,9 @@
+import os
 import numpy as np
 import jax.numpy as jnp
+from itertools import islice
 from jax import jit, vmap
+from exojax.utils.files import file_stamp
 
 
 HITRAN_DEFCIA = \
@@ -31,6 +34,10 @@ HITRAN_DEFCIA = \
 def read_cia(filename, nus, nue):
     """READ HITRAN CIA data.
 
+    Note:
+        The file is read in a single pass, block by block (one block per temperature).
+        Only the lines in the wavenumber range are parsed, except for the first block which gives the wavenumber axis.
+
     Args:
        filename: HITRAN CIA file name (_2011.cia)
        nus: wavenumber min (cm-1)
@@ -41,37 +48,151 @@ def read_cia(filename, nus, nue):
        tcia: temperature (K)
        ac: cia coefficient
     """
-    # read first line
-    com = filename.split('/')[-1].split("_")[0]
+    com = str(filename).split('/')[-1].split("_")[0]
     print(com)
-    f = open(filename, 'r')
-    header = f.readline()
-    info = header.strip().split()
-    nnu = int(info[3])
-    nu = []
-    for i in range(0, nnu):
-        column = f.readline().strip().split()
-        #print(column)
-        nu.append(float(column[0]))
-    f.close()
-    f = open(filename, 'r')
     tcia = []
-    for line in f:
-        line = line.strip()
-        column = line.split()
-        if column[0] == com:
-            tcia.append(float(column[4]))
-    f.close()
-    tcia = np.array(tcia)
-    nu = np.array(nu)
+    ac = []
+    with open(filename, 'r') as f:
+        for header in f:
+            if header.strip() == '':
+                continue
+            info = header.strip().split()
+            numin, numax, nnu = float(info[1]), float(info[2]), int(info[3])
+            tcia.append(float(info[4]))
+            if len(ac) == 0:
+                block_first = (numin, numax, nnu)
+                data = _read_cia_lines(f, nnu)
+                nu = data[:, 0]
+                i0, i1 = _cia_wavenumber_index(nu, nus, nue)
+                ac.append(data[i0:i1, 1])
+                continue
+            if (numin, numax, nnu) != block_first:
+                raise ValueError(
+                    "CIA blocks with different wavenumber grids are not supported: "
+                    + header.strip())
+            _skip_lines(f, i0)
+            ac.append(_read_cia_lines(f, i1 - i0)[:, 1])
+            _skip_lines(f, nnu - i1)
+    if len(ac) == 0:
+        raise ValueError("No CIA block found in " + str(filename))
+    return nu[i0:i1], np.array(tcia), np.array(ac)
+
+
+def _cia_wavenumber_index(nu, nus, nue):
+    """index range [i0, i1) of the CIA wavenumber in the range (with one more point at the both ends)
+
+    Args:
+        nu: CIA wavenumber (cm-1)
+        nus: wavenumber min (cm-1)
+        nue: wavenumber max (cm-1)
+
+    Returns:
+        i0, i1
+    """
     ijnu = np.digitize([nus, nue], nu)
-    nucia = np.array(nu[ijnu[0]:ijnu[1]+1])
-    # read data
-    data = np.loadtxt(filename, comments=com)
-    nt = data.shape[0]/nnu
-    data = data.reshape((int(nt), int(nnu), 2))
-    ac = data[:, ijnu[0]:ijnu[1]+1, 1]
-    return nucia, tcia, ac
+    return ijnu[0], min(ijnu[1] + 1, len(nu))
+
+
+def _read_cia_lines(f, n):
+    if n == 0:
+        return np.zeros((0, 2))
+    return np.loadtxt(islice(f, n), ndmin=2)
+
+
+def _skip_lines(f, n):
+    for _ in islice(f, n):
+        pass
+
+
+#: version of the CIA cache layout
+CIA_CACHE_VERSION = 1
+
+
+def cia_cache_path(filename):
+    """path of the binary cache of the HITRAN CIA file
+
+    Args:
+        filename: HITRAN CIA file name
+
+    Returns:
+        str: path to the cache (.npz next to the CIA file)
+    """
+    return str(filename) + ".npz"
+
+
+def save_cia_cache(filename, nucia, tcia, ac):
+    """saves the CIA table (full wavenumber range) in the binary cache
+
+    Args:
+        filename: HITRAN CIA file name
+        nucia: wavenumber (cm-1)
+        tcia: temperature (K)
+        ac: cia coefficient (nT, nnu)
+
+    Returns:
+        str: path to the cache
+    """
+    path = cia_cache_path(filename)
+    tmppath = path + ".tmp.npz"
+    np.savez(tmppath,
+             version=CIA_CACHE_VERSION,
+             source=file_stamp(filename),
+             nucia=nucia,
+             tcia=tcia,
+             ac=ac)
+    os.replace(tmppath, path)
+    return path
+
+
+def load_cia_cache(filename):
+    """loads the CIA table from the binary cache if the CIA file is unchanged
+
+    Args:
+        filename: HITRAN CIA file name
+
+    Returns:
+        tuple or None: (nucia, tcia, ac) in the full wavenumber range, None if the cache does not exist or is stale
+    """
+    path = cia_cache_path(filename)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if int(data["version"]) != CIA_CACHE_VERSION or not np.array_equal(
+                data["source"], file_stamp(filename)):
+            return None
+        return data["nucia"], data["tcia"], data["ac"]
+
+
+def load_cia(filenames, nus, nue):
+    """loads HITRAN CIA data using the binary cache
+
+    Note:
+        The full table is parsed and cached at the first time. Then, the table in the wavenumber range is loaded from the cache.
+
+    Args:
+       filenames: HITRAN CIA file name, or list of them for multiple CIA pairs
+       nus: wavenumber min (cm-1)
+       nue: wavenumber max (cm-1)
+
+    Returns:
+       (nucia, tcia, ac) for a file name, or list of them for a list of file names, see read_cia
+
+    Examples:
+       >>> (nucia_H2H2, tcia_H2H2, ac_H2H2), (nucia_H2He, tcia_H2He, ac_H2He) = load_cia(["H2-H2_2011.cia", "H2-He_2011.cia"], nus, nue)
+    """
+    if isinstance(filenames, (list, tuple)):
+        return [load_cia(filename, nus, nue) for filename in filenames]
+
+    cached = load_cia_cache(filenames)
+    if cached is None:
+        cached = read_cia(filenames, -np.inf, np.inf)
+        try:
+            save_cia_cache(filenames, *cached)
+        except OSError:
+            print("CIA cache could not be saved for", filenames)
+    nucia, tcia, ac = cached
+    i0, i1 = _cia_wavenumber_index(nucia, nus, nue)
+    return nucia[i0:i1], tcia, ac[:, i0:i1]
 
 
 @jit
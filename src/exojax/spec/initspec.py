@@ -13,6 +13,12 @@ from exojax.utils.instfunc import resolution_eslog
 from exojax.spec.premodit import make_elower_grid
 from exojax.spec.premodit import make_broadpar_grid
 from exojax.spec.premodit import generate_lbd
+from exojax.spec.premodit import generate_lbd_sparse
+from exojax.spec.premodit import lbd_to_sparse
+from exojax.spec.lbdcache import lbd_cache_key
+from exojax.spec.lbdcache import lbd_cache_path
+from exojax.spec.lbdcache import load_lbd_cache
+from exojax.spec.lbdcache import save_lbd_cache
 
 
 def init_lpf(nu_lines, nu_grid):
@@ -29,6 +35,77 @@ def init_lpf(nu_lines, nu_grid):
     return numatrix
 
 
+def init_lpf_window(nu_lines, nu_grid, line_window, block_size=256):
+    """Initialization for the line-window truncated LPF.
+
+    Notes:
+        The wavenumber grid is divided into blocks of block_size. For each line, the range of the blocks within 
+        its own line_window is found by searchsorted on the block edges, and the lines are stored in 
+        the neighbor list of these blocks, padded to a fixed length (the maximum number of the neighbor lines among the blocks). 
+        Therefore, a broad line only increases the neighbor lists of the blocks within its window. 
+        The wavenumbers are stored as offsets from the block start, so that the difference nu - nu_line is accurate even in FP32.
+
+    Args:
+        nu_lines: wavenumber list of lines [Nline] (should be numpy F64)
+        nu_grid: wavenumenr grid [Nnugrid] (should be numpy F64)
+        line_window: half width of the line window in cm-1, float or [Nline] array
+        block_size (int, optional): the number of the wavenumber grid points in a block. Defaults to 256.
+
+    Returns:
+        nu_offset_grid [Nblock, block_size]: wavenumber grid offset from the block start
+        nu_offset_lines [Nblock, Nneighbor]: line center offset from the block start
+        neighbor_index [Nblock, Nneighbor]: line index of the neighbor list
+        neighbor_window [Nblock, Nneighbor]: line window of the neighbor list, -1 for the padding
+    """
+    nu_lines = np.asarray(nu_lines, dtype=np.float64)
+    nu_grid = np.asarray(nu_grid, dtype=np.float64)
+    line_window = np.broadcast_to(np.asarray(line_window, dtype=np.float64),
+                                  nu_lines.shape)
+    order = np.argsort(nu_lines)
+
+    nblock = int(np.ceil(len(nu_grid) / block_size))
+    residual = nblock * block_size - len(nu_grid)
+    nu_grid_padded = np.hstack([nu_grid, np.full(residual, nu_grid[-1])])
+    nu_block = nu_grid_padded.reshape((nblock, block_size))
+    nu_start = nu_block[:, 0]
+
+    # blocks [first, last) of each line (in the sorted order) within its own window
+    nu_sorted = nu_lines[order]
+    window_sorted = line_window[order]
+    first = np.searchsorted(np.max(nu_block, axis=1),
+                            nu_sorted - window_sorted,
+                            side="left")
+    last = np.searchsorted(np.min(nu_block, axis=1),
+                           nu_sorted + window_sorted,
+                           side="right")
+    nblock_line = np.maximum(last - first, 0)
+    line_offsets = np.cumsum(nblock_line) - nblock_line
+    pair_line = np.repeat(np.arange(len(nu_lines)), nblock_line)
+    pair_block = np.repeat(first - line_offsets,
+                           nblock_line) + np.arange(len(pair_line))
+
+    # neighbor list of each block, sorted by the line center in each block
+    pair_order = np.argsort(pair_block, kind="stable")
+    pair_block = pair_block[pair_order]
+    pair_line = pair_line[pair_order]
+    nneighbor_block = np.bincount(pair_block, minlength=nblock)
+    nneighbor = max(int(np.max(nneighbor_block)), 1)
+    print("LPF window: # of neighbor lines per block =", nneighbor, "/",
+          len(nu_lines))
+    block_offsets = np.cumsum(nneighbor_block) - nneighbor_block
+    position = np.arange(len(pair_line)) - block_offsets[pair_block]
+    sorted_index = np.zeros((nblock, nneighbor), dtype=np.int64)
+    sorted_index[pair_block, position] = pair_line
+    valid = np.zeros((nblock, nneighbor), dtype=bool)
+    valid[pair_block, position] = True
+    neighbor_index = order[sorted_index]
+    neighbor_window = np.where(valid, line_window[neighbor_index], -1.0)
+    nu_offset_grid = nu_block - nu_start[:, None]
+    nu_offset_lines = nu_lines[neighbor_index] - nu_start[:, None]
+    return jnp.array(nu_offset_grid), jnp.array(nu_offset_lines), jnp.array(
+        neighbor_index), jnp.array(neighbor_window)
+
+
 def init_dit(nu_lines, nu_grid, warning=False):
     """Initialization for DIT. i.e. Generate nu contribution and index for the
         line shape density (actually, this is a numpy version of getix)
@@ -125,7 +202,13 @@ def init_premodit(nu_lines,
                   diffmode=0,
                   single_broadening=False,
                   single_broadening_parameters=None,
-                  warning=False):
+                  warning=False,
+                  lbd_cache_dir=None,
+                  nu_block_size=None,
+                  lbd_memmap_path=None,
+                  lbd_format="dense",
+                  sparse_nu_block_size=256,
+                  nthreads=None):
     """Initialization for PreMODIT. 
 
     Args:
@@ -145,6 +228,12 @@ def init_premodit(nu_lines,
         diffmode (int): i-th Taylor expansion is used for the weight, default is 1.
         single_broadening (optional): if True, single_braodening_parameters is used. Defaults to False. 
         single_broadening_parameters (optional): [gamma_ref, n_Texp] at 296K for single broadening. When None, the median is used.
+        lbd_cache_dir (str, optional): directory of the on-disk LBD cache. If None (default), the cache is not used. See lbdcache.py.
+        nu_block_size (int, optional): if given, LBD is built block-by-block along the wavenumber axis to bound the host memory use. See premodit.generate_lbd.
+        lbd_memmap_path (str, optional): if given (with nu_block_size), LBD is written into a memory-mapped .npy file. See premodit.generate_lbd.
+        lbd_format (str, optional): "dense" or "sparse". When "sparse", the block-sparse LBD is built directly from the lines (premodit.generate_lbd_sparse) and returned instead of the dense LBD. Defaults to "dense".
+        sparse_nu_block_size (int, optional): block size along the wavenumber axis for lbd_format="sparse". Defaults to 256.
+        nthreads (int, optional): the number of threads to build LBD, see premodit.generate_lbd. Defaults to None (a single thread).
 
     Returns:
         cont_nu: contribution for wavenumber jnp.array
@@ -157,12 +246,18 @@ def init_premodit(nu_lines,
 
 
     Note:
+        For lbd_format="sparse", the first element is the block-sparse LBD (lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower). 
+        The sparse LBD is not saved to the on-disk cache, but a cached dense LBD is converted to the sparse form when found.
         cont is the contribution for i=index+1. 1 - cont is the contribution for i=index. For other i, the contribution should be zero. dq is computed using numpy not jnp.numpy. If you use jnp, you might observe a significant residual because of the float32 truncation error.
     """
     warn_dtype64(nu_lines, warning, tag='nu_lines')
     warn_dtype64(nu_grid, warning, tag='nu_grid')
     warn_dtype64(elower, warning, tag='elower')
     warn_outside_wavenumber_grid(nu_lines, nu_grid)
+    if lbd_format not in ["dense", "sparse"]:
+        raise ValueError("lbd_format should be 'dense' or 'sparse'.")
+    if lbd_format == "sparse" and lbd_memmap_path is not None:
+        raise ValueError("lbd_memmap_path is not available for lbd_format='sparse'.")
 
     if Tmax is None:
         Tmax = np.max([Twt, Tref])
@@ -190,18 +285,60 @@ def init_premodit(nu_lines,
 
     wavmask = (nu_lines >= nu_grid[0]) * (nu_lines <= nu_grid[-1])  #Issue 341
 
-    lbd_coeff, multi_index_uniqgrid = generate_lbd(line_strength_ref[wavmask],
-                                                   nu_lines[wavmask],
-                                                   nu_grid,
-                                                   ngamma_ref[wavmask],
-                                                   ngamma_ref_grid,
-                                                   n_Texp[wavmask],
-                                                   n_Texp_grid,
-                                                   elower[wavmask],
-                                                   elower_grid,
-                                                   Twt,
-                                                   Tref=Tref,
-                                                   diffmode=diffmode)
+    if lbd_cache_dir is not None:
+        key = lbd_cache_key(line_strength_ref[wavmask], nu_lines[wavmask],
+                            elower[wavmask], ngamma_ref[wavmask],
+                            n_Texp[wavmask], nu_grid, elower_grid,
+                            ngamma_ref_grid, n_Texp_grid, dE, Tref, Twt,
+                            diffmode)
+        cached = load_lbd_cache(lbd_cache_dir, key)
+    else:
+        cached = None
+
+    if cached is not None:
+        print("LBD loaded from the cache: ", lbd_cache_path(lbd_cache_dir, key))
+        lbd_coeff, multi_index_uniqgrid, elower_grid, ngamma_ref_grid, n_Texp_grid = cached
+        lbd_coeff = jnp.asarray(lbd_coeff)
+        if lbd_format == "sparse":
+            lbd_coeff = lbd_to_sparse(lbd_coeff, sparse_nu_block_size)
+    elif lbd_format == "sparse":
+        lbd_coeff, multi_index_uniqgrid = generate_lbd_sparse(
+            line_strength_ref[wavmask],
+            nu_lines[wavmask],
+            nu_grid,
+            ngamma_ref[wavmask],
+            ngamma_ref_grid,
+            n_Texp[wavmask],
+            n_Texp_grid,
+            elower[wavmask],
+            elower_grid,
+            Twt,
+            Tref=Tref,
+            diffmode=diffmode,
+            nu_block_size=sparse_nu_block_size,
+            nthreads=nthreads)
+    else:
+        lbd_coeff, multi_index_uniqgrid = generate_lbd(line_strength_ref[wavmask],
+                                                       nu_lines[wavmask],
+                                                       nu_grid,
+                                                       ngamma_ref[wavmask],
+                                                       ngamma_ref_grid,
+                                                       n_Texp[wavmask],
+                                                       n_Texp_grid,
+                                                       elower[wavmask],
+                                                       elower_grid,
+                                                       Twt,
+                                                       Tref=Tref,
+                                                       diffmode=diffmode,
+                                                       nu_block_size=nu_block_size,
+                                                       lbd_memmap_path=lbd_memmap_path,
+                                                       nthreads=nthreads)
+        if lbd_cache_dir is not None:
+            path = save_lbd_cache(lbd_cache_dir, key, lbd_coeff,
+                                  multi_index_uniqgrid, elower_grid,
+                                  ngamma_ref_grid, n_Texp_grid)
+            print("LBD saved to the cache: ", path)
+
     pmarray = np.ones(len(nu_grid) + 1)
     pmarray[1::2] = (pmarray[1::2] * -1.0)
     pmarray = jnp.array(pmarray)
@@ -0,0 +1,161 @@
+"""On-disk cache of the line basis density (LBD) used in PreMODIT
+
+    * The cache is content-addressed, i.e. the key is a hash of the (masked) line list and the grid parameters used to generate the LBD.
+    * Each entry is a directory containing one .npy file per array and a manifest (manifest.json), written last.
+    * lbd_coeff is reloaded memory-mapped, so that the OS page cache can be shared between processes.
+
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+#: version of the cache layout. Change it when the layout or the LBD definition changes.
+LBD_CACHE_VERSION = 1
+
+#: arrays stored in a cache entry
+LBD_CACHE_ITEMS = [
+    "lbd_coeff", "multi_index_uniqgrid", "elower_grid", "ngamma_ref_grid",
+    "n_Texp_grid"
+]
+
+_manifest_filename = "manifest.json"
+
+
+def lbd_cache_key(line_strength_ref, nu_lines, elower, ngamma_ref, n_Texp,
+                  nu_grid, elower_grid, ngamma_ref_grid, n_Texp_grid, dE,
+                  Tref, Twt, diffmode):
+    """compute the content-addressed key of the LBD cache
+
+    Args:
+        line_strength_ref: line strength at Tref of the masked lines
+        nu_lines: line centers of the masked lines
+        elower: Elower of the masked lines
+        ngamma_ref: normalized gamma at reference of the masked lines
+        n_Texp: temperature exponent of the masked lines
+        nu_grid: wavenumber grid
+        elower_grid: Elower grid
+        ngamma_ref_grid: normalized gamma at reference grid
+        n_Texp_grid: temperature exponent grid
+        dE: Elower grid interval
+        Tref: reference temperature in Kelvin
+        Twt: temperature for the weight in Kelvin
+        diffmode (int): i-th Taylor expansion is used for the weight
+
+    Returns:
+        str: hex digest (sha256)
+    """
+    h = hashlib.sha256()
+    h.update(("lbd_cache_v" + str(LBD_CACHE_VERSION)).encode())
+    for arr in [
+            line_strength_ref, nu_lines, elower, ngamma_ref, n_Texp, nu_grid,
+            elower_grid, ngamma_ref_grid, n_Texp_grid
+    ]:
+        _update_hash_array(h, arr)
+    for val in [dE, Tref, Twt]:
+        h.update(np.float64(val).tobytes())
+    h.update(str(int(diffmode)).encode())
+    return h.hexdigest()
+
+
+def _update_hash_array(h, arr):
+    a = np.ascontiguousarray(np.asarray(arr, dtype=np.float64))
+    h.update(str(a.shape).encode())
+    h.update(a.tobytes())
+
+
+def lbd_cache_path(cache_dir, key):
+    """path of the cache entry
+
+    Args:
+        cache_dir (str): cache directory
+        key (str): cache key
+
+    Returns:
+        str: path to the cache entry directory
+    """
+    return os.path.join(os.path.expanduser(cache_dir), key)
+
+
+def save_lbd_cache(cache_dir, key, lbd_coeff, multi_index_uniqgrid,
+                   elower_grid, ngamma_ref_grid, n_Texp_grid):
+    """save LBD and grids to the cache directory
+
+    Notes:
+        The entry is first written in a temporary directory and then renamed,
+        so that a concurrent reader never sees a partially written entry.
+
+    Args:
+        cache_dir (str): cache directory
+        key (str): cache key, see lbd_cache_key
+        lbd_coeff: LBD coefficients (diffmode+1, Ng_nu, Ng_broadpar, Ng_elower)
+        multi_index_uniqgrid: multi index of unique broadening parameter grid
+        elower_grid: Elower grid
+        ngamma_ref_grid: normalized gamma at reference grid
+        n_Texp_grid: temperature exponent grid
+
+    Returns:
+        str: path to the cache entry
+    """
+    cache_dir = os.path.expanduser(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = lbd_cache_path(cache_dir, key)
+    if os.path.exists(os.path.join(path, _manifest_filename)):
+        return path
+
+    arrays = dict(
+        zip(LBD_CACHE_ITEMS, [
+            lbd_coeff, multi_index_uniqgrid, elower_grid, ngamma_ref_grid,
+            n_Texp_grid
+        ]))
+    tmpdir = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp_" + key[:8])
+    try:
+        manifest = {"version": LBD_CACHE_VERSION, "key": key, "items": {}}
+        for name, arr in arrays.items():
+            arr = np.asarray(arr)
+            np.save(os.path.join(tmpdir, name + ".npy"), arr)
+            manifest["items"][name] = {
+                "shape": list(arr.shape),
+                "dtype": str(arr.dtype)
+            }
+        with open(os.path.join(tmpdir, _manifest_filename), "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmpdir, path)
+    except OSError:
+        # another process has created the same entry in the meantime
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return path
+
+
+def load_lbd_cache(cache_dir, key, mmap_mode="r"):
+    """load LBD and grids from the cache directory
+
+    Args:
+        cache_dir (str): cache directory
+        key (str): cache key, see lbd_cache_key
+        mmap_mode (str, optional): mmap_mode for lbd_coeff in np.load. Defaults to "r".
+
+    Returns:
+        tuple or None: (lbd_coeff, multi_index_uniqgrid, elower_grid, ngamma_ref_grid, n_Texp_grid) if the entry exists, otherwise None
+    """
+    path = lbd_cache_path(cache_dir, key)
+    manifest_file = os.path.join(path, _manifest_filename)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != LBD_CACHE_VERSION or manifest.get(
+            "key") != key:
+        return None
+
+    loaded = []
+    for name in LBD_CACHE_ITEMS:
+        if name == "lbd_coeff":
+            arr = np.load(os.path.join(path, name + ".npy"),
+                          mmap_mode=mmap_mode)
+        else:
+            arr = np.load(os.path.join(path, name + ".npy"))
+        loaded.append(arr)
+    return tuple(loaded)
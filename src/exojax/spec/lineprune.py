@@ -0,0 +1,146 @@
+"""Temperature-adaptive line pruning
+
+* The lines are ranked by their maximum fractional contribution to the integrated opacity (the sum of the line strengths) in a wavenumber bin over a temperature range.
+* The weakest lines are dropped in each bin as long as the sum of their maximum fractional contributions is below the tolerance,
+  which bounds the lost fraction of the integrated opacity per bin at any temperature on the temperature grid.
+
+"""
+import numpy as np
+from exojax.spec.hitran import line_strength_numpy
+from exojax.utils.constants import Tref_original
+
+
+def pruning_temperature_grid(Trange, nT=16):
+    """temperature grid (log-spaced) used in the line pruning
+
+    Args:
+        Trange (list): temperature range [Tmin, Tmax] in Kelvin
+        nT (int, optional): the number of the temperature grid. Defaults to 16.
+
+    Returns:
+        array: temperature grid in Kelvin
+    """
+    Tmin, Tmax = np.min(Trange), np.max(Trange)
+    if Tmin <= 0.0:
+        raise ValueError("Trange should be positive.")
+    if Tmin == Tmax:
+        return np.array([Tmin])
+    return np.geomspace(Tmin, Tmax, nT)
+
+
+def nu_bin_index_pruning(nu_lines, nu_bin_width):
+    """wavenumber bin index of the lines
+
+    Args:
+        nu_lines (array): line centers in cm-1
+        nu_bin_width (float): wavenumber bin width in cm-1
+
+    Returns:
+        array, int: bin index of the lines, the number of bins
+    """
+    nu0 = np.floor(np.min(nu_lines))
+    bin_index = ((nu_lines - nu0) // nu_bin_width).astype(np.int64)
+    return bin_index, int(np.max(bin_index)) + 1
+
+
+def temperature_range_pruning_mask(line_strength_ref,
+                                   nu_lines,
+                                   elower,
+                                   qr_lines,
+                                   Trange,
+                                   tolerance=1.e-3,
+                                   nu_bin_width=1.0,
+                                   nT=16,
+                                   Tref=Tref_original):
+    """mask of the lines retained by the temperature-adaptive pruning
+
+    Args:
+        line_strength_ref (array): line strength at Tref (Nline)
+        nu_lines (array): line centers in cm-1 (Nline)
+        elower (array): lower state energy in cm-1 (Nline)
+        qr_lines (function): partition function ratio Q(T)/Q(Tref) as a function of T, returning a scalar or an array (Nline)
+        Trange (list): temperature range [Tmin, Tmax] in Kelvin
+        tolerance (float, optional): tolerance of the lost fraction of the integrated opacity per wavenumber bin. Defaults to 1.e-3.
+        nu_bin_width (float, optional): wavenumber bin width in cm-1. Defaults to 1.0.
+        nT (int, optional): the number of the temperature grid. Defaults to 16.
+        Tref (float, optional): reference temperature of line_strength_ref in Kelvin. Defaults to Tref_original.
+
+    Returns:
+        array, dict: mask (Nline), report (see pruning_report)
+    """
+    line_strength_ref = np.asarray(line_strength_ref)
+    nu_lines = np.asarray(nu_lines)
+    elower = np.asarray(elower)
+    Tgrid = pruning_temperature_grid(Trange, nT)
+    bin_index, nbin = nu_bin_index_pruning(nu_lines, nu_bin_width)
+
+    # maximum fractional contribution over the temperature grid
+    max_fraction = np.zeros(len(nu_lines))
+    for T in Tgrid:
+        line_strength = _line_strength_at(T, line_strength_ref, nu_lines,
+                                          elower, qr_lines, Tref)
+        total = np.bincount(bin_index, weights=line_strength, minlength=nbin)
+        total = np.where(total > 0.0, total, 1.0)
+        max_fraction = np.maximum(max_fraction,
+                                  line_strength / total[bin_index])
+
+    # drops the weakest lines in each bin while the cumulative fraction < tolerance
+    order = np.lexsort((max_fraction, bin_index))
+    cumulative = np.cumsum(max_fraction[order])
+    bin_sorted = bin_index[order]
+    bin_start = np.searchsorted(bin_sorted, np.arange(nbin))
+    offset = np.concatenate([[0.0], cumulative])[bin_start]
+    cumulative = cumulative - offset[bin_sorted]
+    mask = np.ones(len(nu_lines), dtype=bool)
+    mask[order] = cumulative > tolerance
+
+    report = pruning_report(mask, line_strength_ref, nu_lines, elower,
+                            qr_lines, Tgrid, bin_index, nbin, Tref)
+    return mask, report
+
+
+def pruning_report(mask, line_strength_ref, nu_lines, elower, qr_lines, Tgrid,
+                   bin_index, nbin, Tref):
+    """report of the line pruning
+
+    Args:
+        mask (array): mask of the retained lines (Nline)
+        line_strength_ref (array): line strength at Tref (Nline)
+        nu_lines (array): line centers in cm-1 (Nline)
+        elower (array): lower state energy in cm-1 (Nline)
+        qr_lines (function): partition function ratio as a function of T
+        Tgrid (array): temperature grid in Kelvin
+        bin_index (array): wavenumber bin index of the lines (Nline)
+        nbin (int): the number of the bins
+        Tref (float): reference temperature of line_strength_ref in Kelvin
+
+    Returns:
+        dict: nline, nline_retained, retained_fraction, temperatures,
+        estimated_error (max lost fraction of the integrated opacity per bin over the temperature grid),
+        and estimated_error_temperatures (that at each temperature)
+    """
+    error_T = []
+    for T in Tgrid:
+        line_strength = _line_strength_at(T, line_strength_ref, nu_lines,
+                                          elower, qr_lines, Tref)
+        total = np.bincount(bin_index, weights=line_strength, minlength=nbin)
+        lost = np.bincount(bin_index,
+                           weights=line_strength * (~mask),
+                           minlength=nbin)
+        error_T.append(np.max(lost / np.where(total > 0.0, total, 1.0)))
+    error_T = np.array(error_T)
+    nline_retained = int(np.sum(mask))
+    return {
+        "nline": len(mask),
+        "nline_retained": nline_retained,
+        "retained_fraction": nline_retained / len(mask),
+        "temperatures": Tgrid,
+        "estimated_error": np.max(error_T),
+        "estimated_error_temperatures": error_T,
+    }
+
+
+def _line_strength_at(T, line_strength_ref, nu_lines, elower, qr_lines, Tref):
+    qr = np.asarray(qr_lines(T))
+    return line_strength_numpy(T, line_strength_ref, nu_lines, elower, qr,
+                               Tref)
@@ -0,0 +1,136 @@
+"""Declarative line filter evaluated chunk by chunk at the database load time
+
+* A load filter is a list of column predicates, (column, operator, value), e.g.
+  [("elower", "<", 5000.0), ("v_u - v_l", "==", 2), ("Sij", ">", 1.e-25)].
+* The column is a column name, an alias (e.g. "nu", "elower", "Sij0") defined by each mdb, a derived quantity (e.g. "Sij", the line strength at Ttyp),
+  or a vaex expression of the columns (e.g. "v_u - v_l").
+* The predicates (and the load mask of mdb, i.e. nurange, crit, elower_max) are evaluated on the row chunks of the (memory-mapped) dataframe,
+  so that only the columns used in the predicates are read for all the rows, and only the surviving rows are kept.
+
+"""
+import numpy as np
+
+#: default number of the rows in a chunk
+DEFAULT_FILTER_CHUNK_SIZE = 1000000
+
+#: operators available in the predicates
+LOAD_FILTER_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "in": np.isin,
+    "not in": lambda values, value: ~np.isin(values, value),
+}
+
+
+def check_load_filter(load_filter):
+    """checks the format of the load filter
+
+    Args:
+        load_filter (list): list of the predicates (column, operator, value)
+
+    Raises:
+        ValueError: if the predicate is not (column, operator, value) or the operator is not available
+
+    Returns:
+        list: load filter as a list of tuples
+    """
+    checked = []
+    for predicate in load_filter:
+        if len(predicate) != 3:
+            raise ValueError("The predicate should be (column, operator, value): " +
+                             str(predicate))
+        column, operator, value = predicate
+        if operator not in LOAD_FILTER_OPERATORS:
+            raise ValueError("Operator " + str(operator) +
+                             " is not available. Use one of " +
+                             str(list(LOAD_FILTER_OPERATORS)))
+        checked.append((column, operator, value))
+    return checked
+
+
+def evaluate_load_filter(df, load_filter, aliases=None, derived=None):
+    """evaluates the load filter on a (chunk of) dataframe
+
+    Args:
+        df (DataFrame): vaex dataframe (chunk)
+        load_filter (list): list of the predicates (column, operator, value)
+        aliases (dict, optional): aliases of the column names, e.g. {"nu": "wav"}. Defaults to None.
+        derived (dict, optional): functions of df giving derived quantities, e.g. {"Sij": function}. Defaults to None.
+
+    Returns:
+        array: mask of the rows
+    """
+    aliases = {} if aliases is None else aliases
+    derived = {} if derived is None else derived
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value in load_filter:
+        if column in derived:
+            values = derived[column](df)
+        else:
+            values = _evaluate(df, aliases.get(column, column))
+        mask &= LOAD_FILTER_OPERATORS[operator](np.asarray(values), value)
+    return mask
+
+
+def filter_dataframe_chunkwise(df,
+                               load_filter,
+                               aliases=None,
+                               derived=None,
+                               base_mask=None,
+                               columns=None,
+                               chunk_size=DEFAULT_FILTER_CHUNK_SIZE):
+    """filters the rows of a (vaex) dataframe chunk by chunk
+
+    Notes:
+        For vaex, the returned dataframe refers to the surviving rows of df (vaex take), i.e. the other rows are never materialised.
+        pandas dataframe (e.g. from a par file) is also accepted.
+
+    Args:
+        df (DataFrame): vaex (or pandas) dataframe of the line list
+        load_filter (list): list of the predicates (column, operator, value)
+        aliases (dict, optional): aliases of the column names. Defaults to None.
+        derived (dict, optional): functions of df giving derived quantities. Defaults to None.
+        base_mask (function, optional): function of df giving an additional mask (e.g. compute_load_mask of mdb). Defaults to None.
+        columns (list, optional): columns to be kept, None for all the columns. Defaults to None.
+        chunk_size (int, optional): the number of the rows in a chunk. Defaults to DEFAULT_FILTER_CHUNK_SIZE.
+
+    Returns:
+        DataFrame: vaex dataframe of the surviving rows
+    """
+    load_filter = check_load_filter(load_filter)
+    nrow = len(df)
+    selected = []
+    for i in range(0, nrow, chunk_size):
+        chunk = _row_slice(df, i, min(i + chunk_size, nrow))
+        mask = evaluate_load_filter(chunk, load_filter, aliases, derived)
+        if base_mask is not None:
+            mask &= np.asarray(base_mask(chunk), dtype=bool)
+        selected.append(np.nonzero(mask)[0] + i)
+    index = np.concatenate(selected) if len(selected) > 0 else np.array(
+        [], dtype=np.int64)
+    print("load filter:", len(index), "/", nrow, "lines selected.")
+    if columns is not None:
+        df = df[list(columns)]
+    if _is_vaex(df):
+        return df.take(index)
+    return df.iloc[index].reset_index(drop=True)
+
+
+def _is_vaex(df):
+    return hasattr(df, "evaluate")
+
+
+def _evaluate(df, expression):
+    if _is_vaex(df):
+        return df.evaluate(expression)
+    return df.eval(expression)
+
+
+def _row_slice(df, start, end):
+    if _is_vaex(df):
+        return df[start:end]
+    return df.iloc[start:end]
@@ -4,6 +4,7 @@
 analysis."""
 
 from jax import jit, vmap
+from jax.lax import map as lax_map
 import jax.numpy as jnp
 from exojax.special.faddeeva import rewofz, imwofz
 from exojax.special.faddeeva import asymptotic_wofz
@@ -284,17 +285,85 @@ def xsmatrix(numatrix, sigmaDM, gammaLM, SijM):
     return vmap(xsvector, (None, 0, 0, 0))(numatrix, sigmaDM, gammaLM, SijM)
 
 
+@jit
+def xsvector_window(nu_offset_grid, nu_offset_lines, neighbor_index,
+                    neighbor_window, sigmaD, gammaL, Sij):
+    """cross section vector of the line-window truncated LPF
+
+    Notes:
+        The Voigt profiles are evaluated only for the neighbor lines of each wavenumber block 
+        and truncated at the line window. Blocks are computed sequentially (lax.map).
+
+    Args:
+        nu_offset_grid: wavenumber grid offset from the block start [Nblock, block_size], see initspec.init_lpf_window
+        nu_offset_lines: line center offset from the block start [Nblock, Nneighbor]
+        neighbor_index: line index of the neighbor list [Nblock, Nneighbor]
+        neighbor_window: line window of the neighbor list [Nblock, Nneighbor], negative for the padding
+        sigmaD: doppler sigma vector in R^Nline
+        gammaL: gamma factor vector in R^Nline
+        Sij: line strength vector in R^Nline
+
+    Returns:
+        cross section vector in R^(Nblock x block_size), remove the padding by [:len(nu_grid)]
+    """
+
+    def xsblock(x):
+        nu_offset_grid_each, nu_offset_lines_each, index_each, window_each = x
+        numatrix = nu_offset_grid_each[None, :] - nu_offset_lines_each[:, None]
+        voigt_each = vvoigt(numatrix, sigmaD[index_each], gammaL[index_each])
+        mask = jnp.abs(numatrix) <= window_each[:, None]
+        return jnp.dot(Sij[index_each], jnp.where(mask, voigt_each, 0.0))
+
+    xs = lax_map(xsblock, (nu_offset_grid, nu_offset_lines, neighbor_index,
+                       neighbor_window))
+    return xs.reshape(-1)
+
+
+@jit
+def xsmatrix_window(nu_offset_grid, nu_offset_lines, neighbor_index,
+                    neighbor_window, sigmaDM, gammaLM, SijM):
+    """cross section matrix of the line-window truncated LPF
+
+    Args:
+        nu_offset_grid: wavenumber grid offset from the block start [Nblock, block_size], see initspec.init_lpf_window
+        nu_offset_lines: line center offset from the block start [Nblock, Nneighbor]
+        neighbor_index: line index of the neighbor list [Nblock, Nneighbor]
+        neighbor_window: line window of the neighbor list [Nblock, Nneighbor], negative for the padding
+        sigmaDM: doppler sigma matrix in R^(Nlayer x Nline)
+        gammaLM: gamma factor matrix in R^(Nlayer x Nline)
+        SijM: line strength matrix in R^(Nlayer x Nline)
+
+    Returns:
+        cross section matrix in R^(Nlayer x (Nblock x block_size)), remove the padding by [:, :len(nu_grid)]
+    """
+    return vmap(xsvector_window, (None, None, None, None, 0, 0, 0),
+                0)(nu_offset_grid, nu_offset_lines, neighbor_index,
+                   neighbor_window, sigmaDM, gammaLM, SijM)
+
+
 from exojax.spec.make_numatrix import make_numatrix0
 import numpy as np
 import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
-def auto_xsection(nu, nu_lines, sigmaD, gammaL, Sij, memory_size=15.):
+def auto_xsection(nu,
+                  nu_lines,
+                  sigmaD,
+                  gammaL,
+                  Sij,
+                  memory_size=15.,
+                  nthreads=None,
+                  devices=None):
     """compute cross section.
 
     Warning:
        This is NOT auto-differentiable function.
 
+    Note:
+       This function calls tiled_xsection. By default, the wavenumber tiles are distributed over all the local jax devices, 
+       with one thread per device (i.e. serial for a single device). Each thread holds a tile of memory_size.
+
     Args:
        nu: wavenumber array
        nu_lines: line center
@@ -302,6 +371,8 @@ def auto_xsection(nu, nu_lines, sigmaD, gammaL, Sij, memory_size=15.):
        gammaL:  broadening coefficient in Lorentz profile 
        Sij: line strength
        memory_size: memory size for numatrix0 (MB)
+       nthreads (int, optional): the number of threads. Defaults to None (the number of devices).
+       devices (list, optional): list of jax devices. Defaults to None (jax.local_devices()).
 
     Returns:
        numpy.array: cross section (xsv)
@@ -325,45 +396,141 @@ def auto_xsection(nu, nu_lines, sigmaD, gammaL, Sij, memory_size=15.):
        >>> xsv=auto_xsection(nus,nu_lines,sigmaD,gammaL,Sij,memory_size=30)
         100%|████████████████████████████████████████████████████| 456/456 [00:03<00:00, 80.59it/s]
     """
-    NL = len(nu_lines)
-    d = int(memory_size/(NL*4/1024./1024.))
-    if d > 0:
-        Ni = int(len(nu)/d)
-        xsv = []
-        for i in tqdm.tqdm(range(0, Ni+1)):
-            s = int(i*d)
-            e = int((i+1)*d)
-            e = min(e, len(nu))
-            numatrix = make_numatrix0(nu[s:e], nu_lines, warning=False)
-            xsv = np.concatenate(
-                [xsv, xsvector(numatrix, sigmaD, gammaL, Sij)])
-    else:
-        NP = int((NL*4/1024./1024.)/memory_size)+1
-        d = int(memory_size/(int(NL/NP)*4/1024./1024.))
-        Ni = int(len(nu)/d)
-        dd = int(NL/NP)
-        xsv = []
-        for i in tqdm.tqdm(range(0, Ni+1)):
-            s = int(i*d)
-            e = int((i+1)*d)
-            e = min(e, len(nu))
-            xsvtmp = np.zeros_like(nu[s:e])
-            for j in range(0, NP+1):
-                ss = int(j*dd)
-                ee = int((j+1)*dd)
-                ee = min(ee, NL)
-                numatrix = make_numatrix0(
-                    nu[s:e], nu_lines[ss:ee], warning=False)
-                xsvtmp = xsvtmp + \
-                    xsvector(numatrix, sigmaD[ss:ee],
-                             gammaL[ss:ee], Sij[ss:ee])
-            xsv = np.concatenate([xsv, xsvtmp])
-
     if(nu.dtype != np.float64):
         warnings.warn('The wavenumber grid is not np.float64 but '+str(nu.dtype),UserWarning)
     if(nu_lines.dtype != np.float64):
         warnings.warn('The line centers (nu_lines) are not np.float64 but '+str(nu.dtype),UserWarning)
 
+    if devices is None:
+        import jax
+        devices = jax.local_devices()
+
+    return tiled_xsection(nu,
+                          nu_lines,
+                          sigmaD,
+                          gammaL,
+                          Sij,
+                          memory_size=memory_size,
+                          nthreads=nthreads,
+                          devices=devices)
 
-    return xsv
 
+@jit
+def _xsvector_tile(nu_offset, line_offset, sigmaD, gammaL, Sij):
+    numatrix = nu_offset[None, :] - line_offset[:, None]
+    return jnp.dot(Sij, vvoigt(numatrix, sigmaD, gammaL))
+
+
+def xsection_tile_shape(nnu, nline, memory_size):
+    """shape of the tile used in tiled_xsection
+
+    Args:
+        nnu (int): the number of the wavenumber grid
+        nline (int): the number of the lines
+        memory_size (float): memory size for a tile of numatrix (MB), assuming 4 bytes per element
+
+    Returns:
+        int, int: the number of the wavenumber grid points, lines in a tile
+    """
+    nelement = max(int(memory_size * 1024. * 1024. / 4.), 1)
+    tile_line = min(nline, nelement)
+    tile_nu = max(1, min(nnu, nelement // tile_line))
+    return tile_nu, tile_line
+
+
+def tiled_xsection(nu,
+                   nu_lines,
+                   sigmaD,
+                   gammaL,
+                   Sij,
+                   memory_size=15.,
+                   nthreads=None,
+                   devices=None,
+                   show_progress=True):
+    """compute cross section by tiles of (wavenumber, line) with a fixed shape, in a thread pool
+
+    Warning:
+       This is NOT auto-differentiable function.
+
+    Note:
+        The tile shape is determined from memory_size (xsection_tile_shape). The tails are padded 
+        (lines with zero line strength), so that a single jit-compiled tile kernel is used. 
+        Each task computes one wavenumber tile summing over the line tiles and writes it into the preallocated output. 
+        The tasks are dispatched to a thread pool and, if devices is given, to the devices in a round-robin manner.
+        Wavenumbers are given to the kernel as offsets from the first wavenumber of the tile (float64 in numpy) to keep the accuracy.
+
+    Args:
+       nu: wavenumber array
+       nu_lines: line center
+       sigmaD: sigma parameter in Doppler profile 
+       gammaL:  broadening coefficient in Lorentz profile 
+       Sij: line strength
+       memory_size: memory size for a tile of numatrix (MB). Defaults to 15.
+       nthreads (int, optional): the number of threads. Defaults to None (the number of devices, or 1).
+       devices (list, optional): list of jax devices, e.g. jax.devices(). Defaults to None (the default device).
+       show_progress (bool, optional): if True, the progress bar is shown. Defaults to True.
+
+    Returns:
+       numpy.array: cross section (xsv)
+    """
+    import jax
+
+    nu = np.asarray(nu, dtype=np.float64)
+    nu_lines = np.asarray(nu_lines, dtype=np.float64)
+    nnu = len(nu)
+    nline = len(nu_lines)
+    tile_nu, tile_line = xsection_tile_shape(nnu, nline, memory_size)
+    nu_tile_number = int(np.ceil(nnu / tile_nu))
+    line_tile_number = int(np.ceil(nline / tile_line))
+
+    nu_padded = np.hstack(
+        [nu, np.full(nu_tile_number * tile_nu - nnu, nu[-1])])
+    nline_pad = line_tile_number * tile_line - nline
+    nu_lines_padded = np.hstack([nu_lines, np.full(nline_pad, nu[0])])
+    line_params = [
+        np.hstack([np.asarray(sigmaD), np.ones(nline_pad)]),
+        np.hstack([np.asarray(gammaL), np.ones(nline_pad)]),
+        np.hstack([np.asarray(Sij), np.zeros(nline_pad)])
+    ]
+    line_params = [
+        arr.reshape((line_tile_number, tile_line)) for arr in line_params
+    ]
+    nu_lines_padded = nu_lines_padded.reshape((line_tile_number, tile_line))
+
+    if nthreads is None:
+        nthreads = 1 if devices is None else len(devices)
+
+    xsv = np.zeros(nu_tile_number * tile_nu)
+
+    def compute_nu_tile(i):
+        s = i * tile_nu
+        nu_start = nu_padded[s]
+        nu_offset = nu_padded[s:s + tile_nu] - nu_start
+        if devices is None:
+            device = None
+        else:
+            device = devices[i % len(devices)]
+        xs_tile = 0.0
+        for j in range(line_tile_number):
+            args = [nu_offset, nu_lines_padded[j] - nu_start] + [
+                arr[j] for arr in line_params
+            ]
+            if device is not None:
+                args = jax.device_put(args, device)
+            xs_tile = xs_tile + _xsvector_tile(*args)
+        xsv[s:s + tile_nu] = np.asarray(xs_tile)
+        return i
+
+    tiles = range(nu_tile_number)
+    if nthreads == 1:
+        for i in tqdm.tqdm(tiles, disable=not show_progress):
+            compute_nu_tile(i)
+    else:
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            futures = [executor.submit(compute_nu_tile, i) for i in tiles]
+            for future in tqdm.tqdm(as_completed(futures),
+                                    total=nu_tile_number,
+                                    disable=not show_progress):
+                future.result()
+
+    return xsv[:nnu]
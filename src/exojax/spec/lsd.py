@@ -5,6 +5,7 @@
 
 """
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from jax.numpy import index_exp
 import jax.numpy as jnp
 from jax import jit
@@ -71,7 +72,8 @@ def npadd3D_direct1D(a,
                      cz,
                      iz,
                      sumx=1.0,
-                     sumz=1.0):
+                     sumz=1.0,
+                     nthreads=None):
     """numpy version: Add into an array when contirbutions and indices are given (2D+direct).
 
     Args:
@@ -85,6 +87,7 @@ def npadd3D_direct1D(a,
         iz: given index for z
         sumx: a sum of contribution for x at point 1 and point 2, default=1.0
         sumz: a sum of contribution for z at point 1 and point 2, default=1.0
+        nthreads: the number of threads for the accumulation, default=None (a single np.bincount, no thread), see npadd_linear
 
     Returns:
         lineshape density a(nx,ny,nz)
@@ -93,17 +96,126 @@ def npadd3D_direct1D(a,
         sumx or sumz gives a sum of contribution at point 1 and point 2. 
         For the zeroth coeeficient, it should be 1.0
         while it should be 0.0 for the first coefficient.
+        The accumulation uses np.bincount of the linear index instead of np.add.at. See npadd_linear.
+        The indices are checked for each axis as np.add.at does for (ix, ix + 1), direct_iy, (iz, iz + 1), 
+        because an out-of-range index along the inner axes would silently wrap into the next row of the linear index.
+        Negative indices are wrapped along each axis as in np.add.at.
 
     """
+    nx, ny, nz = np.shape(a)
+    wrap = _check_index_range(ix, -nx, nx - 1, "x")
+    wrap = _check_index_range(direct_iy, -ny, ny, "y") or wrap
+    wrap = _check_index_range(iz, -nz, nz - 1, "z") or wrap
+    nline = np.size(w)
+    w = np.broadcast_to(w, (nline, ))
+    cx = np.broadcast_to(cx, (nline, ))
+    ix = np.broadcast_to(ix, (nline, ))
+    direct_cy = np.broadcast_to(direct_cy, (nline, ))
+    direct_iy = np.broadcast_to(direct_iy, (nline, ))
+    cz = np.broadcast_to(cz, (nline, ))
+    iz = np.broadcast_to(iz, (nline, ))
+    stride_x = ny * nz
+
+    def linear_index_and_weight(sl):
+        wy = w[sl] * direct_cy[sl]
+        cx_sl = cx[sl]
+        cz_sl = cz[sl]
+        conjugate_cx = sumx - cx_sl
+        conjugate_cz = sumz - cz_sl
+        ix_sl = ix[sl].astype(np.int64)
+        iy_sl = direct_iy[sl]
+        iz_sl = iz[sl]
+        if wrap:
+            ix_sl, ix_next = ix_sl % nx, (ix_sl + 1) % nx
+            iy_sl = iy_sl % ny
+            iz_sl, iz_next = iz_sl % nz, (iz_sl + 1) % nz
+            row = ix_sl * ny + iy_sl
+            row_next = ix_next * ny + iy_sl
+            linear_index = np.concatenate([
+                row * nz + iz_sl, row_next * nz + iz_sl, row * nz + iz_next,
+                row_next * nz + iz_next
+            ])
+        else:
+            base = (ix_sl * ny + iy_sl) * nz + iz_sl
+            linear_index = np.concatenate(
+                [base, base + stride_x, base + 1, base + stride_x + 1])
+        weight = np.concatenate([
+            wy * conjugate_cx * conjugate_cz, wy * cx_sl * conjugate_cz,
+            wy * conjugate_cx * cz_sl, wy * cx_sl * cz_sl
+        ])
+        return linear_index, weight
+
+    return npadd_linear(a, nline, linear_index_and_weight, nthreads=nthreads)
+
+
+def _check_index_range(index, lower, upper, axis):
+    """checks lower <= index < upper along an axis (np.add.at convention), and returns True if there is a negative index"""
+    index = np.asarray(index)
+    if index.size == 0:
+        return False
+    index_min = np.min(index)
+    if index_min < lower or np.max(index) >= upper:
+        raise IndexError("index for " + axis +
+                         " is out of bounds of the LSD array.")
+    return bool(index_min < 0)
+
+
+def npadd_linear(a,
+                 nline,
+                 linear_index_and_weight,
+                 nthreads=None,
+                 chunk_size=None):
+    """numpy version: Add into an array using the linear (flattened) index with np.bincount
 
-    conjugate_cx = sumx - cx
-    conjugate_cz = sumz - cz
+    Args:
+        a: array (np.array), modified in place
+        nline: the number of lines
+        linear_index_and_weight: function that returns the linear index and weight for a slice of lines
+        nthreads: the number of threads (opt-in), default=None (a single thread)
+        chunk_size: the number of lines in a chunk, default=None (nline divided by nthreads)
+
+    Returns:
+        a
+
+    Note:
+        By default, all the lines are accumulated by a single np.bincount, which is faster than np.add.at.
+        When nthreads > 1, the lines are divided into chunks and each thread accumulates np.bincount of its chunks into its own partial buffer with the same size as a.
+        The peak memory is then about 2 x nthreads x a.size (the partial buffers and the bincount outputs) in addition to the index/weight of the chunks, 
+        and the threads pay off only when nline is much larger than a.size. See tests/benchmark/npadd_bm.py.
+        The indices should be checked by the caller for each axis, here only the range of the linear index is checked.
 
-    np.add.at(a, (ix, direct_iy, iz),
-              w * conjugate_cx * direct_cy * conjugate_cz)
-    np.add.at(a, (ix + 1, direct_iy, iz), w * cx * direct_cy * conjugate_cz)
-    np.add.at(a, (ix, direct_iy, iz + 1), w * conjugate_cx * direct_cy * cz)
-    np.add.at(a, (ix + 1, direct_iy, iz + 1), w * cx * direct_cy * cz)
+    """
+    size = a.size
+    if nthreads is None:
+        nthreads = 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-nline // nthreads))
+    slices = [
+        slice(i, min(i + chunk_size, nline))
+        for i in range(0, nline, chunk_size)
+    ]
+    if len(slices) == 0:
+        return a
+    nthreads = max(1, min(nthreads, len(slices)))
+
+    def accumulate(ithread):
+        partial = np.zeros(size, dtype=np.float64)
+        for sl in slices[ithread::nthreads]:
+            linear_index, weight = linear_index_and_weight(sl)
+            if len(linear_index) > 0 and (np.max(linear_index) >= size
+                                          or np.min(linear_index) < 0):
+                raise IndexError("index is out of bounds of the LSD array.")
+            partial += np.bincount(linear_index,
+                                   weights=weight,
+                                   minlength=size)
+        return partial
+
+    if nthreads == 1:
+        total = accumulate(0)
+    else:
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            total = sum(executor.map(accumulate, range(nthreads)))
+    a += total.reshape(np.shape(a))
     return a
 
 
@@ -117,7 +229,9 @@ def npadd3D_multi_index(a,
                         multi_cont_lines,
                         neighbor_uidx,
                         sumx=1.0,
-                        sumz=1.0):
+                        sumz=1.0,
+                        show_progress=True,
+                        nthreads=None):
     """ numpy version: Add into an array using multi_index system in y
     Args:
         a: lineshape density (LSD) array (np.array)
@@ -128,6 +242,8 @@ def npadd3D_multi_index(a,
         iz: given index for z
         sumx: a sum of contribution for x at point 1 and point 2, default=1.0
         sumz: a sum of contribution for z at point 1 and point 2, default=1.0
+        show_progress: if True, the progress bar is shown, default=True
+        nthreads: the number of threads for the accumulation, default=None (a single np.bincount, no thread), see npadd_linear
     
     Returns:
         lineshape density a(nx,ny,nz)
@@ -141,31 +257,68 @@ def npadd3D_multi_index(a,
     """
     conjugate_multi_cont_lines = 1.0 - multi_cont_lines
 
-    print_progress(0, 4, "Making LSD:")
+    if show_progress:
+        print_progress(0, 4, "Making LSD:")
     # index position
     direct_iy = uidx
     direct_cy = np.prod(conjugate_multi_cont_lines, axis=1)
-    a = npadd3D_direct1D(a, w, cx, ix, direct_cy, direct_iy, cz, iz)
-
-    print_progress(1, 4, "Making LSD:")
+    a = npadd3D_direct1D(a,
+                         w,
+                         cx,
+                         ix,
+                         direct_cy,
+                         direct_iy,
+                         cz,
+                         iz,
+                         nthreads=nthreads)
+
+    if show_progress:
+        print_progress(1, 4, "Making LSD:")
     # index position + (1, 0)
     direct_iy = neighbor_uidx[uidx, 0]
     direct_cy = multi_cont_lines[:, 0] * conjugate_multi_cont_lines[:, 1]
-    a = npadd3D_direct1D(a, w, cx, ix, direct_cy, direct_iy, cz, iz)
-
-    print_progress(2, 4, "Making LSD:")
+    a = npadd3D_direct1D(a,
+                         w,
+                         cx,
+                         ix,
+                         direct_cy,
+                         direct_iy,
+                         cz,
+                         iz,
+                         nthreads=nthreads)
+
+    if show_progress:
+        print_progress(2, 4, "Making LSD:")
     # index position + (0, 1)
     direct_iy = neighbor_uidx[uidx, 1]
     direct_cy = conjugate_multi_cont_lines[:, 0] * multi_cont_lines[:, 1]
-    a = npadd3D_direct1D(a, w, cx, ix, direct_cy, direct_iy, cz, iz)
-
-    print_progress(3, 4, "Making LSD:")
+    a = npadd3D_direct1D(a,
+                         w,
+                         cx,
+                         ix,
+                         direct_cy,
+                         direct_iy,
+                         cz,
+                         iz,
+                         nthreads=nthreads)
+
+    if show_progress:
+        print_progress(3, 4, "Making LSD:")
     # index position + (1, 1)
     direct_iy = neighbor_uidx[uidx, 2]
     direct_cy = np.prod(multi_cont_lines, axis=1)
-    a = npadd3D_direct1D(a, w, cx, ix, direct_cy, direct_iy, cz, iz)
+    a = npadd3D_direct1D(a,
+                         w,
+                         cx,
+                         ix,
+                         direct_cy,
+                         direct_iy,
+                         cz,
+                         iz,
+                         nthreads=nthreads)
     
-    print_progress(4, 4, "Making LSD:")
+    if show_progress:
+        print_progress(4, 4, "Making LSD:")
     
     return a
 
@@ -0,0 +1,105 @@
+"""Columnar snapshot of the activated molecular database (mdb)
+
+    * A snapshot is a directory containing one .npy file per column (e.g. nu_lines, elower) and a manifest (manifest.json), written last.
+    * The columns are reloaded memory-mapped, so that the OS page cache can be shared between processes.
+    * The scalar attributes of mdb (molmass, Tref, nurange etc) are stored in the manifest.
+
+"""
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+#: version of the snapshot layout. Change it when the layout changes.
+MDB_SNAPSHOT_VERSION = 1
+
+_manifest_filename = "manifest.json"
+
+
+def save_snapshot(path, classname, columns, attributes):
+    """save the columns and attributes of mdb as a snapshot
+
+    Notes:
+        The snapshot is first written in a temporary directory and then renamed,
+        so that a concurrent reader never sees a partially written snapshot.
+        An existing snapshot at path is replaced.
+
+    Args:
+        path (str): path to the snapshot directory
+        classname (str): class name of mdb, e.g. "MdbExomol"
+        columns (dict): name and 1D/2D arrays
+        attributes (dict): name and JSON-serializable scalars/lists (numpy scalars are converted)
+
+    Returns:
+        str: path to the snapshot
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmpdir = tempfile.mkdtemp(dir=parent,
+                              prefix=".tmp_" + os.path.basename(path))
+    try:
+        manifest = {
+            "version": MDB_SNAPSHOT_VERSION,
+            "class": classname,
+            "attributes": {k: _to_json(v)
+                           for k, v in attributes.items()},
+            "columns": {}
+        }
+        for name, arr in columns.items():
+            arr = np.ascontiguousarray(np.asarray(arr))
+            np.save(os.path.join(tmpdir, name + ".npy"), arr)
+            manifest["columns"][name] = {
+                "shape": list(arr.shape),
+                "dtype": str(arr.dtype)
+            }
+        with open(os.path.join(tmpdir, _manifest_filename), "w") as f:
+            json.dump(manifest, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmpdir, path)
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+    return path
+
+
+def load_snapshot(path, classname, mmap_mode="r"):
+    """load the columns and attributes of mdb from a snapshot
+
+    Args:
+        path (str): path to the snapshot directory
+        classname (str): expected class name of mdb, e.g. "MdbExomol"
+        mmap_mode (str, optional): mmap_mode for the columns in np.load. Defaults to "r".
+
+    Raises:
+        ValueError: no snapshot, version or class mismatch
+
+    Returns:
+        dict, dict: columns, attributes
+    """
+    path = os.path.expanduser(path)
+    manifest_file = os.path.join(path, _manifest_filename)
+    if not os.path.exists(manifest_file):
+        raise ValueError("No snapshot found in " + str(path))
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MDB_SNAPSHOT_VERSION:
+        raise ValueError("Snapshot version mismatch. Recreate the snapshot.")
+    if manifest.get("class") != classname:
+        raise ValueError("The snapshot was made by " +
+                         str(manifest.get("class")) + ", not " + classname)
+    columns = {}
+    for name in manifest["columns"]:
+        columns[name] = np.load(os.path.join(path, name + ".npy"),
+                                mmap_mode=mmap_mode)
+    return columns, manifest["attributes"]
+
+
+def _to_json(value):
+    if hasattr(value, "tolist"):  # numpy/jax arrays and scalars
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
@@ -163,7 +163,7 @@ def exomol(mdb, Tarr, Parr, R, molmass):
         normalized gammaL matrix,
         normalized sigmaD matrix
     """
-    qt = vmap(mdb.qr_interp)(Tarr)
+    qt = mdb.qr_interp_layers(Tarr)
     SijM = jit(vmap(line_strength, (0, None, None, None, 0, None)))(Tarr, mdb.logsij0,
                                                      mdb.dev_nu_lines,
                                                                  mdb.elower, qt, mdb.Tref)
@@ -235,7 +235,7 @@ def hitran(mdb, Tarr, Parr, Pself, R, molmass):
        normalized gammaL matrix,
        normalized sigmaD matrix
     """
-    qt = vmap(mdb.qr_interp_lines)(Tarr)
+    qt = mdb.qr_interp_lines(Tarr)
     SijM = jit(vmap(line_strength, (0, None, None, None, 0, None)))(Tarr, mdb.logsij0,
                                                      mdb.dev_nu_lines,
                                                               mdb.elower, qt, mdb.Tref)
@@ -8,6 +8,7 @@ you should consider to modit_scanfft
 import jax.numpy as jnp
 from jax import jit, vmap
 from jax.lax import scan
+from jax.lax import map as lax_map
 from exojax.spec.ditkernel import fold_voigt_kernel_logst
 from exojax.spec.lsd import inc2D_givenx
 
@@ -26,7 +27,48 @@ def calc_xsection_from_lsd_scanfft(Slsd, R, pmarray, nsigmaD, nu_grid,
     Returns:
         Cross section in the log nu grid
     """
+    Ng_nu = len(nu_grid)
+    fftvalsum = calc_xsection_fourier_from_lsd_scanfft(Slsd, pmarray, nsigmaD,
+                                                       nu_grid,
+                                                       log_ngammaL_grid)
+    return jnp.fft.irfft(fftvalsum)[:Ng_nu] * R / nu_grid
+
+
+def calc_xsection_fourier_from_lsd_scanfft(Slsd, pmarray, nsigmaD, nu_grid,
+                                           log_ngammaL_grid):
+    """Fourier transform of the (unnormalized) cross section from LSD, i.e. the sum of FFT(LSD) x Voigt kernel over the broadening grid
 
+    Note:
+        The inverse FFT is linear, so the Fourier-space values of several LSDs (molecules) can be summed before a single irfft, 
+        see calc_xsection_from_lsd_scanfft for the normalization.
+
+    Args:
+        Slsd: line shape density
+        pmarray: (+1,-1) array whose length of len(nu_grid)+1
+        nsigmaD: normaized Gaussian STD
+        nu_grid: linear wavenumber grid
+        log_gammaL_grid: logarithm of gammaL grid
+
+    Returns:
+        rfft of the cross section (without R/nu_grid), length of len(nu_grid)+1
+    """
+    fftval = _rfft_lsd_scanfft(Slsd)
+    Ng_nu = len(nu_grid)
+    vk = fold_voigt_kernel_logst(jnp.fft.rfftfreq(2 * Ng_nu, 1),
+                                 jnp.log(nsigmaD), log_ngammaL_grid, Ng_nu,
+                                 pmarray)
+    return jnp.sum(fftval * vk, axis=(1, ))
+
+
+def _rfft_lsd_scanfft(Slsd):
+    """zero-padded rfft of LSD along the wavenumber axis, scanned over the broadening grid
+
+    Args:
+        Slsd: line shape density
+
+    Returns:
+        rfft of LSD, (len(nu_grid)+1, N_gammaL)
+    """
     Sbuf = jnp.vstack([Slsd, jnp.zeros_like(Slsd)])
 
     def f(i, x):
@@ -35,14 +77,42 @@ def calc_xsection_from_lsd_scanfft(Slsd, R, pmarray, nsigmaD, nu_grid,
         return i, y
 
     nscan, fftval = scan(f, 0, Sbuf.T)
-    fftval = fftval.T
-    Ng_nu = len(nu_grid)
-    vk = fold_voigt_kernel_logst(jnp.fft.rfftfreq(2 * Ng_nu, 1),
-                                 jnp.log(nsigmaD), log_ngammaL_grid, Ng_nu,
-                                 pmarray)
-    fftvalsum = jnp.sum(fftval * vk, axis=(1, ))
-    return jnp.fft.irfft(fftvalsum)[:Ng_nu] * R / nu_grid
+    return fftval.T
+
+
+def calc_xsection_from_lsd_scanfft_mixed(Slsd, R, pmarray, nsigmaD, nu_grid,
+                                         log_ngammaL_grid):
+    """Compute cross section from LSD using scan+fft, in which the convolution runs in FP32 (mixed precision)
+
+    Note:
+        LSD is rescaled by its maximum before the conversion to FP32 to avoid underflow.
+        The normalization (the maximum, R/nu_grid) is applied in the original precision of Slsd.
+        The error is of the order of the FP32 epsilon relative to the peak of the cross section, 
+        so the relative error can be large in the far wings. See OpaCalc.fft_precision_report.
+
+    Args:
+        Slsd: line shape density
+        R: spectral resolution
+        pmarray: (+1,-1) array whose length of len(nu_grid)+1
+        nsigmaD: normaized Gaussian STD
+        nu_grid: linear wavenumber grid
+        log_gammaL_grid: logarithm of gammaL grid
 
+    Returns:
+        Cross section in the log nu grid
+    """
+    Ng_nu = len(nu_grid)
+    scale = jnp.max(jnp.abs(Slsd))
+    scale = jnp.where(scale > 0.0, scale, 1.0)
+    Slsd32 = (Slsd / scale).astype(jnp.float32)
+    vk = fold_voigt_kernel_logst(
+        jnp.fft.rfftfreq(2 * Ng_nu, 1).astype(jnp.float32),
+        jnp.log(nsigmaD).astype(jnp.float32),
+        log_ngammaL_grid.astype(jnp.float32), Ng_nu,
+        jnp.asarray(pmarray).astype(jnp.float32))
+    fftvalsum = jnp.sum(_rfft_lsd_scanfft(Slsd32) * vk, axis=(1, ))
+    xs = jnp.fft.irfft(fftvalsum)[:Ng_nu].astype(Slsd.dtype)
+    return xs * scale * R / nu_grid
 
 
 @jit
@@ -112,6 +182,30 @@ def xsmatrix_scanfft(cnu, indexnu, R, pmarray, nsigmaDl, ngammaLM, SijM, nu_grid
     return xsm
 
 
+@jit
+def xsmatrix_scanfft_mixed(cnu, indexnu, R, pmarray, nsigmaDl, ngammaLM, SijM,
+                           nu_grid, dgm_ngammaL):
+    """Cross section matrix (MODIT), scan+fft, in which the convolution runs in FP32 (mixed precision)
+
+    Args:
+       see xsmatrix_scanfft
+
+    Return:
+       cross section matrix in R^(Nlayer x Nwav)
+    """
+
+    def fxs(arr):
+        nsigmaD, ngammaL, Sij, ngammaL_grid = arr
+        log_ngammaL_grid = jnp.log(ngammaL_grid)
+        lsd_array = jnp.zeros((len(nu_grid), len(ngammaL_grid)))
+        Slsd = inc2D_givenx(lsd_array, Sij, cnu, indexnu, jnp.log(ngammaL),
+                            log_ngammaL_grid)
+        return calc_xsection_from_lsd_scanfft_mixed(Slsd, R, pmarray, nsigmaD,
+                                                    nu_grid, log_ngammaL_grid)
+
+    return lax_map(fxs, (nsigmaDl[:, 0], ngammaLM, SijM, dgm_ngammaL))
+
+
 @jit
 def xsmatrix_vald_scanfft(cnuS, indexnuS, R, pmarray, nsigmaDlS, ngammaLMS, SijMS,
                   nu_grid, dgm_ngammaLS):
@@ -4,7 +4,6 @@
 import numpy as np
 import jax.numpy as jnp
 import pathlib
-import vaex
 import warnings
 from exojax.spec import atomllapi, atomll
 from exojax.utils.constants import Tref_original
@@ -44,7 +43,7 @@ class AdbVald(object):
         vdWdamp (jnp array):  log of (van der Waals damping constant / neutral hydrogen number) (s-1)
 
         Note:
-           For the first time to read the VALD line list, it is converted to HDF/vaex. After the second-time, we use the HDF5 format with vaex instead.
+           For the first time to read the VALD line list, the transition parameters are cached next to the line list (.atomll.npz). After the second-time, we use the cache instead, as long as the line list is unchanged.
     """
 
     def __init__(self, path, nurange=[-np.inf, np.inf], margin=0.0, crit=0., Irwin=False, gpu_transfer=True, vmr_fraction=None):
@@ -77,17 +76,9 @@ class AdbVald(object):
 
         # load vald file
         print('Reading VALD file')
-        if self.vald3_file.with_suffix('.hdf5').exists():
-            valdd = vaex.open(self.vald3_file.with_suffix('.hdf5'))
-        else:
-            print(
-                "Note: Couldn't find the hdf5 format. We convert data to the hdf5 format.")
-            valdd = atomllapi.read_ExAll(self.vald3_file)  # vaex.DataFrame
-        pvaldd = valdd.to_pandas_df()  # pandas.DataFrame
-
-        # compute additional transition parameters
-        self._A, self.nu_lines, self._elower, self._eupper, self._gupper, self._jlower, self._jupper, self._ielem, self._iion, self._gamRad, self._gamSta, self._vdWdamp = atomllapi.pickup_param(
-            pvaldd)
+        # transition parameters, cached next to the VALD file (see atomllapi.load_vald)
+        self._A, self.nu_lines, self._elower, self._eupper, self._gupper, self._jlower, self._jupper, self._ielem, self._iion, self._gamRad, self._gamSta, self._vdWdamp = atomllapi.load_vald(
+            self.vald3_file)
 
         # load the partition functions (for 284 atomic species)
         pfTdat, self.pfdat = atomllapi.load_pf_Barklem2016()  # Barklem & Collet (2016)
@@ -264,6 +255,32 @@ class AdbVald(object):
         QT_284 = jnp.array(listofQT)
         return QT_284
 
+    def QT_interp_layers(self, Tarr):
+        """partition function of all 284 species for layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+           Tarr: temperature array of layers (Nlayer)
+
+        Returns:
+           Q(T) (Nlayer, 284)
+        """
+        from exojax.spec.pftable import regular_qt_table_cached
+        from exojax.spec.pftable import interp_qt_table
+
+        T0, dT, table = regular_qt_table_cached(self, gQT_name="gQT_284species")
+        return interp_qt_table(Tarr, T0, dT, table)
+
+    def qr_interp_layers(self, Tarr):
+        """partition function ratio of all 284 species for layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+           Tarr: temperature array of layers (Nlayer)
+
+        Returns:
+           qr(T)=Q(T)/Q(Tref) (Nlayer, 284)
+        """
+        return self.QT_interp_layers(Tarr) / self.QT_interp_layers(Tref_original)
+
     def make_QTmask(self, ielem, iion):
         """Convert the species identifier to the index for Q(Tref) grid (gQT)
         for each line.
@@ -307,6 +324,9 @@ class AdbSepVald(object):
         uspecies (jnp array): unique combinations of ielem and iion [N_species x 2(ielem and iion)]
         N_usp (int): number of species (atoms and ions)
         L_max (int): maximum number of spectral lines for a single species
+        species_index (nd array): index of the species in uspecies for each line of adb [N_line]
+        line_order (nd array): line indices of adb sorted by species [N_line]
+        species_offsets (nd array): offsets of the species in line_order [N_species+1], i.e. ragged layout of the lines
         gQT_284species (jnp array): partition function grid of 284 species
         T_gQT (jnp array): temperatures in the partition function grid
     """
@@ -318,24 +338,28 @@ class AdbSepVald(object):
             adb: adb instance made by the AdbVald class, which stores the lines of all species together
 
         """
-        self.nu_lines = atomll.sep_arr_of_sp(
-            adb.nu_lines, adb, trans_jnp=False)
-        self.QTmask = atomll.sep_arr_of_sp(adb.QTmask, adb, inttype=True).T[0]
-
-        self.ielem = atomll.sep_arr_of_sp(adb.ielem, adb, inttype=True).T[0]
-        self.iion = atomll.sep_arr_of_sp(adb.iion, adb, inttype=True).T[0]
-        self.atomicmass = atomll.sep_arr_of_sp(adb.atomicmass, adb).T[0]
-        self.ionE = atomll.sep_arr_of_sp(adb.ionE, adb).T[0]
-
-        self.logsij0 = atomll.sep_arr_of_sp(adb.logsij0, adb)
-        self.dev_nu_lines = atomll.sep_arr_of_sp(adb.dev_nu_lines, adb)
-        self.elower = atomll.sep_arr_of_sp(adb.elower, adb)
-        self.eupper = atomll.sep_arr_of_sp(adb.eupper, adb)
-        self.gamRad = atomll.sep_arr_of_sp(adb.gamRad, adb)
-        self.gamSta = atomll.sep_arr_of_sp(adb.gamSta, adb)
-        self.vdWdamp = atomll.sep_arr_of_sp(adb.vdWdamp, adb)
-
-        self.uspecies = atomll.get_unique_species(adb)
+        uspecies, self.species_index, self.line_order, self.species_offsets = atomll.species_segments(
+            adb.ielem, adb.iion)
+        sep = lambda arr: atomll.species_padded_array(
+            arr, self.species_index, self.line_order, self.species_offsets)
+
+        self.nu_lines = sep(adb.nu_lines)
+        self.QTmask = jnp.array(sep(adb.QTmask), dtype='int32').T[0]
+
+        self.ielem = jnp.array(sep(adb.ielem), dtype='int32').T[0]
+        self.iion = jnp.array(sep(adb.iion), dtype='int32').T[0]
+        self.atomicmass = jnp.array(sep(adb.atomicmass)).T[0]
+        self.ionE = jnp.array(sep(adb.ionE)).T[0]
+
+        self.logsij0 = jnp.array(sep(adb.logsij0))
+        self.dev_nu_lines = jnp.array(sep(adb.dev_nu_lines))
+        self.elower = jnp.array(sep(adb.elower))
+        self.eupper = jnp.array(sep(adb.eupper))
+        self.gamRad = jnp.array(sep(adb.gamRad))
+        self.gamSta = jnp.array(sep(adb.gamSta))
+        self.vdWdamp = jnp.array(sep(adb.vdWdamp))
+
+        self.uspecies = jnp.array(uspecies)
         self.N_usp = len(self.uspecies)
         self.L_max = self.nu_lines.shape[1]
 
@@ -398,7 +422,7 @@ class AdbKurucz(object):
 
         # load kurucz file
         print('Reading Kurucz file')
-        self._A, self.nu_lines, self._elower, self._eupper, self._gupper, self._jlower, self._jupper, self._ielem, self._iion, self._gamRad, self._gamSta, self._vdWdamp = atomllapi.read_kurucz(
+        self._A, self.nu_lines, self._elower, self._eupper, self._gupper, self._jlower, self._jupper, self._ielem, self._iion, self._gamRad, self._gamSta, self._vdWdamp = atomllapi.load_kurucz(
             self.kurucz_file)
 
         # load the partition functions (for 284 atomic species)
@@ -575,6 +599,32 @@ class AdbKurucz(object):
         QT_284 = jnp.array(listofQT)
         return QT_284
 
+    def QT_interp_layers(self, Tarr):
+        """partition function of all 284 species for layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+           Tarr: temperature array of layers (Nlayer)
+
+        Returns:
+           Q(T) (Nlayer, 284)
+        """
+        from exojax.spec.pftable import regular_qt_table_cached
+        from exojax.spec.pftable import interp_qt_table
+
+        T0, dT, table = regular_qt_table_cached(self, gQT_name="gQT_284species")
+        return interp_qt_table(Tarr, T0, dT, table)
+
+    def qr_interp_layers(self, Tarr):
+        """partition function ratio of all 284 species for layers using the regular-grid table (exojax.spec.pftable)
+
+        Args:
+           Tarr: temperature array of layers (Nlayer)
+
+        Returns:
+           qr(T)=Q(T)/Q(Tref) (Nlayer, 284)
+        """
+        return self.QT_interp_layers(Tarr) / self.QT_interp_layers(Tref_original)
+
     def make_QTmask(self, ielem, iion):
         """Convert the species identifier to the index for Q(Tref) grid (gQT)
         for each line.
@@ -164,7 +164,8 @@ class MultiMol():
                           auto_trange,
                           diffmode=2,
                           dit_grid_resolution=0.2,
-                          allow_32bit=False):
+                          allow_32bit=False,
+                          fused=False):
         """multiple opa for PreMODIT
 
         Args:
@@ -173,11 +174,13 @@ class MultiMol():
             auto_trange (optional): temperature range [Tl, Tu], in which line strength is within 1 % prescision. Defaults to None.
             diffmode (int, optional): _description_. Defaults to 2.
             dit_grid_resolution (float, optional): force to set broadening_parameter_resolution={mode:manual, value: dit_grid_resolution}), ignores broadening_parameter_resolution.
+            fused (bool, optional): if True, the opas in each wavenumber segment are fused into OpaPremoditFused. Defaults to False.
             
         Returns:
-            _type_: _description_
+            list of the lists of opa [n_wavenumber_segments, n_molecules], or list of OpaPremoditFused [n_wavenumber_segments] when fused=True
         """
         from exojax.spec.opacalc import OpaPremodit
+        from exojax.spec.opacalc import OpaPremoditFused
         multiopa = []
         for k in range(len(multimdb)):
             opa_k = []
@@ -189,6 +192,8 @@ class MultiMol():
                                     dit_grid_resolution=dit_grid_resolution,
                                     allow_32bit=allow_32bit)
                 opa_k.append(opa_i)
+            if fused:
+                opa_k = OpaPremoditFused(opa_k)
             multiopa.append(opa_k)
 
         return multiopa
@@ -5,7 +5,7 @@ Notes:
 
 """
 
-__all__ = ["OpaPremodit", "OpaModit", "OpaDirect"]
+__all__ = ["OpaPremodit", "OpaPresolar", "OpaPremoditFused", "OpaModit", "OpaDirect", "OpaTable", "OpaCKD"]
 
 from exojax.spec import initspec
 from exojax.spec.lbderror import optimal_params
@@ -32,6 +32,91 @@ class OpaCalc:
         self.method = None  # which opacity calc method is used
         self.ready = False  # ready for opacity computation
 
+    def fft_precision_report(self, Tarr, Parr, tolerance=1.0e-3):
+        """accuracy report of the mixed precision FFT (fft_precision="mixed") against FP64
+
+        Note:
+            The errors are relative to the peak of the FP64 cross section in each layer. 
+            A UserWarning is issued when the maximum error exceeds tolerance.
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+            tolerance (float, optional): tolerance of the maximum error. Defaults to 1.e-3.
+
+        Returns:
+            dict: max_error, max_error_layers (Nlayer), rms_error, and within_tolerance
+        """
+        fft_precision = self.fft_precision
+        try:
+            self.fft_precision = "FP64"
+            xsm_ref = np.asarray(self.xsmatrix(Tarr, Parr))
+            self.fft_precision = "mixed"
+            xsm = np.asarray(self.xsmatrix(Tarr, Parr))
+        finally:
+            self.fft_precision = fft_precision
+
+        peak = np.max(np.abs(xsm_ref), axis=1)
+        peak = np.where(peak > 0.0, peak, 1.0)
+        error = np.abs(xsm - xsm_ref) / peak[:, None]
+        report = {
+            "max_error": np.max(error),
+            "max_error_layers": np.max(error, axis=1),
+            "rms_error": np.sqrt(np.mean(error**2)),
+        }
+        report["within_tolerance"] = bool(report["max_error"] <= tolerance)
+        print("mixed precision FFT: max error =", report["max_error"],
+              "rms error =", report["rms_error"], "(relative to the peak)")
+        if not report["within_tolerance"]:
+            warnings.warn(
+                "The error of the mixed precision FFT exceeds the tolerance: " +
+                str(report["max_error"]) + " > " + str(tolerance),
+                UserWarning,
+            )
+        return report
+
+    def xsmatrix_batch(self, Tarr_batch, Parr_batch, nbatch_chunk=None):
+        """cross section matrices for a batch of T-P profiles
+
+        Note:
+            xsmatrix is vmapped over the profiles. When nbatch_chunk is given, the profiles are evaluated by chunks (lax.map).
+
+        Args:
+            Tarr_batch (2d array): tempearture arrays in K (Nbatch, Nlayer)
+            Parr_batch (1d or 2d array): pressure arrays in bar (Nbatch, Nlayer) or a pressure array common to the batch (Nlayer)
+            nbatch_chunk (int, optional): the number of profiles in a chunk. Defaults to None (all the profiles at once).
+
+        Returns:
+            jnp.array : cross section matrices (Nbatch, Nlayer, N_wavenumber)
+        """
+        from exojax.utils.chunkmap import layer_chunked_map
+
+        Tarr_batch, Parr_batch = _broadcast_profiles(Tarr_batch, Parr_batch)
+        if nbatch_chunk is None:
+            nbatch_chunk = len(Tarr_batch)
+        return layer_chunked_map(vmap(self.xsmatrix), nbatch_chunk, Tarr_batch,
+                                 Parr_batch)
+
+
+def _check_fft_precision(fft_precision):
+    from jax import config
+
+    if fft_precision not in ["FP64", "mixed"]:
+        raise ValueError("fft_precision should be 'FP64' or 'mixed'.")
+    if fft_precision == "mixed" and not config.values["jax_enable_x64"]:
+        warnings.warn(
+            "fft_precision='mixed' has no effect in the JAX 32bit mode.",
+            UserWarning)
+    return fft_precision
+
+
+def _broadcast_profiles(Tarr_batch, Parr_batch):
+    Tarr_batch = jnp.asarray(Tarr_batch)
+    if Tarr_batch.ndim != 2:
+        raise ValueError("Tarr_batch should be (Nbatch, Nlayer).")
+    Parr_batch = jnp.broadcast_to(jnp.asarray(Parr_batch), Tarr_batch.shape)
+    return Tarr_batch, Parr_batch
+
 
 class OpaPremodit(OpaCalc):
     """Opacity Calculator Class for PreMODIT
@@ -52,7 +137,19 @@ class OpaPremodit(OpaCalc):
         dit_grid_resolution=None,
         allow_32bit=False,
         wavelength_order="descending",
-        version_auto_trange=2
+        version_auto_trange=2,
+        lbd_cache_dir=None,
+        nu_block_size=None,
+        lbd_memmap_path=None,
+        lbd_format="dense",
+        sparse_nu_block_size=256,
+        nthreads=None,
+        xsmatrix_memory_budget=None,
+        engine="fft",
+        realspace_wing_accuracy=1.0e-3,
+        realspace_filter_length=None,
+        fft_precision="FP64",
+        checkpoint=None,
     ):
         """initialization of OpaPremodit
 
@@ -81,6 +178,18 @@ class OpaPremodit(OpaCalc):
             allow_32bit (bool, optional): If True, allow 32bit mode of JAX. Defaults to False.
             wavlength order: wavelength order: "ascending" or "descending"
             version_auto_trange: version of the default elower grid trange (degt) file, Default to 2 since Jan 2024.
+            lbd_cache_dir (str, optional): directory of the on-disk LBD cache. If given, LBD is reloaded from the cache when the same line list and grid parameters were used before. Defaults to None (no cache).
+            nu_block_size (int, optional): if given, LBD is built block-by-block along the wavenumber axis (streaming mode), which bounds the host memory use during the LBD construction. Defaults to None.
+            lbd_memmap_path (str, optional): if given with nu_block_size, LBD is written into a memory-mapped .npy file (premodit.generate_lbd), so that the dense LBD is not held in host memory. Defaults to None.
+            lbd_format (str, optional): "dense" or "sparse". When "sparse", the block-sparse LBD is built directly from the lines (the dense LBD is never made) and only the occupied (broadening parameter, Elower) cells are evaluated in xsvector/xsmatrix. Defaults to "dense".
+            sparse_nu_block_size (int, optional): block size along the wavenumber axis for lbd_format="sparse". Defaults to 256.
+            nthreads (int, optional): the number of threads to build LBD, each accumulating the lines into its own partial buffer (lsd.npadd_linear). Worth it only when the number of lines is much larger than the LBD size. Defaults to None (a single thread).
+            xsmatrix_memory_budget (float, optional): device memory budget (byte) for xsmatrix. If given, the layers are evaluated by chunks, whose size is determined from utils.memuse.premodit_devmemory_use. Defaults to None (all the layers at once).
+            engine (str, optional): convolution engine of xsmatrix, "fft", "realspace" (truncated Voigt filters, see spec.redit), or "auto" (chosen by redit.choose_engine). Defaults to "fft".
+            realspace_wing_accuracy (float, optional): allowed fraction of the line profile lost in the truncated wings for the real space engine. Defaults to 1.e-3.
+            realspace_filter_length (int, optional): fixed filter length for the real space engine. If None, determined from Tarr and Parr in each xsmatrix call (Tarr and Parr should not be traced then). Defaults to None.
+            fft_precision (str, optional): precision of the FFT convolution in xsmatrix, "FP64" or "mixed" (FP32 convolution, LBD and the normalization in FP64). See fft_precision_report for the accuracy. Defaults to "FP64".
+            checkpoint (str, optional): rematerialization of xsmatrix in the backward pass (jax.checkpoint), None, "layer" (per layer), or "chunk" (per chunk of xsmatrix_memory_budget, "layer" is used instead if xsmatrix_memory_budget is not given). Defaults to None.
         """
         super().__init__()
         check_jax64bit(allow_32bit)
@@ -98,6 +207,32 @@ class OpaPremodit(OpaCalc):
         self.mdb = mdb
         self.ngrid_broadpar = None
         self.version_auto_trange = version_auto_trange
+        self.lbd_cache_dir = lbd_cache_dir
+        self.nu_block_size = nu_block_size
+        if lbd_memmap_path is not None and nu_block_size is None:
+            raise ValueError("lbd_memmap_path requires nu_block_size.")
+        self.lbd_memmap_path = lbd_memmap_path
+        if lbd_format not in ["dense", "sparse"]:
+            raise ValueError("lbd_format should be 'dense' or 'sparse'.")
+        self.lbd_format = lbd_format
+        self.sparse_nu_block_size = sparse_nu_block_size
+        self.nthreads = nthreads
+        self.lbd_sparse = None
+        self.xsmatrix_memory_budget = xsmatrix_memory_budget
+        if engine not in ["fft", "realspace", "auto"]:
+            raise ValueError("engine should be 'fft', 'realspace', or 'auto'.")
+        self.engine = engine
+        self.realspace_wing_accuracy = realspace_wing_accuracy
+        self.realspace_filter_length = realspace_filter_length
+        self.fft_precision = _check_fft_precision(fft_precision)
+        if checkpoint not in [None, "layer", "chunk"]:
+            raise ValueError("checkpoint should be None, 'layer', or 'chunk'.")
+        if checkpoint == "chunk" and xsmatrix_memory_budget is None:
+            warnings.warn(
+                "checkpoint='chunk' needs xsmatrix_memory_budget. checkpoint='layer' is used instead.",
+                UserWarning)
+            checkpoint = "layer"
+        self.checkpoint = checkpoint
         # check if the mdb lines are in nu_grid
         if is_outside_range(self.mdb.nu_lines, self.nu_grid[0], self.nu_grid[-1]):
             raise ValueError("None of the lines in mdb are within nu_grid.")
@@ -255,6 +390,12 @@ class OpaPremodit(OpaCalc):
             single_broadening=self.single_broadening,
             single_broadening_parameters=self.single_broadening_parameters,
             warning=self.warning,
+            lbd_cache_dir=self.lbd_cache_dir,
+            nu_block_size=self.nu_block_size,
+            lbd_memmap_path=self.lbd_memmap_path,
+            lbd_format=self.lbd_format,
+            sparse_nu_block_size=self.sparse_nu_block_size,
+            nthreads=self.nthreads,
         )
         self.ready = True
 
@@ -270,12 +411,131 @@ class OpaPremodit(OpaCalc):
         self.ngrid_broadpar = len(multi_index_uniqgrid)
         self.ngrid_elower = len(elower_grid)
 
+        if self.lbd_format == "sparse":
+            # the dense LBD is never made in the sparse mode
+            self.lbd_sparse = lbd_coeff
+            self.opainfo = (None,) + tuple(self.opainfo[1:])
+
+    def extend_nu_grid(self, nu_grid, mdb=None):
+        """OpaPremodit for a new (e.g. widened) wavenumber grid, reusing LBD in the overlap
+
+        Notes:
+            nu_grid should have the same ESLOG resolution as self.nu_grid and share the grid points in the overlap.
+            LBD in the overlap is reused and only the lines in the new region (and near the edges of the grids) are binned, see premodit.extend_lbd.
+            If the broadening parameter or Elower grids cannot be extended to cover the new lines, LBD is rebuilt from scratch with a warning.
+
+        Args:
+            nu_grid: new wavenumber grid (cm-1)
+            mdb (mdb class, optional): mdb covering nu_grid. Defaults to None (self.mdb is used).
+
+        Returns:
+            OpaPremodit: opa for nu_grid. self is not changed.
+
+        Examples:
+            >>> opa = OpaPremodit(mdb, nu_grid, auto_trange=[500.0, 1500.0])
+            >>> opa_wide = opa.extend_nu_grid(nu_grid_wide, mdb_wide)
+        """
+        import copy
+        from exojax.spec.premodit import extend_lbd
+        from exojax.spec.premodit import eslog_grid_offset
+
+        if self.lbd_format == "sparse":
+            raise ValueError("extend_nu_grid does not support lbd_format='sparse'.")
+        if self.method == "presolar":
+            raise ValueError("extend_nu_grid does not support OpaPresolar.")
+        if mdb is None:
+            mdb = self.mdb
+        eslog_grid_offset(self.nu_grid, nu_grid)
+        if is_outside_range(mdb.nu_lines, nu_grid[0], nu_grid[-1]):
+            raise ValueError("None of the lines in mdb are within nu_grid.")
+        if mdb.Tref != self.Tref:
+            mdb.change_reference_temperature(self.Tref)
+
+        opa = copy.copy(self)
+        opa.nu_grid = nu_grid
+        opa.wav = nu2wav(nu_grid, wavelength_order=self.wavelength_order, unit="AA")
+        opa.mdb = mdb
+        opa.compute_gamma_ref_and_n_Texp(mdb)
+
+        (
+            lbd_coeff,
+            multi_index_uniqgrid,
+            elower_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            R,
+            pmarray,
+        ) = self.opainfo
+        try:
+            (
+                lbd_coeff,
+                multi_index_uniqgrid,
+                elower_grid,
+                ngamma_ref_grid,
+                n_Texp_grid,
+            ) = extend_lbd(
+                lbd_coeff,
+                multi_index_uniqgrid,
+                elower_grid,
+                ngamma_ref_grid,
+                n_Texp_grid,
+                self.nu_grid,
+                nu_grid,
+                np.asarray(mdb.line_strength_ref),
+                np.asarray(mdb.nu_lines),
+                np.asarray(opa.gamma_ref / mdb.nu_lines * R),
+                np.asarray(opa.n_Texp),
+                np.asarray(mdb.elower),
+                self.Twt,
+                Tref=self.Tref,
+                diffmode=self.diffmode,
+                nthreads=self.nthreads,
+            )
+        except ValueError as e:
+            warnings.warn(str(e) + " LBD is rebuilt from scratch.", UserWarning)
+            opa.apply_params()
+            return opa
+
+        pmarray = np.ones(len(nu_grid) + 1)
+        pmarray[1::2] = pmarray[1::2] * -1.0
+        opa.opainfo = (
+            lbd_coeff,
+            multi_index_uniqgrid,
+            elower_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            R,
+            jnp.array(pmarray),
+        )
+        opa.ngrid_broadpar = len(multi_index_uniqgrid)
+        opa.ngrid_elower = len(elower_grid)
+        return opa
+
     def xsvector(self, T, P):
+        """cross section vector
+
+        Note:
+            For engine="realspace"/"auto" or fft_precision="mixed", the cross section is computed as a single layer of xsmatrix, 
+            so that the same convolution engine and precision are applied.
+
+        Args:
+            T (float): temperature in K
+            P (float): pressure in bar
+
+        Returns:
+            1D array: cross section in cm2
+        """
         from exojax.spec.premodit import xsvector_zeroth
         from exojax.spec.premodit import xsvector_first
         from exojax.spec.premodit import xsvector_second
         from exojax.spec import normalized_doppler_sigma
 
+        if self.engine != "fft" or self.fft_precision != "FP64":
+            Tarr = jnp.array([T])
+            Parr = jnp.array([P])
+            xsmatrix_layers = self._xsmatrix_layers_function(Tarr, Parr)
+            return xsmatrix_layers(Tarr, Parr, self._qtarr(Tarr))[0]
+
         (
             lbd_coeff,
             multi_index_uniqgrid,
@@ -292,7 +552,31 @@ class OpaPremodit(OpaCalc):
         elif self.mdb.dbtype == "exomol":
             qt = self.mdb.qr_interp(T)
 
-        if self.diffmode == 0:
+        if self.lbd_format == "sparse":
+            from exojax.spec.premodit import xsvector_sparse
+
+            lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower = self.lbd_sparse
+            return xsvector_sparse(
+                T,
+                P,
+                nsigmaD,
+                lbd_sparse,
+                occupancy_block,
+                occupancy_broadpar,
+                occupancy_elower,
+                self.Tref,
+                self.Twt,
+                R,
+                pmarray,
+                self.nu_grid,
+                elower_grid,
+                multi_index_uniqgrid,
+                ngamma_ref_grid,
+                n_Texp_grid,
+                qt,
+                self.Tref_broadening,
+            )
+        elif self.diffmode == 0:
             return xsvector_zeroth(
                 T,
                 P,
@@ -349,6 +633,12 @@ class OpaPremodit(OpaCalc):
     def xsmatrix(self, Tarr, Parr):
         """cross section matrix
 
+        Note:
+            When xsmatrix_memory_budget is given, the layers are evaluated by chunks (lax.map), see xsmatrix_nlayer_chunk.
+            The convolution engine (FFT or real space) is chosen by xsmatrix_engine.
+            When checkpoint="layer", the layers are evaluated one by one and each layer is rematerialized in the backward pass,
+            so that the reverse-mode differentiation stores the FFT buffers of a single layer (or a chunk for checkpoint="chunk").
+
         Args:
             Tarr (): tempearture array in K
             Parr (): pressure array in bar
@@ -359,10 +649,230 @@ class OpaPremodit(OpaCalc):
         Returns:
             jnp.array : cross section matrix (Nlayer, N_wavenumber)
         """
+        from exojax.utils.chunkmap import layer_chunked_map
+
+        qtarr = self._qtarr(Tarr)
+        xsmatrix_layers = self._xsmatrix_layers_function(Tarr, Parr)
+        if self.xsmatrix_memory_budget is None and self.checkpoint is None:
+            return xsmatrix_layers(Tarr, Parr, qtarr)
+        if self.checkpoint == "layer":
+            nlayer_chunk = 1
+        else:
+            nlayer_chunk = self.xsmatrix_nlayer_chunk(len(Tarr))
+        return layer_chunked_map(xsmatrix_layers, nlayer_chunk, Tarr, Parr,
+                                 qtarr)
+
+    def xsmatrix_batch(self, Tarr_batch, Parr_batch, nbatch_chunk=None):
+        """cross section matrices for a batch of T-P profiles
+
+        Note:
+            In PreMODIT, the layers of all the profiles are flattened into a single layer axis and evaluated at once, 
+            so the partition functions and the Doppler widths are computed for the whole batch in one go. 
+            The layers are evaluated by chunks of nbatch_chunk profiles if given, 
+            otherwise the chunk size follows xsmatrix_memory_budget as in xsmatrix.
+
+        Args:
+            Tarr_batch (2d array): tempearture arrays in K (Nbatch, Nlayer)
+            Parr_batch (1d or 2d array): pressure arrays in bar (Nbatch, Nlayer) or a pressure array common to the batch (Nlayer)
+            nbatch_chunk (int, optional): the number of profiles in a chunk. Defaults to None.
+
+        Returns:
+            jnp.array : cross section matrices (Nbatch, Nlayer, N_wavenumber)
+        """
+        from exojax.utils.chunkmap import layer_chunked_map
+
+        Tarr_batch, Parr_batch = _broadcast_profiles(Tarr_batch, Parr_batch)
+        nbatch, nlayer = Tarr_batch.shape
+        Tarr = Tarr_batch.reshape(nbatch * nlayer)
+        Parr = Parr_batch.reshape(nbatch * nlayer)
+        if nbatch_chunk is None:
+            xsm = self.xsmatrix(Tarr, Parr)
+        else:
+            xsm = layer_chunked_map(
+                self._xsmatrix_layers_function(Tarr, Parr),
+                nbatch_chunk * nlayer, Tarr, Parr, self._qtarr(Tarr))
+        return xsm.reshape((nbatch, nlayer, -1))
+
+    def _qtarr(self, Tarr):
+        if self.mdb.dbtype == "hitran":
+            return self.mdb.qr_interp_layers(Tarr, self.mdb.isotope)
+        elif self.mdb.dbtype == "exomol":
+            return self.mdb.qr_interp_layers(Tarr)
+
+    def xsmatrix_engine(self, Tarr, Parr):
+        """convolution engine and the filter length of the real space engine used in xsmatrix
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+
+        Raises:
+            ValueError: the filter length cannot be determined from traced Tarr/Parr
+
+        Returns:
+            str, int: "fft" or "realspace", filter length (None for "fft")
+        """
+        from exojax.spec.redit import choose_engine
+        from exojax.spec.redit import realspace_filter_length
+        from exojax.spec import normalized_doppler_sigma
+        from jax.errors import TracerArrayConversionError
+
+        if self.engine == "fft":
+            return "fft", None
+        try:
+            Tarr = np.asarray(Tarr)
+            Parr = np.asarray(Parr)
+        except TracerArrayConversionError:
+            raise ValueError(
+                "Set realspace_filter_length when Tarr/Parr are traced.")
+
+        _, multi_index_uniqgrid, _, ngamma_ref_grid, n_Texp_grid, R, _ = self.opainfo
+        nsigmaD_min = normalized_doppler_sigma(np.min(Tarr),
+                                               self.mdb.molmass, R)
+        filter_length = self.realspace_filter_length
+        if filter_length is None:
+            nsigmaD_max = normalized_doppler_sigma(np.max(Tarr),
+                                                   self.mdb.molmass, R)
+            ngamma_ref_g = ngamma_ref_grid[multi_index_uniqgrid[:, 0]]
+            n_Texp_g = n_Texp_grid[multi_index_uniqgrid[:, 1]]
+            ngammaL_max = np.max(
+                ngamma_ref_g[None, :] *
+                (Tarr[:, None] / self.Tref_broadening)**(-n_Texp_g[None, :]) *
+                Parr[:, None])
+            filter_length = realspace_filter_length(
+                nsigmaD_max, ngammaL_max, self.realspace_wing_accuracy)
+        if self.engine == "auto":
+            engine = choose_engine(filter_length, len(self.nu_grid),
+                                   nsigmaD_min)
+            if engine == "fft":
+                return "fft", None
+        return "realspace", filter_length
+
+    def _xsmatrix_layers_function(self, Tarr, Parr):
+        from functools import partial
+        from exojax.utils.remat import remat
+
+        engine, filter_length = self.xsmatrix_engine(Tarr, Parr)
+        if engine == "fft" and self.fft_precision == "mixed":
+            xsmatrix_layers = self._xsmatrix_layers_mixed
+        elif engine == "fft":
+            xsmatrix_layers = self._xsmatrix_layers
+        else:
+            xsmatrix_layers = partial(self._xsmatrix_layers_realspace,
+                                      filter_length=filter_length)
+        return remat(xsmatrix_layers, self.checkpoint is not None)
+
+    def _xsmatrix_layers_realspace(self, Tarr, Parr, qtarr, filter_length):
+        from exojax.spec.redit import xsmatrix_from_lsd_realspace
+
+        R = self.opainfo[5]
+        Slsd, nsigmaD, log_ngammaL_grid = self.lsd_layers(Tarr, Parr, qtarr)
+        return xsmatrix_from_lsd_realspace(Slsd, R, nsigmaD, self.nu_grid,
+                                           log_ngammaL_grid, filter_length)
+
+    def _xsmatrix_layers_mixed(self, Tarr, Parr, qtarr):
+        from exojax.spec.premodit import xsmatrix_from_lsd_mixed
+
+        R, pmarray = self.opainfo[5:]
+        Slsd, nsigmaD, log_ngammaL_grid = self.lsd_layers(Tarr, Parr, qtarr)
+        return xsmatrix_from_lsd_mixed(Slsd, R, pmarray, nsigmaD, self.nu_grid,
+                                       log_ngammaL_grid)
+
+    def lsd_layers(self, Tarr, Parr, qtarr=None):
+        """unbiased LSD and the Voigt kernel parameters of the layers, i.e. the inputs of the FFT convolution in xsmatrix
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+            qtarr (optional): partition function ratio layers. Defaults to None (computed from Tarr).
+
+        Returns:
+            LSD (Nlayer, N_wavenumber, Ng_broadpar), normalized Doppler STD (Nlayer), log normalized gamma grid (Nlayer, Ng_broadpar)
+        """
+        from exojax.spec.premodit import lsd_matrix
+        from exojax.spec.premodit import lsd_matrix_sparse
+
+        (
+            lbd_coeff,
+            multi_index_uniqgrid,
+            elower_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            R,
+            pmarray,
+        ) = self.opainfo
+        if qtarr is None:
+            qtarr = self._qtarr(Tarr)
+        if self.lbd_format == "sparse":
+            lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower = self.lbd_sparse
+            return lsd_matrix_sparse(
+                Tarr,
+                Parr,
+                self.Tref,
+                self.Twt,
+                R,
+                lbd_sparse,
+                occupancy_block,
+                occupancy_broadpar,
+                occupancy_elower,
+                self.nu_grid,
+                ngamma_ref_grid,
+                n_Texp_grid,
+                multi_index_uniqgrid,
+                elower_grid,
+                self.mdb.molmass,
+                qtarr,
+                self.Tref_broadening,
+            )
+        return lsd_matrix(
+            Tarr,
+            Parr,
+            self.Tref,
+            self.Twt,
+            R,
+            lbd_coeff,
+            self.nu_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            multi_index_uniqgrid,
+            elower_grid,
+            self.mdb.molmass,
+            qtarr,
+            self.Tref_broadening,
+        )
+
+    def xsmatrix_nlayer_chunk(self, nlayer):
+        """the number of layers in a chunk of xsmatrix, from xsmatrix_memory_budget
+
+        Args:
+            nlayer (int): the number of layers
+
+        Returns:
+            int: the number of layers in a chunk
+        """
+        from exojax.utils.memuse import premodit_nlayer_chunk
+        from jax import config
+
+        if self.xsmatrix_memory_budget is None:
+            return nlayer
+        if config.values["jax_enable_x64"]:
+            precision = "FP64"
+        else:
+            precision = "FP32"
+        _, _, elower_grid, _, _, _, _ = self.opainfo
+        return premodit_nlayer_chunk(
+            len(self.nu_grid),
+            self.ngrid_broadpar,
+            len(elower_grid),
+            nlayer,
+            self.xsmatrix_memory_budget,
+            precision=precision,
+        )
+
+    def _xsmatrix_layers(self, Tarr, Parr, qtarr):
         from exojax.spec.premodit import xsmatrix_zeroth
         from exojax.spec.premodit import xsmatrix_first
         from exojax.spec.premodit import xsmatrix_second
-        from jax import vmap
 
         (
             lbd_coeff,
@@ -374,12 +884,31 @@ class OpaPremodit(OpaCalc):
             pmarray,
         ) = self.opainfo
 
-        if self.mdb.dbtype == "hitran":
-            qtarr = vmap(self.mdb.qr_interp, (None, 0))(self.mdb.isotope, Tarr)
-        elif self.mdb.dbtype == "exomol":
-            qtarr = vmap(self.mdb.qr_interp)(Tarr)
+        if self.lbd_format == "sparse":
+            from exojax.spec.premodit import xsmatrix_sparse
 
-        if self.diffmode == 0:
+            lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower = self.lbd_sparse
+            return xsmatrix_sparse(
+                Tarr,
+                Parr,
+                self.Tref,
+                self.Twt,
+                R,
+                pmarray,
+                lbd_sparse,
+                occupancy_block,
+                occupancy_broadpar,
+                occupancy_elower,
+                self.nu_grid,
+                ngamma_ref_grid,
+                n_Texp_grid,
+                multi_index_uniqgrid,
+                elower_grid,
+                self.mdb.molmass,
+                qtarr,
+                self.Tref_broadening,
+            )
+        elif self.diffmode == 0:
             return xsmatrix_zeroth(
                 Tarr,
                 Parr,
@@ -462,6 +991,331 @@ class OpaPremodit(OpaCalc):
         )
 
 
+class OpaPresolar(OpaPremodit):
+    """Opacity Calculator Class for PreSOLAR
+
+    Notes:
+        PreSOLAR shares the LBD with PreMODIT, but the LSD is convolved with a truncated Voigt shape filter 
+        by overlap-and-add (OLA) in mini batches instead of the full-length FFT of modit_scanfft. 
+        This is advantageous for a long wavenumber grid with narrow lines.
+        A single LBD padded along the wavenumber axis by ndiv x div_length + filter_length - 1 - len(nu_grid) is kept on the device, 
+        and each mini batch is cut from it in the scan of xsvector_presolar.
+
+    Attributes:
+        opainfo: information set used in PreSOLAR (the LBD itself is replaced by lbd_coeff_padded)
+        lbd_coeff_padded: LBD coefficients padded for the mini batches (diffmode+1, ndiv x div_length + filter_length - 1, Ng_broadpar, Ng_elower)
+        hat_nu_grid: wavenumber grid in the OLA form (ndiv, fft_length)
+        filter_length: length of the Voigt shape filter
+        ndiv: the number of the mini batches
+        div_length: mini batch length
+
+    """
+
+    def __init__(
+        self,
+        mdb,
+        nu_grid,
+        diffmode=0,
+        broadening_resolution={"mode": "manual", "value": 0.2},
+        auto_trange=None,
+        manual_params=None,
+        dit_grid_resolution=None,
+        allow_32bit=False,
+        wavelength_order="descending",
+        version_auto_trange=2,
+        wavenumber_halfwidth=25.0,
+        lbd_cache_dir=None,
+        nu_block_size=None,
+        lbd_memmap_path=None,
+        nthreads=None,
+        xsmatrix_memory_budget=None,
+    ):
+        """initialization of OpaPresolar
+
+        Note:
+            The Voigt shape filter is truncated at +- wavenumber_halfwidth (cm-1) at the minimum wavenumber of nu_grid. 
+            The filter length is limited by the length of nu_grid. See OpaPremodit for the other arguments.
+
+        Args:
+            mdb (mdb class): mdbExomol, mdbHitemp, mdbHitran
+            nu_grid (): wavenumber grid (cm-1)
+            diffmode (int, optional): _description_. Defaults to 0.
+            broadening_resolution (dict, optional): definition of the broadening parameter resolution. Default to {"mode": "manual", value: 0.2}. See OpaPremodit.
+            auto_trange (optional): temperature range [Tl, Tu], in which line strength is within 1 % prescision. Defaults to None.
+            manual_params (optional): premodit parameter set [dE, Tref, Twt]. Defaults to None.
+            dit_grid_resolution (float, optional): force to set broadening_parameter_resolution={mode:manual, value: dit_grid_resolution}), ignores broadening_parameter_resolution.
+            allow_32bit (bool, optional): If True, allow 32bit mode of JAX. Defaults to False.
+            wavlength order: wavelength order: "ascending" or "descending"
+            version_auto_trange: version of the default elower grid trange (degt) file, Default to 2 since Jan 2024.
+            wavenumber_halfwidth (float, optional): half width of the Voigt shape filter in cm-1. Defaults to 25.0.
+            lbd_cache_dir (str, optional): directory of the on-disk LBD cache. Defaults to None (no cache).
+            nu_block_size (int, optional): if given, LBD is built block-by-block along the wavenumber axis (streaming mode). Defaults to None.
+            lbd_memmap_path (str, optional): if given with nu_block_size, LBD is written into a memory-mapped .npy file. Defaults to None.
+            nthreads (int, optional): the number of threads to build LBD. Defaults to None (a single thread).
+            xsmatrix_memory_budget (float, optional): device memory budget (byte) for xsmatrix. Defaults to None (all the layers at once).
+        """
+        self.wavenumber_halfwidth = wavenumber_halfwidth
+        self.lbd_coeff_padded = None
+        self.hat_nu_grid = None
+        super().__init__(
+            mdb,
+            nu_grid,
+            diffmode=diffmode,
+            broadening_resolution=broadening_resolution,
+            auto_trange=auto_trange,
+            manual_params=manual_params,
+            dit_grid_resolution=dit_grid_resolution,
+            allow_32bit=allow_32bit,
+            wavelength_order=wavelength_order,
+            version_auto_trange=version_auto_trange,
+            lbd_cache_dir=lbd_cache_dir,
+            nu_block_size=nu_block_size,
+            lbd_memmap_path=lbd_memmap_path,
+            nthreads=nthreads,
+            xsmatrix_memory_budget=xsmatrix_memory_budget,
+        )
+        self.method = "presolar"
+
+    def apply_params(self):
+        from exojax.spec.presolar import optimal_mini_batch
+        from exojax.spec.presolar import lbd_coeff_padded
+        from exojax.spec.presolar import nu_grid_olaform
+
+        super().apply_params()
+        self.filter_length = self.compute_filter_length()
+        self.ndiv, self.div_length = optimal_mini_batch(
+            len(self.nu_grid), self.filter_length
+        )
+        # a single mini batch does not need to be longer than nu_grid
+        self.div_length = min(self.div_length, len(self.nu_grid))
+        lbd_coeff = self.opainfo[0]
+        # the LBD is not kept, use lbd_coeff_padded instead
+        self.opainfo = (None,) + tuple(self.opainfo[1:])
+        self.lbd_coeff_padded = jnp.array(
+            lbd_coeff_padded(
+                lbd_coeff, self.ndiv, self.div_length, self.filter_length
+            )
+        )
+        self.hat_nu_grid = jnp.array(
+            nu_grid_olaform(
+                self.nu_grid, self.ndiv, self.div_length, self.filter_length
+            )
+        )
+
+    def compute_filter_length(self):
+        """compute the length of the Voigt shape filter from wavenumber_halfwidth
+
+        Returns:
+            int: filter length (odd)
+        """
+        from exojax.spec.shapefilter import compute_filter_length
+
+        filter_length = compute_filter_length(
+            self.wavenumber_halfwidth, np.min(self.nu_grid), self.resolution
+        )
+        max_filter_length = len(self.nu_grid) - 1 + np.mod(len(self.nu_grid), 2)
+        if filter_length > max_filter_length:
+            warnings.warn(
+                "The shape filter is longer than nu_grid. filter_length is reduced to "
+                + str(max_filter_length),
+                UserWarning,
+            )
+            filter_length = max_filter_length
+        return filter_length
+
+    def xsvector(self, T, P):
+        from exojax.spec.presolar import xsvector_presolar
+        from exojax.spec import normalized_doppler_sigma
+
+        (
+            _,
+            multi_index_uniqgrid,
+            elower_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            R,
+            _,
+        ) = self.opainfo
+        nsigmaD = normalized_doppler_sigma(T, self.mdb.molmass, R)
+
+        if self.mdb.dbtype == "hitran":
+            qt = self.mdb.qr_interp(self.mdb.isotope, T)
+        elif self.mdb.dbtype == "exomol":
+            qt = self.mdb.qr_interp(T)
+
+        return xsvector_presolar(
+            T,
+            P,
+            nsigmaD,
+            self.lbd_coeff_padded,
+            self.Tref,
+            self.Twt,
+            R,
+            self.hat_nu_grid,
+            self.nu_grid,
+            elower_grid,
+            multi_index_uniqgrid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            qt,
+            self.Tref_broadening,
+            self.div_length,
+            self.filter_length,
+        )
+
+    def _xsmatrix_layers(self, Tarr, Parr, qtarr):
+        from exojax.spec.presolar import xsmatrix_presolar
+
+        (
+            _,
+            multi_index_uniqgrid,
+            elower_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            R,
+            _,
+        ) = self.opainfo
+        return xsmatrix_presolar(
+            Tarr,
+            Parr,
+            self.Tref,
+            self.Twt,
+            R,
+            self.lbd_coeff_padded,
+            self.hat_nu_grid,
+            self.nu_grid,
+            ngamma_ref_grid,
+            n_Texp_grid,
+            multi_index_uniqgrid,
+            elower_grid,
+            self.mdb.molmass,
+            qtarr,
+            self.Tref_broadening,
+            self.div_length,
+            self.filter_length,
+        )
+
+
+class OpaPremoditFused(OpaCalc):
+    """Fused Opacity Calculator Class for multiple molecules using PreMODIT
+
+    Notes:
+        OpaPremoditFused computes the sum of the weighted cross section matrices (such as dtau) of the molecules sharing nu_grid.
+        The Fourier transforms of the molecules are summed before a single inverse FFT per layer.
+        Moreover, the LSDs of the molecules with the same Voigt kernel, i.e. the same molecular mass and normalized broadening grid,
+        are summed before the FFT (groups). The other molecules need their own forward FFT because the Doppler width depends on the molecular mass.
+
+    Attributes:
+        opas: list of OpaPremodit
+        groups: list of the indices of opas sharing the Voigt kernel
+
+    """
+
+    def __init__(self, opas):
+        """initialization of OpaPremoditFused
+
+        Args:
+            opas (list): list of OpaPremodit (not OpaPresolar) sharing nu_grid
+
+        Raises:
+            ValueError: no opa, not OpaPremodit, or different nu_grid
+        """
+        super().__init__()
+        if len(opas) == 0:
+            raise ValueError("No opa is given.")
+        for opa in opas:
+            if opa.method != "premodit":
+                raise ValueError("OpaPremoditFused supports only OpaPremodit.")
+            if not np.array_equal(opa.nu_grid, opas[0].nu_grid):
+                raise ValueError("All the opas should share nu_grid.")
+        self.method = "premodit_fused"
+        self.opas = opas
+        self.nu_grid = opas[0].nu_grid
+        self.wavelength_order = opas[0].wavelength_order
+        self.wav = opas[0].wav
+        self.opainfo = opas[0].opainfo[5:]  # R, pmarray
+        self.groups = self.group_opas()
+        self.ready = True
+
+    def group_opas(self):
+        """groups of the opas sharing the Voigt kernel (molecular mass and normalized broadening grid)
+
+        Returns:
+            list: list of the lists of the indices of self.opas
+        """
+        groups = []
+        for i, opa in enumerate(self.opas):
+            for group in groups:
+                if _same_voigt_kernel(self.opas[group[0]], opa):
+                    group.append(i)
+                    break
+            else:
+                groups.append([i])
+        return groups
+
+    def xsmatrix_weighted(self, Tarr, Parr, weights):
+        """sum of the weighted cross section matrices of the molecules
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+            weights (2d array): weights of the molecules (N_opa, Nlayer)
+
+        Returns:
+            jnp.array : sum_i weights[i, :, None] * xsmatrix_i (Nlayer, N_wavenumber)
+        """
+        from exojax.spec.premodit import fourier_xsmatrix_from_lsd
+        from exojax.spec.premodit import xsmatrix_from_fourier
+
+        R, pmarray = self.opainfo
+        weights = jnp.asarray(weights)
+        fourier_xsmatrix = 0.0
+        for group in self.groups:
+            Slsd = 0.0
+            for i in group:
+                Slsd_i, nsigmaD, log_ngammaL_grid = self.opas[i].lsd_layers(
+                    Tarr, Parr)
+                Slsd = Slsd + weights[i][:, None, None] * Slsd_i
+            fourier_xsmatrix = fourier_xsmatrix + fourier_xsmatrix_from_lsd(
+                Slsd, pmarray, nsigmaD, self.nu_grid, log_ngammaL_grid)
+        return xsmatrix_from_fourier(fourier_xsmatrix, R, self.nu_grid)
+
+    def opacity_profile(self, Tarr, Parr, dParr, mixing_ratios, gravity):
+        """summed opacity profile (delta tau) of the molecules
+
+        Note:
+            Unlike art.opacity_profile_xs, the absolute value is not taken for each molecule because the molecules are summed before the inverse FFT.
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+            dParr (): delta pressure profile in bar, such as art.dParr
+            mixing_ratios (2d array): mass mixing ratios of the molecules (N_opa, Nlayer)
+            gravity (float/1D profile): constant or 1d profile of gravity in cgs
+
+        Returns:
+            dtau: opacity profile (Nlayer, N_wavenumber)
+        """
+        from exojax.utils.constants import opfac
+
+        molmass = jnp.array([opa.mdb.molmass for opa in self.opas])
+        weights = opfac * jnp.asarray(mixing_ratios) * dParr / (
+            molmass[:, None] * gravity)
+        return self.xsmatrix_weighted(Tarr, Parr, weights)
+
+
+def _same_voigt_kernel(opa1, opa2):
+    if opa1.mdb.molmass != opa2.mdb.molmass:
+        return False
+    if opa1.Tref_broadening != opa2.Tref_broadening:
+        return False
+    _, multi_index_uniqgrid1, _, ngamma_ref_grid1, n_Texp_grid1, _, _ = opa1.opainfo
+    _, multi_index_uniqgrid2, _, ngamma_ref_grid2, n_Texp_grid2, _, _ = opa2.opainfo
+    return (np.array_equal(multi_index_uniqgrid1, multi_index_uniqgrid2)
+            and np.array_equal(ngamma_ref_grid1, ngamma_ref_grid2)
+            and np.array_equal(n_Texp_grid1, n_Texp_grid2))
+
+
 class OpaModit(OpaCalc):
     """Opacity Calculator Class for MODIT
 
@@ -480,6 +1334,10 @@ class OpaModit(OpaCalc):
         dit_grid_resolution=0.2,
         allow_32bit=False,
         wavelength_order="descending",
+        engine="fft",
+        realspace_wing_accuracy=1.0e-3,
+        realspace_filter_length=None,
+        fft_precision="FP64",
     ):
         """initialization of OpaModit
 
@@ -495,12 +1353,22 @@ class OpaModit(OpaCalc):
             dit_grid_resolution (float, optional): dit grid resolution. Defaxults to 0.2.
             allow_32bit (bool, optional): If True, allow 32bit mode of JAX. Defaults to False.
             wavlength order: wavelength order: "ascending" or "descending"
+            engine (str, optional): convolution engine of xsmatrix, "fft", "realspace" (truncated Voigt filters, see spec.redit), or "auto" (chosen by redit.choose_engine). Defaults to "fft".
+            realspace_wing_accuracy (float, optional): allowed fraction of the line profile lost in the truncated wings for the real space engine. Defaults to 1.e-3.
+            realspace_filter_length (int, optional): fixed filter length for the real space engine. If None, determined from Tarr in each xsmatrix call (Tarr should not be traced then). Defaults to None.
+            fft_precision (str, optional): precision of the FFT convolution in xsmatrix, "FP64" or "mixed" (FP32 convolution). See fft_precision_report for the accuracy. Defaults to "FP64".
 
         Raises:
             ValueError: _description_
         """
         super().__init__()
         check_jax64bit(allow_32bit)
+        if engine not in ["fft", "realspace", "auto"]:
+            raise ValueError("engine should be 'fft', 'realspace', or 'auto'.")
+        self.engine = engine
+        self.realspace_wing_accuracy = realspace_wing_accuracy
+        self.realspace_filter_length = realspace_filter_length
+        self.fft_precision = _check_fft_precision(fft_precision)
 
         # default setting
         self.method = "modit"
@@ -529,6 +1397,9 @@ class OpaModit(OpaCalc):
     def xsvector(self, T, P, Pself=0.0):
         """cross section vector
 
+        Note:
+            The convolution engine and fft_precision are applied as in xsmatrix, using the DIT grid of ngammaL for this (T, P).
+
         Args:
             T (float): temperature
             P (float): pressure in bar
@@ -568,6 +1439,14 @@ class OpaModit(OpaCalc):
         ngammaL_grid = ditgrid_log_interval(
             ngammaL, dit_grid_resolution=self.dit_grid_resolution
         )
+        if self.engine != "fft" or self.fft_precision != "FP64":
+            return self._xsmatrix_dispatch(
+                jnp.array([T]),
+                jnp.array([[nsigmaD]]),
+                ngammaL[None, :],
+                Sij[None, :],
+                jnp.asarray(ngammaL_grid)[None, :],
+            )[0]
         return xsvector_scanfft(
             cont_nu,
             index_nu,
@@ -636,7 +1515,6 @@ class OpaModit(OpaCalc):
         Returns:
             jnp.array : cross section matrix (Nlayer, N_wavenumber)
         """
-        from exojax.spec.modit_scanfft import xsmatrix_scanfft
         from exojax.spec.modit import exomol
         from exojax.spec.modit import hitran
 
@@ -645,12 +1523,49 @@ class OpaModit(OpaCalc):
         if self.mdb.dbtype == "hitran":
             # qtarr = vmap(self.mdb.qr_interp, (None, 0))(self.mdb.isotope, Tarr)
             SijM, ngammaLM, nsigmaDl = hitran(
-                self.mdb, Tarr, Parr, np.zeros_like(Parr), R, self.mdb.molmass
+                self.mdb, Tarr, Parr, jnp.zeros_like(Parr), R, self.mdb.molmass
             )
         elif self.mdb.dbtype == "exomol":
             # qtarr = vmap(self.mdb.qr_interp)(Tarr)
             SijM, ngammaLM, nsigmaDl = exomol(self.mdb, Tarr, Parr, R, self.mdb.molmass)
 
+        return self._xsmatrix_dispatch(
+            Tarr, nsigmaDl, ngammaLM, SijM, self.dgm_ngammaL
+        )
+
+    def _xsmatrix_dispatch(self, Tarr, nsigmaDl, ngammaLM, SijM, dgm_ngammaL):
+        from exojax.spec.modit_scanfft import xsmatrix_scanfft
+
+        cont_nu, index_nu, R, pmarray = self.opainfo
+        engine, filter_length = self.xsmatrix_engine(Tarr, dgm_ngammaL)
+        if engine == "realspace":
+            from exojax.spec.redit import xsmatrix_realspace
+
+            return xsmatrix_realspace(
+                cont_nu,
+                index_nu,
+                R,
+                nsigmaDl,
+                ngammaLM,
+                SijM,
+                self.nu_grid,
+                dgm_ngammaL,
+                filter_length,
+            )
+        elif self.fft_precision == "mixed":
+            from exojax.spec.modit_scanfft import xsmatrix_scanfft_mixed
+
+            return xsmatrix_scanfft_mixed(
+                cont_nu,
+                index_nu,
+                R,
+                pmarray,
+                nsigmaDl,
+                ngammaLM,
+                SijM,
+                self.nu_grid,
+                dgm_ngammaL,
+            )
         return xsmatrix_scanfft(
             cont_nu,
             index_nu,
@@ -660,19 +1575,83 @@ class OpaModit(OpaCalc):
             ngammaLM,
             SijM,
             self.nu_grid,
-            self.dgm_ngammaL,
+            dgm_ngammaL,
         )
 
+    def xsmatrix_engine(self, Tarr, dgm_ngammaL=None):
+        """convolution engine and the filter length of the real space engine used in xsmatrix
+
+        Note:
+            The maximum Lorentz width is taken from the DIT grid matrix (dgm_ngammaL).
+
+        Args:
+            Tarr (): tempearture array in K
+            dgm_ngammaL (optional): DIT grid matrix of ngammaL. Defaults to None (self.dgm_ngammaL).
+
+        Raises:
+            ValueError: the filter length cannot be determined from traced Tarr
+
+        Returns:
+            str, int: "fft" or "realspace", filter length (None for "fft")
+        """
+        from exojax.spec.redit import choose_engine
+        from exojax.spec.redit import realspace_filter_length
+        from exojax.spec import normalized_doppler_sigma
+        from jax.errors import TracerArrayConversionError
+
+        if self.engine == "fft":
+            return "fft", None
+        try:
+            Tarr = np.asarray(Tarr)
+        except TracerArrayConversionError:
+            raise ValueError("Set realspace_filter_length when Tarr is traced.")
+
+        cont_nu, index_nu, R, pmarray = self.opainfo
+        nsigmaD_min = normalized_doppler_sigma(np.min(Tarr), self.mdb.molmass, R)
+        filter_length = self.realspace_filter_length
+        if filter_length is None:
+            nsigmaD_max = normalized_doppler_sigma(
+                np.max(Tarr), self.mdb.molmass, R
+            )
+            if dgm_ngammaL is None:
+                dgm_ngammaL = self.dgm_ngammaL
+            filter_length = realspace_filter_length(
+                nsigmaD_max, np.max(dgm_ngammaL), self.realspace_wing_accuracy
+            )
+        if self.engine == "auto":
+            engine = choose_engine(filter_length, len(self.nu_grid), nsigmaD_min)
+            if engine == "fft":
+                return "fft", None
+        return "realspace", filter_length
+
 
 class OpaDirect(OpaCalc):
-    def __init__(self, mdb, nu_grid, wavelength_order="descending"):
+    def __init__(
+        self,
+        mdb,
+        nu_grid,
+        wavelength_order="descending",
+        line_window=None,
+        line_window_unit="cm-1",
+        block_size=256,
+    ):
         """initialization of OpaDirect (LPF)
 
-
+        Note:
+            When line_window is given, the Voigt profiles are truncated at +- line_window from the line center 
+            and evaluated only for the neighbor lines of each wavenumber block (see initspec.init_lpf_window), 
+            instead of the dense (Nline, Nnu) numatrix.
+            line_window_unit = "cm-1" gives the window in cm-1, 
+            while "gamma_ref" gives it in the unit of the reference Lorentz half width at 1 bar of each line 
+            (gamma_air for HITRAN/HITEMP, alpha_ref for ExoMol).
 
         Args:
             mdb (mdb class): mdbExomol, mdbHitemp, mdbHitran
             nu_grid (): wavenumber grid (cm-1)
+            wavelength_order (str, optional): wavelength order: "ascending" or "descending". Defaults to "descending".
+            line_window (float, optional): half width of the line window. Defaults to None (no truncation, dense numatrix).
+            line_window_unit (str, optional): unit of line_window, "cm-1" or "gamma_ref". Defaults to "cm-1".
+            block_size (int, optional): the number of the wavenumber grid points in a block for line_window. Defaults to 256.
         """
         super().__init__()
 
@@ -685,13 +1664,62 @@ class OpaDirect(OpaCalc):
             self.nu_grid, wavelength_order=self.wavelength_order, unit="AA"
         )
         self.mdb = mdb
+        if line_window_unit not in ["cm-1", "gamma_ref"]:
+            raise ValueError("line_window_unit should be 'cm-1' or 'gamma_ref'.")
+        self.line_window = line_window
+        self.line_window_unit = line_window_unit
+        self.block_size = block_size
         self.apply_params()
 
     def apply_params(self):
         self.dbtype = self.mdb.dbtype
-        self.opainfo = initspec.init_lpf(self.mdb.nu_lines, self.nu_grid)
+        if self.line_window is None:
+            self.opainfo = initspec.init_lpf(self.mdb.nu_lines, self.nu_grid)
+        else:
+            self.opainfo = initspec.init_lpf_window(
+                self.mdb.nu_lines,
+                self.nu_grid,
+                self.line_window_in_cm(),
+                block_size=self.block_size,
+            )
         self.ready = True
 
+    def line_window_in_cm(self):
+        """line window in cm-1 for each line
+
+        Returns:
+            float or array: half width of the line window in cm-1
+        """
+        if self.line_window_unit == "cm-1":
+            return self.line_window
+        if self.mdb.dbtype == "hitran":
+            gamma_ref = self.mdb.gamma_air
+        elif self.mdb.dbtype == "exomol":
+            gamma_ref = self.mdb.alpha_ref
+        else:
+            raise ValueError("line_window_unit = gamma_ref is not available for " + self.mdb.dbtype)
+        return self.line_window * np.asarray(gamma_ref)
+
+    def _xsvector_lines(self, sigmaD, gammaL, Sij):
+        if self.line_window is None:
+            from exojax.spec.lpf import xsvector as xsvector_lpf
+
+            return xsvector_lpf(self.opainfo, sigmaD, gammaL, Sij)
+        from exojax.spec.lpf import xsvector_window
+
+        return xsvector_window(*self.opainfo, sigmaD, gammaL, Sij)[: len(self.nu_grid)]
+
+    def _xsmatrix_lines(self, sigmaDM, gammaLM, SijM):
+        if self.line_window is None:
+            from exojax.spec.lpf import xsmatrix as xsmatrix_lpf
+
+            return xsmatrix_lpf(self.opainfo, sigmaDM, gammaLM, SijM)
+        from exojax.spec.lpf import xsmatrix_window
+
+        return xsmatrix_window(*self.opainfo, sigmaDM, gammaLM, SijM)[
+            :, : len(self.nu_grid)
+        ]
+
     def xsvector(self, T, P, Pself=0.0):
         """cross section vector
 
@@ -708,9 +1736,6 @@ class OpaDirect(OpaCalc):
         from exojax.spec.exomol import gamma_exomol
         from exojax.spec.hitran import gamma_hitran
         from exojax.spec.hitran import line_strength
-        from exojax.spec.lpf import xsvector as xsvector_lpf
-
-        numatrix = self.opainfo
 
         if self.mdb.dbtype == "hitran":
             qt = self.mdb.qr_interp(self.mdb.isotope, T)
@@ -726,7 +1751,7 @@ class OpaDirect(OpaCalc):
         Sij = line_strength(
             T, self.mdb.logsij0, self.mdb.nu_lines, self.mdb.elower, qt, self.mdb.Tref
         )
-        return xsvector_lpf(numatrix, sigmaD, gammaL, Sij)
+        return self._xsvector_lines(sigmaD, gammaL, Sij)
 
     def xsmatrix(self, Tarr, Parr):
         """cross section matrix
@@ -750,18 +1775,15 @@ class OpaDirect(OpaCalc):
         from exojax.spec.hitran import gamma_hitran
         from exojax.spec.hitran import line_strength
         from exojax.spec.atomll import gamma_vald3
-        from exojax.spec.lpf import xsmatrix as xsmatrix_lpf
 
-        numatrix = self.opainfo
         vmaplinestrengh = jit(vmap(line_strength, (0, None, None, None, 0, None)))
         if self.mdb.dbtype == "hitran":
-            vmapqt = vmap(self.mdb.qr_interp, (None, 0))
-            qt = vmapqt(self.mdb.isotope, Tarr)
+            qt = self.mdb.qr_interp_layers(Tarr, self.mdb.isotope)
             vmaphitran = jit(vmap(gamma_hitran, (0, 0, 0, None, None, None)))
             gammaLM = vmaphitran(
                 Parr,
                 Tarr,
-                np.zeros_like(Parr),
+                jnp.zeros_like(Parr),
                 self.mdb.n_air,
                 self.mdb.gamma_air,
                 self.mdb.gamma_self,
@@ -778,8 +1800,7 @@ class OpaDirect(OpaCalc):
                 self.mdb.nu_lines, Tarr, self.mdb.molmass
             )
         elif self.mdb.dbtype == "exomol":
-            vmapqt = vmap(self.mdb.qr_interp)
-            qt = vmapqt(Tarr)
+            qt = self.mdb.qr_interp_layers(Tarr)
             vmapexomol = jit(vmap(gamma_exomol, (0, 0, None, None)))
             gammaLMP = vmapexomol(Parr, Tarr, self.mdb.n_Texp, self.mdb.alpha_ref)
             gammaLMN = gamma_natural(self.mdb.A)
@@ -796,7 +1817,7 @@ class OpaDirect(OpaCalc):
                 self.mdb.nu_lines, Tarr, self.mdb.molmass
             )
         elif (self.mdb.dbtype == "kurucz") or (self.mdb.dbtype == "vald"):
-            qt_284 = vmap(self.mdb.QT_interp_284)(Tarr)
+            qt_284 = self.mdb.QT_interp_layers(Tarr)
             qt_K = jnp.zeros([len(self.mdb.QTmask), len(Tarr)])
             for i, mask in enumerate(self.mdb.QTmask):
                 qt_K = qt_K.at[i].set(qt_284[:, mask])  # e.g., qt_284[:,76] #Fe I
@@ -857,4 +1878,158 @@ class OpaDirect(OpaCalc):
                 self.mdb.nu_lines, Tarr, self.mdb.atomicmass
             )
 
-        return xsmatrix_lpf(numatrix, sigmaDM, gammaLM, SijM)
+        return self._xsmatrix_lines(sigmaDM, gammaLM, SijM)
+
+
+class OpaTable(OpaCalc):
+    """Opacity Calculator Class using a precomputed cross section table on a (T, log P) grid
+
+    Notes:
+        The table is built by xstable.build_xs_table and saved by xstable.save_xs_table.
+        The computational cost does not depend on the number of lines, but T and P should be within the grid
+        (values outside the grid are clamped to the edges).
+
+    Attributes:
+        opainfo: T_grid, logP_grid, xs_table
+
+    """
+
+    def __init__(self, filename, wavelength_order="descending"):
+        """initialization of OpaTable
+
+        Args:
+            filename (str): cross section table file (.npz), see xstable.save_xs_table
+            wavelength_order (str, optional): wavelength order: "ascending" or "descending". Defaults to "descending".
+        """
+        from exojax.spec.xstable import load_xs_table
+
+        super().__init__()
+        self.method = "table"
+        self.filename = filename
+        nu_grid, T_grid, P_grid, xs_table, method_table = load_xs_table(filename)
+        self.nu_grid = nu_grid
+        self.wavelength_order = wavelength_order
+        self.wav = nu2wav(
+            self.nu_grid, wavelength_order=self.wavelength_order, unit="AA"
+        )
+        self.T_grid = T_grid
+        self.P_grid = P_grid
+        self.method_table = method_table
+        print("OpaTable: the table was made by", method_table)
+        print("T range =", T_grid[0], "-", T_grid[-1], "K")
+        print("P range =", P_grid[0], "-", P_grid[-1], "bar")
+        self.opainfo = (
+            jnp.array(T_grid),
+            jnp.array(np.log10(P_grid)),
+            jnp.array(xs_table),
+        )
+        self.ready = True
+
+    def xsvector(self, T, P):
+        """cross section vector
+
+        Args:
+            T (float): temperature in K
+            P (float): pressure in bar
+
+        Returns:
+            jnp.array: cross section vector (N_wavenumber)
+        """
+        return self.xsmatrix(jnp.array([T]), jnp.array([P]))[0]
+
+    def xsmatrix(self, Tarr, Parr):
+        """cross section matrix
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+
+        Returns:
+            jnp.array : cross section matrix (Nlayer, N_wavenumber)
+        """
+        from exojax.spec.xstable import xsmatrix_table
+
+        T_grid, logP_grid, xs_table = self.opainfo
+        return xsmatrix_table(Tarr, Parr, T_grid, logP_grid, xs_table)
+
+
+class OpaCKD(OpaCalc):
+    """Opacity Calculator Class for the correlated-k distribution (CKD)
+
+    Notes:
+        The ck table is built by ckd.build_ck_table and saved by ckd.save_ck_table. 
+        xsmatrix returns the k-distribution (Nlayer, N_bin, N_g) instead of the cross section matrix.
+        Use ArtEmisPure.run_ck to compute the emission spectrum at the bin centers.
+
+    Attributes:
+        opainfo: T_grid, logP_grid, ck_table
+        nu_bin_edges: edges of the wavenumber bins in cm-1
+        nu_bin: center of the wavenumber bins in cm-1
+        g_ordinates: g-ordinates
+        g_weights: weights of the g-ordinates
+
+    """
+
+    def __init__(self, filename):
+        """initialization of OpaCKD
+
+        Args:
+            filename (str): ck table file (.npz), see ckd.save_ck_table
+        """
+        from exojax.spec.ckd import load_ck_table
+
+        super().__init__()
+        self.method = "ckd"
+        self.filename = filename
+        (
+            nu_bin_edges,
+            T_grid,
+            P_grid,
+            ck_table,
+            g_ordinates,
+            g_weights,
+        ) = load_ck_table(filename)
+        self.nu_bin_edges = nu_bin_edges
+        self.nu_bin = 0.5 * (nu_bin_edges[1:] + nu_bin_edges[:-1])
+        self.T_grid = T_grid
+        self.P_grid = P_grid
+        self.g_ordinates = jnp.array(g_ordinates)
+        self.g_weights = jnp.array(g_weights)
+        print("OpaCKD: # of bins =", len(self.nu_bin), ", # of g =", len(g_ordinates))
+        self.opainfo = (
+            jnp.array(T_grid),
+            jnp.array(np.log10(P_grid)),
+            jnp.array(ck_table),
+        )
+        self.ready = True
+
+    def xsmatrix(self, Tarr, Parr):
+        """k-distribution matrix
+
+        Args:
+            Tarr (): tempearture array in K
+            Parr (): pressure array in bar
+
+        Returns:
+            jnp.array : k-distribution matrix (Nlayer, N_bin, N_g)
+        """
+        from exojax.spec.ckd import xsmatrix_ck
+
+        T_grid, logP_grid, ck_table = self.opainfo
+        return xsmatrix_ck(Tarr, Parr, T_grid, logP_grid, ck_table)
+
+    def random_overlap(self, dtau_ck_1, dtau_ck_2):
+        """combine the optical depths of two species by the random overlap approximation
+
+        Args:
+            dtau_ck_1 (array): optical depth of the species 1 (Nlayer, N_bin, N_g)
+            dtau_ck_2 (array): optical depth of the species 2 (Nlayer, N_bin, N_g), with the same g-ordinates
+
+        Returns:
+            array: combined optical depth (Nlayer, N_bin, N_g)
+        """
+        from exojax.spec.ckd import random_overlap_mixing
+
+        return random_overlap_mixing(
+            dtau_ck_1, dtau_ck_2, self.g_ordinates, self.g_weights
+        )
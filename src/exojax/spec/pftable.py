@@ -0,0 +1,126 @@
+"""Regular-grid partition function table
+
+* The partition function tables (T_gQT, gQT) of the databases are resampled on a regular temperature grid,
+  so that the interpolation needs only index arithmetic (O(1)) instead of the search in jnp.interp.
+* The grid is anchored at the maximum temperature with the median interval of the original table,
+  so that the original grid points are reproduced when the original table is (piecewise) regular, e.g. TIPS for HITRAN/HITEMP and ExoMol .pf.
+* The tables are shared by MdbExomol, MdbHitemp/MdbHitran, and AdbVald/AdbKurucz, see qr_interp_layers in each class.
+
+"""
+import numpy as np
+import jax.numpy as jnp
+
+#: maximum number of the regular temperature grid
+QT_TABLE_MAX_SIZE = 100000
+
+
+def regular_qt_table(T_gQT, gQT, dT=None):
+    """resamples the partition function table on a regular temperature grid
+
+    Args:
+        T_gQT (array): temperature grid of the table, (nT_original) or (Nspecies, nT_original)
+        gQT (array): partition function table, (nT_original) or (Nspecies, nT_original)
+        dT (float, optional): temperature interval of the regular grid. Defaults to None (the median interval of T_gQT).
+
+    Returns:
+        float, float, array: T0 (the first temperature), dT, table (nT) or (Nspecies, nT)
+    """
+    T_gQT = np.asarray(T_gQT, dtype=np.float64)
+    gQT = np.asarray(gQT, dtype=np.float64)
+    Tmin = np.min(T_gQT)
+    Tmax = np.max(T_gQT)
+    if dT is None:
+        dT_original = np.diff(T_gQT, axis=-1)
+        dT = np.median(dT_original[dT_original > 0.0])
+    nT = int(np.ceil((Tmax - Tmin) / dT)) + 1
+    if nT > QT_TABLE_MAX_SIZE:
+        nT = QT_TABLE_MAX_SIZE
+        dT = (Tmax - Tmin) / (nT - 1)
+    T0 = Tmax - (nT - 1) * dT
+    Tgrid = T0 + dT * np.arange(nT)
+    if gQT.ndim == 1:
+        table = np.interp(Tgrid, T_gQT, gQT)
+    else:
+        T_gQT = np.broadcast_to(T_gQT, gQT.shape)
+        table = np.array(
+            [np.interp(Tgrid, T_each, q) for T_each, q in zip(T_gQT, gQT)])
+    return T0, dT, table
+
+
+def interp_qt_table(T, T0, dT, table):
+    """partition function from the regular-grid table by linear interpolation
+
+    Notes:
+        T is clipped to the range of the grid, as in jnp.interp.
+
+    Args:
+        T (float or array): temperature in K
+        T0 (float): the first temperature of the grid
+        dT (float): temperature interval of the grid
+        table (array): partition function table (nT) or (Nspecies, nT)
+
+    Returns:
+        array: Q(T), T.shape + (Nspecies,) for the table of (Nspecies, nT)
+    """
+    index, weight = _qt_table_index(T, T0, dT, table)
+    tableT = jnp.moveaxis(table, -1, 0)
+    return tableT[index] * (1.0 - weight) + tableT[index + 1] * weight
+
+
+def interp_qt_table_derivative(T, T0, dT, table):
+    """temperature derivative of the partition function from the regular-grid table
+
+    Notes:
+        This is the analytic derivative of interp_qt_table, i.e. the slope of the segment, and zero outside the grid.
+
+    Args:
+        T (float or array): temperature in K
+        T0 (float): the first temperature of the grid
+        dT (float): temperature interval of the grid
+        table (array): partition function table (nT) or (Nspecies, nT)
+
+    Returns:
+        array: dQ/dT, T.shape + (Nspecies,) for the table of (Nspecies, nT)
+    """
+    T = jnp.asarray(T)
+    nT = jnp.shape(table)[-1]
+    index, _ = _qt_table_index(T, T0, dT, table)
+    tableT = jnp.moveaxis(table, -1, 0)
+    slope = (tableT[index + 1] - tableT[index]) / dT
+    inside = (T >= T0) * (T <= T0 + (nT - 1) * dT)
+    return slope * jnp.reshape(inside, jnp.shape(inside) +
+                               (1, ) * (jnp.ndim(table) - 1))
+
+
+def _qt_table_index(T, T0, dT, table):
+    T = jnp.asarray(T)
+    nT = jnp.shape(table)[-1]
+    x = jnp.clip((T - T0) / dT, 0.0, nT - 1.0)
+    index = jnp.clip(jnp.floor(x).astype(int), 0, nT - 2)
+    weight = x - index
+    weight = jnp.reshape(weight,
+                         jnp.shape(weight) + (1, ) * (jnp.ndim(table) - 1))
+    return index, weight
+
+
+def regular_qt_table_cached(db, T_gQT_name="T_gQT", gQT_name="gQT"):
+    """regular-grid table of the partition function of a database instance, cached in the instance
+
+    Notes:
+        The table is rebuilt when db.T_gQT or db.gQT is replaced (e.g. by activate or prune_lines_trange).
+
+    Args:
+        db: database instance (mdb or adb)
+        T_gQT_name (str, optional): attribute name of the temperature grid. Defaults to "T_gQT".
+        gQT_name (str, optional): attribute name of the partition function table. Defaults to "gQT".
+
+    Returns:
+        float, float, array: T0, dT, table, see regular_qt_table
+    """
+    T_gQT = getattr(db, T_gQT_name)
+    gQT = getattr(db, gQT_name)
+    cache = getattr(db, "_qt_table_cache", None)
+    if cache is None or cache[0] is not T_gQT or cache[1] is not gQT:
+        cache = (T_gQT, gQT, regular_qt_table(T_gQT, gQT))
+        db._qt_table_cache = cache
+    return cache[2]
@@ -9,10 +9,13 @@ from exojax.spec.lsd import npadd3D_multi_index, npadd3D_direct1D
 from exojax.utils.constants import hcperk
 from exojax.utils.constants import Tref_original
 from exojax.spec.modit_scanfft import calc_xsection_from_lsd_scanfft
+from exojax.spec.modit_scanfft import calc_xsection_fourier_from_lsd_scanfft
+from exojax.spec.modit_scanfft import calc_xsection_from_lsd_scanfft_mixed
 from exojax.spec.set_ditgrid import ditgrid_log_interval, ditgrid_linear_interval
 from exojax.utils.indexing import uniqidx_neibouring
 from exojax.spec import normalized_doppler_sigma
 from exojax.spec.lbd import lbd_coefficients
+from exojax.utils.progbar import print_progress
 
 
 @jit
@@ -236,6 +239,222 @@ def xsmatrix_second(Tarr, Parr, Tref, Twt, R, pmarray, lbd_coeff, nu_grid,
     return xsm
 
 
+@jit
+def xsvector_sparse(T, P, nsigmaD, lbd_sparse, occupancy_block,
+                    occupancy_broadpar, occupancy_elower, Tref, Twt, R, pmarray, nu_grid,
+                    elower_grid, multi_index_uniqgrid, ngamma_ref_grid,
+                    n_Texp_grid, qt, Tref_broadening):
+    """compute cross section vector, with scan+fft, using the block-sparse LBD (any diffmode)
+
+    Args:
+        T (_type_): temperature in Kelvin
+        P (_type_): pressure in bar
+        nsigmaD: normalized doplar STD
+        lbd_sparse (_type_): block-sparse LBD, see lbd_to_sparse
+        occupancy_block (_type_): block index of the occupied cells (Ncell)
+        occupancy_broadpar (_type_): broadening parameter index of the occupied cells (Ncell)
+        occupancy_elower (_type_): Elower index of the occupied cells (Ncell)
+        Tref: reference temperature in Kelvin
+        Twt: temperature used in the weight point (not used for diffmode=0)
+        R (_type_): spectral resolution
+        pmarray (_type_): pmarray
+        nu_grid (_type_): wavenumber grid
+        elower_grid (_type_): E lower grid
+        multi_index_uniqgrid (_type_): multi index of unique broadening parameter grid
+        ngamma_ref_grid (_type_): normalized pressure broadening half-width
+        n_Texp_grid (_type_): temperature exponent grid
+        qt (_type_): partirion function ratio
+        Tref_broadening: reference temperature for broadening in Kelvin
+
+    Returns:
+        jnp.array: cross section in cgs vector
+    """
+    Slsd = unbiased_lsd_sparse(lbd_sparse, occupancy_block, occupancy_broadpar,
+                               occupancy_elower, T, Tref, Twt, nu_grid,
+                               elower_grid, qt, len(multi_index_uniqgrid))
+    ngamma_grid = unbiased_ngamma_grid(T, P, ngamma_ref_grid, n_Texp_grid,
+                                       multi_index_uniqgrid, Tref_broadening)
+    log_ngammaL_grid = jnp.log(ngamma_grid)
+    xs = calc_xsection_from_lsd_scanfft(Slsd, R, pmarray, nsigmaD, nu_grid,
+                                        log_ngammaL_grid)
+    return xs
+
+
+@jit
+def xsmatrix_sparse(Tarr, Parr, Tref, Twt, R, pmarray, lbd_sparse,
+                    occupancy_block, occupancy_broadpar, occupancy_elower, nu_grid,
+                    ngamma_ref_grid, n_Texp_grid, multi_index_uniqgrid,
+                    elower_grid, Mmol, qtarr, Tref_broadening):
+    """compute cross section matrix given atmospheric layers, using the block-sparse LBD (any diffmode), with scan+fft
+
+    Args:
+        Tarr (_type_): temperature layers
+        Parr (_type_): pressure layers
+        Tref: reference temperature in K
+        Twt: weight temperature in K (not used for diffmode=0)
+        R (float): spectral resolution
+        pmarray (_type_): pmarray
+        lbd_sparse (_type_): block-sparse LBD, see lbd_to_sparse
+        occupancy_block (_type_): block index of the occupied cells (Ncell)
+        occupancy_broadpar (_type_): broadening parameter index of the occupied cells (Ncell)
+        occupancy_elower (_type_): Elower index of the occupied cells (Ncell)
+        nu_grid (_type_): wavenumber grid
+        ngamma_ref_grid (_type_): normalized half-width grid
+        n_Texp_grid (_type_): temperature exponent grid
+        multi_index_uniqgrid (_type_): multi index for uniq broadpar grid
+        elower_grid (_type_): Elower grid
+        Mmol (_type_): molecular mass
+        qtarr (_type_): partition function ratio layers
+        Tref_broadening: reference temperature for broadening in Kelvin
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    nsigmaD = vmap(normalized_doppler_sigma, (0, None, None), 0)(Tarr, Mmol, R)
+    Ng_broadpar = len(multi_index_uniqgrid)
+    Slsd = vmap(
+        lambda T, qt: unbiased_lsd_sparse(lbd_sparse, occupancy_block,
+                                          occupancy_broadpar,
+                                          occupancy_elower, T, Tref, Twt,
+                                          nu_grid, elower_grid, qt,
+                                          Ng_broadpar), (0, 0), 0)(Tarr, qtarr)
+    ngamma_grid = vmap(unbiased_ngamma_grid, (0, 0, None, None, None, None),
+                       0)(Tarr, Parr, ngamma_ref_grid, n_Texp_grid,
+                          multi_index_uniqgrid, Tref_broadening)
+    log_ngammaL_grid = jnp.log(ngamma_grid)
+    xsm = vmap(calc_xsection_from_lsd_scanfft, (0, None, None, 0, None, 0),
+               0)(Slsd, R, pmarray, nsigmaD, nu_grid, log_ngammaL_grid)
+    return xsm
+
+
+@jit
+def lsd_matrix(Tarr, Parr, Tref, Twt, R, lbd_coeff, nu_grid, ngamma_ref_grid,
+               n_Texp_grid, multi_index_uniqgrid, elower_grid, Mmol, qtarr,
+               Tref_broadening):
+    """compute the unbiased LSD and the Voigt kernel parameters given atmospheric layers (dense LBD, any diffmode)
+
+    Notes:
+        The order of the Taylor expansion (diffmode) is given by the shape of lbd_coeff.
+
+    Args:
+        Tarr (_type_): temperature layers
+        Parr (_type_): pressure layers
+        Tref: reference temperature in K
+        Twt: weight temperature in K (not used for diffmode=0)
+        R (float): spectral resolution
+        lbd_coeff (_type_): LBD coefficients (diffmode + 1, Ng_nu, Ng_broadpar, Ng_elower)
+        nu_grid (_type_): wavenumber grid
+        ngamma_ref_grid (_type_): normalized half-width grid
+        n_Texp_grid (_type_): temperature exponent grid
+        multi_index_uniqgrid (_type_): multi index for uniq broadpar grid
+        elower_grid (_type_): Elower grid
+        Mmol (_type_): molecular mass
+        qtarr (_type_): partition function ratio layers
+        Tref_broadening: reference temperature for broadening in Kelvin
+
+    Returns:
+        LSD (Nlayer, Ng_nu, Ng_broadpar), normalized Doppler STD (Nlayer), log normalized gamma grid (Nlayer, Ng_broadpar)
+    """
+    nsigmaD = vmap(normalized_doppler_sigma, (0, None, None), 0)(Tarr, Mmol, R)
+    ndiff = lbd_coeff.shape[0]
+    if ndiff == 1:
+        Slsd = vmap(unbiased_lsd_zeroth, (None, 0, None, None, None, 0),
+                    0)(lbd_coeff[0], Tarr, Tref, nu_grid, elower_grid, qtarr)
+    elif ndiff == 2:
+        Slsd = vmap(unbiased_lsd_first, (None, 0, None, None, None, None, 0),
+                    0)(lbd_coeff, Tarr, Tref, Twt, nu_grid, elower_grid, qtarr)
+    else:
+        Slsd = vmap(unbiased_lsd_second, (None, 0, None, None, None, None, 0),
+                    0)(lbd_coeff, Tarr, Tref, Twt, nu_grid, elower_grid, qtarr)
+    ngamma_grid = vmap(unbiased_ngamma_grid, (0, 0, None, None, None, None),
+                       0)(Tarr, Parr, ngamma_ref_grid, n_Texp_grid,
+                          multi_index_uniqgrid, Tref_broadening)
+    return Slsd, nsigmaD, jnp.log(ngamma_grid)
+
+
+@jit
+def lsd_matrix_sparse(Tarr, Parr, Tref, Twt, R, lbd_sparse,
+                      occupancy_block, occupancy_broadpar, occupancy_elower, nu_grid,
+                      ngamma_ref_grid, n_Texp_grid, multi_index_uniqgrid,
+                      elower_grid, Mmol, qtarr, Tref_broadening):
+    """compute the unbiased LSD and the Voigt kernel parameters given atmospheric layers, using the block-sparse LBD (any diffmode)
+
+    Args:
+        see xsmatrix_sparse
+
+    Returns:
+        LSD (Nlayer, Ng_nu, Ng_broadpar), normalized Doppler STD (Nlayer), log normalized gamma grid (Nlayer, Ng_broadpar)
+    """
+    nsigmaD = vmap(normalized_doppler_sigma, (0, None, None), 0)(Tarr, Mmol, R)
+    Ng_broadpar = len(multi_index_uniqgrid)
+    Slsd = vmap(
+        lambda T, qt: unbiased_lsd_sparse(lbd_sparse, occupancy_block,
+                                          occupancy_broadpar,
+                                          occupancy_elower, T, Tref, Twt,
+                                          nu_grid, elower_grid, qt,
+                                          Ng_broadpar), (0, 0), 0)(Tarr, qtarr)
+    ngamma_grid = vmap(unbiased_ngamma_grid, (0, 0, None, None, None, None),
+                       0)(Tarr, Parr, ngamma_ref_grid, n_Texp_grid,
+                          multi_index_uniqgrid, Tref_broadening)
+    return Slsd, nsigmaD, jnp.log(ngamma_grid)
+
+
+@jit
+def fourier_xsmatrix_from_lsd(Slsd, pmarray, nsigmaD, nu_grid,
+                              log_ngammaL_grid):
+    """Fourier transform of the (unnormalized) cross section matrix from the LSD of layers
+
+    Args:
+        Slsd: LSD (Nlayer, Ng_nu, Ng_broadpar)
+        pmarray: (+1,-1) array whose length of len(nu_grid)+1
+        nsigmaD: normalized Doppler STD (Nlayer)
+        nu_grid: wavenumber grid
+        log_ngammaL_grid: log normalized gamma grid (Nlayer, Ng_broadpar)
+
+    Returns:
+        complex array (Nlayer, Ng_nu + 1), to be converted by xsmatrix_from_fourier
+    """
+    return vmap(calc_xsection_fourier_from_lsd_scanfft, (0, None, 0, None, 0),
+                0)(Slsd, pmarray, nsigmaD, nu_grid, log_ngammaL_grid)
+
+
+@jit
+def xsmatrix_from_lsd_mixed(Slsd, R, pmarray, nsigmaD, nu_grid,
+                            log_ngammaL_grid):
+    """cross section matrix from the LSD of layers, in which the FFT convolution runs in FP32 (mixed precision)
+
+    Args:
+        Slsd: LSD (Nlayer, Ng_nu, Ng_broadpar)
+        R (float): spectral resolution
+        pmarray: (+1,-1) array whose length of len(nu_grid)+1
+        nsigmaD: normalized Doppler STD (Nlayer)
+        nu_grid: wavenumber grid
+        log_ngammaL_grid: log normalized gamma grid (Nlayer, Ng_broadpar)
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    return vmap(calc_xsection_from_lsd_scanfft_mixed,
+                (0, None, None, 0, None, 0), 0)(Slsd, R, pmarray, nsigmaD,
+                                                 nu_grid, log_ngammaL_grid)
+
+
+@jit
+def xsmatrix_from_fourier(fourier_xsmatrix, R, nu_grid):
+    """cross section matrix from its Fourier transform (a single irfft per layer)
+
+    Args:
+        fourier_xsmatrix: output of fourier_xsmatrix_from_lsd (or the sum of them) (Nlayer, Ng_nu + 1)
+        R (float): spectral resolution
+        nu_grid: wavenumber grid
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    Ng_nu = len(nu_grid)
+    return jnp.fft.irfft(fourier_xsmatrix, axis=-1)[:, :Ng_nu] * R / nu_grid
+
+
 def parallel_merge_grids(grid1, grid2):
     """Merge two different grids into one grid in parallel, in a C-contiguous RAM mapping.
     
@@ -387,7 +606,10 @@ def generate_lbd(line_strength_ref,
                  elower_grid,
                  Twt,
                  Tref=Tref_original,
-                 diffmode=0):
+                 diffmode=0,
+                 nu_block_size=None,
+                 lbd_memmap_path=None,
+                 nthreads=None):
     """generate log-biased line shape density (LBD)
 
     Args:
@@ -403,9 +625,14 @@ def generate_lbd(line_strength_ref,
         Twt: temperature used for the weight coefficient computation 
         Tref: reference temperature in Kelvin, default is 296.0 K
         diffmode (int): i-th Taylor expansion is used for the weight, default is 1.
+        nu_block_size (int, optional): if given, LBD is built block-by-block along the wavenumber axis (streaming mode). Defaults to None.
+        lbd_memmap_path (str, optional): if given (streaming mode only), LBD is written into a memory-mapped .npy file and returned as np.memmap. Defaults to None.
+        nthreads (int, optional): the number of threads for the accumulation of the lines (per-thread partial buffers, see lsd.npadd_linear). Defaults to None (a single np.bincount).
         
     Notes:
         When len(ngamma_ref_grid) = 1 and len(n_Texp_grid) = 1, the single broadening parameter mode is applied.
+        In the streaming mode, the lines are sorted by nu_lines and the work buffer is limited to (nu_block_size + 1, Ng_broadpar, Ng_elower + 1) per Taylor order.
+        The extra bin along the wavenumber axis is carried over to the next block, as required by the npgetix scheme.
 
     Returns:
         [jnp array]: the list of the n-th coeffs of line shape density (LBD)
@@ -421,16 +648,9 @@ def generate_lbd(line_strength_ref,
         
     """
 
-    cont_nu, index_nu = npgetix(nu_lines, nu_grid)
-    single_broadening = _check_single_broadening(
-        ngamma_ref_grid, n_Texp_grid)
-
-    if single_broadening:
-        multi_index_uniqgrid = jnp.array([[0, 0]])
-        Ng_broadpar = 1
-    else:
-        multi_index_lines, multi_cont_lines, uidx_bp, neighbor_uidx, multi_index_uniqgrid, Ng_broadpar = broadpar_getix(
-            ngamma_ref, ngamma_ref_grid, n_Texp, n_Texp_grid)
+    cont_nu, index_nu, coeff_elower, index_elower, broadpar_index, multi_index_uniqgrid, Ng_broadpar = _lbd_line_indices(
+        nu_lines, nu_grid, ngamma_ref, ngamma_ref_grid, n_Texp, n_Texp_grid,
+        elower, elower_grid, Twt, Tref, diffmode)
 
     # We extend the LBD grid to +1 along nu direction.
     #Ng_nu = len(nu_grid)
@@ -439,19 +659,37 @@ def generate_lbd(line_strength_ref,
     # We extend the LBD grid to +1 along elower direction. See Issue #273
     Ng_elower_plus_one = len(elower_grid) + 1
 
-    coeff_elower, index_elower = lbd_coefficients(elower, elower_grid, Tref,
-                                                  Twt, diffmode)
+    if nu_block_size is not None:
+        lbd_coeff = _generate_lbd_nu_blocks(line_strength_ref, nu_lines,
+                                            cont_nu, index_nu, coeff_elower,
+                                            index_elower, broadpar_index,
+                                            len(nu_grid), Ng_broadpar,
+                                            Ng_elower_plus_one, diffmode,
+                                            nu_block_size, lbd_memmap_path,
+                                            nthreads)
+        if lbd_memmap_path is None:
+            lbd_coeff = jnp.array(lbd_coeff)
+        return lbd_coeff, multi_index_uniqgrid
+    elif lbd_memmap_path is not None:
+        raise ValueError("lbd_memmap_path requires nu_block_size.")
 
     lbd_coeff = []
     for idiff in range(diffmode + 1):
         lbd_diff = np.zeros((Ng_nu_plus_one, Ng_broadpar, Ng_elower_plus_one),
                             dtype=np.float64)
 
-        if single_broadening:
-            lbd_diff = npadd3D_direct1D(lbd_diff, line_strength_ref, cont_nu,
-                                        index_nu, 1.0, 0, coeff_elower[idiff],
-                                        index_elower)
+        if broadpar_index is None:
+            lbd_diff = npadd3D_direct1D(lbd_diff,
+                                        line_strength_ref,
+                                        cont_nu,
+                                        index_nu,
+                                        1.0,
+                                        0,
+                                        coeff_elower[idiff],
+                                        index_elower,
+                                        nthreads=nthreads)
         else:
+            uidx_bp, multi_cont_lines, neighbor_uidx = broadpar_index
             lbd_diff = npadd3D_multi_index(lbd_diff,
                                            line_strength_ref,
                                            cont_nu,
@@ -461,7 +699,8 @@ def generate_lbd(line_strength_ref,
                                            uidx_bp,
                                            multi_cont_lines,
                                            neighbor_uidx,
-                                           sumz=1.0)
+                                           sumz=1.0,
+                                           nthreads=nthreads)
         if idiff == 0:
             lbd_diff = convert_to_jnplog(lbd_diff)
         else:
@@ -475,6 +714,196 @@ def generate_lbd(line_strength_ref,
     return lbd_coeff, multi_index_uniqgrid
 
 
+def generate_lbd_sparse(line_strength_ref,
+                        nu_lines,
+                        nu_grid,
+                        ngamma_ref,
+                        ngamma_ref_grid,
+                        n_Texp,
+                        n_Texp_grid,
+                        elower,
+                        elower_grid,
+                        Twt,
+                        Tref=Tref_original,
+                        diffmode=0,
+                        nu_block_size=256,
+                        nthreads=None):
+    """generate the block-sparse LBD directly from the lines, without making the dense LBD
+
+    Notes:
+        The lines are streamed block-by-block along the wavenumber axis as in generate_lbd(nu_block_size=...), 
+        and only the occupied cells of each block are kept. The dense LBD (diffmode + 1, Ng_nu, Ng_broadpar, Ng_elower) never exists.
+        The work buffer is (nu_block_size + 1, Ng_broadpar, Ng_elower + 1) per Taylor order.
+
+    Args:
+        see generate_lbd
+        nu_block_size (int, optional): block size along the wavenumber axis. Defaults to 256.
+        nthreads (int, optional): the number of threads for the accumulation of the lines in each block, see lsd.npadd_linear. Defaults to None (a single np.bincount).
+
+    Returns:
+        tuple: block-sparse LBD (lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower), see lbd_to_sparse
+        jnp.array: multi_index_uniqgrid (number of unique broadpar, 2)
+    """
+    cont_nu, index_nu, coeff_elower, index_elower, broadpar_index, multi_index_uniqgrid, Ng_broadpar = _lbd_line_indices(
+        nu_lines, nu_grid, ngamma_ref, ngamma_ref_grid, n_Texp, n_Texp_grid,
+        elower, elower_grid, Twt, Tref, diffmode)
+    cells = []
+    for iblock, start, end, lbd_block in _lbd_nu_blocks(
+            line_strength_ref, nu_lines, cont_nu, index_nu, coeff_elower,
+            index_elower, broadpar_index, len(nu_grid), Ng_broadpar,
+            len(elower_grid) + 1, diffmode, nu_block_size,
+            "Making sparse LBD:", nthreads):
+        cells.append(_sparse_cells(lbd_block, iblock, nu_block_size))
+    lbd_sparse = _concatenate_sparse_cells(cells, diffmode + 1, nu_block_size,
+                                           len(nu_grid), Ng_broadpar,
+                                           len(elower_grid))
+    return lbd_sparse, multi_index_uniqgrid
+
+
+def _lbd_line_indices(nu_lines, nu_grid, ngamma_ref, ngamma_ref_grid, n_Texp,
+                      n_Texp_grid, elower, elower_grid, Twt, Tref, diffmode):
+    """indices and contributions of the lines on the LBD grid, used in generate_lbd and generate_lbd_sparse
+
+    Returns:
+        cont_nu, index_nu, coeff_elower, index_elower, 
+        broadpar_index ((uidx_bp, multi_cont_lines, neighbor_uidx) or None for the single broadening parameter mode), 
+        multi_index_uniqgrid, Ng_broadpar
+    """
+    cont_nu, index_nu = npgetix(nu_lines, nu_grid)
+    single_broadening = _check_single_broadening(ngamma_ref_grid, n_Texp_grid)
+    if single_broadening:
+        multi_index_uniqgrid = jnp.array([[0, 0]])
+        Ng_broadpar = 1
+        broadpar_index = None
+    else:
+        multi_index_lines, multi_cont_lines, uidx_bp, neighbor_uidx, multi_index_uniqgrid, Ng_broadpar = broadpar_getix(
+            ngamma_ref, ngamma_ref_grid, n_Texp, n_Texp_grid)
+        broadpar_index = (uidx_bp, multi_cont_lines, neighbor_uidx)
+    coeff_elower, index_elower = lbd_coefficients(elower, elower_grid, Tref,
+                                                  Twt, diffmode)
+    return cont_nu, index_nu, coeff_elower, index_elower, broadpar_index, multi_index_uniqgrid, Ng_broadpar
+
+
+def _generate_lbd_nu_blocks(line_strength_ref, nu_lines, cont_nu, index_nu,
+                            coeff_elower, index_elower, broadpar_index,
+                            Ng_nu, Ng_broadpar, Ng_elower_plus_one, diffmode,
+                            nu_block_size, lbd_memmap_path, nthreads=None):
+    """streaming mode of generate_lbd, building LBD block-by-block along the wavenumber axis
+
+    Args:
+        line_strength_ref: line strength at reference temperature
+        nu_lines: line centers
+        cont_nu: contribution of wavenumber (npgetix)
+        index_nu: index of wavenumber (npgetix)
+        coeff_elower: list of the coefficients of the weight (lbd_coefficients)
+        index_elower: index of Elower (lbd_coefficients)
+        broadpar_index: (uidx_bp, multi_cont_lines, neighbor_uidx) or None for the single broadening parameter mode
+        Ng_nu (int): the number of the wavenumber grid
+        Ng_broadpar (int): the number of the broadening parameter grid
+        Ng_elower_plus_one (int): the number of the Elower grid + 1
+        diffmode (int): i-th Taylor expansion is used for the weight
+        nu_block_size (int): block size along the wavenumber axis
+        lbd_memmap_path (str): path to the output .npy file, or None (in memory)
+        nthreads (int, optional): the number of threads for the accumulation of the lines in each block, see lsd.npadd_linear. Defaults to None.
+
+    Returns:
+        ndarray: LBD coefficient (diffmode + 1, Ng_nu, Ng_broadpar, Ng_elower) (np.memmap if lbd_memmap_path is given)
+    """
+    output_shape = (diffmode + 1, Ng_nu, Ng_broadpar, Ng_elower_plus_one - 1)
+    if lbd_memmap_path is None:
+        lbd_out = np.empty(output_shape, dtype=np.float64)
+    else:
+        lbd_out = np.lib.format.open_memmap(lbd_memmap_path,
+                                            mode="w+",
+                                            dtype=np.float64,
+                                            shape=output_shape)
+
+    for iblock, start, end, lbd_block in _lbd_nu_blocks(
+            line_strength_ref, nu_lines, cont_nu, index_nu, coeff_elower,
+            index_elower, broadpar_index, Ng_nu, Ng_broadpar,
+            Ng_elower_plus_one, diffmode, nu_block_size,
+            "Making LBD (streaming):", nthreads):
+        lbd_out[:, start:end, :, :] = lbd_block
+
+    if lbd_memmap_path is not None:
+        lbd_out.flush()
+    return lbd_out
+
+
+def _lbd_nu_blocks(line_strength_ref, nu_lines, cont_nu, index_nu,
+                   coeff_elower, index_elower, broadpar_index, Ng_nu,
+                   Ng_broadpar, Ng_elower_plus_one, diffmode, nu_block_size,
+                   progress_label, nthreads=None):
+    """generator of the LBD blocks along the wavenumber axis (see _generate_lbd_nu_blocks for the arguments)
+
+    Yields:
+        iblock, start, end, LBD block (diffmode + 1, end - start, Ng_broadpar, Ng_elower)
+    """
+    if nu_block_size < 1:
+        raise ValueError("nu_block_size should be a positive integer.")
+
+    order = np.argsort(nu_lines, kind="stable")
+    index_nu_sorted = index_nu[order]
+    carry = np.zeros((diffmode + 1, Ng_broadpar, Ng_elower_plus_one),
+                     dtype=np.float64)
+    nblock = (Ng_nu - 1) // nu_block_size + 1
+    for iblock in range(nblock):
+        print_progress(iblock, nblock, progress_label)
+        start = iblock * nu_block_size
+        end = min(start + nu_block_size, Ng_nu)
+        istart, iend = np.searchsorted(index_nu_sorted, [start, end])
+        lines = order[istart:iend]
+        lbd_diffs = []
+        for idiff in range(diffmode + 1):
+            # one extra bin is the overlap with the next block
+            lbd_block = np.zeros((end - start + 1, Ng_broadpar,
+                                  Ng_elower_plus_one),
+                                 dtype=np.float64)
+            lbd_block[0] += carry[idiff]
+            if len(lines) > 0:
+                lbd_block = _add_lines_to_lbd_block(
+                    lbd_block, line_strength_ref[lines], cont_nu[lines],
+                    index_nu[lines] - start, coeff_elower[idiff][lines],
+                    index_elower[lines], broadpar_index, lines, nthreads)
+            carry[idiff] = lbd_block[-1]
+            lbd_block = lbd_block[:-1]
+            if idiff == 0:
+                lbd_block = convert_to_log(lbd_block)
+            else:
+                lbd_block = lbd_block[:, :, 0:-1]
+            lbd_diffs.append(lbd_block)
+        yield iblock, start, end, np.array(lbd_diffs)
+    print_progress(nblock, nblock, progress_label)
+
+
+def _add_lines_to_lbd_block(lbd_block, line_strength_ref, cont_nu, index_nu,
+                            coeff_elower, index_elower, broadpar_index,
+                            lines, nthreads):
+    if broadpar_index is None:
+        return npadd3D_direct1D(lbd_block,
+                                line_strength_ref,
+                                cont_nu,
+                                index_nu,
+                                1.0,
+                                0,
+                                coeff_elower,
+                                index_elower,
+                                nthreads=nthreads)
+    uidx_bp, multi_cont_lines, neighbor_uidx = broadpar_index
+    return npadd3D_multi_index(lbd_block,
+                               line_strength_ref,
+                               cont_nu,
+                               index_nu,
+                               coeff_elower,
+                               index_elower,
+                               uidx_bp[lines],
+                               multi_cont_lines[lines],
+                               neighbor_uidx,
+                               sumz=1.0,
+                               show_progress=False,
+                               nthreads=nthreads)
+
+
 def _check_single_broadening(ngamma_ref_grid, n_Texp_grid):
     """check if the single broadening parameter mode is applied
 
@@ -494,6 +923,198 @@ def _check_single_broadening(ngamma_ref_grid, n_Texp_grid):
     return single_broadening
 
 
+def extend_lbd(lbd_coeff,
+               multi_index_uniqgrid,
+               elower_grid,
+               ngamma_ref_grid,
+               n_Texp_grid,
+               nu_grid,
+               nu_grid_new,
+               line_strength_ref,
+               nu_lines,
+               ngamma_ref,
+               n_Texp,
+               elower,
+               Twt,
+               Tref=Tref_original,
+               diffmode=0,
+               nthreads=None):
+    """extend LBD to a new wavenumber grid with the same ESLOG resolution, reusing the overlapping LBD bins
+
+    Notes:
+        nu_grid_new should be on the same ESLOG lattice as nu_grid, i.e. the same resolution and nu_grid[0] being one of the grid points of nu_grid_new (or vice versa).
+        The LBD bins in the overlap are copied from lbd_coeff except for the edge bins of both grids, which receive the contributions from the lines outside the grids.
+        Only the lines contributing to the other bins are newly binned.
+        The Elower, ngamma_ref, n_Texp grids are extended with their own intervals when the lines are outside of them.
+        Each grid can be extended up to its original length on each side, otherwise ValueError is raised (then, rebuild LBD from scratch).
+
+    Args:
+        lbd_coeff: LBD coefficients on nu_grid (diffmode+1, Ng_nu, Ng_broadpar, Ng_elower)
+        multi_index_uniqgrid: multi index of unique broadening parameter grid of lbd_coeff
+        elower_grid: Elower grid of lbd_coeff
+        ngamma_ref_grid: normalized gamma at reference grid of lbd_coeff
+        n_Texp_grid: temperature exponent grid of lbd_coeff
+        nu_grid: wavenumber grid of lbd_coeff
+        nu_grid_new: new wavenumber grid
+        line_strength_ref: line strength at reference temperature Tref of the lines for nu_grid_new
+        nu_lines: line centers of the lines for nu_grid_new
+        ngamma_ref: normalized gamma at reference of the lines for nu_grid_new
+        n_Texp: temperature exponent of the lines for nu_grid_new
+        elower: Elower of the lines for nu_grid_new
+        Twt: temperature used for the weight coefficient computation
+        Tref: reference temperature in Kelvin, default is 296.0 K
+        diffmode (int): i-th Taylor expansion is used for the weight
+        nthreads (int, optional): the number of threads to bin the lines, see generate_lbd. Defaults to None.
+
+    Returns:
+        jnp.array: LBD coefficients on nu_grid_new
+        jnp.array: multi_index_uniqgrid
+        nd array: elower_grid
+        nd array: ngamma_ref_grid
+        nd array: n_Texp_grid
+    """
+    offset = eslog_grid_offset(nu_grid, nu_grid_new)
+    wavmask = (nu_lines >= nu_grid_new[0]) * (nu_lines <= nu_grid_new[-1])
+    line_strength_ref = line_strength_ref[wavmask]
+    nu_lines = nu_lines[wavmask]
+    ngamma_ref = ngamma_ref[wavmask]
+    n_Texp = n_Texp[wavmask]
+    elower = elower[wavmask]
+
+    single_broadening = len(ngamma_ref_grid) == 1 and len(n_Texp_grid) == 1
+    elower_grid, shift_elower = _extend_regular_grid(elower_grid, elower)
+    if single_broadening:
+        shift_broadpar = np.array([0, 0])
+        multi_index_uniqgrid_new = np.array([[0, 0]])
+    else:
+        ngamma_ref_grid, shift_ngamma = _extend_regular_grid(ngamma_ref_grid,
+                                                             ngamma_ref,
+                                                             log=True)
+        n_Texp_grid, shift_n_Texp = _extend_regular_grid(n_Texp_grid, n_Texp)
+        shift_broadpar = np.array([shift_ngamma, shift_n_Texp])
+        multi_index_uniqgrid_new = broadpar_getix(ngamma_ref, ngamma_ref_grid,
+                                                  n_Texp, n_Texp_grid)[4]
+
+    # reused bins [ibin_start, ibin_end) in the new grid
+    Ng_nu_old = len(nu_grid)
+    Ng_nu_new = len(nu_grid_new)
+    ibin_start = max(offset + 1, 1)
+    ibin_end = max(min(offset + Ng_nu_old - 1, Ng_nu_new - 1), ibin_start)
+
+    # bins the lines contributing to the bins other than the reused bins
+    lbd_shape = (diffmode + 1, Ng_nu_new, len(multi_index_uniqgrid_new),
+                 len(elower_grid))
+    lbd_new = np.zeros(lbd_shape, dtype=np.float64)
+    lbd_new[0] = -np.inf
+    _, index_nu = npgetix(nu_lines, nu_grid_new)
+    binmask = (index_nu < ibin_start) + (index_nu + 1 >= ibin_end)
+    print("Extending LBD: ", np.sum(binmask), "/", len(nu_lines),
+          " lines are newly binned.")
+    if np.sum(binmask) > 0:
+        lbd_lines, multi_index_lines = generate_lbd(
+            line_strength_ref[binmask], nu_lines[binmask], nu_grid_new,
+            ngamma_ref[binmask], ngamma_ref_grid, n_Texp[binmask],
+            n_Texp_grid,
+            elower[binmask],
+            elower_grid,
+            Twt,
+            Tref,
+            diffmode,
+            nthreads=nthreads)
+        position = _multi_index_position(multi_index_lines,
+                                         multi_index_uniqgrid_new)
+        lbd_new[:, :, position, :] = np.asarray(lbd_lines)
+
+    # copies the reused bins from lbd_coeff
+    if ibin_end > ibin_start:
+        position = _multi_index_position(
+            np.asarray(multi_index_uniqgrid) + shift_broadpar,
+            multi_index_uniqgrid_new,
+            allow_missing=True)
+        used = position >= 0
+        lbd_new[0, ibin_start:ibin_end] = -np.inf
+        lbd_new[1:, ibin_start:ibin_end] = 0.0
+        lbd_new[:, ibin_start:ibin_end, position[used],
+                shift_elower:shift_elower + lbd_coeff.shape[3]] = np.asarray(
+                    lbd_coeff)[:, ibin_start - offset:ibin_end - offset,
+                               used, :]
+
+    return jnp.array(lbd_new), jnp.array(
+        multi_index_uniqgrid_new), elower_grid, ngamma_ref_grid, n_Texp_grid
+
+
+def eslog_grid_offset(nu_grid, nu_grid_new):
+    """index offset between two ESLOG grids on the same lattice
+
+    Args:
+        nu_grid: wavenumber grid (ESLOG)
+        nu_grid_new: new wavenumber grid (ESLOG)
+
+    Returns:
+        int: offset, i.e. nu_grid[i] = nu_grid_new[i + offset]
+    """
+    dlognu = np.log(nu_grid[1] / nu_grid[0])
+    dlognu_new = np.log(nu_grid_new[1] / nu_grid_new[0])
+    if not np.isclose(dlognu, dlognu_new, rtol=1.e-8, atol=0.0):
+        raise ValueError(
+            "nu_grid_new should have the same ESLOG resolution as nu_grid.")
+    lognu_ratio = np.log(nu_grid[0] / nu_grid_new[0])
+    offset = int(np.round(lognu_ratio / dlognu))
+    if not np.isclose(lognu_ratio, offset * dlognu, rtol=0.0,
+                      atol=1.e-6 * dlognu):
+        raise ValueError(
+            "nu_grid_new should be on the same ESLOG lattice as nu_grid.")
+    return offset
+
+
+def _extend_regular_grid(grid, values, log=False):
+    """extend a regular (linear or log) grid with its own interval so that the grid covers values
+
+    Args:
+        grid: regular grid (ascending)
+        values: values to be covered
+        log (bool, optional): if True, the grid is regular in log. Defaults to False.
+
+    Returns:
+        nd array, int: extended grid, the number of the grid points added to the lower side
+    """
+    grid = np.asarray(grid)
+    if len(values) == 0:
+        return grid, 0
+    x = np.log(grid) if log else grid
+    v = np.log(values) if log else np.asarray(values)
+    dx = x[1] - x[0]
+    nlow = int(np.ceil((x[0] - np.min(v)) / dx)) if np.min(v) < x[0] else 0
+    nhigh = int(np.ceil((np.max(v) - x[-1]) / dx)) if np.max(v) > x[-1] else 0
+    if nlow > len(grid) or nhigh > len(grid):
+        raise ValueError(
+            "The grid cannot be extended to cover the new lines. Rebuild LBD.")
+    xlow = x[0] - dx * np.arange(nlow, 0, -1)
+    xhigh = x[-1] + dx * np.arange(1, nhigh + 1)
+    if log:
+        xlow, xhigh = np.exp(xlow), np.exp(xhigh)
+    return np.concatenate([xlow, grid, xhigh]), nlow
+
+
+def _multi_index_position(multi_index, multi_index_ref, allow_missing=False):
+    """positions of the multi indices in multi_index_ref
+
+    Args:
+        multi_index: multi indices (N, 2)
+        multi_index_ref: reference multi indices (M, 2)
+        allow_missing (bool, optional): if True, -1 is returned for the multi index not in multi_index_ref, otherwise ValueError. Defaults to False.
+
+    Returns:
+        nd array: positions (N)
+    """
+    lookup = {tuple(m): i for i, m in enumerate(np.asarray(multi_index_ref))}
+    position = np.array(
+        [lookup.get(tuple(m), -1) for m in np.asarray(multi_index)], dtype=int)
+    if not allow_missing and np.any(position < 0):
+        raise ValueError("multi index not found in multi_index_ref.")
+    return position
+
+
 def convert_to_jnplog(lbd_nth):
     """compute log and convert to jnp
 
@@ -506,12 +1127,101 @@ def convert_to_jnplog(lbd_nth):
     Returns:
         jnp.array: log form of n-th coefficient LBD
     """
+    return jnp.array(convert_to_log(lbd_nth))
+
+
+def convert_to_log(lbd_nth):
+    """compute log (numpy version of convert_to_jnplog)
+
+    Args:
+        lbd_nth (ndarray): n-th coefficient (non-log) LBD
+
+    Returns:
+        ndarray: log form of n-th coefficient LBD
+    """
     logmin = -np.inf
     lbd_nth[lbd_nth > 0.0] = np.log(lbd_nth[lbd_nth > 0.0])
     lbd_nth[lbd_nth == 0.0] = logmin
     # Removing the extended grid of elower. See Issue #273
-    lbd_nth = jnp.array(lbd_nth[:, :, 0:-1])
-    return lbd_nth
+    return lbd_nth[:, :, 0:-1]
+
+
+def lbd_to_sparse(lbd_coeff, nu_block_size=256):
+    """convert the dense LBD to the block-sparse form
+
+    Notes:
+        The wavenumber axis is divided into blocks of nu_block_size. 
+        For each block, only the (broadening parameter, Elower) cells that have lines in the block (occupied cells) are stored.
+        The occupied cells of all the blocks are concatenated (Ncell), i.e. no padding to the maximum occupancy among the blocks.
+        The tail of the last block is padded with -inf (zeroth) or 0 (higher orders).
+        Use generate_lbd_sparse to make the block-sparse LBD without the dense LBD.
+
+    Args:
+        lbd_coeff (array): dense LBD coefficient (diffmode + 1, Ng_nu, Ng_broadpar, Ng_elower), the zeroth coefficient is in the log form
+        nu_block_size (int, optional): block size along the wavenumber axis. Defaults to 256.
+
+    Returns:
+        jnp.array: block-sparse LBD (diffmode + 1, Ncell, nu_block_size)
+        jnp.array: block index of the occupied cells (Ncell)
+        jnp.array: broadening parameter index of the occupied cells (Ncell)
+        jnp.array: Elower index of the occupied cells (Ncell)
+    """
+    if nu_block_size < 1:
+        raise ValueError("nu_block_size should be a positive integer.")
+    lbd_coeff = np.asarray(lbd_coeff)
+    ndiff, Ng_nu, Ng_broadpar, Ng_elower = np.shape(lbd_coeff)
+    nblock = (Ng_nu - 1) // nu_block_size + 1
+    cells = []
+    for iblock in range(nblock):
+        block = lbd_coeff[:, iblock * nu_block_size:(iblock + 1) *
+                          nu_block_size, :, :]
+        cells.append(_sparse_cells(block, iblock, nu_block_size))
+    return _concatenate_sparse_cells(cells, ndiff, nu_block_size, Ng_nu,
+                                     Ng_broadpar, Ng_elower)
+
+
+def _sparse_cells(block, iblock, nu_block_size):
+    """extracts the occupied cells of a LBD block
+
+    Args:
+        block (ndarray): LBD block (diffmode + 1, <= nu_block_size, Ng_broadpar, Ng_elower), the zeroth coefficient is in the log form
+        iblock (int): block index
+        nu_block_size (int): block size along the wavenumber axis
+
+    Returns:
+        values (diffmode + 1, Nocc, nu_block_size), block index (Nocc), broadening parameter index (Nocc), Elower index (Nocc)
+    """
+    ndiff, nu_length = block.shape[0], block.shape[1]
+    occupied = np.any(np.isfinite(block[0]), axis=0)
+    for idiff in range(1, ndiff):
+        occupied = occupied | np.any(block[idiff] != 0.0, axis=0)
+    ib, ie = np.nonzero(occupied)
+    values = np.zeros((ndiff, len(ib), nu_block_size))
+    values[0, :, :] = -np.inf
+    values[:, :, :nu_length] = np.moveaxis(block[:, :, ib, ie], 1, 2)
+    return values, np.full(len(ib), iblock), ib, ie
+
+
+def _concatenate_sparse_cells(cells, ndiff, nu_block_size, Ng_nu, Ng_broadpar,
+                              Ng_elower):
+    values, occupancy_block, occupancy_broadpar, occupancy_elower = [
+        list(x) for x in zip(*cells)
+    ]
+    # a dummy cell (-inf) keeps the arrays non-empty when there is no line
+    dummy = np.zeros((ndiff, 1, nu_block_size))
+    dummy[0, :, :] = -np.inf
+    values.append(dummy)
+    for occupancy in [occupancy_block, occupancy_broadpar, occupancy_elower]:
+        occupancy.append(np.zeros(1, dtype=int))
+    lbd_sparse = np.concatenate(values, axis=1)
+    ncell = lbd_sparse.shape[1] - 1
+    nblock = (Ng_nu - 1) // nu_block_size + 1
+    print("Sparse LBD: occupancy =", ncell, "/", nblock * Ng_broadpar *
+          Ng_elower, "cells")
+    return jnp.array(lbd_sparse), jnp.array(
+        np.concatenate(occupancy_block)), jnp.array(
+            np.concatenate(occupancy_broadpar)), jnp.array(
+                np.concatenate(occupancy_elower))
 
 
 def logf_bias(elower_in, T, Tref):
@@ -621,6 +1331,52 @@ def unbiased_lsd_second(lbd_coeff, T, Tref, Twt, nu_grid, elower_grid, qt):
     return (Slsd.T * g_bias(nu_grid, T, Tref) / qt).T
 
 
+def unbiased_lsd_sparse(lbd_sparse, occupancy_block, occupancy_broadpar,
+                        occupancy_elower, T, Tref, Twt, nu_grid, elower_grid,
+                        qt, Ng_broadpar):
+    """ unbias the block-sparse LBD and densify it to LSD (any diffmode)
+
+    Notes:
+        The order of the Taylor expansion (diffmode) is given by the shape of lbd_sparse. 
+        Only the occupied cells are evaluated before summing over Elower into the (Ng_nu, Ng_broadpar) LSD.
+
+    Args:
+        lbd_sparse: block-sparse LBD (diffmode + 1, Ncell, nu_block_size), see lbd_to_sparse
+        occupancy_block: block index of the occupied cells (Ncell)
+        occupancy_broadpar: broadening parameter index of the occupied cells (Ncell)
+        occupancy_elower: Elower index of the occupied cells (Ncell)
+        T: temperature for unbiasing in Kelvin
+        Tref: reference temperature in Kelvin
+        Twt: Temperature at the weight point (not used for diffmode=0)
+        nu_grid: wavenumber grid in cm-1
+        elower_grid: Elower grid in cm-1
+        qt: partition function ratio Q(T)/Q(Tref)
+        Ng_broadpar (int): the number of the broadening parameter grid
+
+    Returns:
+        LSD, shape = (number_of_wavenumber_bin, number_of_broadening_parameters)
+        
+    """
+    ndiff, _, nu_block_size = lbd_sparse.shape
+    nblock = (len(nu_grid) - 1) // nu_block_size + 1
+    lfb = logf_bias(elower_grid[occupancy_elower], T,
+                    Tref)[:, None]  # (Ncell, 1)
+    Scell = jnp.exp(lfb + lbd_sparse[0])
+    if ndiff > 1:
+        dt = (1.0 / T - 1.0 / Twt)
+        unbiased_coeff = lbd_sparse[1] * dt
+        if ndiff > 2:
+            unbiased_coeff = unbiased_coeff + 0.5 * lbd_sparse[2] * dt**2
+        Scell = Scell + jnp.exp(lfb) * unbiased_coeff
+
+    Slsd = jnp.zeros((nblock, nu_block_size, Ng_broadpar))
+    Slsd = Slsd.at[occupancy_block[:, None],
+                   jnp.arange(nu_block_size)[None, :],
+                   occupancy_broadpar[:, None]].add(Scell)
+    Slsd = Slsd.reshape((nblock * nu_block_size, Ng_broadpar))[:len(nu_grid)]
+    return (Slsd.T * g_bias(nu_grid, T, Tref) / qt).T
+
+
 def unbiased_ngamma_grid(T, P, ngamma_ref_grid, n_Texp_grid,
                          multi_index_uniqgrid, Tref_broadening):
     """compute unbiased ngamma grid
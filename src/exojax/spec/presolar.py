@@ -2,12 +2,24 @@
 
     * LBD -> hat(LBD)
     * shapefilter -> hat(shapefilter)
+    * padded LBD -> LSD of each mini batch and convolution with the Voigt shape filter by OLA, mini batch by mini batch
 
 """
 import numpy as np
 import jax.numpy as jnp
+from jax import jit, vmap
+from jax.lax import scan
+from jax.lax import dynamic_slice
+from functools import partial
 from exojax.signal.ola import optimal_fft_length
 from exojax.signal.ola import generate_padding_matrix
+from exojax.signal.ola import overlap_and_add
+from exojax.spec.shapefilter import generate_centered_voigt_shape_filter
+from exojax.spec.premodit import unbiased_lsd_zeroth
+from exojax.spec.premodit import unbiased_lsd_first
+from exojax.spec.premodit import unbiased_lsd_second
+from exojax.spec.premodit import unbiased_ngamma_grid
+from exojax.spec import normalized_doppler_sigma
 
 def shapefilter_olaform(shapefilter, div_length, padding_value=0.0):
     """generate zero-padding shape filter
@@ -24,7 +36,7 @@ def shapefilter_olaform(shapefilter, div_length, padding_value=0.0):
     return _padding_zeros_axis(shapefilter, padding_value, residual)
 
 
-def lbd_olaform(lbd, ndiv, div_length, filter_length):
+def lbd_olaform(lbd, ndiv, div_length, filter_length, padding_value=-np.inf):
     """convert LBD to match the form of OLA, i.e. generate hat LBD 
 
     Args:
@@ -32,15 +44,70 @@ def lbd_olaform(lbd, ndiv, div_length, filter_length):
         ndiv (int): number of mini batches
         div_length (int): mini batch length 
         filter_length (int): filter length
+        padding_value (optional): padding value. Defaults to -np.inf (for the log form, i.e. the zeroth coefficient). Use 0.0 for the higher coefficients.
 
     Returns:
         4D array: hat(LBD) (ndiv, fft_length, :, :)
     """
-    rlbd = _reshape_lbd(lbd, ndiv, div_length)
-    hat_lbd = generate_padding_matrix(-np.inf, rlbd, filter_length)
+    rlbd = _reshape_lbd(lbd, ndiv, div_length, padding_value=padding_value)
+    hat_lbd = generate_padding_matrix(padding_value, rlbd, filter_length)
     return hat_lbd
 
 
+def lbd_coeff_padded(lbd_coeff, ndiv, div_length, filter_length):
+    """pad the LBD coefficients along the wavenumber axis for the mini batches of OLA
+
+    Notes:
+        The mini batches are cut from the padded LBD in xsvector_presolar (lax.dynamic_slice), 
+        so the overlapped hat(LBD) (ndiv, diffmode+1, fft_length, :, :) is never stored.
+
+    Args:
+        lbd_coeff (4D array): LBD coefficients (diffmode+1, input length, :, :), the zeroth coefficient is in the log form
+        ndiv (int): number of mini batches
+        div_length (int): mini batch length 
+        filter_length (int): filter length
+
+    Raises:
+        ValueError: ndiv*div_length should be larger than input length = shape(lbd_coeff)[1]
+
+    Returns:
+        4D array: padded LBD coefficients (diffmode+1, ndiv*div_length + filter_length - 1, :, :), padded with -np.inf for the zeroth coefficient and 0.0 for the others
+    """
+    lbd_coeff = np.asarray(lbd_coeff)
+    input_length = lbd_coeff.shape[1]
+    if ndiv * div_length < input_length:
+        raise ValueError(
+            "ndiv*div_length should be larger than input length = shape(lbd_coeff)[1]"
+        )
+    residual = ndiv * div_length + filter_length - 1 - input_length
+    padding_matrix = np.zeros((lbd_coeff.shape[0], residual) +
+                              lbd_coeff.shape[2:])
+    padding_matrix[0] = -np.inf
+    return np.concatenate((lbd_coeff, padding_matrix), axis=1)
+
+
+def nu_grid_olaform(nu_grid, ndiv, div_length, filter_length):
+    """convert the wavenumber grid to the OLA form, padded with the last value
+
+    Notes:
+        The padding value does not matter as long as it is positive and finite, because hat(LBD) is zero there.
+
+    Args:
+        nu_grid (1D array): wavenumber grid
+        ndiv (int): number of mini batches
+        div_length (int): mini batch length 
+        filter_length (int): filter length
+
+    Returns:
+        2D array: hat(nu_grid) (ndiv, fft_length)
+    """
+    nu_grid = np.asarray(nu_grid)
+    residual = ndiv * div_length - len(nu_grid)
+    rnu = np.hstack([nu_grid, np.full(residual, nu_grid[-1])])
+    rnu = rnu.reshape((ndiv, div_length))
+    return generate_padding_matrix(nu_grid[-1], rnu, filter_length)
+
+
 def optimal_mini_batch(input_length, filter_length):
     """compute the optimal number and length of the mini batches array
 
@@ -56,6 +123,126 @@ def optimal_mini_batch(input_length, filter_length):
     return ndiv, opt_div_length
 
 
+def _unbiased_lsd(lbd_coeff_each, T, Tref, Twt, nu_grid_each, elower_grid,
+                  qt):
+    diffmode = lbd_coeff_each.shape[0] - 1
+    if diffmode == 0:
+        return unbiased_lsd_zeroth(lbd_coeff_each[0], T, Tref,
+                                   nu_grid_each, elower_grid, qt)
+    elif diffmode == 1:
+        return unbiased_lsd_first(lbd_coeff_each, T, Tref, Twt,
+                                  nu_grid_each, elower_grid, qt)
+    elif diffmode == 2:
+        return unbiased_lsd_second(lbd_coeff_each, T, Tref, Twt,
+                                   nu_grid_each, elower_grid, qt)
+    else:
+        raise ValueError("diffmode should be 0, 1, 2.")
+
+
+@partial(jit, static_argnums=(15, 16))
+def xsvector_presolar(T, P, nsigmaD, lbd_coeff, Tref, Twt, R, hat_nu_grid,
+                      nu_grid, elower_grid, multi_index_uniqgrid,
+                      ngamma_ref_grid, n_Texp_grid, qt, Tref_broadening,
+                      div_length, filter_length):
+    """compute cross section vector, with OLA convolution of the Voigt shape filter (PreSOLAR)
+
+    Notes:
+        The LSD is computed mini batch by mini batch, from the slice of the padded LBD (offset i*div_length, length fft_length), 
+        the elements beyond div_length of which are set to zero (the padding of OLA). For each mini batch, 
+        the LSD is convolved with the truncated Voigt shape filter of each broadening parameter in the Fourier space, 
+        and summed over the broadening parameters before the inverse FFT. The mini batches are then overlapped and added.
+
+    Args:
+        T (_type_): temperature in Kelvin
+        P (_type_): pressure in bar
+        nsigmaD: normalized doplar STD
+        lbd_coeff (_type_): padded LBD coefficients (diffmode+1, ndiv*div_length + filter_length - 1, Ng_broadpar, Ng_elower), see lbd_coeff_padded
+        Tref: reference temperature used to compute LBD in Kelvin
+        Twt: temperature used in the weight point (not used for diffmode=0)
+        R (_type_): spectral resolution
+        hat_nu_grid (_type_): wavenumber grid in the OLA form (ndiv, fft_length), see nu_grid_olaform
+        nu_grid (_type_): wavenumber grid
+        elower_grid (_type_): E lower grid
+        multi_index_uniqgrid (_type_): multi index of unique broadening parameter grid
+        ngamma_ref_grid (_type_): normalized pressure broadening half-width
+        n_Texp_grid (_type_): temperature exponent grid
+        qt (_type_): partirion function ratio
+        Tref_broadening: reference temperature for broadening in Kelvin
+        div_length (int): mini batch length (static)
+        filter_length (int): shape filter length, odd (static)
+
+    Returns:
+        jnp.array: cross section in cgs vector
+    """
+    ndiv, fft_length = hat_nu_grid.shape
+    ndiff, _, Ng_broadpar, Ng_elower = lbd_coeff.shape
+    mini_batch_mask = jnp.arange(fft_length) < div_length
+    ngamma_grid = unbiased_ngamma_grid(T, P, ngamma_ref_grid, n_Texp_grid,
+                                       multi_index_uniqgrid, Tref_broadening)
+    shapefilter = vmap(generate_centered_voigt_shape_filter, (None, 0, None),
+                       0)(nsigmaD, ngamma_grid, filter_length)
+    hat_shapefilter = jnp.zeros((len(ngamma_grid), fft_length))
+    hat_shapefilter = hat_shapefilter.at[:, :filter_length].set(shapefilter)
+    ftilde = jnp.fft.rfft(hat_shapefilter, axis=1).T  # (nfreq, Ng_broadpar)
+
+    def f(i, hat_nu_grid_each):
+        lbd_coeff_each = dynamic_slice(lbd_coeff, (0, i * div_length, 0, 0),
+                                       (ndiff, fft_length, Ng_broadpar,
+                                        Ng_elower))
+        Slsd = _unbiased_lsd(lbd_coeff_each, T, Tref, Twt, hat_nu_grid_each,
+                             elower_grid, qt)
+        Slsd = jnp.where(mini_batch_mask[:, None], Slsd, 0.0)
+        xtilde = jnp.fft.rfft(Slsd, axis=0)
+        ytilde = jnp.sum(xtilde * ftilde, axis=1)
+        i = i + 1
+        return i, jnp.fft.irfft(ytilde, n=fft_length)
+
+    _, ftarr = scan(f, 0, hat_nu_grid)
+    output_length = ndiv * div_length + filter_length - 1
+    fftval = overlap_and_add(ftarr, output_length, div_length)
+    half_length = (filter_length - 1) // 2
+    Ng_nu = len(nu_grid)
+    return fftval[half_length:half_length + Ng_nu] * R / nu_grid
+
+
+@partial(jit, static_argnums=(15, 16))
+def xsmatrix_presolar(Tarr, Parr, Tref, Twt, R, lbd_coeff, hat_nu_grid,
+                      nu_grid, ngamma_ref_grid, n_Texp_grid,
+                      multi_index_uniqgrid, elower_grid, Mmol, qtarr,
+                      Tref_broadening, div_length, filter_length):
+    """compute cross section matrix given atmospheric layers, with OLA convolution of the Voigt shape filter (PreSOLAR)
+
+    Args:
+        Tarr (_type_): temperature layers
+        Parr (_type_): pressure layers
+        Tref: reference temperature in K
+        Twt: weight temperature in K (not used for diffmode=0)
+        R (float): spectral resolution
+        lbd_coeff (_type_): padded LBD coefficients, see lbd_coeff_padded
+        hat_nu_grid (_type_): wavenumber grid in the OLA form, see nu_grid_olaform
+        nu_grid (_type_): wavenumber grid
+        ngamma_ref_grid (_type_): normalized half-width grid
+        n_Texp_grid (_type_): temperature exponent grid
+        multi_index_uniqgrid (_type_): multi index for uniq broadpar grid
+        elower_grid (_type_): Elower grid
+        Mmol (_type_): molecular mass
+        qtarr (_type_): partition function ratio layers
+        Tref_broadening: reference temperature for broadening in Kelvin
+        div_length (int): mini batch length (static)
+        filter_length (int): shape filter length, odd (static)
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    nsigmaD = vmap(normalized_doppler_sigma, (0, None, None), 0)(Tarr, Mmol, R)
+    return vmap(
+        lambda T, P, nsigmaD_each, qt: xsvector_presolar(
+            T, P, nsigmaD_each, lbd_coeff, Tref, Twt, R, hat_nu_grid,
+            nu_grid, elower_grid, multi_index_uniqgrid, ngamma_ref_grid,
+            n_Texp_grid, qt, Tref_broadening, div_length, filter_length),
+        (0, 0, 0, 0), 0)(Tarr, Parr, nsigmaD, qtarr)
+
+
 def _padding_zeros_axis(input_array, padding_value, residual):
     """ generate an array with padding along zero-th axis 
 
@@ -0,0 +1,149 @@
+"""Real space evaluation of DIT (REDIT)
+
+* REDIT convolves the line shape density (LSD) with truncated Voigt filters in real space (banded convolution), instead of the full-length FFT in modit/modit_scanfft.
+* The filter length is determined from the line widths in the normalized (ESLOG) grid, see realspace_filter_length.
+* choose_engine gives the crossover between the real space convolution and FFT.
+* Because the widths are normalized by the grid interval in ESLOG, the filter is common to all the wavenumbers in the grid.
+
+"""
+import numpy as np
+import jax.numpy as jnp
+from jax import jit
+from jax import vmap
+from jax.lax import conv_general_dilated
+from jax.lax import Precision
+from jax.lax import map as lax_map
+from functools import partial
+from exojax.spec.shapefilter import generate_centered_voigt_shape_filter
+from exojax.spec.lsd import inc2D_givenx
+
+#: real space convolution is chosen when filter_length < REALSPACE_CROSSOVER_FACTOR * log2(2 * len(nu_grid))
+REALSPACE_CROSSOVER_FACTOR = 8.0
+
+
+def realspace_filter_length(nsigmaD_max, ngammaL_max, wing_accuracy=1.e-3):
+    """filter length of the truncated Voigt filter
+
+    Note:
+        The half length is the larger of 6 nsigmaD_max (Gaussian core) and 2 ngammaL_max / (pi wing_accuracy),
+        the latter of which is the half length beyond which the fraction wing_accuracy of the Lorentz profile is lost.
+
+    Args:
+        nsigmaD_max (float): maximum normalized Doppler width
+        ngammaL_max (float): maximum normalized Lorentz half width
+        wing_accuracy (float, optional): allowed fraction of the line profile lost in the truncated wings. Defaults to 1.e-3.
+
+    Returns:
+        int: filter length (odd)
+    """
+    half_length = max(6.0 * nsigmaD_max,
+                      2.0 * ngammaL_max / (np.pi * wing_accuracy), 1.0)
+    return 2 * int(np.ceil(half_length)) + 1
+
+
+def choose_engine(filter_length, ngrid, nsigmaD_min):
+    """chooses the real space convolution or FFT from the filter length and the grid size
+
+    Note:
+        FFT is chosen when the Doppler profile is not resolved by the grid (nsigmaD_min < 1), 
+        because the sampled Voigt filter deviates from the band-limited (folded) Voigt kernel used in FFT.
+
+    Args:
+        filter_length (int): filter length of the truncated Voigt filter
+        ngrid (int): the number of the wavenumber grid
+        nsigmaD_min (float): minimum normalized Doppler width
+
+    Returns:
+        str: "realspace" or "fft"
+    """
+    if nsigmaD_min < 1.0:
+        return "fft"
+    if filter_length < REALSPACE_CROSSOVER_FACTOR * np.log2(2 * ngrid):
+        return "realspace"
+    return "fft"
+
+
+@partial(jit, static_argnums=(5, ))
+def calc_xsection_from_lsd_realspace(Slsd, R, nsigmaD, nu_grid,
+                                     log_ngammaL_grid, filter_length):
+    """Compute cross section from LSD by the real space convolution with the truncated Voigt filters
+
+    Args:
+        Slsd: line shape density (Ng_nu, Ng_gammaL)
+        R: spectral resolution
+        nsigmaD: normaized Gaussian STD
+        nu_grid: linear wavenumber grid
+        log_ngammaL_grid: logarithm of normalized gammaL grid (Ng_gammaL)
+        filter_length (int): filter length (odd), see realspace_filter_length
+
+    Returns:
+        Cross section in the log nu grid
+    """
+    Ng_gammaL = jnp.shape(Slsd)[1]
+    half_length = (filter_length - 1) // 2
+    shape_filters = vmap(generate_centered_voigt_shape_filter,
+                         (None, 0, None), 0)(nsigmaD,
+                                             jnp.exp(log_ngammaL_grid),
+                                             filter_length)
+    xs = conv_general_dilated(Slsd.T[None, :, :],
+                              shape_filters[:, None, :],
+                              window_strides=(1, ),
+                              padding=[(half_length, half_length)],
+                              feature_group_count=Ng_gammaL,
+                              precision=Precision.HIGHEST)
+    return jnp.sum(xs[0], axis=0) * R / nu_grid
+
+
+@partial(jit, static_argnums=(5, ))
+def xsmatrix_from_lsd_realspace(Slsd, R, nsigmaD, nu_grid, log_ngammaL_grid,
+                                filter_length):
+    """cross section matrix from the LSD of layers by the real space convolution
+
+    Args:
+        Slsd: LSD (Nlayer, Ng_nu, Ng_broadpar)
+        R: spectral resolution
+        nsigmaD: normalized Doppler STD (Nlayer)
+        nu_grid: wavenumber grid
+        log_ngammaL_grid: log normalized gamma grid (Nlayer, Ng_broadpar)
+        filter_length (int): filter length (odd), see realspace_filter_length
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    return vmap(
+        lambda S, s, g: calc_xsection_from_lsd_realspace(
+            S, R, s, nu_grid, g, filter_length), (0, 0, 0), 0)(Slsd, nsigmaD,
+                                                               log_ngammaL_grid)
+
+
+@partial(jit, static_argnums=(8, ))
+def xsmatrix_realspace(cnu, indexnu, R, nsigmaDl, ngammaLM, SijM, nu_grid,
+                       dgm_ngammaL, filter_length):
+    """Cross section matrix (MODIT) by the real space convolution
+
+    Args:
+       cnu: contribution by npgetix for wavenumber
+       indexnu: index by npgetix for wavenumber
+       R: spectral resolution
+       nsigmaDl: normalized doppler sigma in layers in R^(Nlayer x 1)
+       ngammaLM: gamma factor matrix in R^(Nlayer x Nline)
+       SijM: line strength matrix in R^(Nlayer x Nline)
+       nu_grid: linear wavenumber grid
+       dgm_ngammaL: DIT Grid Matrix for normalized gammaL R^(Nlayer, NDITgrid)
+       filter_length (int): filter length (odd), see realspace_filter_length
+
+    Return:
+       cross section matrix in R^(Nlayer x Nwav)
+    """
+
+    def fxs(arr):
+        nsigmaD, ngammaL, Sij, ngammaL_grid = arr
+        log_ngammaL_grid = jnp.log(ngammaL_grid)
+        lsd_array = jnp.zeros((len(nu_grid), len(ngammaL_grid)))
+        Slsd = inc2D_givenx(lsd_array, Sij, cnu, indexnu, jnp.log(ngammaL),
+                            log_ngammaL_grid)
+        return calc_xsection_from_lsd_realspace(Slsd, R, nsigmaD, nu_grid,
+                                                log_ngammaL_grid,
+                                                filter_length)
+
+    return lax_map(fxs, (nsigmaDl[:, 0], ngammaLM, SijM, dgm_ngammaL))
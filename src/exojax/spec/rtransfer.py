@@ -27,6 +27,8 @@
 from jax import jit
 import jax.numpy as jnp
 from jax.lax import scan
+from functools import partial
+from exojax.utils.remat import remat
 from exojax.spec.twostream import solve_lart_twostream
 from exojax.spec.twostream import solve_fluxadding_twostream
 from exojax.spec.toon import reduced_source_function_isothermal_layer
@@ -94,14 +96,15 @@ def rtrun_emis_pureabs_fbased2st_surface(dtau, source_matrix, source_surface):
     )
 
 
-@jit
-def rtrun_emis_pureabs_ibased(dtau, source_matrix, mus, weights):
+@partial(jit, static_argnames=("checkpoint", ))
+def rtrun_emis_pureabs_ibased(dtau, source_matrix, mus, weights, checkpoint=False):
     """Radiative Transfer for emission spectrum using intensity-based n-stream pure absorption with no surface (NEMESIS, pRT-like)
     Args:
         dtau (2D array): optical depth matrix, dtau  (N_layer, N_nus)
         source_matrix (2D array): source matrix (N_layer, N_nus)
         mus (list): mu (cos theta) list for integration
         weights (list): weight list for mu
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint), which reduces the device memory use of the gradient. Defaults to False.
 
     Returns:
         flux in the unit of [erg/cm2/s/cm-1] if using piBarr as a source function.
@@ -125,7 +128,7 @@ def rtrun_emis_pureabs_ibased(dtau, source_matrix, mus, weights):
         carry_fmu = carry_fmu + 2.0 * mu * w * jnp.sum(source_matrix * dtrans, axis=0)
         return carry_fmu, None
 
-    spec, _ = scan(f, jnp.zeros(Nnus), muws)
+    spec, _ = scan(remat(f, checkpoint), jnp.zeros(Nnus), muws)
 
     return spec
 
@@ -156,8 +159,8 @@ def initialize_gaussian_quadrature(nstream):
     return mus, weights
 
 
-@jit
-def rtrun_emis_pureabs_ibased_linsap(dtau, source_matrix_boundary, mus, weights):
+@partial(jit, static_argnames=("checkpoint", ))
+def rtrun_emis_pureabs_ibased_linsap(dtau, source_matrix_boundary, mus, weights, checkpoint=False):
     """Radiative Transfer for emission spectrum using intensity-based n-stream pure absorption with no surface w/ linear source approximation = linsap (HELIOS-R2 like)
 
     Args:
@@ -165,6 +168,7 @@ def rtrun_emis_pureabs_ibased_linsap(dtau, source_matrix_boundary, mus, weights)
         source_matrix_booundary (2D array): source matrix at the layer upper boundary (N_layer + 1, N_nus)
         mus (list): mu (cos theta) list for integration
         weights (list): weight list for mu
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint), which reduces the device memory use of the gradient. Defaults to False.
 
     Returns:
         flux in the unit of [erg/cm2/s/cm-1] if using piBarr as a source function.
@@ -204,7 +208,7 @@ def rtrun_emis_pureabs_ibased_linsap(dtau, source_matrix_boundary, mus, weights)
 
         return carry_fmu, None
 
-    spec, _ = scan(f, jnp.zeros(Nnus), muws)
+    spec, _ = scan(remat(f, checkpoint), jnp.zeros(Nnus), muws)
     return spec
 
 
@@ -295,9 +299,9 @@ def rtrun_trans_pureabs_simpson(
     return deltaRp2 + radius_lower[-1] ** 2
 
 
-@jit
+@partial(jit, static_argnames=("checkpoint", ))
 def rtrun_emis_scat_lart_toonhm(
-    dtau, single_scattering_albedo, asymmetric_parameter, source_matrix
+    dtau, single_scattering_albedo, asymmetric_parameter, source_matrix, checkpoint=False
 ):
     """Radiative Transfer for emission spectrum using flux-based two-stream scattering LART solver w/ Toon Hemispheric Mean with no surface.
 
@@ -306,6 +310,7 @@ def rtrun_emis_scat_lart_toonhm(
         single_scattering_albedo (_type_): _description_
         asymmetric_parameter (_type_): _description_
         source_matrix (_type_): _description_
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint), which reduces the device memory use of the gradient. Defaults to False.
 
     Returns:
         _type_: _description_
@@ -324,7 +329,7 @@ def rtrun_emis_scat_lart_toonhm(
     )
     nlayer, Nnus = diagonal.shape
     cumTtilde, Qtilde, spectrum = solve_lart_twostream(
-        diagonal, lower_diagonal, upper_diagonal, vector, jnp.zeros(Nnus)
+        diagonal, lower_diagonal, upper_diagonal, vector, jnp.zeros(Nnus), checkpoint
     )
 
     return spectrum, cumTtilde, Qtilde, trans_coeff, scat_coeff, reduced_piB
@@ -360,7 +365,7 @@ def rtrun_emis_scat_lart_toonhm_surface(
     return spectrum, cumTtilde, Qtilde, trans_coeff, scat_coeff, piB
 
 
-@jit
+@partial(jit, static_argnames=("checkpoint", ))
 def rtrun_reflect_fluxadding_toonhm(
     dtau,
     single_scattering_albedo,
@@ -369,6 +374,7 @@ def rtrun_reflect_fluxadding_toonhm(
     source_surface,
     reflectivity_surface,
     incoming_flux,
+    checkpoint=False,
 ):
     """Radiative Transfer for reflected spectrum the flux adding solver w/ Toon Hemispheric Mean with surface.
 
@@ -380,6 +386,7 @@ def rtrun_reflect_fluxadding_toonhm(
         source_surface: source from the surface (N_nus)
         reflectivity_surface: reflectivity from the surface (N_nus)
         incoming flux: incoming flux F_0^- (N_nus)
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint), which reduces the device memory use of the gradient. Defaults to False.
 
     Returns:
         _type_: _description_
@@ -389,14 +396,14 @@ def rtrun_reflect_fluxadding_toonhm(
     )
 
     Rphat, Sphat = solve_fluxadding_twostream(
-        trans_coeff, scat_coeff, reduced_piB, reflectivity_surface, source_surface
+        trans_coeff, scat_coeff, reduced_piB, reflectivity_surface, source_surface, checkpoint
     )
     return Rphat * incoming_flux + Sphat
 
 
-@jit
+@partial(jit, static_argnames=("checkpoint", ))
 def rtrun_emis_scat_fluxadding_toonhm(
-    dtau, single_scattering_albedo, asymmetric_parameter, source_matrix
+    dtau, single_scattering_albedo, asymmetric_parameter, source_matrix, checkpoint=False
 ):
     """Radiative Transfer for emission spectrum (w/ scattering) using flux-based two-stream scattering the flux adding solver w/ Toon Hemispheric Mean with surface.
 
@@ -405,6 +412,7 @@ def rtrun_emis_scat_fluxadding_toonhm(
         single_scattering_albedo (_type_): _description_
         asymmetric_parameter (_type_): _description_
         source_matrix (_type_): _description_
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint), which reduces the device memory use of the gradient. Defaults to False.
 
     Returns:
         _type_: _description_
@@ -418,7 +426,7 @@ def rtrun_emis_scat_fluxadding_toonhm(
     )
 
     _, spectrum = solve_fluxadding_twostream(
-        trans_coeff, scat_coeff, reduced_piB, reflectivity_surface, source_surface
+        trans_coeff, scat_coeff, reduced_piB, reflectivity_surface, source_surface, checkpoint
     )
 
     return spectrum
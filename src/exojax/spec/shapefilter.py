@@ -3,6 +3,7 @@
 
 from exojax.spec.lpf import voigt
 import jax.numpy as jnp
+import numpy as np
 
 def generate_voigt_shape_filter(nsigmaD, ngammaL, filter_length):
     """generate a Voigt filter with a tail cut (naturally!)
@@ -19,6 +20,22 @@ def generate_voigt_shape_filter(nsigmaD, ngammaL, filter_length):
     return voigt(qogrid, nsigmaD, ngammaL)
 
 
+def generate_centered_voigt_shape_filter(nsigmaD, ngammaL, filter_length):
+    """generate a Voigt filter centered at the middle of the filter, with a tail cut
+
+    Args:
+        nsigmaD (float): normalized Dopper width
+        ngammaL (float): normalized Lorenz half width
+        filter_length (int): filter length, should be odd
+
+    Returns:
+        array: Voigt filter, the line center is at (filter_length - 1)/2
+    """
+    half_length = (filter_length - 1) // 2
+    qogrid = jnp.array(range(-half_length, half_length + 1))
+    return voigt(qogrid, nsigmaD, ngammaL)
+
+
 def compute_filter_length(wavenumber_halfwidth, representative_wavenumber,
                           spectral_resolution):
     """compute the length of the FIR line shape filter
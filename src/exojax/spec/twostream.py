@@ -9,9 +9,10 @@
 
 import jax.numpy as jnp
 from jax.lax import scan
+from exojax.utils.remat import remat
 
 
-def solve_fluxadding_twostream(trans_coeff, scat_coeff, reduced_source_function, reflectivity_bottom, source_bottom):
+def solve_fluxadding_twostream(trans_coeff, scat_coeff, reduced_source_function, reflectivity_bottom, source_bottom, checkpoint=False):
     """Two-stream RT solver using flux adding
 
     Args:
@@ -20,6 +21,7 @@ def solve_fluxadding_twostream(trans_coeff, scat_coeff, reduced_source_function,
         reduced_source_function :  pi \mathcal{B} (Nlayer, Nnus)
         reflectivity_bottom (_type_): R^+_N (Nnus)
         source_bottom (_type_): S^+_N (Nnus)
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint). Defaults to False.
 
     Returns:
         Effective reflectivity (hat(R^plus)), Effective source (hat(S^plus))
@@ -52,12 +54,12 @@ def solve_fluxadding_twostream(trans_coeff, scat_coeff, reduced_source_function,
         trans_coeff[nlayer-2::-1],
         pihatB[nlayer-2::-1]
     ]
-    RS, _ = scan(f, [Rphat0, Sphat0], arrin)
+    RS, _ = scan(remat(f, checkpoint), [Rphat0, Sphat0], arrin)
     return RS
 
 
 def solve_lart_twostream(diagonal, lower_diagonal, upper_diagonal, vector,
-                         flux_bottom):
+                         flux_bottom, checkpoint=False):
     """Two-stream RT solver given tridiagonal system components (LART form)
 
     Args:
@@ -66,6 +68,7 @@ def solve_lart_twostream(diagonal, lower_diagonal, upper_diagonal, vector,
         upper_diagonal (_type_): upper diagonal component of the tridiagonal system (an)
         vector (_type_): right-hand side vector (dn)
         flux_bottom: bottom flux FB
+        checkpoint (bool, optional): if True, the scan body is rematerialized in the backward pass (jax.checkpoint). Defaults to False.
 
     Note:
         Our definition of the tridiagonal components is 
@@ -99,7 +102,7 @@ def solve_lart_twostream(diagonal, lower_diagonal, upper_diagonal, vector,
         diagonal[1:nlayer, :], lower_diagonal[0:nlayer - 1, :],
         upper_diagonal[1:nlayer, :], vector[1:nlayer, :]
     ]
-    _, stackedTQ = scan(f, [That0, Qhat0], arrin)
+    _, stackedTQ = scan(remat(f, checkpoint), [That0, Qhat0], arrin)
     That, Qhat = stackedTQ
 
     # inserts top boundary
@@ -0,0 +1,113 @@
+"""precomputed cross section table on a (T, log P) grid
+
+    * build_xs_table evaluates xsmatrix of an opa on the (T, P) grid, vectorized over the pressure grid.
+    * The table is saved in the compressed npz format with the grids (save_xs_table/load_xs_table).
+    * xsmatrix_table interpolates the table bilinearly in (T, log10 P). See also opacalc.OpaTable.
+
+"""
+import numpy as np
+import jax.numpy as jnp
+from jax import jit, vmap
+from exojax.utils.interp import interp2d_bilinear
+from exojax.utils.progbar import print_progress
+from exojax.utils.checkarray import check_strictly_ascending
+
+#: version of the table format
+XS_TABLE_VERSION = 1
+
+
+def build_xs_table(opa, T_grid, P_grid, dtype=np.float64, show_progress=True):
+    """build the cross section table on the (T, P) grid
+
+    Notes:
+        For each temperature, opa.xsmatrix is evaluated for all the pressure grid points at once. 
+        When opa is OpaPremodit, xsmatrix_memory_budget can be used to bound the device memory use.
+
+    Args:
+        opa (opa): opa instance with xsmatrix(Tarr, Parr), such as OpaPremodit, OpaModit, OpaDirect
+        T_grid (1D array): temperature grid in K, ascending order
+        P_grid (1D array): pressure grid in bar, ascending order, interpolated in log10 P
+        dtype (optional): dtype of the table. Defaults to np.float64.
+        show_progress (bool, optional): if True, the progress bar is shown. Defaults to True.
+
+    Raises:
+        ValueError: T_grid or P_grid is not in ascending order
+
+    Returns:
+        array: cross section table (len(T_grid), len(P_grid), len(nu_grid)) in cm2
+    """
+    T_grid = np.asarray(T_grid)
+    P_grid = np.asarray(P_grid)
+    check_strictly_ascending(T_grid, "T_grid")
+    check_strictly_ascending(P_grid, "P_grid")
+
+    xs_table = np.zeros((len(T_grid), len(P_grid), len(opa.nu_grid)),
+                        dtype=dtype)
+    for i, T in enumerate(T_grid):
+        Tarr = np.full(len(P_grid), T)
+        xs_table[i, :, :] = np.asarray(opa.xsmatrix(Tarr, P_grid))
+        if show_progress:
+            print_progress(i + 1, len(T_grid), "Making XS table:")
+    return xs_table
+
+
+def save_xs_table(filename, nu_grid, T_grid, P_grid, xs_table, method=""):
+    """save the cross section table in the compressed npz format
+
+    Args:
+        filename (str): file name (.npz)
+        nu_grid (1D array): wavenumber grid in cm-1
+        T_grid (1D array): temperature grid in K
+        P_grid (1D array): pressure grid in bar
+        xs_table (array): cross section table (len(T_grid), len(P_grid), len(nu_grid))
+        method (str, optional): opacity calculator method used to build the table. Defaults to "".
+    """
+    if np.shape(xs_table) != (len(T_grid), len(P_grid), len(nu_grid)):
+        raise ValueError("shape of xs_table should be (nT, nP, nnu).")
+    np.savez_compressed(filename,
+                        version=XS_TABLE_VERSION,
+                        nu_grid=np.asarray(nu_grid),
+                        T_grid=np.asarray(T_grid),
+                        P_grid=np.asarray(P_grid),
+                        xs_table=np.asarray(xs_table),
+                        method=method)
+
+
+def load_xs_table(filename):
+    """load the cross section table
+
+    Args:
+        filename (str): file name (.npz)
+
+    Raises:
+        ValueError: version mismatch
+
+    Returns:
+        nu_grid, T_grid, P_grid, xs_table, method
+    """
+    with np.load(filename) as dat:
+        if int(dat["version"]) != XS_TABLE_VERSION:
+            raise ValueError("version of the xs table file is not supported.")
+        return dat["nu_grid"], dat["T_grid"], dat["P_grid"], dat[
+            "xs_table"], str(dat["method"])
+
+
+@jit
+def xsmatrix_table(Tarr, Parr, T_grid, logP_grid, xs_table):
+    """cross section matrix by the bilinear interpolation of the table in (T, log10 P)
+
+    Notes:
+        T and P outside the grid are clamped to the edges of the grid.
+
+    Args:
+        Tarr (_type_): temperature layers in K
+        Parr (_type_): pressure layers in bar
+        T_grid (_type_): temperature grid in K
+        logP_grid (_type_): log10 pressure grid (bar)
+        xs_table (_type_): cross section table (len(T_grid), len(logP_grid), N_wavenumber)
+
+    Returns:
+        jnp.array : cross section matrix (Nlayer, N_wavenumber)
+    """
+    return vmap(interp2d_bilinear, (0, 0, None, None, None),
+                0)(Tarr, jnp.log10(Parr), T_grid, logP_grid, xs_table)
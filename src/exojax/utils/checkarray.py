@@ -45,3 +45,17 @@ def is_outside_range(xarr, xs, xe):
         
     """
     return not np.any((xarr > xs) & (xarr < xe))
+
+
+def check_strictly_ascending(x, name="grid"):
+    """Check if a grid is in strictly ascending order with two or more points.
+
+    Args:
+        x (numpy.ndarray): grid
+        name (str, optional): name of the grid used in the error message. Defaults to "grid".
+
+    Raises:
+        ValueError: x is not in strictly ascending order or has less than two points
+    """
+    if len(x) < 2 or np.any(np.diff(x) <= 0.0):
+        raise ValueError(name + " should be in ascending order with >= 2 points.")
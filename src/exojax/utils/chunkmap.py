@@ -0,0 +1,39 @@
+"""chunked evaluation along the layer axis
+
+"""
+import jax.numpy as jnp
+from jax.lax import map as lax_map
+
+
+def layer_chunked_map(func, nlayer_chunk, *layer_arrays):
+    """evaluates func by chunks of layers using lax.map, to bound the device memory use
+
+    Note:
+        The layer arrays are padded with the last layer to a multiple of nlayer_chunk, 
+        so that all the chunks have the same shape (one compilation). The padded layers are removed from the output.
+
+    Args:
+        func (function): function of layer arrays (nlayer_chunk, ...) returning an array (nlayer_chunk, ...), e.g. vmapped xsmatrix
+        nlayer_chunk (int): the number of layers in a chunk
+        *layer_arrays: arrays with the layer axis as the first axis (nlayer, ...)
+
+    Returns:
+        jnp.array: output of func (nlayer, ...)
+    """
+    nlayer = jnp.shape(layer_arrays[0])[0]
+    nlayer_chunk = max(1, min(int(nlayer_chunk), nlayer))
+    if nlayer_chunk == nlayer:
+        return func(*layer_arrays)
+
+    nchunk = -(-nlayer // nlayer_chunk)
+    npad = nchunk * nlayer_chunk - nlayer
+    chunked_arrays = []
+    for arr in layer_arrays:
+        arr = jnp.asarray(arr)
+        if npad > 0:
+            arr = jnp.concatenate([arr, jnp.repeat(arr[-1:], npad, axis=0)])
+        chunked_arrays.append(
+            arr.reshape((nchunk, nlayer_chunk) + jnp.shape(arr)[1:]))
+    out = lax_map(lambda args: func(*args), tuple(chunked_arrays))
+    out = out.reshape((nchunk * nlayer_chunk, ) + jnp.shape(out)[2:])
+    return out[:nlayer]
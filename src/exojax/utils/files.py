@@ -1,4 +1,6 @@
 import glob
+import os
+import numpy as np
 from pathlib import Path
 
 def find_files_by_extension(directory_path, extension):
@@ -39,3 +41,16 @@ def get_file_names_without_extension(file_paths):
     """
     return [Path(path).stem for path in file_paths]
 
+
+
+def file_stamp(path):
+    """size and modification time of a file, used to check whether a cache made from the file is stale
+
+    Args:
+        path (str): path to the file
+
+    Returns:
+        np.array: [size in bytes, modification time in ns]
+    """
+    stat = os.stat(path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
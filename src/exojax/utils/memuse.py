@@ -1,3 +1,4 @@
+import warnings
 from jax import config
 
 
@@ -9,6 +10,9 @@ def device_memory_use(opa, art=None, nfree=None, print_summary=True):
         art (art, optional): art instance. Defaults to None.
         nfree (int, optional): the number of free parameters. Defaults to None.
         print_summary (bool): printing summary Defaults to True.
+
+    Note:
+        When opa.checkpoint is given, the number of the layers in a chunk is used instead of art.nlayer for the inference.
     Raises:
         ValueError: method not implemented yet 
 
@@ -26,6 +30,16 @@ def device_memory_use(opa, art=None, nfree=None, print_summary=True):
         nlayer = None
     ngrid_nu_grid = len(opa.nu_grid)
 
+    # with checkpoint, the FFT buffers of a layer chunk only are stored in the backward pass
+    checkpoint = getattr(opa, "checkpoint", None)
+    if nfree is not None and nlayer is not None and checkpoint is not None:
+        if checkpoint == "layer":
+            nlayer = 1
+        else:
+            nlayer = opa.xsmatrix_nlayer_chunk(nlayer)
+        if print_summary:
+            print("checkpoint =", checkpoint, ": # of the layers in a chunk is used.")
+
     if opa.method == "premodit":
         ngrid_broadpar = opa.ngrid_broadpar
         ngrid_elower = opa.ngrid_elower
@@ -125,6 +139,49 @@ def premodit_devmemory_use(ngrid_nu_grid,
     return memuse, (memcase, info)
 
 
+def premodit_nlayer_chunk(ngrid_nu_grid,
+                          ngrid_broadpar,
+                          ngrid_elower,
+                          nlayer,
+                          memory_budget,
+                          precision="FP64"):
+    """the number of layers in a chunk for the layer-chunked xsmatrix of PreMODIT, given a memory budget
+
+    Notes:
+        The device memory use per layer is the FFT/IFFT term (Case 0) of premodit_devmemory_use with nlayer=1. 
+        The LBD term (Case 1) does not depend on the number of layers and is subtracted from the budget. 
+        At least one layer is evaluated in a chunk even if the budget is too small. 
+
+    Args:
+        ngrid_nu_grid (int): the number of the wavenumber grid
+        ngrid_broadpar (int): the number of the broadening parameter grid
+        ngrid_elower: (int): the number of the lower energy grid
+        nlayer (int): the number of the atmospheric layers
+        memory_budget (float): device memory budget (byte)
+        precision (str, optional): precision of JAX mode FP32/FP64. Defaults to "FP64".
+
+    Returns:
+        int: the number of layers in a chunk (1 <= nlayer_chunk <= nlayer)
+    """
+    memuse_layer, _ = premodit_devmemory_use(ngrid_nu_grid,
+                                             ngrid_broadpar,
+                                             0,
+                                             nlayer=1,
+                                             precision=precision)
+    memuse_lbd, _ = premodit_devmemory_use(ngrid_nu_grid,
+                                           ngrid_broadpar,
+                                           ngrid_elower,
+                                           precision=precision)
+    available = memory_budget - memuse_lbd
+    nlayer_chunk = int(available // memuse_layer)
+    if nlayer_chunk < 1:
+        warnings.warn(
+            "memory budget is too small even for one layer: nlayer_chunk=1 is used.",
+            UserWarning)
+        nlayer_chunk = 1
+    return min(nlayer_chunk, int(nlayer))
+
+
 if __name__ == "__main__":
     n_nu_grid = 700000.0 * 0.1
     n_broadpar = 8
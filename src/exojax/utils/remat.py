@@ -0,0 +1,23 @@
+"""rematerialization (gradient checkpointing) utilities
+
+    * In reverse-mode differentiation (e.g. HMC-NUTS), JAX stores the intermediate buffers of the forward pass.
+    * A function wrapped with jax.checkpoint stores only its inputs and recomputes the intermediates in the backward pass,
+      i.e. trades recomputation for device memory.
+
+"""
+from jax import checkpoint as jax_checkpoint
+
+
+def remat(func, checkpoint=True):
+    """wraps func with jax.checkpoint if checkpoint is True
+
+    Args:
+        func (function): function, e.g. a per-layer opacity or a scan body
+        checkpoint (bool, optional): if True, func is rematerialized in the backward pass. Defaults to True.
+
+    Returns:
+        function: func or the checkpointed func
+    """
+    if checkpoint:
+        return jax_checkpoint(func)
+    return func
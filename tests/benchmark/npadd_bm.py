@@ -0,0 +1,61 @@
+"""benchmark of the LSD accumulation (np.add.at vs np.bincount, opt-in threads)
+
+   pytest tests/benchmark/npadd_bm.py
+
+"""
+import pytest
+import numpy as np
+from exojax.spec.lsd import npadd3D_direct1D
+
+nx, ny, nz = 100000, 4, 20
+nline = 10000000
+
+
+def _lines():
+    rng = np.random.default_rng(1)
+    w = rng.random(nline)
+    cx = rng.random(nline)
+    ix = rng.integers(0, nx - 1, nline)
+    cy = rng.random(nline)
+    iy = rng.integers(0, ny, nline)
+    cz = rng.random(nline)
+    iz = rng.integers(0, nz - 1, nline)
+    return w, cx, ix, cy, iy, cz, iz
+
+
+lines = _lines()
+
+
+def npadd_at():
+    a = np.zeros((nx, ny, nz))
+    w, cx, ix, cy, iy, cz, iz = lines
+    wy = w * cy
+    np.add.at(a, (ix, iy, iz), wy * (1.0 - cx) * (1.0 - cz))
+    np.add.at(a, (ix + 1, iy, iz), wy * cx * (1.0 - cz))
+    np.add.at(a, (ix, iy, iz + 1), wy * (1.0 - cx) * cz)
+    np.add.at(a, (ix + 1, iy, iz + 1), wy * cx * cz)
+    return a
+
+
+def npadd_bincount(nthreads):
+    return npadd3D_direct1D(np.zeros((nx, ny, nz)), *lines, nthreads=nthreads)
+
+
+def test_benchmark_add_at(benchmark):
+    benchmark(npadd_at)
+
+
+@pytest.mark.parametrize("nthreads", [None, 2, 4])
+def test_benchmark_bincount(benchmark, nthreads):
+    benchmark(npadd_bincount, nthreads)
+
+
+if __name__ == "__main__":
+    import time
+    for label, func in [("np.add.at", npadd_at),
+                        ("bincount", lambda: npadd_bincount(None)),
+                        ("bincount (2 threads)", lambda: npadd_bincount(2)),
+                        ("bincount (4 threads)", lambda: npadd_bincount(4))]:
+        ts = time.perf_counter()
+        func()
+        print(label, time.perf_counter() - ts, "sec")
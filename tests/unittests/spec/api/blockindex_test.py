@@ -0,0 +1,103 @@
+from exojax.spec.blockindex import build_block_index
+from exojax.spec.blockindex import block_row_ranges
+from exojax.spec.blockindex import select_blocks
+from exojax.spec.blockindex import select_dataframe_blockwise
+from exojax.spec.blockindex import block_index_dataframe
+from exojax.spec.blockindex import load_block_index
+from exojax.spec.hitran import line_strength_numpy
+from exojax.spec import api
+from exojax.test.data import TESTDATA_CO_HITEMP_PARFILE
+from exojax.test.emulate_mdb import mock_wavenumber_grid
+import numpy as np
+import pkg_resources
+import vaex
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_line_list(nline=1000):
+    np.random.seed(1)
+    nu_lines = np.sort(np.random.rand(nline) * 100.0 + 4000.0)
+    elower = np.random.rand(nline) * 5000.0
+    line_strength_ref = 10**(np.random.rand(nline) * 6.0 - 26.0)
+    return nu_lines, line_strength_ref, elower
+
+
+def test_build_block_index_and_row_ranges():
+    nu_lines, line_strength_ref, elower = _mock_line_list()
+    index = build_block_index(nu_lines, line_strength_ref, elower, block_size=64)
+    assert len(index["row_start"]) == 16
+    assert index["row_end"][-1] == 1000
+    assert index["nu_min"][1] == nu_lines[64]
+    assert index["line_strength_max"][0] == np.max(line_strength_ref[:64])
+    block_mask = np.zeros(16, dtype=bool)
+    block_mask[[2, 3, 7]] = True
+    assert block_row_ranges(index, block_mask) == [(128, 256), (448, 512)]
+
+
+def test_select_blocks_does_not_miss_lines():
+    nu_lines, line_strength_ref, elower = _mock_line_list()
+    index = build_block_index(nu_lines, line_strength_ref, elower, block_size=16)
+    Ttyp = 1000.0
+    qrtyp = 3.0
+    crit = 1.e-22
+    nu_min, nu_max, elower_max = 4020.0, 4060.0, 3000.0
+    block_mask = select_blocks(index, nu_min, nu_max, crit, Ttyp, qrtyp,
+                               elower_max)
+    assert np.sum(block_mask) < len(block_mask)
+
+    line_mask = (nu_lines > nu_min) * (nu_lines < nu_max) * (
+        elower < elower_max) * (line_strength_numpy(
+            Ttyp, line_strength_ref, nu_lines, elower, qrtyp) > crit)
+    row_selected = np.zeros(len(nu_lines), dtype=bool)
+    for start, end in block_row_ranges(index, block_mask):
+        row_selected[start:end] = True
+    assert np.all(row_selected[line_mask])
+
+
+def test_block_index_file_is_rebuilt_when_stale(tmp_path):
+    nu_lines, line_strength_ref, elower = _mock_line_list()
+    datafile = str(tmp_path / "lines.hdf5")
+    vaex.from_arrays(wav=nu_lines, int=line_strength_ref,
+                     El=elower).export_hdf5(datafile)
+    columns = ("wav", "int", "El")
+    df = vaex.open(datafile)
+    index = block_index_dataframe(df, columns, datafile, block_size=64)
+    loaded = load_block_index(datafile, columns, 64)
+    assert np.array_equal(loaded["nu_max"], index["nu_max"])
+    assert load_block_index(datafile, columns, 128) is None
+    df.close()
+
+    vaex.from_arrays(wav=nu_lines[:500],
+                     int=line_strength_ref[:500],
+                     El=elower[:500]).export_hdf5(datafile)
+    assert load_block_index(datafile, columns, 64) is None
+
+
+def test_select_dataframe_blockwise():
+    nu_lines, line_strength_ref, elower = _mock_line_list()
+    df = vaex.from_arrays(wav=nu_lines, int=line_strength_ref, El=elower)
+    dfsel = select_dataframe_blockwise([df], ("wav", "int", "El"),
+                                       nu_min=4020.0,
+                                       nu_max=4030.0,
+                                       block_size=32)
+    assert len(dfsel) < len(df)
+    mask = (nu_lines > 4020.0) * (nu_lines < 4030.0)
+    masksel = (dfsel.wav.values > 4020.0) * (dfsel.wav.values < 4030.0)
+    assert np.array_equal(dfsel.wav.values[masksel], nu_lines[mask])
+
+
+def test_mdbhitemp_block_index():
+    parfile = pkg_resources.resource_filename(
+        'exojax', 'data/testdata/CO/' + TESTDATA_CO_HITEMP_PARFILE)
+    nus, wav, res = mock_wavenumber_grid()
+    mdb = api.MdbHitemp('CO', nus, isotope=1, parfile=parfile, crit=1.e-30)
+    mdb_block = api.MdbHitemp('CO',
+                              nus,
+                              isotope=1,
+                              parfile=parfile,
+                              crit=1.e-30,
+                              block_index=True)
+    assert np.array_equal(mdb.nu_lines, mdb_block.nu_lines)
+    assert np.array_equal(mdb.line_strength_ref, mdb_block.line_strength_ref)
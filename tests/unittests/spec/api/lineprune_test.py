@@ -0,0 +1,54 @@
+from exojax.spec.lineprune import temperature_range_pruning_mask
+from exojax.spec.lineprune import pruning_temperature_grid
+from exojax.test.emulate_mdb import mock_mdbHitemp
+import numpy as np
+import pytest
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def test_pruning_temperature_grid():
+    Tgrid = pruning_temperature_grid([1000.0, 500.0], nT=5)
+    assert Tgrid[0] == pytest.approx(500.0)
+    assert Tgrid[-1] == pytest.approx(1000.0)
+    assert len(pruning_temperature_grid([700.0, 700.0])) == 1
+    with pytest.raises(ValueError):
+        pruning_temperature_grid([0.0, 700.0])
+
+
+def test_temperature_range_pruning_mask_bound():
+    np.random.seed(1)
+    nline = 1000
+    nu_lines = np.sort(np.random.rand(nline) * 10.0 + 4000.0)
+    elower = np.random.rand(nline) * 5000.0
+    line_strength_ref = 10**(np.random.rand(nline) * 6.0 - 26.0)
+    tolerance = 1.e-3
+    mask, report = temperature_range_pruning_mask(line_strength_ref,
+                                                  nu_lines,
+                                                  elower,
+                                                  lambda T: 1.0,
+                                                  [500.0, 1500.0],
+                                                  tolerance=tolerance)
+    assert report["nline_retained"] == np.sum(mask)
+    assert report["nline_retained"] < nline
+    assert report["estimated_error"] <= tolerance
+    assert np.all(report["estimated_error_temperatures"] <= tolerance)
+
+
+def test_prune_lines_trange_hitemp():
+    mdb = mock_mdbHitemp(multi_isotope=True)
+    nline = len(mdb.nu_lines)
+    tolerance = 1.e-2
+    report = mdb.prune_lines_trange([500.0, 1500.0], tolerance=tolerance)
+    assert report["nline"] == nline
+    assert len(mdb.nu_lines) == report["nline_retained"]
+    assert len(mdb.logsij0) == report["nline_retained"]
+    assert len(mdb.qr_interp_lines(1000.0)) == report["nline_retained"]
+    assert report["estimated_error"] <= tolerance
+
+
+if __name__ == "__main__":
+    test_pruning_temperature_grid()
+    test_temperature_range_pruning_mask_bound()
+    test_prune_lines_trange_hitemp()
@@ -0,0 +1,70 @@
+from exojax.spec.loadfilter import filter_dataframe_chunkwise
+from exojax.spec.loadfilter import check_load_filter
+from exojax.spec.hitran import line_strength_numpy
+from exojax.spec import api
+from exojax.test.data import TESTDATA_CO_HITEMP_PARFILE
+from exojax.test.emulate_mdb import mock_wavenumber_grid
+import numpy as np
+import pkg_resources
+import pytest
+import vaex
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_dataframe(nline=1000):
+    np.random.seed(1)
+    return vaex.from_arrays(wav=np.sort(np.random.rand(nline) * 100.0 +
+                                        4000.0),
+                            El=np.random.rand(nline) * 5000.0,
+                            v_u=np.random.randint(0, 5, nline),
+                            v_l=np.random.randint(0, 3, nline))
+
+
+def test_filter_dataframe_chunkwise():
+    df = _mock_dataframe()
+    load_filter = [("elower", "<", 2000.0), ("v_u - v_l", "==", 2),
+                   ("v_l", "in", [0, 1])]
+    dffil = filter_dataframe_chunkwise(df,
+                                       load_filter,
+                                       aliases={"elower": "El"},
+                                       base_mask=lambda chunk:
+                                       (chunk.wav > 4020.0).values,
+                                       columns=["wav", "El"],
+                                       chunk_size=64)
+    wav, El, v_u, v_l = [df[c].values for c in ["wav", "El", "v_u", "v_l"]]
+    mask = (El < 2000.0) * (v_u - v_l == 2) * (v_l < 2) * (wav > 4020.0)
+    assert np.array_equal(dffil.wav.values, wav[mask])
+    assert dffil.get_column_names() == ["wav", "El"]
+
+
+def test_check_load_filter():
+    with pytest.raises(ValueError):
+        check_load_filter([("El", "~", 1.0)])
+    with pytest.raises(ValueError):
+        check_load_filter([("El", "<")])
+
+
+def test_mdbhitemp_load_filter():
+    parfile = pkg_resources.resource_filename(
+        'exojax', 'data/testdata/CO/' + TESTDATA_CO_HITEMP_PARFILE)
+    nus, wav, res = mock_wavenumber_grid()
+    mdb = api.MdbHitemp('CO', nus, isotope=1, parfile=parfile)
+    Sij_typ = line_strength_numpy(mdb.Ttyp, mdb.line_strength_ref,
+                                  mdb.nu_lines, mdb.elower, 1.0)
+    crit = np.median(Sij_typ)
+    load_filter = [("elower", "<", 3000.0), ("Sij", ">", crit)]
+    mdb_filter = api.MdbHitemp('CO',
+                               nus,
+                               isotope=1,
+                               parfile=parfile,
+                               load_filter=load_filter,
+                               inherit_dataframe=True)
+    QTref, QTtyp = mdb.QT_for_select_line(mdb.Ttyp)
+    Sij_typ = line_strength_numpy(mdb.Ttyp, mdb.line_strength_ref,
+                                  mdb.nu_lines, mdb.elower, QTtyp / QTref)
+    mask = (mdb.elower < 3000.0) * (Sij_typ > crit)
+    assert 0 < np.sum(mask) < len(mask)
+    assert np.array_equal(mdb_filter.nu_lines, mdb.nu_lines[mask])
+    assert len(mdb_filter.df) == np.sum(mask)
@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+from exojax.spec.api import MdbExomol
+from exojax.spec.mdbsnapshot import save_snapshot
+from exojax.spec.mdbsnapshot import load_snapshot
+from exojax.utils.constants import Tref_original
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_activated_mdbexomol(nline=100):
+    # mimics an activated MdbExomol without radis/network
+    np.random.seed(1)
+    mdb = MdbExomol.__new__(MdbExomol)
+    mdb.dbtype = "exomol"
+    mdb.path = "CO/12C-16O/SAMPLE"
+    mdb.exact_molecule_name = "12C-16O"
+    mdb.database = "SAMPLE"
+    mdb.simple_molecule_name = "CO"
+    mdb.molmass = 28.0101
+    mdb.Tref = Tref_original
+    mdb.gpu_transfer = False
+    mdb.nurange = [4000.0, 4100.0]
+    mdb.nu_lines = np.sort(np.random.uniform(4000.0, 4100.0, nline))
+    mdb.elower = np.random.uniform(0.0, 5000.0, nline)
+    mdb.line_strength_ref = 10**np.random.uniform(-24.0, -20.0, nline)
+    mdb.logsij0 = np.log(mdb.line_strength_ref)
+    mdb.A = np.random.uniform(1.0, 10.0, nline)
+    mdb.gamma_natural = mdb.A * 1.e-12
+    mdb.gpp = np.random.randint(1, 20, nline).astype(float)
+    mdb.jlower = np.random.randint(0, 50, nline)
+    mdb.jupper = mdb.jlower + 1
+    mdb.alpha_ref = np.random.uniform(0.05, 0.1, nline)
+    mdb.n_Texp = np.random.uniform(0.4, 0.6, nline)
+    mdb.T_gQT = np.linspace(1.0, 5000.0, 5000)
+    mdb.gQT = 0.36 * mdb.T_gQT + 0.3
+    return mdb
+
+
+def test_snapshot_roundtrip(tmp_path):
+    mdb = _mock_activated_mdbexomol()
+    path = mdb.save_snapshot(str(tmp_path / "snapshot"))
+    mdb_snap = MdbExomol.from_snapshot(path)
+    assert isinstance(mdb_snap.nu_lines, np.memmap)
+    for name in MdbExomol.snapshot_columns:
+        assert np.array_equal(getattr(mdb_snap, name), getattr(mdb, name))
+    assert mdb_snap.molmass == mdb.molmass
+    assert mdb_snap.nurange == mdb.nurange
+    assert str(mdb_snap.path) == mdb.path
+    assert mdb_snap.qr_interp(1000.0) == pytest.approx(mdb.qr_interp(1000.0))
+
+    mdb_snap_gpu = MdbExomol.from_snapshot(path, gpu_transfer=True)
+    assert np.allclose(mdb_snap_gpu.dev_nu_lines, mdb.nu_lines)
+
+    # the snapshot is replaced
+    mdb.change_reference_temperature(1000.0)
+    mdb.save_snapshot(path)
+    mdb_snap = MdbExomol.from_snapshot(path)
+    assert mdb_snap.Tref == 1000.0
+    assert np.array_equal(mdb_snap.line_strength_ref, mdb.line_strength_ref)
+
+
+def test_load_snapshot_errors(tmp_path):
+    with pytest.raises(ValueError):
+        load_snapshot(str(tmp_path / "none"), "MdbExomol")
+    path = save_snapshot(str(tmp_path / "snapshot"), "MdbHitemp",
+                         {"nu_lines": np.arange(3.0)}, {"Tref": np.float64(296.0)})
+    with pytest.raises(ValueError):
+        MdbExomol.from_snapshot(path)
+    columns, attributes = load_snapshot(path, "MdbHitemp")
+    assert attributes["Tref"] == 296.0
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_snapshot_roundtrip(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,50 @@
+from exojax.spec.pftable import regular_qt_table
+from exojax.spec.pftable import interp_qt_table
+from exojax.spec.pftable import interp_qt_table_derivative
+from exojax.spec.atomllapi import load_pf_Barklem2016
+from exojax.test.emulate_mdb import mock_mdbHitemp
+import numpy as np
+import jax.numpy as jnp
+from jax import grad
+import pytest
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def test_regular_qt_table_reproduces_regular_table():
+    T_gQT = np.array([1.0, 20.0, 40.0, 60.0, 80.0])
+    gQT = T_gQT**1.5
+    T0, dT, table = regular_qt_table(T_gQT, gQT)
+    assert dT == 20.0
+    assert T0 == 0.0
+    T = np.array([20.0, 33.0, 61.0, 80.0, 100.0])
+    assert np.allclose(interp_qt_table(T, T0, dT, table),
+                       np.interp(T, T_gQT, gQT))
+
+
+def test_interp_qt_table_derivative():
+    pfTdat, pfdat = load_pf_Barklem2016()
+    T_gQT = np.array(pfTdat.columns[1:], dtype=float)
+    gQT = pfdat.iloc[:, 1:].to_numpy(dtype=float)
+    T0, dT, table = regular_qt_table(T_gQT, gQT)
+    T = 2345.6
+    assert np.allclose(interp_qt_table(T, T0, dT, table),
+                       [np.interp(T, T_gQT, q) for q in gQT])
+    dQdT = interp_qt_table_derivative(T, T0, dT, table)
+    dQdT_ad = grad(lambda x: interp_qt_table(x, T0, dT, table)[76])(T)
+    assert dQdT[76] == pytest.approx(dQdT_ad)
+
+
+def test_qr_interp_layers_hitemp():
+    mdb = mock_mdbHitemp(multi_isotope=True)
+    Tarr = jnp.array([500.0, 1234.5, 3000.0])
+    qr_layers = mdb.qr_interp_layers(Tarr)
+    assert qr_layers.shape == (3, len(mdb.uniqiso))
+    for i, isotope in enumerate(mdb.uniqiso):
+        qr = np.array([mdb.qr_interp(isotope, T) for T in Tarr])
+        assert np.allclose(qr_layers[:, i], qr)
+        assert np.allclose(mdb.qr_interp_layers(Tarr, isotope), qr)
+    qr_lines = mdb.qr_interp_lines(Tarr)
+    assert qr_lines.shape == (3, len(mdb.nu_lines))
+    assert np.allclose(qr_lines[1], mdb.qr_interp_lines(1234.5))
@@ -0,0 +1,82 @@
+import pytest
+import numpy as np
+import jax.numpy as jnp
+from jax import config
+from jax import grad
+from exojax.spec.atmrt import ArtEmisPure
+from exojax.spec.atmrt import ArtEmisScat
+from exojax.spec.atmrt import ArtReflectPure
+
+config.update("jax_enable_x64", True)
+
+nu_grid = jnp.linspace(4000.0, 4100.0, 64)
+nlayer = 20
+
+
+def _dtau(scale):
+    return scale * jnp.outer(jnp.logspace(-3, 1, nlayer),
+                             1.0 + 0.5 * jnp.sin(nu_grid / 3.0))
+
+
+@pytest.mark.parametrize("rtsolver", ["ibased", "ibased_linsap"])
+def test_art_emis_pure_gradient_checkpoint(rtsolver):
+    arts = [
+        ArtEmisPure(nlayer=nlayer,
+                    nu_grid=nu_grid,
+                    rtsolver=rtsolver,
+                    checkpoint=checkpoint) for checkpoint in [False, True]
+    ]
+
+    def loss(art, scale):
+        temperature = art.powerlaw_temperature(1200.0, 0.1)
+        if rtsolver == "ibased_linsap":
+            temperature = art.powerlaw_temperature_boundary(1200.0, 0.1)
+        return jnp.sum(art.run(_dtau(scale), temperature))
+
+    values = [grad(lambda x: loss(art, x))(1.0) for art in arts]
+    assert values[1] == pytest.approx(values[0], rel=1.e-12)
+
+
+@pytest.mark.parametrize(
+    "rtsolver", ["fluxadding_toon_hemispheric_mean", "lart_toon_hemispheric_mean"])
+def test_art_emis_scat_gradient_checkpoint(rtsolver):
+    arts = [
+        ArtEmisScat(nlayer=nlayer,
+                    nu_grid=nu_grid,
+                    rtsolver=rtsolver,
+                    checkpoint=checkpoint) for checkpoint in [False, True]
+    ]
+    ssa = 0.3 * jnp.ones((nlayer, len(nu_grid)))
+    asym = 0.1 * jnp.ones((nlayer, len(nu_grid)))
+
+    def loss(art, scale):
+        temperature = art.powerlaw_temperature(1200.0, 0.1)
+        return jnp.sum(art.run(_dtau(scale), ssa, asym, temperature))
+
+    values = [grad(lambda x: loss(art, x))(1.0) for art in arts]
+    assert values[1] == pytest.approx(values[0], rel=1.e-12)
+
+
+def test_art_reflect_pure_gradient_checkpoint():
+    arts = [
+        ArtReflectPure(nlayer=nlayer, nu_grid=nu_grid, checkpoint=checkpoint)
+        for checkpoint in [False, True]
+    ]
+    ssa = 0.3 * jnp.ones((nlayer, len(nu_grid)))
+    asym = 0.1 * jnp.ones((nlayer, len(nu_grid)))
+    reflectivity_surface = 0.5 * jnp.ones(len(nu_grid))
+    incoming_flux = jnp.ones(len(nu_grid))
+
+    def loss(art, scale):
+        return jnp.sum(
+            art.run(_dtau(scale), ssa, asym, reflectivity_surface,
+                    incoming_flux))
+
+    values = [grad(lambda x: loss(art, x))(1.0) for art in arts]
+    assert values[1] == pytest.approx(values[0], rel=1.e-12)
+
+
+if __name__ == "__main__":
+    test_art_emis_pure_gradient_checkpoint("ibased")
+    test_art_emis_scat_gradient_checkpoint("lart_toon_hemispheric_mean")
+    test_art_reflect_pure_gradient_checkpoint()
@@ -0,0 +1,75 @@
+from exojax.spec.atomllapi import read_ExAll
+from exojax.spec.atomllapi import pickup_param
+from exojax.spec.atomllapi import read_kurucz
+from exojax.spec.atomllapi import load_kurucz
+from exojax.spec.atomllapi import load_atomll_cache
+from exojax.spec.atomllapi import atomll_cache_path
+import numpy as np
+import pytest
+
+vald_species = ["'Fe 1'", "'Fe 2'", "'H 1'", "'Ti 4'", "'CO 1'", "'TiO 1'", "'C2 1'"]
+
+
+def _write_vald(path):
+    with open(path, "w") as f:
+        f.write(" " * 67 + "Lande factors       Damping parameters\n")
+        f.write("Elm Ion      WL_vac(A)   log gf* E_low(eV) J lo  E_up(eV) J up"
+                "   lower   upper    mean   Rad.  Stark   Waals\n")
+        for i, species in enumerate(vald_species):
+            f.write("%s,%16.4f,%8.3f,%8.4f,%5.1f,%8.4f,%5.1f,"
+                    "  1.500,  1.500,  1.500, 8.143,-5.390,-7.780,\n" %
+                    (species, 5000.0 + i, -1.0, 1.0, 2.0, 3.0, 3.0))
+            f.write("'  LS                      3d6.(5D).4s.4p.(3P*) z5F*'\n")
+            f.write("'_          KP   KP   KP   KP   KP   KP    Fe  '\n")
+
+
+def _write_kurucz(path, nline=3):
+    with open(path, "w") as f:
+        for i in range(nline):
+            f.write("%11.4f%7.3f%6s%12.3f%5.1f%11s%12.3f%5.1f%11s%6.2f%6.2f%6.2f"
+                    "K88  0 0  0 0.000  0 0.000    0    0\n" %
+                    (400.0 + i, -4.23, ["26.00", "26.01", " 1.00"][i % 3],
+                     22838.323, 3.0, " (3F)4s4p z", 47814.8, 2.0,
+                     " (3H)4s4p z", 8.05, -5.49, -7.58))
+
+
+def test_read_ExAll(tmp_path):
+    path = tmp_path / "vald.txt"
+    _write_vald(path)
+    ExAll = read_ExAll(path).to_pandas_df()
+    # molecules and Ti IV are removed
+    assert np.array_equal(ExAll["species"], [2600.0, 2601.0, 100.0])
+    A, nu_lines, elower, eupper, gupper, jlower, jupper, ielem, iion, gamRad, gamSta, vdWdamp = pickup_param(
+        ExAll)
+    assert np.array_equal(ielem, [1, 26, 26])
+    assert np.array_equal(iion, [1, 2, 1])
+    assert nu_lines[0] == pytest.approx(1.e8 / 5002.0)
+
+
+def test_read_kurucz(tmp_path):
+    path = tmp_path / "gf.all"
+    _write_kurucz(path)
+    A, nu_lines, elower, eupper, gupper, jlower, jupper, ielem, iion, gamRad, gamSta, gamvdW = read_kurucz(
+        path)
+    # sorted by wavenumber
+    assert np.array_equal(ielem, [1, 26, 26])
+    assert np.array_equal(iion, [1, 2, 1])
+    assert np.all(elower == 22838.323)
+    assert np.all(gupper == 5.0)
+    assert np.all(gamvdW == -7.58)
+
+
+def test_load_kurucz_cache(tmp_path):
+    path = tmp_path / "gf.all"
+    _write_kurucz(path)
+    assert load_atomll_cache(path) is None
+    params = load_kurucz(path)
+    assert atomll_cache_path(path).exists()
+    cached = load_atomll_cache(path)
+    for a, b in zip(params, cached):
+        assert np.array_equal(a, b)
+
+    # the cache becomes stale when the line list is modified
+    _write_kurucz(path, nline=4)
+    assert load_atomll_cache(path) is None
+    assert len(load_kurucz(path)[1]) == 4
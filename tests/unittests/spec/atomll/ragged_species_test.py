@@ -0,0 +1,96 @@
+from exojax.spec.atomll import species_segments
+from exojax.spec.atomll import species_padded_array
+from exojax.spec.atomll import line_species_weight
+from exojax.spec.atomll import get_unique_species
+from exojax.spec.atomll import sep_arr_of_sp
+from exojax.spec.dit import dtauM_vald
+from exojax.spec.dit import xsmatrix
+from exojax.spec.initspec import init_dit
+from exojax.spec.layeropacity import layer_optical_depth
+from types import SimpleNamespace
+import numpy as np
+import jax.numpy as jnp
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+ielem = np.array([26, 26, 22, 26, 1, 22, 26, 26])
+iion = np.array([1, 2, 1, 1, 1, 1, 2, 1])
+
+
+def _padded_reference(arr, ielem, iion, uspecies):
+    sep = [arr[(ielem == sp[0]) * (iion == sp[1])] for sp in uspecies]
+    L_max = np.max([len(a) for a in sep])
+    return np.array([np.pad(a, (0, L_max - len(a))) for a in sep])
+
+
+def test_species_segments():
+    uspecies, species_index, line_order, species_offsets = species_segments(
+        ielem, iion)
+    assert np.array_equal(uspecies, [[26, 1], [26, 2], [22, 1], [1, 1]])
+    assert np.array_equal(species_index, [0, 1, 2, 0, 3, 2, 1, 0])
+    assert np.array_equal(species_offsets, [0, 3, 5, 7, 8])
+    assert np.array_equal(line_order, [0, 3, 7, 1, 6, 2, 5, 4])
+
+    arr = np.arange(len(ielem)) + 1.0
+    padded = species_padded_array(arr, species_index, line_order,
+                                  species_offsets)
+    assert np.array_equal(padded,
+                          _padded_reference(arr, ielem, iion, uspecies))
+
+
+def test_sep_arr_of_sp():
+    adb = SimpleNamespace(ielem=jnp.array(ielem), iion=jnp.array(iion))
+    uspecies = get_unique_species(adb)
+    assert np.array_equal(uspecies, [[26, 1], [26, 2], [22, 1], [1, 1]])
+    arr = np.arange(len(ielem)) * 0.5
+    assert np.array_equal(sep_arr_of_sp(arr, adb),
+                          _padded_reference(arr, ielem, iion, uspecies))
+
+
+def test_line_species_weight():
+    uspecies = jnp.array([[22, 1], [26, 1], [26, 2]])
+    weight = line_species_weight(jnp.array(ielem), jnp.array(iion), uspecies,
+                                 jnp.array([2.0, 3.0, 5.0]))
+    assert np.array_equal(weight, [3.0, 5.0, 2.0, 3.0, 0.0, 2.0, 5.0, 3.0])
+
+
+def test_dtauM_vald_equals_sum_of_species():
+    nus = np.linspace(5000.0, 5010.0, 2001)
+    nu_lines = np.array(
+        [5001.0, 5002.5, 5003.0, 5004.2, 5005.1, 5006.6, 5007.3, 5008.8])
+    nline = len(nu_lines)
+    nlayer = 3
+    cnu, indexnu, pmarray = init_dit(nu_lines, nus)
+    sigmaDM = jnp.array(np.linspace(0.02, 0.05, nlayer)[:, None] *
+                        np.linspace(1.0, 1.5, nline)[None, :])
+    gammaLM = jnp.array(np.linspace(0.01, 0.03, nlayer)[:, None] *
+                        np.linspace(1.0, 2.0, nline)[None, :])
+    SijM = jnp.array(np.linspace(1.0, 2.0, nlayer)[:, None] *
+                     np.linspace(1.0, 3.0, nline)[None, :] * 1.e-20)
+    dgm_sigmaD = jnp.array(np.geomspace(0.015, 0.1, 8)[None, :] *
+                           np.ones((nlayer, 1)))
+    dgm_gammaL = jnp.array(np.geomspace(0.008, 0.1, 8)[None, :] *
+                           np.ones((nlayer, 1)))
+    dParr = jnp.array([0.1, 0.2, 0.3])
+    g = 1.e5
+
+    adb = SimpleNamespace(ielem=jnp.array(ielem), iion=jnp.array(iion))
+    uspecies = get_unique_species(adb)
+    MMR = jnp.array([1.e-3, 1.e-4, 1.e-5, 0.7])
+    mods = jnp.array([0.0, 0.5, -0.3, 0.0])
+    mass = jnp.array([55.8, 55.8, 47.9, 1.0])
+    dtau = dtauM_vald(dParr, g, adb, nus, cnu, indexnu, pmarray, SijM,
+                      gammaLM, sigmaDM, uspecies, mods, MMR, mass, dgm_sigmaD,
+                      dgm_gammaL)
+
+    dtau_ref = jnp.zeros((nlayer, len(nus)))
+    for i, sp in enumerate(uspecies):
+        mask = (ielem == sp[0]) * (iion == sp[1])
+        xsm = xsmatrix(cnu, indexnu, pmarray, sigmaDM, gammaLM,
+                       SijM * mask[None, :], nus, dgm_sigmaD, dgm_gammaL)
+        dtau_ref = dtau_ref + layer_optical_depth(
+            dParr, jnp.abs(xsm), MMR[i] * 10**mods[i] * jnp.ones(nlayer),
+            mass[i], g)
+    assert np.allclose(dtau, dtau_ref, rtol=1.e-8, atol=0.0)
+    assert np.max(dtau) > 0.0
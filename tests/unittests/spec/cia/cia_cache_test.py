@@ -0,0 +1,50 @@
+from exojax.spec.hitrancia import read_cia
+from exojax.spec.hitrancia import load_cia
+from exojax.spec.hitrancia import load_cia_cache
+from exojax.spec.hitrancia import cia_cache_path
+from exojax.spec.contdb import CdbCIA
+import numpy as np
+import os
+import pytest
+
+tcia_test = [200.0, 300.0, 1000.0]
+
+
+def _write_cia(filename, nu):
+    with open(filename, "w") as f:
+        for T in tcia_test:
+            f.write("               H2-H2 %11.3f %9.3f %7d %7.1f 8.788E-45 -.999"
+                    "                             6\n" %
+                    (nu[0], nu[-1], len(nu), T))
+            for x in nu:
+                f.write(" %9.4f  %9.3E\n" % (x, 1.e-45 * T * (1.0 + x)))
+
+
+def test_read_cia_multiple_temperatures(tmp_path):
+    filename = str(tmp_path / "H2-H2_TEST.cia")
+    nu = np.arange(4300.0, 4400.0)
+    _write_cia(filename, nu)
+    nucia, tcia, ac = read_cia(filename, 4310.5, 4320.5)
+    assert np.array_equal(tcia, tcia_test)
+    assert np.array_equal(nucia, np.arange(4311.0, 4322.0))
+    assert np.shape(ac) == (3, 11)
+    assert ac[2, 0] == pytest.approx(1.e-42 * 4312.0, rel=1.e-3)
+
+
+def test_load_cia_cache(tmp_path):
+    filename_h2h2 = str(tmp_path / "H2-H2_TEST.cia")
+    filename_h2he = str(tmp_path / "H2-He_TEST.cia")
+    _write_cia(filename_h2h2, np.arange(4300.0, 4400.0))
+    _write_cia(filename_h2he, np.arange(4000.0, 4500.0))
+    cias = load_cia([filename_h2h2, filename_h2he], 4310.5, 4320.5)
+    assert os.path.exists(cia_cache_path(filename_h2h2))
+    assert os.path.exists(cia_cache_path(filename_h2he))
+    for filename, cia in zip([filename_h2h2, filename_h2he], cias):
+        for x, y in zip(read_cia(filename, 4310.5, 4320.5), cia):
+            assert np.array_equal(x, y)
+
+    # the cache becomes stale when the CIA file is modified
+    _write_cia(filename_h2h2, np.arange(4300.0, 4350.0))
+    assert load_cia_cache(filename_h2h2) is None
+    cdb = CdbCIA(filename_h2h2, nurange=[4310.0, 4320.0], margin=0.0)
+    assert np.shape(cdb.logac) == (3, len(cdb.nucia))
@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+from exojax.spec.ckd import gauss_legendre_grid
+from exojax.spec.ckd import nu_bin_index
+from exojax.spec.ckd import compute_kdist
+from exojax.spec.ckd import random_overlap_mixing
+from exojax.spec.ckd import build_ck_table
+from exojax.spec.ckd import save_ck_table
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaCKD
+from exojax.spec.atmrt import ArtEmisPure
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def test_gauss_legendre_grid():
+    g_ordinates, g_weights = gauss_legendre_grid(8)
+    assert np.sum(g_weights) == pytest.approx(1.0)
+    assert np.all((g_ordinates > 0.0) & (g_ordinates < 1.0))
+    assert np.sum(g_ordinates * g_weights) == pytest.approx(0.5)
+
+
+def test_compute_kdist():
+    nu_grid = np.arange(10.0)
+    bin_index = nu_bin_index(nu_grid, np.array([0.0, 5.0, 9.0]))
+    assert np.all(bin_index == np.array([0, 0, 0, 0, 0, 1, 1, 1, 1, -1]))
+    xs = np.array([[5.0, 1.0, 4.0, 2.0, 3.0, 2.0, 2.0, 2.0, 2.0, 100.0]])
+    g_ordinates = np.array([0.1, 0.5, 0.9])
+    kdist = compute_kdist(xs, bin_index, 2, g_ordinates)
+    assert np.shape(kdist) == (1, 2, 3)
+    assert np.allclose(kdist[0, 0, :], [1.0, 3.0, 5.0])
+    assert np.allclose(kdist[0, 1, :], 2.0)
+
+
+def test_nu_bin_index_empty_bin():
+    with pytest.raises(ValueError):
+        nu_bin_index(np.arange(10.0), np.array([0.0, 5.2, 5.5, 9.0]))
+
+
+def test_random_overlap_mixing():
+    g_ordinates, g_weights = gauss_legendre_grid(8)
+    rng = np.random.default_rng(0)
+    dtau = np.sort(rng.random((3, 4, 8)), axis=-1)
+    # transparent species
+    dtau_mix = random_overlap_mixing(dtau, np.zeros_like(dtau), g_ordinates,
+                                     g_weights)
+    assert np.allclose(dtau_mix, dtau)
+    # gray species
+    gray = np.full((3, 4, 8), 0.3)
+    dtau_mix = random_overlap_mixing(gray, 2.0 * gray, g_ordinates,
+                                     g_weights)
+    assert np.allclose(dtau_mix, 0.9)
+
+
+def test_ck_emission(tmp_path):
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=0,
+                      manual_params=[160.0, 1000.0, 700.0])
+    nlayer = 5
+    art = ArtEmisPure(pressure_top=1.e-3,
+                      pressure_btm=1.e1,
+                      nlayer=nlayer,
+                      nu_grid=nu_grid)
+    T_grid = np.array([1000.0, 1200.0])
+    nbin = 10
+    nu_bin_edges = np.linspace(nu_grid[0], nu_grid[-1], nbin + 1)
+    ck_table, g_ordinates, g_weights = build_ck_table(opa,
+                                                      T_grid,
+                                                      art.pressure,
+                                                      nu_bin_edges,
+                                                      ng=16)
+    filename = str(tmp_path / "ck.npz")
+    save_ck_table(filename, nu_bin_edges, T_grid, art.pressure, ck_table,
+                  g_ordinates, g_weights)
+    opack = OpaCKD(filename)
+
+    Tarr = np.array([1200.0, 1200.0, 1000.0, 1000.0, 1000.0])
+    mmr = art.constant_mmr_profile(0.01)
+    gravity = 1.e5
+    xs = opa.xsmatrix(Tarr, art.pressure)
+    dtau = art.opacity_profile_xs(xs, mmr, mdb.molmass, gravity)
+    flux = art.run(dtau, Tarr)
+    bin_index = nu_bin_index(nu_grid, nu_bin_edges)
+    flux_binned = np.array(
+        [np.mean(flux[bin_index == i]) for i in range(nbin)])
+
+    kdist = opack.xsmatrix(Tarr, art.pressure)
+    assert np.shape(kdist) == (nlayer, nbin, 16)
+    dtau_ck = art.opacity_profile_xs(kdist, mmr, mdb.molmass, gravity)
+    flux_ck = art.run_ck(dtau_ck, Tarr, opack.nu_bin, opack.g_weights)
+    assert np.max(np.abs(flux_ck / flux_binned - 1.0)) < 0.02
+
+
+if __name__ == "__main__":
+    test_random_overlap_mixing()
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import jax
+from jax import config
+from exojax.spec.lpf import xsvector
+from exojax.spec.lpf import tiled_xsection
+from exojax.spec.lpf import auto_xsection
+from exojax.spec.lpf import xsection_tile_shape
+from exojax.spec.make_numatrix import make_numatrix0
+
+config.update("jax_enable_x64", True)
+
+
+def _lines():
+    np.random.seed(1)
+    nline = 37
+    nu = np.linspace(4000.0, 4010.0, 501)
+    nu_lines = np.random.uniform(3999.0, 4011.0, nline)
+    sigmaD = np.random.uniform(0.005, 0.02, nline)
+    gammaL = np.random.uniform(0.005, 0.05, nline)
+    Sij = np.random.uniform(0.1, 1.0, nline)
+    return nu, nu_lines, sigmaD, gammaL, Sij
+
+
+def test_xsection_tile_shape():
+    assert xsection_tile_shape(1000, 10, 1.0) == (1000, 10)
+    tile_nu, tile_line = xsection_tile_shape(1000, 10**6, 1.0)
+    assert tile_line == 2**18
+    assert tile_nu == 1
+
+
+@pytest.mark.parametrize("memory_size,nthreads", [(1.0, 1), (1.e-3, 1),
+                                                  (1.e-4, 3)])
+def test_tiled_xsection(memory_size, nthreads):
+    nu, nu_lines, sigmaD, gammaL, Sij = _lines()
+    numatrix = make_numatrix0(nu, nu_lines, warning=False)
+    ref = xsvector(numatrix, sigmaD, gammaL, Sij)
+    xsv = tiled_xsection(nu,
+                         nu_lines,
+                         sigmaD,
+                         gammaL,
+                         Sij,
+                         memory_size=memory_size,
+                         nthreads=nthreads,
+                         show_progress=False)
+    assert xsv.shape == nu.shape
+    assert np.max(np.abs(xsv / ref - 1.0)) < 1.e-10
+
+
+def test_auto_xsection():
+    nu, nu_lines, sigmaD, gammaL, Sij = _lines()
+    numatrix = make_numatrix0(nu, nu_lines, warning=False)
+    ref = xsvector(numatrix, sigmaD, gammaL, Sij)
+    xsv = auto_xsection(nu, nu_lines, sigmaD, gammaL, Sij, memory_size=1.e-3)
+    assert np.max(np.abs(xsv / ref - 1.0)) < 1.e-10
+    xsv = auto_xsection(nu,
+                        nu_lines,
+                        sigmaD,
+                        gammaL,
+                        Sij,
+                        memory_size=1.e-4,
+                        nthreads=3,
+                        devices=jax.devices()[:1])
+    assert np.max(np.abs(xsv / ref - 1.0)) < 1.e-10
+
+
+if __name__ == "__main__":
+    test_xsection_tile_shape()
+    test_tiled_xsection(1.e-4, 3)
+    test_auto_xsection()
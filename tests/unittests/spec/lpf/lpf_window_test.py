@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from exojax.spec.initspec import init_lpf_window
+from exojax.spec.opacalc import OpaDirect
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def test_init_lpf_window():
+    nu_grid = np.arange(10.0)
+    nu_lines = np.array([8.5, 0.2, 4.0, 20.0])
+    nu_offset_grid, nu_offset_lines, neighbor_index, neighbor_window = init_lpf_window(
+        nu_lines, nu_grid, 1.0, block_size=4)
+    assert np.shape(nu_offset_grid) == (3, 4)
+    assert np.all(nu_offset_grid[2] == np.array([0.0, 1.0, 1.0,
+                                                 1.0]))  # padding
+    # block 0 (0-3): 0.2, 4.0 / block 1 (4-7): 4.0 / block 2 (8-9): 8.5
+    assert np.shape(neighbor_index) == (3, 2)
+    for iblock, lines in enumerate([[1, 2], [2], [0]]):
+        valid = neighbor_window[iblock] > 0.0
+        assert set(np.array(neighbor_index[iblock])[valid]) == set(lines)
+    assert nu_offset_lines[1, 0] == 0.0
+    assert nu_offset_lines[2, 0] == 0.5
+
+
+def test_init_lpf_window_broad_line():
+    # a broad line does not increase the neighbor lists of the blocks outside its window
+    nu_grid = np.arange(40.0)
+    nu_lines = np.array([1.0, 2.0, 3.0, 12.0, 21.0, 22.0, 30.5])
+    line_window = np.array([0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 8.0])
+    _, _, neighbor_index, neighbor_window = init_lpf_window(nu_lines,
+                                                            nu_grid,
+                                                            line_window,
+                                                            block_size=10)
+    assert np.shape(neighbor_index) == (4, 3)
+    for iblock, lines in enumerate([[0, 1, 2], [3], [4, 5, 6], [6]]):
+        valid = neighbor_window[iblock] > 0.0
+        assert list(np.array(neighbor_index[iblock])[valid]) == lines
+
+
+@pytest.mark.parametrize("line_window, line_window_unit, tol",
+                         [(1000.0, "cm-1", 1.e-12), (3.0, "cm-1", 1.e-3),
+                          (100.0, "gamma_ref", 1.e-3)])
+def test_opadirect_line_window(line_window, line_window_unit, tol):
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="lpf",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    opa = OpaDirect(mdb, nu_grid)
+    Tarr = np.array([1000.0, 1200.0])
+    Parr = np.array([0.1, 1.0])
+    ref = opa.xsmatrix(Tarr, Parr)
+    opaw = OpaDirect(mdb,
+                     nu_grid,
+                     line_window=line_window,
+                     line_window_unit=line_window_unit,
+                     block_size=128)
+    xsm = opaw.xsmatrix(Tarr, Parr)
+    assert np.shape(xsm) == np.shape(ref)
+    assert np.max(np.abs(xsm - ref)) / np.max(ref) < tol
+    xsv = opaw.xsvector(Tarr[1], Parr[1])
+    assert np.max(np.abs(xsv - xsm[1])) / np.max(xsv) < 1.e-12
+
+
+if __name__ == "__main__":
+    test_init_lpf_window()
@@ -0,0 +1,159 @@
+import pytest
+import numpy as np
+from exojax.spec.lsd import npadd3D_direct1D
+from exojax.spec.lsd import npadd3D_multi_index
+from exojax.spec.lsd import npadd_linear
+
+
+def _npadd3D_direct1D_reference(a, w, cx, ix, direct_cy, direct_iy, cz, iz):
+    conjugate_cx = 1.0 - cx
+    conjugate_cz = 1.0 - cz
+    np.add.at(a, (ix, direct_iy, iz), w * conjugate_cx * direct_cy * conjugate_cz)
+    np.add.at(a, (ix + 1, direct_iy, iz), w * cx * direct_cy * conjugate_cz)
+    np.add.at(a, (ix, direct_iy, iz + 1), w * conjugate_cx * direct_cy * cz)
+    np.add.at(a, (ix + 1, direct_iy, iz + 1), w * cx * direct_cy * cz)
+    return a
+
+
+def _random_lines(nline, nx, ny, nz, seed=1):
+    rng = np.random.default_rng(seed)
+    w = rng.random(nline)
+    cx = rng.random(nline)
+    ix = rng.integers(0, nx - 1, nline)
+    cy = rng.random(nline)
+    iy = rng.integers(0, ny, nline)
+    cz = rng.random(nline)
+    iz = rng.integers(0, nz - 1, nline)
+    return w, cx, ix, cy, iy, cz, iz
+
+
+@pytest.mark.parametrize("nthreads", [1, 3])
+def test_npadd3D_direct1D(nthreads):
+    nx, ny, nz = 30, 4, 5
+    w, cx, ix, cy, iy, cz, iz = _random_lines(1000, nx, ny, nz)
+    ref = _npadd3D_direct1D_reference(np.zeros((nx, ny, nz)), w, cx, ix, cy,
+                                      iy, cz, iz)
+    a = npadd3D_direct1D(np.zeros((nx, ny, nz)),
+                         w,
+                         cx,
+                         ix,
+                         cy,
+                         iy,
+                         cz,
+                         iz,
+                         nthreads=nthreads)
+    assert np.allclose(a, ref, rtol=1.e-12, atol=0.0)
+
+
+def test_npadd3D_direct1D_single_broadening():
+    nx, ny, nz = 30, 1, 5
+    w, cx, ix, _, _, cz, iz = _random_lines(1000, nx, ny, nz)
+    ref = _npadd3D_direct1D_reference(np.zeros((nx, ny, nz)), w, cx, ix, 1.0,
+                                      0, cz, iz)
+    a = npadd3D_direct1D(np.zeros((nx, ny, nz)), w, cx, ix, 1.0, 0, cz, iz)
+    assert np.allclose(a, ref, rtol=1.e-12, atol=0.0)
+
+
+def test_npadd3D_direct1D_out_of_bounds():
+    nx, ny, nz = 30, 1, 5
+    w, cx, ix, _, _, cz, iz = _random_lines(10, nx, ny, nz)
+    ix[0] = nx - 1
+    with pytest.raises(IndexError):
+        npadd3D_direct1D(np.zeros((nx, ny, nz)), w, cx, ix, 1.0, 0, cz, iz)
+
+
+@pytest.mark.parametrize("axis", ["y", "z"])
+def test_npadd3D_direct1D_inner_axis_out_of_bounds(axis):
+    # the linear index is within a.size, but wraps into the next row
+    nx, ny, nz = 30, 4, 5
+    w, cx, ix, cy, iy, cz, iz = _random_lines(10, nx, ny, nz)
+    ix[0] = 0
+    if axis == "y":
+        iy[0] = ny
+    else:
+        iz[0] = nz - 1
+    with pytest.raises(IndexError):
+        npadd3D_direct1D(np.zeros((nx, ny, nz)), w, cx, ix, cy, iy, cz, iz)
+
+
+@pytest.mark.parametrize("axis", ["x", "y", "z"])
+def test_npadd3D_direct1D_negative_out_of_bounds(axis):
+    # np.add.at raises for ix < -nx, iy < -ny, iz < -nz
+    nx, ny, nz = 30, 4, 5
+    w, cx, ix, cy, iy, cz, iz = _random_lines(10, nx, ny, nz)
+    if axis == "x":
+        ix[0] = -(nx + 1)
+    elif axis == "y":
+        iy[0] = -(ny + 1)
+    else:
+        iz[0] = -(nz + 1)
+    with pytest.raises(IndexError):
+        npadd3D_direct1D(np.zeros((nx, ny, nz)), w, cx, ix, cy, iy, cz, iz)
+
+
+def test_npadd3D_direct1D_negative_index():
+    # negative indices wrap along each axis as in np.add.at
+    nx, ny, nz = 30, 4, 5
+    w, cx, ix, cy, iy, cz, iz = _random_lines(100, nx, ny, nz)
+    ix[:3] = [-1, -nx, 0]
+    iy[:3] = [0, -1, -ny]
+    iz[:3] = [-nz, 0, -1]
+    ref = _npadd3D_direct1D_reference(np.zeros((nx, ny, nz)), w, cx, ix, cy,
+                                      iy, cz, iz)
+    a = npadd3D_direct1D(np.zeros((nx, ny, nz)), w, cx, ix, cy, iy, cz, iz)
+    assert np.allclose(a, ref, rtol=1.e-12, atol=0.0)
+
+
+@pytest.mark.parametrize("nthreads", [None, 1, 4])
+def test_npadd_linear_chunks(nthreads):
+    rng = np.random.default_rng(3)
+    nline = 1003
+    index = rng.integers(0, 60, nline)
+    weight = rng.random(nline)
+    ref = np.zeros((3, 4, 5))
+    np.add.at(ref.reshape(-1), index, weight)
+    a = npadd_linear(np.zeros((3, 4, 5)),
+                     nline,
+                     lambda sl: (index[sl], weight[sl]),
+                     nthreads=nthreads,
+                     chunk_size=100)
+    assert np.allclose(a, ref, rtol=1.e-12, atol=0.0)
+
+
+def test_npadd3D_multi_index():
+    nx, ny, nz = 30, 4, 5
+    nline = 1000
+    w, cx, ix, _, _, cz, iz = _random_lines(nline, nx, ny, nz)
+    rng = np.random.default_rng(2)
+    uidx = rng.integers(0, ny, nline)
+    multi_cont_lines = rng.random((nline, 2))
+    neighbor_uidx = rng.integers(0, ny, (ny, 3))
+
+    ref = np.zeros((nx, ny, nz))
+    conj = 1.0 - multi_cont_lines
+    for direct_iy, direct_cy in [
+        (uidx, np.prod(conj, axis=1)),
+        (neighbor_uidx[uidx, 0], multi_cont_lines[:, 0] * conj[:, 1]),
+        (neighbor_uidx[uidx, 1], conj[:, 0] * multi_cont_lines[:, 1]),
+        (neighbor_uidx[uidx, 2], np.prod(multi_cont_lines, axis=1)),
+    ]:
+        ref = _npadd3D_direct1D_reference(ref, w, cx, ix, direct_cy,
+                                          direct_iy, cz, iz)
+    a = npadd3D_multi_index(np.zeros((nx, ny, nz)),
+                            w,
+                            cx,
+                            ix,
+                            cz,
+                            iz,
+                            uidx,
+                            multi_cont_lines,
+                            neighbor_uidx,
+                            show_progress=False,
+                            nthreads=2)
+    assert np.allclose(a, ref, rtol=1.e-12, atol=0.0)
+
+
+if __name__ == "__main__":
+    test_npadd3D_direct1D(3)
+    test_npadd3D_direct1D_single_broadening()
+    test_npadd3D_multi_index()
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaPremoditFused
+from exojax.spec.layeropacity import layer_optical_depth
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _opas():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    mdb_heavy = mock_mdb("hitemp")
+    mdb_heavy.molmass = 2.0 * mdb.molmass
+    opa0 = OpaPremodit(mdb=mdb,
+                       nu_grid=nu_grid,
+                       diffmode=0,
+                       manual_params=[160.0, 1000.0, 700.0])
+    opa1 = OpaPremodit(mdb=mdb,
+                       nu_grid=nu_grid,
+                       diffmode=1,
+                       manual_params=[160.0, 1000.0, 700.0],
+                       lbd_format="sparse")
+    opa2 = OpaPremodit(mdb=mdb_heavy,
+                       nu_grid=nu_grid,
+                       diffmode=0,
+                       manual_params=[160.0, 1000.0, 700.0])
+    return [opa0, opa1, opa2]
+
+
+def test_opa_premodit_fused():
+    opas = _opas()
+    opa = OpaPremoditFused(opas)
+    assert opa.groups == [[0, 1], [2]]
+
+    Tarr = np.array([900.0, 1000.0, 1200.0])
+    Parr = np.array([0.01, 0.1, 1.0])
+    dParr = np.array([0.005, 0.05, 0.5])
+    gravity = 2478.57
+    mmrs = np.array([[0.01, 0.01, 0.02], [0.02, 0.03, 0.01],
+                     [0.001, 0.002, 0.003]])
+    dtau = opa.opacity_profile(Tarr, Parr, dParr, mmrs, gravity)
+    ref = 0.0
+    for i, opa_i in enumerate(opas):
+        ref = ref + layer_optical_depth(dParr, opa_i.xsmatrix(Tarr, Parr),
+                                        mmrs[i], opa_i.mdb.molmass, gravity)
+    assert np.shape(dtau) == np.shape(ref)
+    assert np.max(np.abs(dtau - ref)) < 1.e-10 * np.max(ref)
+
+
+def test_opa_premodit_fused_nu_grid_error():
+    opas = _opas()
+    opas[1].nu_grid = opas[1].nu_grid * 1.0001
+    with pytest.raises(ValueError):
+        OpaPremoditFused(opas)
+
+
+if __name__ == "__main__":
+    test_opa_premodit_fused()
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+import jax.numpy as jnp
+from jax import config
+from jax import grad
+from exojax.spec.opacalc import OpaPremodit
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+
+config.update("jax_enable_x64", True)
+
+
+def _opa(checkpoint, xsmatrix_memory_budget=None):
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    return OpaPremodit(mdb,
+                       nu_grid,
+                       diffmode=0,
+                       manual_params=[160.0, 1000.0, 700.0],
+                       xsmatrix_memory_budget=xsmatrix_memory_budget,
+                       checkpoint=checkpoint)
+
+
+def test_checkpoint_value_error():
+    with pytest.raises(ValueError):
+        _opa("stream")
+
+
+def test_checkpoint_chunk_without_budget():
+    with pytest.warns(UserWarning, match="xsmatrix_memory_budget"):
+        opa = _opa("chunk")
+    assert opa.checkpoint == "layer"
+
+
+@pytest.mark.parametrize("checkpoint,budget", [("layer", None),
+                                                ("chunk", 1.e6)])
+def test_xsmatrix_gradient_checkpoint(checkpoint, budget):
+    Parr = jnp.array([0.1, 0.3, 1.0])
+    opa_ref = _opa(None)
+    opa = _opa(checkpoint, budget)
+
+    def loss(opa, T0):
+        Tarr = T0 * jnp.array([0.8, 1.0, 1.2])
+        return jnp.sum(jnp.log(opa.xsmatrix(Tarr, Parr) + 1.e-30))
+
+    assert np.allclose(opa.xsmatrix(1000.0 * jnp.ones(3), Parr),
+                       opa_ref.xsmatrix(1000.0 * jnp.ones(3), Parr),
+                       rtol=1.e-12)
+    dref = grad(lambda T0: loss(opa_ref, T0))(1000.0)
+    d = grad(lambda T0: loss(opa, T0))(1000.0)
+    assert d == pytest.approx(dref, rel=1.e-10)
+
+
+if __name__ == "__main__":
+    test_checkpoint_value_error()
+    test_checkpoint_chunk_without_budget()
+    test_xsmatrix_gradient_checkpoint("layer", None)
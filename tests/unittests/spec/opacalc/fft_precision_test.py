@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import jax.numpy as jnp
+from jax import config
+from exojax.spec.modit_scanfft import calc_xsection_from_lsd_scanfft
+from exojax.spec.modit_scanfft import calc_xsection_from_lsd_scanfft_mixed
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaModit
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+
+config.update("jax_enable_x64", True)
+
+
+def test_calc_xsection_from_lsd_scanfft_mixed():
+    np.random.seed(1)
+    Ng_nu = 2048
+    nu_grid = jnp.exp(jnp.linspace(jnp.log(4000.0), jnp.log(4010.0), Ng_nu))
+    R = 1.0 / (jnp.log(nu_grid[1]) - jnp.log(nu_grid[0]))
+    pmarray = np.ones(Ng_nu + 1)
+    pmarray[1::2] = -1.0
+    log_ngammaL_grid = jnp.log(jnp.array([0.1, 0.3, 1.0]))
+    Slsd = jnp.array(np.random.rand(Ng_nu, 3) * 1.e-45)  # underflows in FP32 without rescaling
+    nsigmaD = 1.3
+    ref = calc_xsection_from_lsd_scanfft(Slsd, R, jnp.array(pmarray), nsigmaD,
+                                         nu_grid, log_ngammaL_grid)
+    val = calc_xsection_from_lsd_scanfft_mixed(Slsd, R, jnp.array(pmarray),
+                                               nsigmaD, nu_grid,
+                                               log_ngammaL_grid)
+    assert val.dtype == jnp.float64
+    assert np.max(np.abs(val - ref)) < 1.e-5 * np.max(ref)
+
+
+def _setting():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    Tarr = np.array([800.0, 1200.0])
+    Parr = np.array([0.01, 1.0])
+    return nu_grid, Tarr, Parr
+
+
+def test_opapremodit_mixed_precision():
+    nu_grid, Tarr, Parr = _setting()
+    opa = OpaPremodit(mdb=mock_mdb("hitemp"),
+                      nu_grid=nu_grid,
+                      diffmode=1,
+                      manual_params=[160.0, 1000.0, 700.0],
+                      fft_precision="mixed")
+    report = opa.fft_precision_report(Tarr, Parr)
+    assert opa.fft_precision == "mixed"
+    assert report["within_tolerance"]
+    assert report["max_error"] < 1.e-5
+    assert np.shape(report["max_error_layers"]) == (len(Tarr), )
+    with pytest.warns(UserWarning):
+        opa.fft_precision_report(Tarr, Parr, tolerance=1.e-12)
+    # xsvector also uses the mixed precision FFT
+    xsv = opa.xsvector(Tarr[1], Parr[1])
+    assert np.allclose(xsv, opa.xsmatrix(Tarr, Parr)[1], rtol=1.e-10, atol=0.0)
+    opa.fft_precision = "FP64"
+    xsv_ref = opa.xsvector(Tarr[1], Parr[1])
+    assert not np.array_equal(xsv, xsv_ref)
+    assert np.max(np.abs(xsv - xsv_ref)) < 1.e-5 * np.max(xsv_ref)
+
+
+def test_opamodit_mixed_precision():
+    nu_grid, Tarr, Parr = _setting()
+    opa = OpaModit(mdb=mock_mdb("hitemp"),
+                   nu_grid=nu_grid,
+                   Tarr_list=Tarr,
+                   Parr=Parr,
+                   fft_precision="mixed")
+    report = opa.fft_precision_report(Tarr, Parr)
+    assert report["max_error"] < 1.e-5
+    xsv = opa.xsvector(Tarr[1], Parr[1])
+    opa.fft_precision = "FP64"
+    xsv_ref = opa.xsvector(Tarr[1], Parr[1])
+    assert not np.array_equal(xsv, xsv_ref)
+    assert np.max(np.abs(xsv - xsv_ref)) < 1.e-5 * np.max(xsv_ref)
+
+
+def test_fft_precision_error():
+    nu_grid, Tarr, Parr = _setting()
+    with pytest.raises(ValueError):
+        OpaModit(mdb=mock_mdb("hitemp"), nu_grid=nu_grid, fft_precision="FP16")
+
+
+if __name__ == "__main__":
+    test_opapremodit_mixed_precision()
+    test_opamodit_mixed_precision()
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaModit
+from exojax.spec.opacalc import OpaDirect
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+Tarr_batch = np.array([[800.0, 1000.0, 1200.0], [900.0, 1100.0, 1500.0],
+                       [1000.0, 1300.0, 1400.0]])
+Parr = np.array([0.01, 0.1, 1.0])
+
+
+def _nu_grid(xsmode):
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode=xsmode,
+                                        wavelength_order="ascending")
+    return nu_grid
+
+
+def _check_batch(opa, nbatch_chunk):
+    xsm_batch = opa.xsmatrix_batch(Tarr_batch, Parr, nbatch_chunk=nbatch_chunk)
+    assert np.shape(xsm_batch) == (len(Tarr_batch), len(Parr),
+                                   len(opa.nu_grid))
+    for i, Tarr in enumerate(Tarr_batch):
+        ref = opa.xsmatrix(Tarr, Parr)
+        assert np.max(np.abs(xsm_batch[i] - ref)) < 1.e-12 * np.max(ref)
+
+
+@pytest.mark.parametrize("nbatch_chunk", [None, 2])
+def test_xsmatrix_batch_premodit(nbatch_chunk):
+    opa = OpaPremodit(mdb=mock_mdb("hitemp"),
+                      nu_grid=_nu_grid("premodit"),
+                      diffmode=0,
+                      manual_params=[160.0, 1000.0, 700.0])
+    _check_batch(opa, nbatch_chunk)
+
+
+@pytest.mark.parametrize("nbatch_chunk", [None, 2])
+def test_xsmatrix_batch_modit(nbatch_chunk):
+    opa = OpaModit(mdb=mock_mdb("hitemp"),
+                   nu_grid=_nu_grid("modit"),
+                   Tarr_list=Tarr_batch,
+                   Parr=Parr)
+    _check_batch(opa, nbatch_chunk)
+
+
+def test_xsmatrix_batch_direct():
+    opa = OpaDirect(mock_mdb("hitemp"), _nu_grid("lpf"))
+    _check_batch(opa, 2)
+
+
+def test_xsmatrix_batch_shape_error():
+    opa = OpaDirect(mock_mdb("hitemp"), _nu_grid("lpf"))
+    with pytest.raises(ValueError):
+        opa.xsmatrix_batch(Tarr_batch[0], Parr)
+
+
+if __name__ == "__main__":
+    test_xsmatrix_batch_premodit(2)
+    test_xsmatrix_batch_modit(2)
+    test_xsmatrix_batch_direct()
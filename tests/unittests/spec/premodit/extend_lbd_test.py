@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+from exojax.spec.premodit import generate_lbd
+from exojax.spec.premodit import extend_lbd
+from exojax.spec.premodit import eslog_grid_offset
+from exojax.spec.premodit import make_elower_grid
+from exojax.spec.premodit import make_broadpar_grid
+from exojax.spec.opacalc import OpaPremodit
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_lines(nu_grid, resolution, nline, seed, gamma_range, elower_range):
+    np.random.seed(seed)
+    nu_lines = np.random.uniform(nu_grid[0], nu_grid[-1], nline)
+    elower = np.random.uniform(elower_range[0], elower_range[1], nline)
+    ngamma_ref = np.random.uniform(gamma_range[0], gamma_range[1],
+                                   nline) / nu_lines * resolution
+    n_Texp = np.random.uniform(0.4, 0.6, nline)
+    line_strength_ref = 10**np.random.uniform(-24.0, -20.0, nline)
+    return line_strength_ref, nu_lines, ngamma_ref, n_Texp, elower
+
+
+@pytest.mark.parametrize("diffmode", [0, 1])
+def test_extend_lbd_agrees_with_generate_lbd(diffmode):
+    Twt, Tref = 700.0, 1000.0
+    nu_grid_new, wav, resolution = wavenumber_grid(4000.0,
+                                                   4010.0,
+                                                   1000,
+                                                   unit="cm-1",
+                                                   xsmode="premodit")
+    nu_grid = nu_grid_new[300:700]
+    lines_old = _mock_lines(nu_grid, resolution, 100, 1, [0.05, 0.07],
+                            [1000.0, 2000.0])
+    lines_add = _mock_lines(nu_grid_new, resolution, 100, 2, [0.04, 0.1],
+                            [500.0, 3000.0])
+    lines = [np.concatenate([a, b]) for a, b in zip(lines_old, lines_add)]
+    line_strength_ref, nu_lines, ngamma_ref, n_Texp, elower = lines
+
+    elower_grid = make_elower_grid(lines_old[4], 300.0)
+    ngamma_ref_grid, n_Texp_grid = make_broadpar_grid(lines_old[2],
+                                                      lines_old[3], Tref, Twt,
+                                                      850.0)
+    wavmask = (nu_lines >= nu_grid[0]) * (nu_lines <= nu_grid[-1])
+    lbd_coeff, multi_index_uniqgrid = generate_lbd(
+        line_strength_ref[wavmask], nu_lines[wavmask], nu_grid,
+        ngamma_ref[wavmask], ngamma_ref_grid, n_Texp[wavmask], n_Texp_grid,
+        elower[wavmask], elower_grid, Twt, Tref, diffmode)
+
+    lbd_new, multi_index_new, elower_grid_new, ngamma_ref_grid_new, n_Texp_grid_new = extend_lbd(
+        lbd_coeff, multi_index_uniqgrid, elower_grid, ngamma_ref_grid,
+        n_Texp_grid, nu_grid, nu_grid_new, line_strength_ref, nu_lines,
+        ngamma_ref, n_Texp, elower, Twt, Tref, diffmode)
+    assert len(elower_grid_new) > len(elower_grid)
+    assert len(ngamma_ref_grid_new) > len(ngamma_ref_grid)
+
+    lbd_ref, multi_index_ref = generate_lbd(line_strength_ref, nu_lines,
+                                            nu_grid_new, ngamma_ref,
+                                            ngamma_ref_grid_new, n_Texp,
+                                            n_Texp_grid_new, elower,
+                                            elower_grid_new, Twt, Tref,
+                                            diffmode)
+    assert np.array_equal(np.asarray(multi_index_new),
+                          np.asarray(multi_index_ref))
+    assert np.allclose(np.exp(lbd_new[0]), np.exp(lbd_ref[0]), rtol=1.e-10)
+    for idiff in range(1, diffmode + 1):
+        assert np.allclose(lbd_new[idiff], lbd_ref[idiff], rtol=1.e-10)
+
+
+def test_eslog_grid_offset():
+    nu_grid, wav, resolution = wavenumber_grid(4000.0,
+                                               4010.0,
+                                               1000,
+                                               unit="cm-1",
+                                               xsmode="premodit")
+    assert eslog_grid_offset(nu_grid[100:200], nu_grid) == 100
+    assert eslog_grid_offset(nu_grid, nu_grid[100:200]) == -100
+    nu_shifted = nu_grid * np.sqrt(nu_grid[1] / nu_grid[0])
+    with pytest.raises(ValueError):
+        eslog_grid_offset(nu_grid, nu_shifted)
+
+
+def test_opapremodit_extend_nu_grid():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    opa_narrow = OpaPremodit(mdb,
+                             nu_grid[500:2000],
+                             diffmode=1,
+                             manual_params=[160.0, 1000.0, 700.0])
+    opa = opa_narrow.extend_nu_grid(nu_grid)
+    assert len(opa_narrow.nu_grid) == 1500
+    opa_full = OpaPremodit(mdb,
+                           nu_grid,
+                           diffmode=1,
+                           manual_params=[160.0, 1000.0, 700.0])
+    Tarr = np.array([800.0, 1200.0])
+    Parr = np.array([0.1, 1.0])
+    xsm = opa.xsmatrix(Tarr, Parr)
+    xsm_full = opa_full.xsmatrix(Tarr, Parr)
+    assert np.max(np.abs(xsm - xsm_full)) < 1.e-10 * np.max(xsm_full)
+
+
+if __name__ == "__main__":
+    test_extend_lbd_agrees_with_generate_lbd(1)
+    test_eslog_grid_offset()
+    test_opapremodit_extend_nu_grid()
@@ -0,0 +1,134 @@
+import pytest
+import numpy as np
+from exojax.spec.premodit import generate_lbd
+from exojax.spec.premodit import make_elower_grid
+from exojax.spec.premodit import make_broadpar_grid
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_lbd_inputs(nline=200):
+    np.random.seed(2)
+    nu_grid, wav, resolution = wavenumber_grid(4000.0,
+                                               4010.0,
+                                               1000,
+                                               unit="cm-1",
+                                               xsmode="premodit")
+    nu_lines = np.random.uniform(4000.0, 4010.0, nline)
+    elower = np.random.uniform(100.0, 3000.0, nline)
+    ngamma_ref = np.random.uniform(0.05, 0.1, nline) / nu_lines * resolution
+    n_Texp = np.random.uniform(0.4, 0.6, nline)
+    line_strength_ref = 10**np.random.uniform(-24.0, -20.0, nline)
+    elower_grid = make_elower_grid(elower, 300.0)
+    ngamma_ref_grid, n_Texp_grid = make_broadpar_grid(ngamma_ref, n_Texp,
+                                                      1000.0, 400.0, 296.0)
+    return (line_strength_ref, nu_lines, nu_grid, ngamma_ref, ngamma_ref_grid,
+            n_Texp, n_Texp_grid, elower, elower_grid)
+
+
+@pytest.mark.parametrize("diffmode, nu_block_size", [(0, 128), (1, 7),
+                                                     (2, 1000), (2, 333)])
+def test_generate_lbd_nu_blocks_agrees_with_dense(diffmode, nu_block_size):
+    args = _mock_lbd_inputs()
+    ref, multi_index_ref = generate_lbd(*args, 1000.0, 400.0, diffmode)
+    val, multi_index = generate_lbd(*args,
+                                    1000.0,
+                                    400.0,
+                                    diffmode,
+                                    nu_block_size=nu_block_size)
+    assert np.array_equal(np.asarray(multi_index_ref), np.asarray(multi_index))
+    assert np.shape(ref) == np.shape(val)
+    ref = np.asarray(ref)
+    val = np.asarray(val)
+    assert np.array_equal(np.isinf(ref), np.isinf(val))
+    finite = np.isfinite(ref)
+    assert np.allclose(ref[finite], val[finite], rtol=1.e-12, atol=1.e-30)
+
+
+def test_generate_lbd_nu_blocks_memmap(tmp_path):
+    args = _mock_lbd_inputs()
+    ref, _ = generate_lbd(*args, 1000.0, 400.0, 1)
+    path = str(tmp_path / "lbd.npy")
+    val, _ = generate_lbd(*args,
+                          1000.0,
+                          400.0,
+                          1,
+                          nu_block_size=100,
+                          lbd_memmap_path=path)
+    assert isinstance(val, np.memmap)
+    loaded = np.load(path, mmap_mode="r")
+    assert np.allclose(np.asarray(ref), loaded, rtol=1.e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("nu_block_size", [None, 100])
+def test_generate_lbd_nthreads(nu_block_size):
+    args = _mock_lbd_inputs(nline=2000)
+    ref, _ = generate_lbd(*args, 1000.0, 400.0, 1, nu_block_size=nu_block_size)
+    val, _ = generate_lbd(*args,
+                          1000.0,
+                          400.0,
+                          1,
+                          nu_block_size=nu_block_size,
+                          nthreads=3)
+    ref = np.asarray(ref)
+    val = np.asarray(val)
+    assert np.array_equal(np.isinf(ref), np.isinf(val))
+    finite = np.isfinite(ref)
+    assert np.allclose(ref[finite], val[finite], rtol=1.e-12, atol=1.e-30)
+
+
+def test_opapremodit_nthreads():
+    from exojax.spec.opacalc import OpaPremodit
+    from exojax.test.emulate_mdb import mock_mdb
+
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit")
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=1,
+                      manual_params=[160.0, 1000.0, 700.0])
+    opa_threads = OpaPremodit(mdb=mdb,
+                              nu_grid=nu_grid,
+                              diffmode=1,
+                              manual_params=[160.0, 1000.0, 700.0],
+                              nthreads=2)
+    assert opa_threads.nthreads == 2
+    ref = opa.xsvector(1200.0, 1.0)
+    val = opa_threads.xsvector(1200.0, 1.0)
+    assert np.allclose(val, ref, rtol=1.e-10, atol=0.0)
+
+
+def test_opapremodit_lbd_memmap(tmp_path):
+    from exojax.spec.opacalc import OpaPremodit
+    from exojax.test.emulate_mdb import mock_mdb
+
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit")
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=1,
+                      manual_params=[160.0, 1000.0, 700.0])
+    path = str(tmp_path / "lbd.npy")
+    opa_memmap = OpaPremodit(mdb=mdb,
+                             nu_grid=nu_grid,
+                             diffmode=1,
+                             manual_params=[160.0, 1000.0, 700.0],
+                             nu_block_size=500,
+                             lbd_memmap_path=path)
+    assert isinstance(opa_memmap.opainfo[0], np.memmap)
+    ref = opa.xsvector(1200.0, 1.0)
+    val = opa_memmap.xsvector(1200.0, 1.0)
+    assert np.allclose(val, ref, rtol=1.e-10, atol=0.0)
+
+    with pytest.raises(ValueError):
+        OpaPremodit(mdb=mdb, nu_grid=nu_grid, lbd_memmap_path=path)
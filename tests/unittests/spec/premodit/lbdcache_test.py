@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from exojax.spec import initspec
+from exojax.spec.initspec import init_premodit
+from exojax.spec.lbdcache import lbd_cache_key
+from exojax.utils.grids import wavenumber_grid
+
+
+def _mock_lines(nline=50):
+    np.random.seed(1)
+    nu_grid, wav, res = wavenumber_grid(4000.0,
+                                        4010.0,
+                                        2000,
+                                        unit="cm-1",
+                                        xsmode="premodit")
+    nu_lines = np.sort(np.random.uniform(4000.5, 4009.5, nline))
+    elower = np.random.uniform(100.0, 3000.0, nline)
+    gamma_ref = np.random.uniform(0.05, 0.1, nline)
+    n_Texp = np.random.uniform(0.4, 0.6, nline)
+    line_strength_ref = 10**np.random.uniform(-24.0, -20.0, nline)
+    return nu_grid, nu_lines, elower, gamma_ref, n_Texp, line_strength_ref
+
+
+def _init(cache_dir, diffmode=1):
+    nu_grid, nu_lines, elower, gamma_ref, n_Texp, line_strength_ref = _mock_lines()
+    return init_premodit(nu_lines,
+                         nu_grid,
+                         elower,
+                         gamma_ref,
+                         n_Texp,
+                         line_strength_ref,
+                         Twt=1000.0,
+                         Tref=400.0,
+                         Tref_broadening=296.0,
+                         dE=300.0,
+                         diffmode=diffmode,
+                         lbd_cache_dir=cache_dir)
+
+
+def test_lbd_cache_reload(tmp_path, monkeypatch):
+    ref = _init(str(tmp_path))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("generate_lbd should not be called")
+
+    monkeypatch.setattr(initspec, "generate_lbd", _fail)
+    val = _init(str(tmp_path))
+    for r, v in zip(ref[:5], val[:5]):
+        assert np.array_equal(np.asarray(r), np.asarray(v))
+    assert val[5] == pytest.approx(ref[5])
+
+
+def test_lbd_cache_key_depends_on_parameters():
+    nu_grid, nu_lines, elower, gamma_ref, n_Texp, line_strength_ref = _mock_lines()
+    args = [
+        line_strength_ref, nu_lines, elower, gamma_ref, n_Texp, nu_grid,
+        np.arange(3.0),
+        np.arange(2.0),
+        np.arange(2.0), 300.0, 400.0, 1000.0, 1
+    ]
+    key = lbd_cache_key(*args)
+    assert key == lbd_cache_key(*args)
+    args_diffmode = args[:-1] + [2]
+    assert key != lbd_cache_key(*args_diffmode)
+    args_lines = [line_strength_ref * 1.01] + args[1:]
+    assert key != lbd_cache_key(*args_lines)
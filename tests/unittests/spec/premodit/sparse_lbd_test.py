@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+from exojax.spec.premodit import generate_lbd
+from exojax.spec.premodit import generate_lbd_sparse
+from exojax.spec.premodit import make_elower_grid
+from exojax.spec.premodit import make_broadpar_grid
+from exojax.spec.premodit import lbd_to_sparse
+from exojax.spec.premodit import unbiased_lsd_sparse
+from exojax.spec.premodit import unbiased_lsd_zeroth
+from exojax.spec.premodit import unbiased_lsd_first
+from exojax.spec.premodit import unbiased_lsd_second
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _mock_lines(Twt, Tref, nline=100):
+    np.random.seed(3)
+    nu_grid, wav, resolution = wavenumber_grid(4000.0,
+                                               4010.0,
+                                               1000,
+                                               unit="cm-1",
+                                               xsmode="premodit")
+    nu_lines = np.random.uniform(4000.0, 4005.0, nline)
+    elower = np.random.uniform(100.0, 5000.0, nline)
+    ngamma_ref = np.random.uniform(0.05, 0.1, nline) / nu_lines * resolution
+    n_Texp = np.random.uniform(0.4, 0.6, nline)
+    line_strength_ref = 10**np.random.uniform(-24.0, -20.0, nline)
+    elower_grid = make_elower_grid(elower, 300.0)
+    ngamma_ref_grid, n_Texp_grid = make_broadpar_grid(ngamma_ref, n_Texp,
+                                                      Twt, Tref, 296.0)
+    return (line_strength_ref, nu_lines, nu_grid, ngamma_ref, ngamma_ref_grid,
+            n_Texp, n_Texp_grid, elower, elower_grid)
+
+
+def _mock_lbd(diffmode, Twt, Tref, nline=100):
+    lines = _mock_lines(Twt, Tref, nline)
+    nu_grid, elower_grid = lines[2], lines[8]
+    lbd_coeff, multi_index_uniqgrid = generate_lbd(*lines,
+                                                   Twt,
+                                                   Tref=Tref,
+                                                   diffmode=diffmode)
+    return lbd_coeff, multi_index_uniqgrid, nu_grid, elower_grid
+
+
+@pytest.mark.parametrize("diffmode", [0, 1, 2])
+def test_unbiased_lsd_sparse(diffmode):
+    Twt = 1000.0
+    Tref = 400.0
+    T = 1300.0
+    qt = 1.3
+    lbd_coeff, multi_index_uniqgrid, nu_grid, elower_grid = _mock_lbd(
+        diffmode, Twt, Tref)
+    if diffmode == 0:
+        ref = unbiased_lsd_zeroth(lbd_coeff[0], T, Tref, nu_grid, elower_grid,
+                                  qt)
+    elif diffmode == 1:
+        ref = unbiased_lsd_first(lbd_coeff, T, Tref, Twt, nu_grid,
+                                 elower_grid, qt)
+    elif diffmode == 2:
+        ref = unbiased_lsd_second(lbd_coeff, T, Tref, Twt, nu_grid,
+                                  elower_grid, qt)
+
+    lbd_sparse, occupancy_block, occupancy_broadpar, occupancy_elower = lbd_to_sparse(
+        lbd_coeff, nu_block_size=64)
+    # lines are only in the first half of nu_grid
+    nblock = (len(nu_grid) - 1) // 64 + 1
+    assert lbd_sparse.shape[1] < nblock * len(multi_index_uniqgrid) * len(
+        elower_grid) / 2
+    val = unbiased_lsd_sparse(lbd_sparse, occupancy_block, occupancy_broadpar,
+                              occupancy_elower, T, Tref, Twt, nu_grid,
+                              elower_grid, qt, len(multi_index_uniqgrid))
+    assert np.shape(val) == np.shape(ref)
+    assert np.allclose(val, ref, rtol=1.e-12, atol=0.0)
+
+
+@pytest.mark.parametrize("diffmode", [0, 2])
+def test_generate_lbd_sparse_equals_lbd_to_sparse(diffmode):
+    Twt = 1000.0
+    Tref = 400.0
+    lbd_coeff, multi_index_uniqgrid, nu_grid, elower_grid = _mock_lbd(
+        diffmode, Twt, Tref)
+    ref = lbd_to_sparse(lbd_coeff, nu_block_size=100)
+    val, multi_index_uniqgrid_sparse = generate_lbd_sparse(
+        *_mock_lines(Twt, Tref), Twt, Tref=Tref, diffmode=diffmode,
+        nu_block_size=100)
+    assert np.array_equal(multi_index_uniqgrid_sparse, multi_index_uniqgrid)
+    for i in range(1, 4):
+        assert np.array_equal(val[i], ref[i])
+    assert np.allclose(val[0], ref[0], rtol=1.e-12, atol=0.0)
+
+
+def test_opapremodit_sparse_equals_dense():
+    from exojax.spec.opacalc import OpaPremodit
+    from exojax.test.emulate_mdb import mock_mdb
+    from exojax.test.emulate_mdb import mock_wavenumber_grid
+    nu_grid, wav, res = mock_wavenumber_grid()
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=1,
+                      manual_params=[160.0, 1000.0, 700.0])
+    opa_sparse = OpaPremodit(mdb=mdb,
+                             nu_grid=nu_grid,
+                             diffmode=1,
+                             manual_params=[160.0, 1000.0, 700.0],
+                             lbd_format="sparse")
+    assert opa_sparse.opainfo[0] is None
+    xs = opa.xsvector(1200.0, 0.1)
+    xs_sparse = opa_sparse.xsvector(1200.0, 0.1)
+    assert np.allclose(xs_sparse, xs, rtol=1.e-10, atol=0.0)
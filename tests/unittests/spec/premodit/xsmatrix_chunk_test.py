@@ -0,0 +1,40 @@
+import numpy as np
+from exojax.spec.opacalc import OpaPremodit
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def test_xsmatrix_layer_chunked():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=0,
+                      manual_params=[160.0, 1000.0, 700.0])
+    Tarr = np.linspace(800.0, 1500.0, 5)
+    Parr = np.logspace(-2.0, 1.0, 5)
+    ref = opa.xsmatrix(Tarr, Parr)
+
+    opa.xsmatrix_memory_budget = 1.e15
+    assert opa.xsmatrix_nlayer_chunk(len(Tarr)) == len(Tarr)
+    _, _, elower_grid, _, _, _, _ = opa.opainfo
+    memuse_layer = len(nu_grid) * opa.ngrid_broadpar * 4 * 8
+    memuse_lbd = len(nu_grid) * opa.ngrid_broadpar * len(elower_grid) * 2 * 8
+    opa.xsmatrix_memory_budget = max(memuse_lbd,
+                                     memuse_layer) + 2.5 * memuse_layer
+    assert opa.xsmatrix_nlayer_chunk(len(Tarr)) == 2
+    val = opa.xsmatrix(Tarr, Parr)
+    assert np.shape(val) == np.shape(ref)
+    assert np.allclose(val, ref, rtol=1.e-12, atol=0.0)
+
+
+if __name__ == "__main__":
+    test_xsmatrix_layer_chunked()
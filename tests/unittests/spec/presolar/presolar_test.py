@@ -11,6 +11,8 @@ from exojax.spec.presolar import optimal_mini_batch
 from exojax.spec.presolar import lbd_olaform
 from exojax.spec.presolar import _reshape_lbd
 from exojax.spec.presolar import shapefilter_olaform
+from exojax.spec.presolar import lbd_coeff_padded
+from exojax.spec.presolar import nu_grid_olaform
 from exojax.utils.constants import Tref_original
 
 def _example_filter(N, filter_length):
@@ -85,6 +87,34 @@ def test_lbd_olaform_simple():
     assert res2 == 0.0
 
 
+def test_lbd_coeff_padded_simple():
+    lbd = _simple_example_lbd().astype(float) + 1.0
+    lbd_coeff = np.array([lbd, lbd])
+    input_length = np.shape(lbd)[0]
+    ndiv, div_length = 3, 5
+    filter_length = 3
+    padded = lbd_coeff_padded(lbd_coeff, ndiv, div_length, filter_length)
+    assert np.shape(padded) == (2, 17, 3, 2)
+    assert np.all(padded[:, :input_length, :, :] == lbd_coeff)
+    assert np.all(padded[0, input_length:, :, :] == -np.inf)
+    assert np.all(padded[1, input_length:, :, :] == 0.0)
+    # the mini batches of hat(LBD) are the slices of the padded LBD
+    hat_lbd = lbd_olaform(lbd, ndiv, div_length, filter_length)
+    for i in range(ndiv):
+        assert np.all(padded[0, i * div_length:(i + 1) * div_length] ==
+                      hat_lbd[i, :div_length])
+
+
+def test_nu_grid_olaform_simple():
+    nu_grid = np.arange(1.0, 14.0)
+    ndiv, div_length = 3, 5
+    filter_length = 3
+    hat_nu_grid = nu_grid_olaform(nu_grid, ndiv, div_length, filter_length)
+    assert np.shape(hat_nu_grid) == (3, 7)
+    assert np.all(hat_nu_grid[:, :div_length].flatten()[:13] == nu_grid)
+    assert np.all(hat_nu_grid[:, div_length:] == nu_grid[-1])
+
+
 def test_lbd_olaform():
     lbd, filter_length = _example_lbd_and_filter()
     input_length = np.shape(lbd)[0]
@@ -0,0 +1,75 @@
+"""cross section test of PreSOLAR, compared with PreMODIT
+
+"""
+import pytest
+import numpy as np
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaPresolar
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _nu_grid():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="presolar",
+                                        wavelength_order="ascending")
+    return nu_grid
+
+
+@pytest.mark.parametrize("wavenumber_halfwidth, ndiv", [(1.0, 3),
+                                                         (1000.0, 1)])
+def test_xsection_presolar(wavenumber_halfwidth, ndiv):
+    nu_grid = _nu_grid()
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=0,
+                      manual_params=[1600.0, 1000.0, 700.0])
+    T = 1200.0
+    P = 1.0
+    ref = opa.xsvector(T, P)
+    del opa
+
+    if wavenumber_halfwidth > 100.0:
+        with pytest.warns(UserWarning):
+            opa = OpaPresolar(mdb=mdb,
+                              nu_grid=nu_grid,
+                              diffmode=0,
+                              manual_params=[1600.0, 1000.0, 700.0],
+                              wavenumber_halfwidth=wavenumber_halfwidth)
+    else:
+        opa = OpaPresolar(mdb=mdb,
+                          nu_grid=nu_grid,
+                          diffmode=0,
+                          manual_params=[1600.0, 1000.0, 700.0],
+                          wavenumber_halfwidth=wavenumber_halfwidth)
+    assert opa.method == "presolar"
+    assert opa.ndiv == ndiv
+    assert opa.lbd_coeff_padded.shape[1] == (opa.ndiv * opa.div_length +
+                                             opa.filter_length - 1)
+    xs = opa.xsvector(T, P)
+    assert np.max(np.abs(xs - ref)) / np.max(ref) < 1.e-3
+
+    xsm = opa.xsmatrix(np.array([1000.0, T]), np.array([0.1, P]))
+    assert np.max(np.abs(xsm[1] - xs)) / np.max(xs) < 1.e-12
+
+
+def test_extend_nu_grid_presolar_error():
+    nu_grid = _nu_grid()
+    opa = OpaPresolar(mdb=mock_mdb("hitemp"),
+                      nu_grid=nu_grid,
+                      diffmode=0,
+                      manual_params=[1600.0, 1000.0, 700.0],
+                      wavenumber_halfwidth=1.0)
+    with pytest.raises(ValueError):
+        opa.extend_nu_grid(nu_grid)
+
+
+if __name__ == "__main__":
+    test_xsection_presolar(1.0, 3)
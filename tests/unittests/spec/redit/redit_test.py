@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+import jax.numpy as jnp
+from jax import config
+from exojax.spec.redit import realspace_filter_length
+from exojax.spec.redit import choose_engine
+from exojax.spec.redit import calc_xsection_from_lsd_realspace
+from exojax.spec.modit_scanfft import calc_xsection_from_lsd_scanfft
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaModit
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+
+config.update("jax_enable_x64", True)
+
+
+def test_realspace_filter_length():
+    assert realspace_filter_length(1.0, 0.1, wing_accuracy=1.e-2) == 15
+    assert realspace_filter_length(1.0, 1.0, wing_accuracy=1.e-2) == 129
+
+
+def test_choose_engine():
+    assert choose_engine(31, 10**6, 2.0) == "realspace"
+    assert choose_engine(1001, 10**6, 2.0) == "fft"
+    assert choose_engine(31, 10**6, 0.5) == "fft"
+
+
+def test_calc_xsection_from_lsd_realspace():
+    Ng_nu = 4096
+    nu_grid = jnp.exp(jnp.linspace(jnp.log(4000.0), jnp.log(4010.0), Ng_nu))
+    R = 1.0 / (jnp.log(nu_grid[1]) - jnp.log(nu_grid[0]))
+    pmarray = np.ones(Ng_nu + 1)
+    pmarray[1::2] = -1.0
+    log_ngammaL_grid = jnp.log(jnp.array([0.1, 0.3, 1.0]))
+    Slsd = np.zeros((Ng_nu, 3))
+    Slsd[1000, 0] = 1.0
+    Slsd[2000, 1] = 2.0
+    Slsd[3000, 2] = 1.5
+    nsigmaD = 3.0
+    ref = calc_xsection_from_lsd_scanfft(jnp.array(Slsd), R,
+                                         jnp.array(pmarray), nsigmaD, nu_grid,
+                                         log_ngammaL_grid)
+    filter_length = realspace_filter_length(nsigmaD, 1.0, 1.e-3)
+    val = calc_xsection_from_lsd_realspace(jnp.array(Slsd), R, nsigmaD,
+                                           nu_grid, log_ngammaL_grid,
+                                           filter_length)
+    assert np.max(np.abs(val - ref)) < 1.e-4 * np.max(ref)
+
+
+def _setting():
+    nu_grid, wav, res = wavenumber_grid(22980.0,
+                                        23020.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    Tarr = np.array([800.0, 1200.0])
+    Parr = np.array([1.e-3, 1.e-2])
+    return nu_grid, Tarr, Parr
+
+
+@pytest.mark.parametrize("engine,wing_accuracy", [("realspace", 1.e-3),
+                                                  ("auto", 1.e-2)])
+def test_opapremodit_realspace(engine, wing_accuracy):
+    nu_grid, Tarr, Parr = _setting()
+    mdb = mock_mdb("hitemp")
+    opa = OpaPremodit(mdb=mdb,
+                      nu_grid=nu_grid,
+                      diffmode=0,
+                      manual_params=[160.0, 1000.0, 700.0])
+    ref = opa.xsmatrix(Tarr, Parr)
+    opa.engine = engine
+    opa.realspace_wing_accuracy = wing_accuracy
+    assert opa.xsmatrix_engine(Tarr, Parr)[0] == "realspace"
+    xsm = opa.xsmatrix(Tarr, Parr)
+    assert np.max(np.abs(xsm - ref)) < 10.0 * wing_accuracy * np.max(ref)
+    # xsvector uses the same engine as xsmatrix
+    xsv = opa.xsvector(Tarr[1], Parr[1])
+    assert np.allclose(xsv, xsm[1], rtol=1.e-10, atol=0.0)
+
+
+def test_opamodit_realspace():
+    nu_grid, Tarr, Parr = _setting()
+    mdb = mock_mdb("hitemp")
+    opa = OpaModit(mdb=mdb, nu_grid=nu_grid, Tarr_list=Tarr, Parr=Parr)
+    ref = opa.xsmatrix(Tarr, Parr)
+    xsv_ref = opa.xsvector(Tarr[1], Parr[1])
+    opa.engine = "realspace"
+    xsm = opa.xsmatrix(Tarr, Parr)
+    assert np.max(np.abs(xsm - ref)) < 1.e-3 * np.max(ref)
+    # xsvector uses the real space engine too
+    xsv = opa.xsvector(Tarr[1], Parr[1])
+    assert not np.array_equal(xsv, xsv_ref)
+    assert np.max(np.abs(xsv - xsv_ref)) < 1.e-3 * np.max(xsv_ref)
+
+
+if __name__ == "__main__":
+    test_opapremodit_realspace("auto", 1.e-2)
+    test_opamodit_realspace()
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+import jax.numpy as jnp
+from jax import grad
+from exojax.spec.opacalc import OpaPremodit
+from exojax.spec.opacalc import OpaTable
+from exojax.spec.xstable import build_xs_table
+from exojax.spec.xstable import save_xs_table
+from exojax.spec.xstable import load_xs_table
+from exojax.test.emulate_mdb import mock_mdb
+from exojax.utils.grids import wavenumber_grid
+from jax import config
+
+config.update("jax_enable_x64", True)
+
+
+def _opa():
+    nu_grid, wav, res = wavenumber_grid(22920.0,
+                                        23100.0,
+                                        3000,
+                                        unit="AA",
+                                        xsmode="premodit",
+                                        wavelength_order="ascending")
+    mdb = mock_mdb("hitemp")
+    return OpaPremodit(mdb=mdb,
+                       nu_grid=nu_grid,
+                       diffmode=0,
+                       manual_params=[160.0, 1000.0, 700.0])
+
+
+def test_xs_table(tmp_path):
+    opa = _opa()
+    T_grid = np.array([800.0, 1000.0, 1200.0])
+    P_grid = np.array([0.01, 0.1, 1.0])
+    xs_table = build_xs_table(opa, T_grid, P_grid)
+    assert np.shape(xs_table) == (3, 3, len(opa.nu_grid))
+
+    filename = str(tmp_path / "xstable.npz")
+    save_xs_table(filename, opa.nu_grid, T_grid, P_grid, xs_table,
+                  method=opa.method)
+    nu_grid, T_grid_load, P_grid_load, xs_table_load, method = load_xs_table(
+        filename)
+    assert np.all(xs_table_load == xs_table)
+    assert method == "premodit"
+
+    opat = OpaTable(filename)
+    # on the grid points
+    xsm = opat.xsmatrix(np.array([800.0, 1200.0]), np.array([0.1, 1.0]))
+    assert np.allclose(xsm[0], xs_table[0, 1, :])
+    assert np.allclose(xsm[1], xs_table[2, 2, :])
+    # bilinear in (T, log10 P)
+    xsv = opat.xsvector(900.0, 10**(-1.5))
+    ref = 0.25 * (xs_table[0, 0, :] + xs_table[1, 0, :] + xs_table[0, 1, :] +
+                  xs_table[1, 1, :])
+    assert np.allclose(xsv, ref)
+    # differentiable
+    dxs = grad(lambda T: jnp.sum(opat.xsvector(T, 0.3)))(1100.0)
+    assert np.isfinite(dxs)
+
+
+def test_xs_table_grid_order():
+    opa = _opa()
+    with pytest.raises(ValueError):
+        build_xs_table(opa, np.array([1000.0, 800.0]), np.array([0.1, 1.0]))
+
+
+if __name__ == "__main__":
+    test_xs_table_grid_order()
@@ -0,0 +1,20 @@
+import pytest
+import jax.numpy as jnp
+import numpy as np
+from exojax.utils.chunkmap import layer_chunked_map
+
+
+@pytest.mark.parametrize("nlayer_chunk", [1, 3, 7, 10])
+def test_layer_chunked_map(nlayer_chunk):
+    nlayer = 7
+    x = jnp.arange(nlayer * 4.0).reshape((nlayer, 4))
+    y = jnp.linspace(1.0, 2.0, nlayer)
+    func = lambda x, y: x * y[:, None] + jnp.sum(x, axis=1)[:, None]
+    ref = func(x, y)
+    val = layer_chunked_map(func, nlayer_chunk, x, y)
+    assert np.shape(val) == np.shape(ref)
+    assert np.allclose(val, ref)
+
+
+if __name__ == "__main__":
+    test_layer_chunked_map(3)
@@ -1,6 +1,7 @@
 import pytest
 from exojax.utils.memuse import premodit_devmemory_use
 from exojax.utils.memuse import device_memory_use
+from exojax.utils.memuse import premodit_nlayer_chunk
 from exojax.test.emulate_mdb import mock_mdb
 from exojax.spec.opacalc import OpaPremodit
 from exojax.test.emulate_mdb import mock_wavenumber_grid
@@ -23,6 +24,26 @@ def test_memuse_premodit():
     assert mem == 44800000000
 
 
+def test_premodit_nlayer_chunk():
+    ngrid_nu_grid = 70000
+    ngrid_broadpar = 10
+    ngrid_elower = 10
+    nlayer = 200
+    memuse_layer = ngrid_nu_grid * ngrid_broadpar * 4 * 8
+    memuse_lbd = ngrid_nu_grid * ngrid_broadpar * ngrid_elower * 2 * 8
+    nlayer_chunk = premodit_nlayer_chunk(ngrid_nu_grid, ngrid_broadpar,
+                                         ngrid_elower, nlayer,
+                                         memuse_lbd + 30.5 * memuse_layer)
+    assert nlayer_chunk == 30
+    nlayer_chunk = premodit_nlayer_chunk(ngrid_nu_grid, ngrid_broadpar,
+                                         ngrid_elower, nlayer, 1.e15)
+    assert nlayer_chunk == nlayer
+    with pytest.warns(UserWarning):
+        nlayer_chunk = premodit_nlayer_chunk(ngrid_nu_grid, ngrid_broadpar,
+                                             ngrid_elower, nlayer, 1.0)
+    assert nlayer_chunk == 1
+
+
 def test_device_memory_use_premodit_art_opa():
     config.update("jax_enable_x64", True)
     db = "exomol"
@@ -58,4 +79,5 @@ def test_device_memory_use_premodit_art_opa():
 
 if __name__ == "__main__":
     test_memuse_premodit()
+    test_premodit_nlayer_chunk()
     test_device_memory_use_premodit_art_opa()
\ No newline at end of file